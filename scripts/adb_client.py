@@ -0,0 +1,332 @@
+"""
+adb server socket 協定的最小用戶端（預設 127.0.0.1:5037，可用 ANDROID_ADB_SERVER_PORT 覆寫）：
+- 請求格式：4 位十六進位長度 + 內容；回應 OKAY，或 FAIL + 4 位長度 + 錯誤訊息
+- track_devices：訂閱 host:track-devices，裝置清單有變化時伺服器主動推送，不需輪詢
+- ensure_server：連不上時才啟動一次 adb start-server；kill_server：host:kill
+- AdbClient：host:devices-l、host:transport、shell:、sync:（STAT/RECV/SEND）
+  host:* 與 shell: 依協定是一次性連線；sync: 連線可重複使用，依裝置保留在連線池中
+
+用法：
+  client = AdbClient()
+  for serial in client.ready_serials():
+      print(client.shell(serial, "getprop ro.build.version.sdk"))
+      client.pull(serial, "/sdcard/Download/a.txt", "a.txt")
+  client.close()
+"""
+
+import os
+import select
+import shutil
+import socket
+import stat as stat_mod
+import struct
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+ADB_HOST = os.environ.get("ANDROID_ADB_SERVER_ADDRESS", "127.0.0.1")
+ADB_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", "5037"))
+PLATFORM_TOOLS_ADB = Path(r"C:\platform-tools\adb.exe")
+CONNECT_TIMEOUT = 2.0
+SYNC_DATA_MAX = 64 * 1024
+DEFAULT_POOL_SIZE = 4
+
+
+class AdbError(Exception):
+    pass
+
+
+def find_adb():
+    found = shutil.which("adb")
+    if found:
+        return found
+    if PLATFORM_TOOLS_ADB.exists():
+        return str(PLATFORM_TOOLS_ADB)
+    return None
+
+
+def _recv_exact(sock, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise AdbError("connection closed by adb server")
+        buf += chunk
+    return bytes(buf)
+
+
+def _read_hex_block(sock) -> bytes:
+    length = int(_recv_exact(sock, 4), 16)
+    return _recv_exact(sock, length) if length else b""
+
+
+def _send_request(sock, payload: str):
+    data = payload.encode("utf-8")
+    sock.sendall(b"%04x" % len(data) + data)
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        raise AdbError(_read_hex_block(sock).decode("utf-8", errors="replace"))
+    raise AdbError(f"unexpected adb status {status!r}")
+
+
+def connect(host: str = ADB_HOST, port: int = ADB_PORT, timeout: float | None = CONNECT_TIMEOUT):
+    sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT)
+    sock.settimeout(timeout)
+    return sock
+
+
+def ensure_server(host: str = ADB_HOST, port: int = ADB_PORT) -> bool:
+    """adb server 可連線則回傳 True；否則嘗試啟動一次。"""
+    try:
+        connect(host, port).close()
+        return True
+    except OSError:
+        pass
+    adb = find_adb()
+    if not adb:
+        return False
+    try:
+        env = dict(os.environ, ANDROID_ADB_SERVER_PORT=str(port))
+        subprocess.run([adb, "start-server"], capture_output=True, timeout=30, env=env)
+        connect(host, port).close()
+        return True
+    except Exception:
+        return False
+
+
+def kill_server(host: str = ADB_HOST, port: int = ADB_PORT) -> bool:
+    """host:kill：停止執行中的 adb server（例如要取代 adb.exe 所在目錄前）；沒有 server 時回傳 False。"""
+    try:
+        with connect(host, port) as sock:
+            _send_request(sock, "host:kill")
+        return True
+    except (OSError, AdbError):
+        return False
+
+
+def parse_devices(text: str) -> list:
+    """'serial\\tstate\\n...' -> [(serial, state), ...]"""
+    devices = []
+    for line in text.splitlines():
+        parts = line.strip().split("\t")
+        if len(parts) >= 2:
+            devices.append((parts[0], parts[1]))
+    return devices
+
+
+def host_query(request: str, host: str = ADB_HOST, port: int = ADB_PORT) -> str:
+    with connect(host, port) as sock:
+        _send_request(sock, request)
+        return _read_hex_block(sock).decode("utf-8", errors="replace")
+
+
+def devices(host: str = ADB_HOST, port: int = ADB_PORT) -> list:
+    return parse_devices(host_query("host:devices", host, port))
+
+
+def track_devices(host: str = ADB_HOST, port: int = ADB_PORT, stop=None):
+    """產生器：連線後立即送出一次目前清單，之後每次變化送出一次 [(serial, state), ...]。
+
+    stop：可選的 threading.Event；設定後最多 0.5 秒內結束。
+    """
+    with connect(host, port) as sock:
+        _send_request(sock, "host:track-devices")
+        sock.settimeout(None)
+        while stop is None or not stop.is_set():
+            # 以 select 等待可讀，避免在區塊讀到一半時逾時而失去同步
+            if stop is not None and not select.select([sock], [], [], 0.5)[0]:
+                continue
+            yield parse_devices(_read_hex_block(sock).decode("utf-8", errors="replace"))
+
+
+def parse_devices_long(text: str) -> list:
+    """host:devices-l -> [{"serial", "state", "product", "model", "device", "transport_id", ...}, ...]"""
+    result = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        info = {"serial": parts[0], "state": parts[1]}
+        for item in parts[2:]:
+            if ":" in item:
+                k, v = item.split(":", 1)
+                info[k] = v
+        result.append(info)
+    return result
+
+
+class SyncConnection:
+    """已進入 sync: 模式的連線；可連續執行多個 STAT/RECV/SEND，直到 QUIT。"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def _send(self, cmd: bytes, payload: bytes = b""):
+        self.sock.sendall(cmd + struct.pack("<I", len(payload)) + payload)
+
+    def _recv_header(self):
+        raw = _recv_exact(self.sock, 8)
+        return raw[:4], struct.unpack("<I", raw[4:])[0]
+
+    def _fail(self, length: int):
+        raise AdbError(_recv_exact(self.sock, length).decode("utf-8", errors="replace"))
+
+    def stat(self, remote: str):
+        """回傳 (mode, size, mtime)；檔案不存在時 mode 為 0。"""
+        self._send(b"STAT", remote.encode("utf-8"))
+        raw = _recv_exact(self.sock, 16)
+        if raw[:4] != b"STAT":
+            raise AdbError(f"unexpected sync reply {raw[:4]!r}")
+        return struct.unpack("<III", raw[4:])
+
+    def pull(self, remote: str, out) -> int:
+        """把遠端檔案寫入 out（二進位檔案物件），回傳位元組數。"""
+        self._send(b"RECV", remote.encode("utf-8"))
+        total = 0
+        while True:
+            cmd, length = self._recv_header()
+            if cmd == b"DATA":
+                out.write(_recv_exact(self.sock, length))
+                total += length
+            elif cmd == b"DONE":
+                return total
+            elif cmd == b"FAIL":
+                self._fail(length)
+            else:
+                raise AdbError(f"unexpected sync reply {cmd!r}")
+
+    def push(self, src, remote: str, mode: int = 0o644, mtime: int | None = None) -> int:
+        """src 為二進位檔案物件；回傳位元組數。"""
+        self._send(b"SEND", f"{remote},{stat_mod.S_IFREG | mode}".encode("utf-8"))
+        total = 0
+        while True:
+            chunk = src.read(SYNC_DATA_MAX)
+            if not chunk:
+                break
+            self._send(b"DATA", chunk)
+            total += len(chunk)
+        self.sock.sendall(b"DONE" + struct.pack("<I", int(mtime if mtime is not None else time.time())))
+        cmd, length = self._recv_header()
+        if cmd == b"FAIL":
+            self._fail(length)
+        if cmd != b"OKAY":
+            raise AdbError(f"unexpected sync reply {cmd!r}")
+        return total
+
+    def quit(self):
+        try:
+            self._send(b"QUIT")
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class AdbClient:
+    def __init__(self, host: str = ADB_HOST, port: int = ADB_PORT, pool_size: int = DEFAULT_POOL_SIZE):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self._sync_pool = {}
+        self._lock = threading.Lock()
+
+    # -- host ----------------------------------------------------------------
+
+    def ensure_server(self) -> bool:
+        return ensure_server(self.host, self.port)
+
+    def kill_server(self) -> bool:
+        return kill_server(self.host, self.port)
+
+    def version(self) -> int:
+        return int(host_query("host:version", self.host, self.port), 16)
+
+    def devices(self, long: bool = False) -> list:
+        if long:
+            return parse_devices_long(host_query("host:devices-l", self.host, self.port))
+        return [{"serial": s, "state": st} for s, st in devices(self.host, self.port)]
+
+    def ready_serials(self) -> list:
+        return [d["serial"] for d in self.devices() if d["state"] == "device"]
+
+    # -- transport -----------------------------------------------------------
+
+    def open_service(self, serial: str | None, service: str, timeout: float | None = None):
+        """連到 serial（None = 唯一一台）並開啟 service；回傳已就緒的 socket。"""
+        sock = connect(self.host, self.port)
+        try:
+            _send_request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+            _send_request(sock, service)
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(timeout)
+        return sock
+
+    def shell(self, serial: str | None, command: str, timeout: float | None = 60) -> str:
+        with self.open_service(serial, f"shell:{command}", timeout) as sock:
+            chunks = []
+            while True:
+                chunk = sock.recv(SYNC_DATA_MAX)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+    def shell_stream(self, serial: str | None, command: str):
+        """長時間執行的指令（例如 logcat）：回傳可逐行讀取的二進位檔案物件，呼叫端負責 close。"""
+        sock = self.open_service(serial, f"shell:{command}")
+        return sock.makefile("rb")
+
+    # -- sync（連線池） --------------------------------------------------------
+
+    @contextmanager
+    def sync(self, serial: str | None):
+        key = serial or ""
+        with self._lock:
+            idle = self._sync_pool.setdefault(key, [])
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = SyncConnection(self.open_service(serial, "sync:", timeout=60))
+        try:
+            yield conn
+        except Exception:
+            # 發生錯誤時連線狀態不明，不放回池中
+            conn.quit()
+            raise
+        with self._lock:
+            idle = self._sync_pool.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                conn = None
+        if conn is not None:
+            conn.quit()
+
+    def stat(self, serial: str | None, remote: str):
+        with self.sync(serial) as conn:
+            return conn.stat(remote)
+
+    def pull(self, serial: str | None, remote: str, local) -> int:
+        with self.sync(serial) as conn, open(local, "wb") as f:
+            return conn.pull(remote, f)
+
+    def push(self, serial: str | None, local, remote: str, mode: int = 0o644) -> int:
+        with self.sync(serial) as conn, open(local, "rb") as f:
+            return conn.push(f, remote, mode, int(os.path.getmtime(local)))
+
+    def close(self):
+        with self._lock:
+            pools = list(self._sync_pool.values())
+            self._sync_pool = {}
+        for idle in pools:
+            for conn in idle:
+                conn.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
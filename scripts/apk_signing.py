@@ -0,0 +1,687 @@
+"""
+純 Python 簽章憑證指紋讀取（取代 keytool 子行程）：
+- v1：META-INF/*.RSA|*.DSA|*.EC 的 PKCS#7 SignedData（AAB 與舊式 APK）
+- v2/v3：ZIP 中央目錄前的 APK Signing Block
+- keystore：JKS/JCEKS 的憑證不加密，免密碼直接讀；PKCS12 若已安裝 cryptography 則交給它，
+  否則先以 PKCS#12 KDF + HMAC 驗證 MAC（密碼錯誤一定失敗，不靠 padding 碰運氣），再以 PBES2（PBKDF2 + AES-CBC）
+  解密憑證袋；其他加密演算法回傳 None，由呼叫端退回 keytool
+- 指定 alias 時只回傳該 alias 的憑證；alias 不存在時回傳 None（同 keytool 的 "Alias <x> does not exist"）
+- verify_directory：以 process pool 一次檢查整個資料夾的 .aab/.apk
+
+注意：這裡只取出憑證並計算 SHA-256/SHA-1/MD5 摘要做比對，不做簽章的密碼學驗證（那是 apksigner 的工作）。
+指紋格式與 keytool 相同（大寫、冒號分隔），可直接和既有輸出比較。
+
+用法：
+  python scripts/apk_signing.py app-prod.apks-or.aab-or-dir [--keystore ks --alias upload --storepass ****]
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import struct
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ARCHIVE_SUFFIXES = (".aab", ".apk")
+V1_BLOCK_SUFFIXES = (".RSA", ".DSA", ".EC")
+APK_SIG_BLOCK_MAGIC = b"APK Sig Block 42"
+APK_SIGNATURE_SCHEME_V2_ID = 0x7109871A
+APK_SIGNATURE_SCHEME_V3_ID = 0xF05368C0
+APK_SIGNATURE_SCHEME_V31_ID = 0x1B93AD61
+
+OID_SIGNED_DATA = "1.2.840.113549.1.7.2"
+OID_DATA = "1.2.840.113549.1.7.1"
+OID_ENCRYPTED_DATA = "1.2.840.113549.1.7.6"
+OID_CERT_BAG = "1.2.840.113549.1.12.10.1.3"
+OID_FRIENDLY_NAME = "1.2.840.113549.1.9.20"
+OID_PBES2 = "1.2.840.113549.1.5.13"
+OID_PBKDF2 = "1.2.840.113549.1.5.12"
+PBKDF2_PRF = {
+    "1.2.840.113549.2.7": "sha1",
+    "1.2.840.113549.2.9": "sha256",
+    "1.2.840.113549.2.10": "sha384",
+    "1.2.840.113549.2.11": "sha512",
+}
+DIGEST_OIDS = {
+    "1.3.14.3.2.26": "sha1",
+    "2.16.840.1.101.3.4.2.4": "sha224",
+    "2.16.840.1.101.3.4.2.1": "sha256",
+    "2.16.840.1.101.3.4.2.2": "sha384",
+    "2.16.840.1.101.3.4.2.3": "sha512",
+}
+AES_CBC_KEY_SIZES = {
+    "2.16.840.1.101.3.4.1.2": 16,
+    "2.16.840.1.101.3.4.1.22": 24,
+    "2.16.840.1.101.3.4.1.42": 32,
+}
+NAME_ATTRS = {
+    "2.5.4.3": "CN",
+    "2.5.4.6": "C",
+    "2.5.4.7": "L",
+    "2.5.4.8": "ST",
+    "2.5.4.10": "O",
+    "2.5.4.11": "OU",
+}
+
+
+# ---------------------------------------------------------------------------
+# DER/BER
+# ---------------------------------------------------------------------------
+
+def _tlv(data, pos):
+    """讀一個 TLV；回傳 (tag, 內容起點, 內容終點, 下一個 TLV 起點)。支援 BER 不定長度。"""
+    tag = data[pos]
+    pos += 1
+    if tag & 0x1F == 0x1F:
+        while data[pos] & 0x80:
+            pos += 1
+        pos += 1
+    first = data[pos]
+    pos += 1
+    if first < 0x80:
+        end = pos + first
+        return tag, pos, end, end
+    if first == 0x80:
+        p = pos
+        while data[p:p + 2] != b"\x00\x00":
+            p = _tlv(data, p)[3]
+        return tag, pos, p, p + 2
+    n = first & 0x7F
+    length = int.from_bytes(data[pos:pos + n], "big")
+    pos += n
+    end = pos + length
+    if end > len(data):
+        raise ValueError("DER length exceeds buffer")
+    return tag, pos, end, end
+
+
+def _children(data, start, end):
+    pos = start
+    while pos < end:
+        item = _tlv(data, pos)
+        yield item
+        pos = item[3]
+
+
+def _oid(data, start, end) -> str:
+    raw = data[start:end]
+    parts = []
+    value = 0
+    for b in raw:
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            parts.append(value)
+            value = 0
+    if not parts:
+        return ""
+    first = parts[0]
+    head = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+    return ".".join(str(x) for x in head + parts[1:])
+
+
+def _octets(data, tag, start, end) -> bytes:
+    """OCTET STRING 內容；constructed（BER 分段）時串接各段。"""
+    if tag & 0x20:
+        return b"".join(_octets(data, t, s, e) for t, s, e, _ in _children(data, start, end))
+    return bytes(data[start:end])
+
+
+def _name_to_str(data, start, end) -> str:
+    parts = []
+    for _, rs, re_, _ in _children(data, start, end):
+        for _, as_, ae, _ in _children(data, rs, re_):
+            items = list(_children(data, as_, ae))
+            if len(items) < 2:
+                continue
+            oid = _oid(data, items[0][1], items[0][2])
+            vtag, vs, ve, _ = items[1]
+            raw = bytes(data[vs:ve])
+            value = raw.decode("utf-16-be", errors="replace") if vtag == 0x1E else raw.decode("utf-8", errors="replace")
+            parts.append(f"{NAME_ATTRS.get(oid, oid)}={value}")
+    return ", ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# 憑證
+# ---------------------------------------------------------------------------
+
+def format_digest(raw: bytes) -> str:
+    return ":".join(f"{b:02X}" for b in raw)
+
+
+def signature_hash_code(der: bytes) -> str:
+    """android.content.pm.Signature.hashCode()（Arrays.hashCode 的十六進位），即 dumpsys package 的 signatures:[...]。"""
+    h = 1
+    for b in der:
+        h = (31 * h + (b - 256 if b > 127 else b)) & 0xFFFFFFFF
+    return f"{h:x}"
+
+
+def cert_info(der: bytes) -> dict:
+    """X.509 DER -> {subject, issuer, serial, sha256, sha1, md5, hash_code}。"""
+    info = {
+        "sha256": format_digest(hashlib.sha256(der).digest()),
+        "sha1": format_digest(hashlib.sha1(der).digest()),
+        "md5": format_digest(hashlib.md5(der).digest()),
+        "hash_code": signature_hash_code(der),
+        "subject": None,
+        "issuer": None,
+        "serial": None,
+    }
+    try:
+        _, cs, ce, _ = _tlv(der, 0)
+        _, ts, te, _ = next(_children(der, cs, ce))
+        fields = list(_children(der, ts, te))
+        if fields and fields[0][0] == 0xA0:
+            fields = fields[1:]
+        # serial, signature, issuer, validity, subject
+        info["serial"] = der[fields[0][1]:fields[0][2]].hex()
+        info["issuer"] = _name_to_str(der, fields[2][1], fields[2][2])
+        info["subject"] = _name_to_str(der, fields[4][1], fields[4][2])
+    except Exception:
+        pass
+    return info
+
+
+def certs_from_pkcs7(data: bytes) -> list:
+    """PKCS#7 ContentInfo(SignedData) -> 憑證 DER 清單。"""
+    _, cs, ce, _ = _tlv(data, 0)
+    items = list(_children(data, cs, ce))
+    if len(items) < 2 or _oid(data, items[0][1], items[0][2]) != OID_SIGNED_DATA:
+        raise ValueError("not a PKCS#7 SignedData block")
+    _, ss, se, _ = _tlv(data, items[1][1])
+    certs = []
+    for tag, s, e, _ in _children(data, ss, se):
+        if tag != 0xA0:
+            continue
+        pos = s
+        while pos < e:
+            ctag, _, _, cnext = _tlv(data, pos)
+            if ctag == 0x30:
+                certs.append(bytes(data[pos:cnext]))
+            pos = cnext
+    return certs
+
+
+# ---------------------------------------------------------------------------
+# 封存檔（AAB/APK）
+# ---------------------------------------------------------------------------
+
+def read_v1_certs(zf: zipfile.ZipFile) -> list:
+    certs = []
+    for name in zf.namelist():
+        upper = name.upper()
+        if upper.startswith("META-INF/") and upper.endswith(V1_BLOCK_SUFFIXES):
+            certs.extend(cert_info(der) for der in certs_from_pkcs7(zf.read(name)))
+    return certs
+
+
+def _central_directory_offset(f) -> int:
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    tail_len = min(size, 0xFFFF + 22)
+    f.seek(size - tail_len)
+    tail = f.read(tail_len)
+    idx = tail.rfind(b"PK\x05\x06")
+    if idx < 0:
+        raise ValueError("end of central directory not found")
+    cd_offset = struct.unpack_from("<I", tail, idx + 16)[0]
+    if cd_offset == 0xFFFFFFFF and idx >= 20 and tail[idx - 20:idx - 16] == b"PK\x06\x07":
+        eocd64 = struct.unpack_from("<Q", tail, idx - 20 + 8)[0]
+        f.seek(eocd64 + 48)
+        cd_offset = struct.unpack("<Q", f.read(8))[0]
+    return cd_offset
+
+
+def _length_prefixed(buf, pos):
+    (n,) = struct.unpack_from("<I", buf, pos)
+    start = pos + 4
+    if start + n > len(buf):
+        raise ValueError("length-prefixed field exceeds buffer")
+    return buf[start:start + n], start + n
+
+
+def _iter_length_prefixed(buf):
+    pos = 0
+    while pos < len(buf):
+        item, pos = _length_prefixed(buf, pos)
+        yield item
+
+
+def _scheme_certs(value: bytes) -> list:
+    """v2/v3 的 signers -> 各 signer signed-data 裡的憑證（signed data 的第二個欄位）。"""
+    certs = []
+    signers, _ = _length_prefixed(value, 0)
+    for signer in _iter_length_prefixed(signers):
+        signed_data, _ = _length_prefixed(signer, 0)
+        _digests, pos = _length_prefixed(signed_data, 0)
+        cert_seq, _ = _length_prefixed(signed_data, pos)
+        certs.extend(cert_info(bytes(der)) for der in _iter_length_prefixed(cert_seq))
+    return certs
+
+
+def read_signing_block(f) -> dict:
+    """回傳 {"v2": [...], "v3": [...]}；沒有 APK Signing Block 時為空 dict。"""
+    cd_offset = _central_directory_offset(f)
+    if cd_offset < 24:
+        return {}
+    f.seek(cd_offset - 24)
+    footer = f.read(24)
+    if footer[8:] != APK_SIG_BLOCK_MAGIC:
+        return {}
+    (block_size,) = struct.unpack_from("<Q", footer, 0)
+    f.seek(cd_offset - block_size - 8)
+    block = f.read(block_size + 8)
+    pairs = memoryview(block)[8:-24]
+    result = {}
+    pos = 0
+    while pos + 12 <= len(pairs):
+        (length,) = struct.unpack_from("<Q", pairs, pos)
+        (pair_id,) = struct.unpack_from("<I", pairs, pos + 8)
+        value = bytes(pairs[pos + 12:pos + 8 + length])
+        if pair_id == APK_SIGNATURE_SCHEME_V2_ID:
+            result["v2"] = _scheme_certs(value)
+        elif pair_id in (APK_SIGNATURE_SCHEME_V3_ID, APK_SIGNATURE_SCHEME_V31_ID):
+            result.setdefault("v3", []).extend(_scheme_certs(value))
+        pos += 8 + length
+    return result
+
+
+def read_archive_signers(source) -> dict:
+    """source：路徑或可 seek 的二進位串流。回傳 {"v1": [...], "v2": [...], "v3": [...]}（僅含存在的方案）。"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return read_archive_signers(f)
+    signers = read_signing_block(source)
+    source.seek(0)
+    with zipfile.ZipFile(source) as zf:
+        v1 = read_v1_certs(zf)
+    if v1:
+        signers["v1"] = v1
+    return signers
+
+
+def primary_cert(signers: dict):
+    """比對用的主要憑證：v3 > v2 > v1（與 Android 安裝時採用的方案一致）。"""
+    for scheme in ("v3", "v2", "v1"):
+        if signers.get(scheme):
+            return signers[scheme][0]
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Keystore
+# ---------------------------------------------------------------------------
+
+def _java_utf(buf, pos):
+    (n,) = struct.unpack_from(">H", buf, pos)
+    return buf[pos + 2:pos + 2 + n].decode("utf-8", errors="replace"), pos + 2 + n
+
+
+def _read_jks(buf: bytes) -> list:
+    """JKS/JCEKS：回傳 [(alias, cert_der), ...]；私鑰項目取憑證鏈第一張。"""
+    (magic, _version, count) = struct.unpack_from(">III", buf, 0)
+    pos = 12
+    entries = []
+    for _ in range(count):
+        (tag,) = struct.unpack_from(">I", buf, pos)
+        alias, pos = _java_utf(buf, pos + 4)
+        pos += 8  # timestamp
+        if tag == 1:
+            (key_len,) = struct.unpack_from(">I", buf, pos)
+            pos += 4 + key_len
+            (chain_len,) = struct.unpack_from(">I", buf, pos)
+            pos += 4
+            for i in range(chain_len):
+                _cert_type, pos = _java_utf(buf, pos)
+                (cert_len,) = struct.unpack_from(">I", buf, pos)
+                der = buf[pos + 4:pos + 4 + cert_len]
+                pos += 4 + cert_len
+                if i == 0:
+                    entries.append((alias, der))
+        elif tag == 2:
+            _cert_type, pos = _java_utf(buf, pos)
+            (cert_len,) = struct.unpack_from(">I", buf, pos)
+            entries.append((alias, buf[pos + 4:pos + 4 + cert_len]))
+            pos += 4 + cert_len
+        else:
+            # JCEKS secret key 是序列化 Java 物件，無法安全略過；停在這裡
+            break
+    return entries
+
+
+def _pbes2_decrypt(params_data, params_start, params_end, ciphertext: bytes, password: str) -> bytes:
+    kdf, enc = list(_children(params_data, params_start, params_end))[:2]
+    kdf_items = list(_children(params_data, kdf[1], kdf[2]))
+    if _oid(params_data, kdf_items[0][1], kdf_items[0][2]) != OID_PBKDF2:
+        raise ValueError("unsupported key derivation")
+    kdf_params = list(_children(params_data, kdf_items[1][1], kdf_items[1][2]))
+    salt = bytes(params_data[kdf_params[0][1]:kdf_params[0][2]])
+    iterations = int.from_bytes(params_data[kdf_params[1][1]:kdf_params[1][2]], "big")
+    prf = "sha1"
+    for tag, s, e, _ in kdf_params[2:]:
+        if tag == 0x30:
+            prf = PBKDF2_PRF.get(_oid(params_data, *next(_children(params_data, s, e))[1:3]), prf)
+    enc_items = list(_children(params_data, enc[1], enc[2]))
+    key_size = AES_CBC_KEY_SIZES.get(_oid(params_data, enc_items[0][1], enc_items[0][2]))
+    if not key_size:
+        raise ValueError("unsupported cipher")
+    iv = bytes(params_data[enc_items[1][1]:enc_items[1][2]])
+    key = hashlib.pbkdf2_hmac(prf, password.encode("utf-8"), salt, iterations, key_size)
+    plain = _aes_cbc_decrypt(key, iv, ciphertext)
+    pad = plain[-1] if plain else 0
+    if not 1 <= pad <= 16 or plain[-pad:] != bytes([pad]) * pad:
+        raise ValueError("bad padding (wrong password?)")
+    return plain[:-pad]
+
+
+def _pkcs12_safe_bags(safe_contents: bytes, out: list):
+    _, s, e, _ = _tlv(safe_contents, 0)
+    for _, bs, be, _ in _children(safe_contents, s, e):
+        items = list(_children(safe_contents, bs, be))
+        if _oid(safe_contents, items[0][1], items[0][2]) != OID_CERT_BAG:
+            continue
+        alias = None
+        for tag, as_, ae, _ in items[2:]:
+            if tag != 0x31:
+                continue
+            for _, at_s, at_e, _ in _children(safe_contents, as_, ae):
+                attr = list(_children(safe_contents, at_s, at_e))
+                if _oid(safe_contents, attr[0][1], attr[0][2]) == OID_FRIENDLY_NAME:
+                    _, vs, ve, _ = next(_children(safe_contents, attr[1][1], attr[1][2]))
+                    alias = bytes(safe_contents[vs:ve]).decode("utf-16-be", errors="replace")
+        _, cb_s, cb_e, _ = _tlv(safe_contents, items[1][1])
+        cert_bag = list(_children(safe_contents, cb_s, cb_e))
+        inner_tag, is_, ie, _ = _tlv(safe_contents, cert_bag[1][1])
+        out.append((alias, _octets(safe_contents, inner_tag, is_, ie)))
+
+
+def _pkcs12_kdf(hash_name: str, password: bytes, salt: bytes, id_byte: int, iterations: int, n: int) -> bytes:
+    """RFC 7292 附錄 B.2 的金鑰衍生（MAC 金鑰用 id_byte=3）；password 為含結尾 00 00 的 BMPString。"""
+    u = hashlib.new(hash_name).digest_size
+    v = hashlib.new(hash_name).block_size
+
+    def fill(data: bytes) -> bytes:
+        # 重複 data 直到長度為 v 的倍數（至少 len(data)）
+        if not data:
+            return b""
+        length = v * -(-len(data) // v)
+        return (data * (length // len(data) + 1))[:length]
+
+    i_buf = bytearray(fill(salt) + fill(password))
+    d = bytes([id_byte]) * v
+    out = b""
+    while len(out) < n:
+        a = hashlib.new(hash_name, d + bytes(i_buf)).digest()
+        for _ in range(iterations - 1):
+            a = hashlib.new(hash_name, a).digest()
+        out += a
+        b = int.from_bytes((a * (v // u + 1))[:v], "big") + 1
+        for j in range(0, len(i_buf), v):
+            block = (int.from_bytes(i_buf[j:j + v], "big") + b) & ((1 << (8 * v)) - 1)
+            i_buf[j:j + v] = block.to_bytes(v, "big")
+    return out[:n]
+
+
+def _pkcs12_verify_mac(buf: bytes, mac_data, auth_safe: bytes, password: str):
+    """MacData ::= SEQUENCE { DigestInfo, macSalt, iterations DEFAULT 1 }；不符時拋出 ValueError。"""
+    items = list(_children(buf, mac_data[1], mac_data[2]))
+    digest_info = list(_children(buf, items[0][1], items[0][2]))
+    alg = list(_children(buf, digest_info[0][1], digest_info[0][2]))
+    hash_name = DIGEST_OIDS.get(_oid(buf, alg[0][1], alg[0][2]))
+    if not hash_name:
+        raise ValueError("unsupported PKCS12 MAC algorithm")
+    expected = bytes(buf[digest_info[1][1]:digest_info[1][2]])
+    salt = bytes(buf[items[1][1]:items[1][2]])
+    iterations = int.from_bytes(buf[items[2][1]:items[2][2]], "big") if len(items) > 2 else 1
+    # 空密碼在不同實作下可能是 00 00 或空字串，兩種都試
+    candidates = [(password + "\0").encode("utf-16-be")] + ([b""] if not password else [])
+    size = hashlib.new(hash_name).digest_size
+    for pw in candidates:
+        key = _pkcs12_kdf(hash_name, pw, salt, 3, iterations, size)
+        if hmac.compare_digest(hmac.new(key, auth_safe, hash_name).digest(), expected):
+            return
+    raise ValueError("PKCS12 MAC mismatch (wrong password?)")
+
+
+def _read_pkcs12(buf: bytes, password: str) -> list:
+    _, s, e, _ = _tlv(buf, 0)
+    pfx = list(_children(buf, s, e))
+    auth_safe = pfx[1]
+    ci = list(_children(buf, auth_safe[1], auth_safe[2]))
+    if _oid(buf, ci[0][1], ci[0][2]) != OID_DATA:
+        raise ValueError("unsupported PKCS12 integrity mode")
+    otag, os_, oe, _ = _tlv(buf, ci[1][1])
+    safe = _octets(buf, otag, os_, oe)
+    if len(pfx) > 2:
+        _pkcs12_verify_mac(buf, pfx[2], safe, password)
+    _, ss, se, _ = _tlv(safe, 0)
+    entries = []
+    for _, cs, ce, _ in _children(safe, ss, se):
+        items = list(_children(safe, cs, ce))
+        content_type = _oid(safe, items[0][1], items[0][2])
+        if content_type == OID_DATA:
+            t, a, b, _ = _tlv(safe, items[1][1])
+            _pkcs12_safe_bags(_octets(safe, t, a, b), entries)
+        elif content_type == OID_ENCRYPTED_DATA:
+            _, eds, ede, _ = _tlv(safe, items[1][1])
+            enc_info = list(_children(safe, eds, ede))[1]
+            eci = list(_children(safe, enc_info[1], enc_info[2]))
+            alg = list(_children(safe, eci[1][1], eci[1][2]))
+            if _oid(safe, alg[0][1], alg[0][2]) != OID_PBES2:
+                raise ValueError("unsupported PKCS12 encryption")
+            ciphertext = _octets(safe, eci[2][0], eci[2][1], eci[2][2])
+            _pkcs12_safe_bags(_pbes2_decrypt(safe, alg[1][1], alg[1][2], ciphertext, password), entries)
+    return entries
+
+
+def _read_pkcs12_with_cryptography(buf: bytes, password: str):
+    """cryptography 未安裝時回傳 None；密碼錯誤（MAC 不符）時由 cryptography 拋出 ValueError。"""
+    try:
+        from cryptography.hazmat.primitives.serialization import Encoding, pkcs12  # type: ignore
+    except Exception:
+        return None
+    if not hasattr(pkcs12, "load_pkcs12"):  # cryptography < 36：沒有 friendlyName，無法對應 alias
+        _key, cert, extra = pkcs12.load_key_and_certificates(buf, password.encode("utf-8"))
+        return [(None, c.public_bytes(Encoding.DER)) for c in ([cert] if cert else []) + list(extra or [])]
+    p12 = pkcs12.load_pkcs12(buf, password.encode("utf-8"))
+    bags = ([p12.cert] if p12.cert else []) + list(p12.additional_certs)
+    return [(b.friendly_name.decode("utf-8", errors="replace") if b.friendly_name else None,
+             b.certificate.public_bytes(Encoding.DER)) for b in bags]
+
+
+def read_keystore_certs(path, storepass: str | None = None):
+    """回傳 [(alias, cert_info), ...]；格式不支援或無法解密時回傳 None。"""
+    buf = Path(path).read_bytes()
+    entries = None
+    if buf[:4] in (b"\xfe\xed\xfe\xed", b"\xce\xce\xce\xce"):
+        entries = _read_jks(buf)
+    elif buf[:1] == b"\x30" and storepass is not None:
+        try:
+            entries = _read_pkcs12_with_cryptography(buf, storepass)
+            if entries is None:
+                entries = _read_pkcs12(buf, storepass)
+        except Exception:
+            entries = None
+    if entries is None:
+        return None
+    return [(alias, cert_info(bytes(der))) for alias, der in entries]
+
+
+def keystore_fingerprints(path, alias: str | None = None, storepass: str | None = None):
+    """與 keytool -list -v [-alias] 相同語意：指定 alias 時只找該 alias（不分大小寫），不存在就回傳 None；
+    未指定時 keystore 只有一張憑證才回傳那一張。"""
+    entries = read_keystore_certs(path, storepass)
+    if not entries:
+        return None
+    if alias:
+        for name, info in entries:
+            if name and name.lower() == alias.lower():
+                return info
+        return None
+    unique = {info["sha256"]: info for _, info in entries}
+    if len(unique) == 1:
+        return next(iter(unique.values()))
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 批次驗證
+# ---------------------------------------------------------------------------
+
+def verify_archive(path, expected_sha256: str | None = None) -> dict:
+    result = {"path": str(path), "schemes": [], "sha256": None, "md5": None, "subject": None,
+              "match": None, "error": None}
+    try:
+        signers = read_archive_signers(path)
+        result["schemes"] = sorted(signers)
+        cert = primary_cert(signers)
+        if cert:
+            result.update(sha256=cert["sha256"], md5=cert["md5"], subject=cert["subject"])
+            # 所有方案的憑證都必須一致，否則視為不符
+            digests = {c["sha256"] for certs in signers.values() for c in certs[:1]}
+            if expected_sha256:
+                result["match"] = digests == {expected_sha256.strip().upper()}
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def verify_directory(directory, expected_sha256: str | None = None, workers: int | None = None) -> list:
+    paths = sorted(p for p in Path(directory).rglob("*") if p.suffix.lower() in ARCHIVE_SUFFIXES and p.is_file())
+    if len(paths) <= 1:
+        return [verify_archive(p, expected_sha256) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(verify_archive, paths, [expected_sha256] * len(paths)))
+
+
+# ---------------------------------------------------------------------------
+# AES 解密（僅供 PKCS12 PBES2 憑證袋使用；資料量只有數 KB）
+# ---------------------------------------------------------------------------
+
+def _aes_tables():
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        p = p ^ ((p << 1) & 0xFF) ^ (0x1B if p & 0x80 else 0)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        x = q ^ ((q << 1 | q >> 7) & 0xFF) ^ ((q << 2 | q >> 6) & 0xFF) ^ ((q << 3 | q >> 5) & 0xFF) ^ ((q << 4 | q >> 4) & 0xFF)
+        sbox[p] = x ^ 0x63
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    inv = [0] * 256
+    for i, v in enumerate(sbox):
+        inv[v] = i
+    return sbox, inv
+
+
+def _gmul(a, b):
+    r = 0
+    while b:
+        if b & 1:
+            r ^= a
+        a = ((a << 1) ^ 0x11B) if a & 0x80 else (a << 1)
+        b >>= 1
+    return r
+
+
+_SBOX, _INV_SBOX = _aes_tables()
+_MUL = {m: [_gmul(i, m) for i in range(256)] for m in (9, 11, 13, 14)}
+
+
+def _aes_expand_key(key: bytes) -> list:
+    nk = len(key) // 4
+    rounds = nk + 6
+    words = [list(key[4 * i:4 * i + 4]) for i in range(nk)]
+    rcon = 1
+    for i in range(nk, 4 * (rounds + 1)):
+        t = list(words[i - 1])
+        if i % nk == 0:
+            t = [_SBOX[b] for b in t[1:] + t[:1]]
+            t[0] ^= rcon
+            rcon = _gmul(rcon, 2)
+        elif nk > 6 and i % nk == 4:
+            t = [_SBOX[b] for b in t]
+        words.append([a ^ b for a, b in zip(words[i - nk], t)])
+    return [sum(words[4 * r:4 * r + 4], []) for r in range(rounds + 1)]
+
+
+def _aes_decrypt_block(round_keys, block):
+    s = [b ^ k for b, k in zip(block, round_keys[-1])]
+    m9, m11, m13, m14 = _MUL[9], _MUL[11], _MUL[13], _MUL[14]
+    for r in range(len(round_keys) - 2, -1, -1):
+        # InvShiftRows + InvSubBytes
+        s = [_INV_SBOX[s[(i + 4 * (i % 4) * 3) % 16]] for i in range(16)]
+        s = [b ^ k for b, k in zip(s, round_keys[r])]
+        if r:
+            out = []
+            for c in range(4):
+                a0, a1, a2, a3 = s[4 * c:4 * c + 4]
+                out += [
+                    m14[a0] ^ m11[a1] ^ m13[a2] ^ m9[a3],
+                    m9[a0] ^ m14[a1] ^ m11[a2] ^ m13[a3],
+                    m13[a0] ^ m9[a1] ^ m14[a2] ^ m11[a3],
+                    m11[a0] ^ m13[a1] ^ m9[a2] ^ m14[a3],
+                ]
+            s = out
+    return s
+
+
+def _aes_cbc_decrypt(key: bytes, iv: bytes, data: bytes) -> bytes:
+    if len(data) % 16:
+        raise ValueError("ciphertext is not block aligned")
+    round_keys = _aes_expand_key(key)
+    out = bytearray()
+    prev = iv
+    for i in range(0, len(data), 16):
+        block = data[i:i + 16]
+        plain = _aes_decrypt_block(round_keys, block)
+        out += bytes(p ^ c for p, c in zip(plain, prev))
+        prev = block
+    return bytes(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print signing certificate fingerprints without keytool")
+    parser.add_argument("target", help="AAB/APK file or a directory of them")
+    parser.add_argument("--keystore", help="Keystore to compare against (JKS/JCEKS/PKCS12)")
+    parser.add_argument("--alias", help="Key alias in the keystore")
+    parser.add_argument("--storepass", help="Keystore password (PKCS12 only)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for directories")
+    args = parser.parse_args()
+
+    expected = None
+    if args.keystore:
+        ks = keystore_fingerprints(args.keystore, args.alias, args.storepass)
+        if ks:
+            expected = ks["sha256"]
+            print(f"Keystore SHA-256: {ks['sha256']}")
+            print(f"Keystore MD5: {ks['md5']}")
+        else:
+            print("<KEYSTORE_UNREADABLE> 格式不支援或密碼錯誤；請改用 keytool。")
+
+    target = Path(args.target)
+    results = verify_directory(target, expected, args.workers) if target.is_dir() else [verify_archive(target, expected)]
+    for r in results:
+        if r["error"]:
+            print(f"[ERROR] {r['path']}: {r['error']}")
+            continue
+        match = "UNKNOWN" if r["match"] is None else ("YES" if r["match"] else "NO")
+        print(f"{r['path']}")
+        print(f"  schemes: {','.join(r['schemes']) or '<UNSIGNED>'}")
+        print(f"  subject: {r['subject']}")
+        print(f"  SHA-256: {r['sha256']}")
+        print(f"  MD5: {r['md5']}")
+        print(f"  Fingerprint match (SHA-256): {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+bundletool build-apks 輸出（.apks）的快取：
+- 鍵 = SHA-256(AAB 內容 SHA-256、簽署身分、bundletool 版本、build-apks 模式)
+  簽署身分：release 為 keystore 憑證 SHA-256 指紋（讀不到時退回 keystore 檔案 SHA-256）+ alias；
+  local-testing 為固定字串。密碼絕不進入鍵或索引
+- 命中時直接複製回 --output 路徑，不啟動 JVM、不重新簽署
+- 有上限的磁碟儲存區，依 mtime 做 LRU 淘汰（命中時更新 mtime），與 download_cache 相同做法
+
+快取目錄：<使用者快取目錄>/apks（見 download_cache.cache_root）；上限 HOMELETTER_APKS_CACHE_MB（預設 1024）
+
+用法：
+  python scripts/apks_cache.py [--list] [--evict] [--clear]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from download_cache import cache_root
+
+DEFAULT_MAX_MB = 1024
+HASH_CHUNK = 1024 * 1024
+
+
+def sha256_file(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def signing_identity(release: bool, ks_path=None, alias: str | None = None, cert_sha256: str | None = None):
+    """回傳不含密碼的簽署身分字串；release 但無法識別 keystore 時回傳 None（不快取）。"""
+    if not release:
+        return "local-testing"
+    if cert_sha256:
+        return f"cert:{cert_sha256.replace(':', '').upper()}|alias:{alias}"
+    if ks_path and Path(ks_path).exists():
+        return f"keystore:{sha256_file(ks_path)}|alias:{alias}"
+    return None
+
+
+class ApksCache:
+    def __init__(self, root=None, max_bytes: int | None = None):
+        self.root = Path(root) if root else cache_root() / "apks"
+        env_mb = os.environ.get("HOMELETTER_APKS_CACHE_MB")
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(env_mb or DEFAULT_MAX_MB) * 1024 * 1024)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(aab_sha256: str, identity: str, bundletool_version: str, mode: str = "universal") -> str:
+        material = json.dumps({"aab": aab_sha256, "signing": identity, "bundletool": bundletool_version,
+                               "mode": mode}, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def blob_path(self, key: str) -> Path:
+        return self.root / f"{key}.apks"
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def _save_index(self, index: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(index, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def restore(self, key: str, dest) -> bool:
+        """命中時複製到 dest 並回傳 True。"""
+        blob = self.blob_path(key)
+        if not blob.exists():
+            return False
+        os.utime(blob)  # LRU：最近使用
+        dest = Path(dest)
+        tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+        shutil.copyfile(blob, tmp)
+        os.replace(tmp, dest)
+        return True
+
+    def store(self, key: str, apks_path, meta: dict | None = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        blob = self.blob_path(key)
+        tmp = blob.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(apks_path, tmp)
+        os.replace(tmp, blob)
+        with self._lock:
+            index = self._load_index()
+            index[key] = dict(meta or {}, size=blob.stat().st_size, stored_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self._save_index(index)
+        self.evict()
+
+    def evict(self, max_bytes: int | None = None) -> list:
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        if not self.root.exists():
+            return []
+        entries = sorted((p.stat().st_mtime, p.stat().st_size, p) for p in self.root.glob("*.apks"))
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, p in entries:
+            if total <= limit:
+                break
+            try:
+                p.unlink()
+                total -= size
+                removed.append(p.stem)
+            except OSError:
+                pass
+        if removed:
+            with self._lock:
+                index = self._load_index()
+                self._save_index({k: v for k, v in index.items() if k not in removed})
+        return removed
+
+    def entries(self) -> list:
+        index = self._load_index()
+        out = []
+        for p in sorted(self.root.glob("*.apks"), key=lambda p: -p.stat().st_mtime) if self.root.exists() else []:
+            out.append(dict(index.get(p.stem, {}), key=p.stem, size=p.stat().st_size,
+                            last_used=time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(p.stat().st_mtime))))
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or trim the cache of bundletool build-apks outputs")
+    parser.add_argument("--list", action="store_true", help="List cached APK sets, most recently used first")
+    parser.add_argument("--evict", action="store_true", help="Evict least recently used sets over the size limit")
+    parser.add_argument("--max-mb", type=float, help="Size limit for --evict (default: HOMELETTER_APKS_CACHE_MB or 1024)")
+    parser.add_argument("--clear", action="store_true", help="Remove every cached APK set")
+    args = parser.parse_args()
+
+    cache = ApksCache(max_bytes=int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None)
+    if args.clear:
+        removed = cache.evict(0)
+        print(f"Removed {len(removed)} cached APK set(s)")
+    elif args.evict:
+        removed = cache.evict()
+        print(f"Evicted {len(removed)} cached APK set(s)")
+    entries = cache.entries()
+    if args.list or not (args.clear or args.evict):
+        total = sum(e["size"] for e in entries)
+        print(f"{cache.root}: {len(entries)} APK set(s), {total / (1024 * 1024):.1f} MB")
+        for e in entries:
+            print(f"  {e['key'][:12]}  {e['size'] / (1024 * 1024):7.1f} MB  {e['last_used']}  "
+                  f"{e.get('aab', '?')}  bundletool {e.get('bundletool', '?')}  {e.get('signing', '?')}")
+
+
+if __name__ == "__main__":
+    main()
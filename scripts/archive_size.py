@@ -0,0 +1,220 @@
+"""
+AAB / APK 大小分析（只讀 ZIP central directory，不解壓任何內容）：
+- 依模組（AAB 的 base/、feature 模組；APK 一律為 base）與類別彙總壓縮後 / 未壓縮大小：
+  dex、lib/<abi>、res/<類型>-<密度>（drawable-xxhdpi、mipmap-anydpi…）、assets/<副檔名>（Lottie 為 json）、
+  manifest、resources（resources.pb / resources.arsc）、META-INF、other
+- .apks 會直接分析裡面的 universal.apk（bundletool 以 STORED 放入，開啟時是外層檔案的切片，不解壓）
+- diff：比較兩個建置，列出各類別增減與成長最多的項目
+
+用法：
+  python scripts/archive_size.py app-prod-release.aab [--apks app-prod.apks] [--top 15] [--json]
+  python scripts/archive_size.py new.aab --diff old.aab [--top 20]
+"""
+
+import argparse
+import json
+import re
+import sys
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+
+from nested_zip import find_member, open_entry
+
+DENSITIES = {"ldpi", "mdpi", "tvdpi", "hdpi", "xhdpi", "xxhdpi", "xxxhdpi", "nodpi", "anydpi"}
+DENSITY_NUMERIC = re.compile(r"^\d+dpi$")
+AAB_MODULE_DIRS = {"manifest", "dex", "res", "assets", "lib", "root", "apex"}
+
+
+def _res_bucket(res_dir: str) -> str:
+    """'drawable-night-xxhdpi-v4' -> 'res/drawable-xxhdpi'；沒有密度限定詞時為 'res/drawable'。"""
+    parts = res_dir.split("-")
+    density = next((q for q in parts[1:] if q in DENSITIES or DENSITY_NUMERIC.match(q)), None)
+    return f"res/{parts[0]}-{density}" if density else f"res/{parts[0]}"
+
+
+def classify(name: str, is_bundle: bool) -> tuple:
+    """回傳 (模組, 類別)。"""
+    parts = name.split("/")
+    module = "base"
+    if is_bundle:
+        if parts[0] in ("META-INF", "BUNDLE-METADATA") or len(parts) == 1:
+            return "(bundle)", "META-INF" if parts[0] == "META-INF" else "bundle-metadata"
+        if len(parts) > 1 and parts[1] in AAB_MODULE_DIRS | {"resources.pb", "native.pb", "assets.pb"}:
+            module, parts = parts[0], parts[1:]
+    top = parts[0]
+    if top == "META-INF":
+        return module, "META-INF"
+    if top == "dex" or (len(parts) == 1 and top.endswith(".dex")):
+        return module, "dex"
+    if top == "lib" and len(parts) > 2:
+        return module, f"lib/{parts[1]}"
+    if top == "res" and len(parts) > 2:
+        return module, _res_bucket(parts[1])
+    if top == "assets":
+        ext = Path(parts[-1]).suffix.lower().lstrip(".") or "noext"
+        return module, f"assets/{ext}"
+    if top == "manifest" or top == "AndroidManifest.xml":
+        return module, "manifest"
+    if top in ("resources.pb", "resources.arsc"):
+        return module, "resources"
+    if top == "root" and len(parts) > 1:
+        return module, "root"
+    return module, "other"
+
+
+def read_entries(source, is_bundle: bool | None = None) -> dict:
+    """source 為路徑或可 seek 串流；回傳 {name: (壓縮後, 未壓縮, 模組, 類別)}。只讀 central directory。"""
+    with zipfile.ZipFile(source) as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+    if is_bundle is None:
+        is_bundle = any(i.filename in ("BundleConfig.pb",) or i.filename.startswith("base/manifest/") for i in infos)
+    entries = {}
+    for info in infos:
+        module, category = classify(info.filename, is_bundle)
+        entries[info.filename] = (info.compress_size, info.file_size, module, category)
+    return entries
+
+
+def read_archive(path) -> dict:
+    """.aab / .apk 直接讀；.apks 讀裡面的 universal.apk（找不到時讀第一個 .apk）。"""
+    path = Path(path)
+    if path.suffix.lower() != ".apks":
+        return read_entries(path)
+    with zipfile.ZipFile(path) as outer:
+        member = find_member(outer, "universal.apk") or next(
+            (n for n in outer.namelist() if n.endswith(".apk")), None)
+        if not member:
+            raise ValueError(f"no APK inside {path}")
+        with open_entry(outer, member) as apk:
+            return read_entries(apk, is_bundle=False)
+
+
+def breakdown(entries: dict) -> list:
+    """[{module, category, compressed, uncompressed, count}, ...]，依壓縮後大小由大到小。"""
+    totals = defaultdict(lambda: [0, 0, 0])
+    for compressed, uncompressed, module, category in entries.values():
+        t = totals[(module, category)]
+        t[0] += compressed
+        t[1] += uncompressed
+        t[2] += 1
+    rows = [{"module": m, "category": c, "compressed": v[0], "uncompressed": v[1], "count": v[2]}
+            for (m, c), v in totals.items()]
+    return sorted(rows, key=lambda r: -r["compressed"])
+
+
+def largest_entries(entries: dict, top: int = 15) -> list:
+    items = sorted(entries.items(), key=lambda kv: -kv[1][0])[:top]
+    return [{"name": n, "compressed": v[0], "uncompressed": v[1], "category": v[3]} for n, v in items]
+
+
+def diff(old: dict, new: dict, top: int = 20) -> dict:
+    """兩個建置的差異：各類別增減、成長最多的項目、新增與移除的項目。"""
+    old_rows = {(r["module"], r["category"]): r for r in breakdown(old)}
+    new_rows = {(r["module"], r["category"]): r for r in breakdown(new)}
+    categories = []
+    for key in set(old_rows) | set(new_rows):
+        o, n = old_rows.get(key), new_rows.get(key)
+        delta = (n["compressed"] if n else 0) - (o["compressed"] if o else 0)
+        if delta:
+            categories.append({"module": key[0], "category": key[1], "old": o["compressed"] if o else 0,
+                               "new": n["compressed"] if n else 0, "delta": delta})
+    categories.sort(key=lambda r: -abs(r["delta"]))
+    changes = []
+    for name in set(old) | set(new):
+        o, n = old.get(name), new.get(name)
+        delta = (n[0] if n else 0) - (o[0] if o else 0)
+        if delta:
+            changes.append({"name": name, "old": o[0] if o else None, "new": n[0] if n else None, "delta": delta})
+    growth = sorted((c for c in changes if c["delta"] > 0), key=lambda c: -c["delta"])[:top]
+    shrink = sorted((c for c in changes if c["delta"] < 0), key=lambda c: c["delta"])[:top]
+    old_total = sum(v[0] for v in old.values())
+    new_total = sum(v[0] for v in new.values())
+    return {
+        "old_total": old_total,
+        "new_total": new_total,
+        "delta": new_total - old_total,
+        "categories": categories,
+        "top_growth": growth,
+        "top_shrink": shrink,
+        "added": sorted(n for n in new if n not in old),
+        "removed": sorted(n for n in old if n not in new),
+    }
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):8.2f} MB"
+
+
+def print_breakdown(label: str, entries: dict, top: int = 15, min_share: float = 0.0):
+    rows = breakdown(entries)
+    total_c = sum(r["compressed"] for r in rows) or 1
+    total_u = sum(r["uncompressed"] for r in rows)
+    print(f"=== Size breakdown: {label} ===")
+    print(f"Total: {_mb(total_c).strip()} compressed / {_mb(total_u).strip()} uncompressed, {len(entries)} entries")
+    print(f"  {'compressed':>11} {'uncompressed':>11} {'share':>6} {'files':>6}  module/category")
+    hidden = 0
+    for r in rows:
+        share = r["compressed"] / total_c
+        if share < min_share:
+            hidden += 1
+            continue
+        print(f"  {_mb(r['compressed'])} {_mb(r['uncompressed'])} {share * 100:5.1f}% {r['count']:6d}  "
+              f"{r['module']}/{r['category']}")
+    if hidden:
+        print(f"  ... {hidden} smaller categor{'y' if hidden == 1 else 'ies'} under {min_share * 100:.1f}%")
+    if top:
+        print(f"Largest {top} entries:")
+        for e in largest_entries(entries, top):
+            print(f"  {_mb(e['compressed'])}  {e['name']}")
+
+
+def print_diff(d: dict, top: int = 20):
+    sign = "+" if d["delta"] >= 0 else "-"
+    print("=== Size diff ===")
+    print(f"Total: {_mb(d['old_total']).strip()} -> {_mb(d['new_total']).strip()} "
+          f"({sign}{abs(d['delta']) / 1024:.1f} KB)")
+    for c in d["categories"][:top]:
+        print(f"  {c['delta'] / 1024:+10.1f} KB  {c['module']}/{c['category']}")
+    if d["top_growth"]:
+        print(f"Top {len(d['top_growth'])} growth:")
+        for c in d["top_growth"]:
+            was = "new" if c["old"] is None else f"{c['old'] / 1024:.1f} KB"
+            print(f"  {c['delta'] / 1024:+10.1f} KB  {c['name']} (was {was})")
+    print(f"Added: {len(d['added'])} entries | Removed: {len(d['removed'])} entries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down AAB/APK size from the zip central directory")
+    parser.add_argument("archive", help=".aab, .apk or .apks to analyze")
+    parser.add_argument("--apks", help="Also analyze the universal APK inside this .apks")
+    parser.add_argument("--diff", metavar="OLD", help="Compare against an older build of the same kind")
+    parser.add_argument("--top", type=int, default=15, help="Entries to list (default: 15)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    args = parser.parse_args()
+
+    for p in filter(None, [args.archive, args.apks, args.diff]):
+        if not Path(p).exists():
+            print(f"<ARCHIVE_NOT_FOUND> {p}")
+            sys.exit(1)
+    new = read_archive(args.archive)
+    if args.diff:
+        d = diff(read_archive(args.diff), new, args.top)
+        if args.json:
+            print(json.dumps(d, indent=1))
+        else:
+            print_diff(d, args.top)
+        return
+    reports = [(args.archive, new)]
+    if args.apks:
+        reports.append((f"{args.apks} (universal.apk)", read_archive(args.apks)))
+    if args.json:
+        print(json.dumps({label: {"categories": breakdown(e), "largest": largest_entries(e, args.top)}
+                          for label, e in reports}, indent=1))
+        return
+    for label, entries in reports:
+        print_breakdown(label, entries, args.top)
+
+
+if __name__ == "__main__":
+    main()
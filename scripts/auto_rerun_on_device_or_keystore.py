@@ -1,28 +1,13 @@
-import os
 import sys
-import time
 import argparse
-import shutil
-import subprocess
 from pathlib import Path
 
-project_path = r"F:\homeletter2.0android251006\homeletterAPP"
-
+from device_watch import wait_for_device_or_keystore
+from release_pipeline import Pipeline
+import run_metrics
+import verify_aab_with_bundletool as verify
 
-def run_cmd(cmd_str: str):
-    try:
-        print(f"[RUN] {cmd_str}")
-        result = subprocess.run(cmd_str, cwd=project_path, shell=True, capture_output=True, text=True)
-        out = result.stdout or ""
-        err = result.stderr or ""
-        if out:
-            print(out)
-        if err:
-            print(err)
-        return result.returncode, out, err
-    except Exception as e:
-        print(f"[NativeCommandError] {e}")
-        return 1, "", str(e)
+project_path = r"F:\homeletter2.0android251006\homeletterAPP"
 
 
 def read_gradle_properties():
@@ -46,66 +31,29 @@ def resolve_keystore_path(props):
     return str(p)
 
 
-def has_connected_device():
-    # Try PATH first, then fallback to explicit platform-tools path
-    adb_in_path = shutil.which("adb") is not None
-    cmds = []
-    if adb_in_path:
-        cmds.append("adb start-server")
-        cmds.append("adb devices")
-    cmds.append("\"C:\\platform-tools\\adb.exe\" start-server")
-    cmds.append("\"C:\\platform-tools\\adb.exe\" devices")
-    for c in cmds:
-        code, out, _ = run_cmd(c)
-        if "devices" in c and code == 0 and out:
-            lines = [ln.strip() for ln in out.splitlines()]
-            devs = [ln for ln in lines if ln.endswith("\tdevice")]
-            if devs:
-                print("[INFO] ADB device detected:")
-                for d in devs:
-                    print(f"- {d}")
-                return True
-    return False
-
-
-def wait_for_conditions(timeout_sec: int, poll_sec: int):
+def wait_for_conditions(timeout_sec: int, poll_sec: float):
+    # 事件驅動：adb host:track-devices + keystore 檔案通知（無 watchdog 時以 poll_sec 做 stat 迴圈）
     props = read_gradle_properties()
     ks_path = resolve_keystore_path(props)
-    ks_ok = False
-    dev_ok = False
-    start = time.time()
-    while time.time() - start < timeout_sec:
-        # Check keystore
-        if ks_path and Path(ks_path).exists():
-            ks_ok = True
-        # Check device
-        dev_ok = has_connected_device()
-        if ks_ok or dev_ok:
-            return ks_ok, dev_ok
-        print(f"[WAIT] No device/keystore yet. Polling again in {poll_sec}s...")
-        time.sleep(poll_sec)
-    return ks_ok, dev_ok
+    print("[WAIT] Subscribed to adb device events" + (f" and {ks_path}" if ks_path else "") + "...")
+    return wait_for_device_or_keystore(ks_path, timeout_sec, stat_interval=poll_sec)
 
 
 def rerun_verify():
-    # Ensure bundletool can use adb even without PATH if needed
-    prefix = "set PATH=C:\\platform-tools;%PATH% && "
-    py = shutil.which("python") or shutil.which("py")
-    if not py:
-        print("<PYTHON_NOT_FOUND>")
-        return 1
-    cmd = prefix + ("python" if "python" in py else "py -3") + " .\\scripts\\verify_aab_with_bundletool.py"
-    code, out, err = run_cmd(cmd)
-    # Surface result
-    print("=== Verify Output ===")
-    print(out)
-    return code
+    # 在同一個行程內執行 verify pipeline（與 rebuild_twa_and_verify 相同）；
+    # install stage 會自行把 platform-tools 加進 PATH，不需要再包一層 cmd /c python
+    cfg = verify.resolve_config()
+    result = Pipeline(verify.build_stages(cfg)).run()
+    result.print_summary()
+    verify.print_verify_summary(cfg, result)
+    return 0 if result.ok else 1
 
 
 def main():
     parser = argparse.ArgumentParser(description="Auto rerun verification when emulator or keystore is ready")
     parser.add_argument("--timeout", type=int, default=600, help="Max wait seconds (default: 600)")
-    parser.add_argument("--poll", type=int, default=5, help="Polling interval seconds (default: 5)")
+    parser.add_argument("--poll", type=float, default=0.5,
+                        help="Keystore stat interval when filesystem notifications are unavailable (default: 0.5)")
     args = parser.parse_args()
 
     print("[INFO] Watching for ADB device or Release keystore...")
@@ -121,4 +69,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.session("auto_rerun_on_device_or_keystore"):
+        main()
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""
+發佈工具本身的基準測試（Linux 即可執行；外部工具全部由 fake_tools 的確定性替身取代）：
+- tail_and_filter_log / gradle_timeline：數百 MB 的 --info log
+- gradle_session_tee：GradleSession 執行替身 gradlew，測 tee + 即時錯誤過濾 + task 時間軸的開銷
+- extract_fingerprints：大型 .apks 內的 universal.apk 簽章 + JKS keystore 指紋
+- extract_zip_to / extract_zip_to_reinstall：platform-tools 形狀的 zip（全新安裝 / 版本相同時略過）
+- verify_parse_keytool / verify_read_aab_signers：verify_aab_with_bundletool 的指紋解析
+- pipeline_verify_cold / pipeline_verify_warm：完整 verify pipeline（替身 java/keytool + 本機 adb server 替身），
+  cold 每輪先清空 probe/stage 快取與 .apks 快取
+- startup_bench_fake：startup_bench 對 adb server 替身跑 main + detail 各 50 次 am start -W 與 logcat 等待（工具本身的開銷）
+
+每項基準測試在獨立的子行程中執行（同一個腳本以 --child 啟動，共用已產生的工作區、環境變數與 adb server 替身），
+peak_rss_kb 為該子行程的峰值 RSS（經小型啟動器以 run_metrics.wait_measured 量測；含直譯器本身的基本用量），
+各列可互相比較。
+
+結果為 JSON（schema 1）：每項 min/median/max 秒數、處理量、MB/s 與峰值 RSS；--compare 與舊結果比較中位數，
+超過門檻時 exit code 為 1，可直接放進 CI 追蹤退步。
+
+用法：
+  python scripts/bench_release_tools.py [--log-mb 300] [--apk-mb 64] [--repeat 3] [--only NAME ...]
+                                        [--out results.json] [--compare baseline.json --threshold 0.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import fake_tools
+from fake_adb_server import FakeAdbServer
+
+SCHEMA = 1
+
+
+class _Sink:
+    """吞掉被測函式的輸出，只計算量。"""
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, s):
+        self.bytes += len(s)
+        return len(s)
+
+    def flush(self):
+        pass
+
+
+class Benchmark:
+    def __init__(self, name: str, func, setup=None, processed_bytes: int = 0):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.processed_bytes = processed_bytes
+
+    def run(self, repeat: int) -> dict:
+        times = []
+        sink = _Sink()
+        for _ in range(repeat):
+            if self.setup:
+                with redirect_stdout(sink):
+                    self.setup()
+            start = time.perf_counter()
+            with redirect_stdout(sink):
+                self.func()
+            times.append(time.perf_counter() - start)
+        median = statistics.median(times)
+        result = {
+            "name": self.name,
+            "repeat": repeat,
+            "min": round(min(times), 4),
+            "median": round(median, 4),
+            "max": round(max(times), 4),
+            "processed_bytes": self.processed_bytes,
+            "output_bytes": sink.bytes // repeat,
+        }
+        if self.processed_bytes and median > 0:
+            result["mb_per_s"] = round(self.processed_bytes / (1024 * 1024) / median, 1)
+        return result
+
+
+def prepare_workspace(root: Path, args) -> dict:
+    """產生所有輸入（只做一次，不計時）。"""
+    bin_dir = fake_tools.install_fake_tools(root / "bin")
+    project = root / "project"
+    project.mkdir(parents=True, exist_ok=True)
+    (project / "bundletool-all.jar").write_bytes(b"PK\x05\x06" + b"\x00" * 18)
+    (project / "release.jks").write_bytes(fake_tools.jks_bytes())
+    (project / "gradle.properties").write_text(
+        "RELEASE_STORE_FILE=release.jks\n"
+        f"RELEASE_KEY_ALIAS={fake_tools.TEST_ALIAS}\n"
+        "RELEASE_STORE_PASSWORD=bench-pass\nRELEASE_KEY_PASSWORD=bench-pass\n", encoding="utf-8")
+    gradlew = project / "gradlew"
+    shutil.copyfile(bin_dir / "gradlew", gradlew)
+    gradlew.chmod(0o755)
+    print(f"[BENCH] generating {args.log_mb} MB Gradle log, {args.apk_mb} MB universal.apk ...", file=sys.stderr)
+    return {
+        "bin": bin_dir,
+        "project": project,
+        "log": fake_tools.write_gradle_log(root / "bundle_fixed.log", args.log_mb),
+        "apks": fake_tools.write_apks(root / "app-prod.apks", args.apk_mb),
+        "aab": fake_tools.write_aab(project / "app-prod-release.aab", args.aab_mb),
+        "platform_tools_zip": fake_tools.write_platform_tools_zip(root / "platform-tools.zip", args.zip_mb),
+        "keytool_text": fake_tools.keytool_list_text(args.keytool_entries),
+        "jks": project / "release.jks",
+        "extract_dir": root / "platform-tools",
+        "cache": root / "cache",
+    }
+
+
+def build_benchmarks(ws: dict, args) -> list:
+    # 這些模組讀取 ANDROID_ADB_SERVER_PORT / HOMELETTER_CACHE_DIR 等環境變數，必須在環境設定好之後才匯入
+    import compose_fix_build_and_bundle as compose_fix
+    import install_platform_tools_and_verify as platform_tools
+    import startup_bench
+    import verify_aab_with_bundletool as verify
+    from apk_signing import primary_cert, read_archive_signers
+    from adb_client import AdbClient
+    from gradle_session import GradleSession
+    from gradle_timeline import analyze_log
+    from apks_cache import ApksCache
+    from probe_cache import ProbeCache
+    from release_pipeline import Pipeline
+
+    log, apks, aab = ws["log"], ws["apks"], ws["aab"]
+    verify.project_path = str(ws["project"])
+    cfg = verify.resolve_config(aab)
+
+    def clear_extract_dir():
+        shutil.rmtree(ws["extract_dir"], ignore_errors=True)
+
+    def clear_caches():
+        ProbeCache().clear()
+        ApksCache().evict(0)
+
+    def run_pipeline():
+        result = Pipeline(verify.build_stages(cfg)).run()
+        if not result.ok:
+            raise RuntimeError("verify pipeline failed: " + ", ".join(
+                r.name for r in result.stages.values() if not r.ok))
+
+    def run_gradle_session():
+        session = GradleSession(ws["project"], ws["project"] / "gradlew")
+        result = session.run([("bundle", ":app:bundleProdRelease")], ws["project"] / "bench_session.log",
+                             extra_args=["--info"])
+        if not result.ok:
+            raise RuntimeError(f"fake gradlew failed with exit {result.returncode}")
+
+    def run_startup_bench():
+        startup_bench.run_session(AdbClient(), "emulator-5554", ["main", "detail"], runs=50, warmup=1)
+
+    tee_bytes = int(args.tee_mb * fake_tools.MB)
+    return [
+        Benchmark("tail_and_filter_log", lambda: compose_fix.tail_and_filter_log(log), processed_bytes=log.stat().st_size),
+        Benchmark("gradle_timeline", lambda: analyze_log(log), processed_bytes=log.stat().st_size),
+        Benchmark("gradle_session_tee", run_gradle_session, processed_bytes=tee_bytes),
+        Benchmark("extract_fingerprints",
+                  lambda: platform_tools.extract_fingerprints(apks, ws["jks"], fake_tools.TEST_ALIAS, "bench-pass"),
+                  processed_bytes=apks.stat().st_size),
+        Benchmark("extract_zip_to", lambda: platform_tools.extract_zip_to(ws["platform_tools_zip"], ws["extract_dir"]),
+                  setup=clear_extract_dir, processed_bytes=ws["platform_tools_zip"].stat().st_size),
+        Benchmark("extract_zip_to_reinstall",
+                  lambda: platform_tools.extract_zip_to(ws["platform_tools_zip"], ws["extract_dir"])),
+        Benchmark("verify_parse_keytool", lambda: verify.parse_keytool_fingerprints(ws["keytool_text"]),
+                  processed_bytes=len(ws["keytool_text"].encode("utf-8"))),
+        Benchmark("verify_read_aab_signers", lambda: primary_cert(read_archive_signers(aab)),
+                  processed_bytes=aab.stat().st_size),
+        Benchmark("pipeline_verify_cold", run_pipeline, setup=clear_caches),
+        Benchmark("pipeline_verify_warm", run_pipeline),
+        Benchmark("startup_bench_fake", run_startup_bench),
+    ]
+
+
+def save_workspace(root: Path, ws: dict):
+    (root / "workspace.json").write_text(json.dumps({k: str(v) for k, v in ws.items()}), encoding="utf-8")
+
+
+def load_workspace(root: Path) -> dict:
+    data = json.loads((root / "workspace.json").read_text(encoding="utf-8"))
+    return {k: v if k == "keytool_text" else Path(v) for k, v in data.items()}
+
+
+# Linux 的 ru_maxrss 會沿用 fork 當下父行程的 RSS 高水位（exec 後仍保留），本行程產生過工作區而偏大時
+# 會蓋過子行程的實際峰值；因此交給只載入 run_metrics 的小型啟動器代為啟動，並由它呼叫 wait_measured
+_LAUNCHER = """\
+import json, subprocess, sys
+sys.path.insert(0, sys.argv[1])
+import run_metrics
+proc = subprocess.Popen(sys.argv[2:], stdout=subprocess.DEVNULL)
+code, peak = run_metrics.wait_measured(proc)
+print(json.dumps({"returncode": code, "peak_rss_kb": peak}))
+"""
+
+
+def run_isolated(name: str, root: Path, argv: list) -> dict:
+    """在新的子行程執行一項基準測試；回傳其結果並加上子行程的峰值 RSS。"""
+    out = root / f"{name}.result.json"
+    out.unlink(missing_ok=True)
+    script = Path(__file__).resolve()
+    cmd = [sys.executable, str(script), *argv, "--child", name, "--workspace", str(root)]
+    launcher = subprocess.run([sys.executable, "-c", _LAUNCHER, str(script.parent), *cmd],
+                              stdout=subprocess.PIPE, text=True)
+    measured = json.loads(launcher.stdout) if launcher.returncode == 0 and launcher.stdout.strip() else {}
+    if measured.get("returncode") != 0 or not out.exists():
+        raise RuntimeError(f"benchmark {name} exited with {measured.get('returncode', launcher.returncode)}")
+    result = json.loads(out.read_text(encoding="utf-8"))
+    result["peak_rss_kb"] = measured["peak_rss_kb"]
+    return result
+
+
+def compare(results: list, baseline_path, threshold: float) -> list:
+    baseline = {r["name"]: r for r in json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["name"])
+        if old and old["median"] > 0 and r["median"] > old["median"] * (1 + threshold):
+            regressions.append({"name": r["name"], "median": r["median"], "baseline": old["median"],
+                                "ratio": round(r["median"] / old["median"], 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the release tooling against deterministic stand-in tools")
+    parser.add_argument("--log-mb", type=float, default=300, help="Size of the generated Gradle log (default: 300)")
+    parser.add_argument("--tee-mb", type=float, default=100, help="Output of the stand-in gradlew per run (default: 100)")
+    parser.add_argument("--apk-mb", type=float, default=64, help="Size of universal.apk inside the .apks (default: 64)")
+    parser.add_argument("--aab-mb", type=float, default=32, help="Size of the generated AAB (default: 32)")
+    parser.add_argument("--zip-mb", type=float, default=16, help="Size of the platform-tools zip (default: 16)")
+    parser.add_argument("--keytool-entries", type=int, default=2000, help="Entries in the keytool -list -v text")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (default: 3)")
+    parser.add_argument("--only", nargs="*", help="Run only these benchmarks")
+    parser.add_argument("--out", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median slowdown vs baseline (default: 0.25)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated workspace")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workspace", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # 子行程：沿用父行程產生的工作區與環境變數，只跑一項並把結果寫回工作區
+        root = Path(args.workspace)
+        bench = next(b for b in build_benchmarks(load_workspace(root), args) if b.name == args.child)
+        result = bench.run(args.repeat)
+        (root / f"{bench.name}.result.json").write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    root = Path(tempfile.mkdtemp(prefix="homeletter-bench-"))
+    server = FakeAdbServer(devices={"emulator-5554": "device"}).start()
+    saved_env = dict(os.environ)
+    try:
+        ws = prepare_workspace(root, args)
+        save_workspace(root, ws)
+        server.install_package("emulator-5554", fake_tools.PACKAGE, {"base.apk": b"bench"})
+        os.environ.update({
+            "PATH": f"{ws['bin']}{os.pathsep}{os.environ.get('PATH', '')}",
+            "ANDROID_ADB_SERVER_PORT": str(server.port),
+            "HOMELETTER_CACHE_DIR": str(ws["cache"]),
+            "FAKE_GRADLE_LOG_MB": str(args.tee_mb),
+            "FAKE_APK_MB": str(min(args.apk_mb, 16)),
+            "FAKE_AAB_MB": str(min(args.aab_mb, 16)),
+            "FAKE_KEYTOOL_ENTRIES": str(args.keytool_entries),
+        })
+        benchmarks = build_benchmarks(ws, args)
+        if args.only:
+            unknown = set(args.only) - {b.name for b in benchmarks}
+            if unknown:
+                parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+            benchmarks = [b for b in benchmarks if b.name in args.only]
+        results = []
+        for bench in benchmarks:
+            print(f"[BENCH] {bench.name} x{args.repeat} ...", file=sys.stderr)
+            r = run_isolated(bench.name, root, sys.argv[1:])
+            results.append(r)
+            rate = f" ({r['mb_per_s']} MB/s)" if "mb_per_s" in r else ""
+            rss = f", peak RSS {r['peak_rss_kb'] / 1024:.0f} MB" if r["peak_rss_kb"] else ""
+            print(f"[BENCH] {bench.name}: median {r['median']:.3f}s{rate}{rss}", file=sys.stderr)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        server.stop()
+        if args.keep:
+            print(f"[BENCH] workspace kept at {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "schema": SCHEMA,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "keep", "child", "workspace")},
+        "results": results,
+    }
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.threshold)
+        for r in report["regressions"]:
+            print(f"[REGRESSION] {r['name']} median {r['median']:.3f}s vs {r['baseline']:.3f}s (x{r['ratio']})",
+                  file=sys.stderr)
+    text = json.dumps(report, indent=1)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+        print(f"[BENCH] results written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Release 建置輸入指紋（fingerprint）：
+- 涵蓋 app/src/**、各 build.gradle(.kts)、settings.gradle(.kts)、gradle/libs.versions.toml、gradle.properties
+- 以 (size, mtime_ns) 快取每個檔案的 SHA-256，未變動的檔案不重新雜湊
+- 狀態檔存於 app/build/release-inputs.json；gradle clean 會一併清除，之後自然回到完整建置
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+STATE_NAME = "release-inputs.json"
+BUILD_FILES = [
+    "build.gradle",
+    "build.gradle.kts",
+    "settings.gradle",
+    "settings.gradle.kts",
+    "gradle.properties",
+    "gradle/libs.versions.toml",
+    "app/build.gradle",
+    "app/build.gradle.kts",
+]
+HASH_CHUNK = 1024 * 1024
+
+
+def state_path(project_dir) -> Path:
+    return Path(project_dir) / "app" / "build" / STATE_NAME
+
+
+def iter_input_files(project_dir):
+    root = Path(project_dir)
+    for rel in BUILD_FILES:
+        p = root / rel
+        if p.is_file():
+            yield p
+    src = root / "app" / "src"
+    if src.is_dir():
+        for dirpath, dirnames, filenames in os.walk(src):
+            dirnames.sort()
+            for name in sorted(filenames):
+                yield Path(dirpath) / name
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_state(project_dir) -> dict:
+    p = state_path(project_dir)
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def compute_fingerprint(project_dir, previous: dict | None = None):
+    """回傳 (總指紋, 檔案表)；previous 為上次的檔案表，用來略過未變動檔案的雜湊。"""
+    root = Path(project_dir)
+    previous = previous or {}
+    files = {}
+    total = hashlib.sha256()
+    for p in iter_input_files(root):
+        rel = p.relative_to(root).as_posix()
+        st = p.stat()
+        old = previous.get(rel)
+        if old and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+            digest = old["sha256"]
+        else:
+            digest = _sha256_file(p)
+        files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        total.update(rel.encode("utf-8") + b"\0" + digest.encode("ascii") + b"\n")
+    return total.hexdigest(), files
+
+
+def save_state(project_dir, fingerprint: str, files: dict):
+    p = state_path(project_dir)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"fingerprint": fingerprint, "files": files}), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def check_inputs(project_dir):
+    """回傳 (是否未變動, 新指紋, 新檔案表)。呼叫端於建置成功後再 save_state。"""
+    state = load_state(project_dir)
+    fingerprint, files = compute_fingerprint(project_dir, state.get("files"))
+    return fingerprint == state.get("fingerprint"), fingerprint, files
@@ -0,0 +1,31 @@
+"""
+各腳本 --selfcheck 共用的斷言收集器：
+- check(cond, message)：不成立時印出 <MARKER_SELFCHECK_FAILED> message 並記下，不中斷後續檢查
+- done(summary)：全部通過時印出 [OK] summary；回傳是否全部通過（selfcheck() 的回傳值）
+
+用法：
+  check = Checks("SYNC")
+  check(a.items() == b.items(), "clients diverged")
+  return check.done("sync selfcheck: converged")
+"""
+
+
+class Checks:
+    def __init__(self, marker: str):
+        self.marker = marker
+        self.failures = []
+
+    def __call__(self, cond, message: str) -> bool:
+        if not cond:
+            self.failures.append(message)
+            print(f"<{self.marker}_SELFCHECK_FAILED> {message}")
+        return bool(cond)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def done(self, summary: str) -> bool:
+        if self.ok:
+            print(f"[OK] {summary}")
+        return self.ok
@@ -1,14 +1,18 @@
 import os
-import re
-import subprocess
+import argparse
 from pathlib import Path
 
+from build_inputs import check_inputs, save_state
+from gradle_log import ERROR_PATTERN, run_and_tee, tail_lines as read_tail
+from gradle_session import GradleSession
+from gradle_timeline import analyze_log
+import run_metrics
+
 project_path = r"F:\homeletter2.0android251006\homeletterAPP"
 
 LOG_COMPILE = Path(project_path) / "compile_fixed.log"
 LOG_BUNDLE = Path(project_path) / "bundle_fixed.log"
 
-ERROR_PATTERN = re.compile(r"(ERROR|FAILED|Unresolved)", re.IGNORECASE)
 TAIL_LINES = 400
 
 
@@ -16,7 +20,7 @@ def run_cmd(cmd_str: str) -> int:
     try:
         print(f"[RUN] {cmd_str}")
         # 使用 cmd /c 包裝以避免 NativeCommandError，並確保在專案根目錄執行
-        result = subprocess.run(["cmd", "/c", cmd_str], cwd=project_path)
+        result = run_metrics.run(["cmd", "/c", cmd_str], cwd=project_path, echo=True)
         return result.returncode
     except Exception as e:
         print(f"[NativeCommandError] {e}")
@@ -27,12 +31,8 @@ def tail_and_filter_log(log_path: Path, tail_lines: int = TAIL_LINES):
     if not log_path.exists():
         print(f"<LOG_NOT_FOUND> {log_path}")
         return
-    try:
-        text = log_path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        text = log_path.read_text(errors="ignore")
-    lines = text.splitlines()
-    tail = lines[-tail_lines:]
+    # 從檔尾反向讀取，不把整個 log 載入記憶體
+    tail = read_tail(log_path, tail_lines)
     print(f"=== Tail({tail_lines}) of {log_path.name} ===")
     for line in tail:
         print(line)
@@ -42,35 +42,104 @@ def tail_and_filter_log(log_path: Path, tail_lines: int = TAIL_LINES):
             print(line)
 
 
-def main():
+def run_gradle(args: str, log_path: Path, live: bool) -> int:
+    if not live:
+        return run_cmd(rf".\gradlew.bat {args} > {log_path.name} 2>&1")
+    # live：由 Python 接管輸出，邊寫 log 邊過濾錯誤
+    print(rf"[RUN] .\gradlew.bat {args} (tee -> {log_path.name})")
+    code, _ = run_and_tee(["cmd", "/c", rf".\gradlew.bat {args}"], log_path, cwd=project_path)
+    return code
+
+
+def list_aabs():
+    aab_dir = Path(project_path) / r"app\build\outputs\bundle\prodRelease"
+    return list(aab_dir.glob("*.aab"))
+
+
+def build_cold(clean: bool, live: bool) -> bool:
+    """舊流程：每一步都是全新 JVM（--no-daemon），compile 與 bundle 分兩次 Gradle 呼叫。"""
     # 1) clean
-    if run_cmd(r".\gradlew.bat clean") != 0:
+    if clean and run_cmd(r".\gradlew.bat clean") != 0:
         print("[clean] failed")
-        return
+        return False
 
     # 2) compile（全部輸出到檔案）
-    compile_cmd = r".\gradlew.bat :app:compileProdReleaseKotlin --stacktrace --info --console=plain --no-daemon > compile_fixed.log 2>&1"
-    if run_cmd(compile_cmd) != 0:
+    compile_args = ":app:compileProdReleaseKotlin --stacktrace --info --console=plain --no-daemon"
+    if run_gradle(compile_args, LOG_COMPILE, live) != 0:
         print("[compile] failed")
         tail_and_filter_log(LOG_COMPILE)
-        return
+        return False
 
-    # 3) 抽尾段與過濾錯誤（compile）
+    # 3) 抽尾段與過濾錯誤（compile）、task 時間軸
     tail_and_filter_log(LOG_COMPILE)
+    analyze_log(LOG_COMPILE).print_report()
 
     # 4) bundle（全部輸出到檔案）
-    bundle_cmd = r".\gradlew.bat :app:bundleProdRelease --stacktrace --info --console=plain --no-daemon --no-configuration-cache > bundle_fixed.log 2>&1"
-    if run_cmd(bundle_cmd) != 0:
+    bundle_args = ":app:bundleProdRelease --stacktrace --info --console=plain --no-daemon --no-configuration-cache"
+    if run_gradle(bundle_args, LOG_BUNDLE, live) != 0:
         print("[bundle] failed")
         tail_and_filter_log(LOG_BUNDLE)
-        return
+        return False
 
     # Bundle tail & errors
     tail_and_filter_log(LOG_BUNDLE)
+    analyze_log(LOG_BUNDLE).print_report()
+    return True
+
+
+def build_session(session: GradleSession, clean: bool) -> bool:
+    """warm daemon：clean / compile / bundle 合併為一個 task graph，錯誤仍依步驟歸屬。"""
+    steps = [("clean", ":app:clean")] if clean else []
+    steps += [("compile", ":app:compileProdReleaseKotlin"), ("bundle", ":app:bundleProdRelease")]
+    result = session.run(steps, LOG_BUNDLE, extra_args=["--stacktrace", "--info", "--no-configuration-cache"])
+    result.print_summary()
+    if not result.ok:
+        failed = result.failed_step()
+        print(f"[{failed.name if failed else 'gradle'}] failed")
+    tail_and_filter_log(LOG_BUNDLE)
+    result.timeline.print_report()
+    return result.ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile and bundle prodRelease, then surface Gradle errors")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip gradle clean; skip the build entirely when inputs are unchanged and an AAB exists")
+    parser.add_argument("--live", action="store_true",
+                        help="Tee Gradle output through ERROR_PATTERN while it runs and report the first failure immediately")
+    parser.add_argument("--cold", action="store_true",
+                        help="Previous behaviour: --no-daemon and separate compile/bundle invocations")
+    parser.add_argument("--stop-daemon", action="store_true", help="Stop the warm Gradle daemon when done")
+    args = parser.parse_args()
+
+    # 輸入指紋一律在建置前計算，建置成功後寫回，下次 --incremental 即可沿用
+    unchanged, fingerprint, files = check_inputs(project_path)
+    if args.incremental:
+        aabs = list_aabs()
+        if unchanged and aabs:
+            print("[INCREMENTAL] Inputs unchanged and AAB present; skipping build.")
+            print("=== AAB paths ===")
+            for p in aabs:
+                print(str(p))
+            return
+        print(f"[INCREMENTAL] Inputs {'unchanged (no AAB yet)' if unchanged else 'changed'}; skipping clean.")
+
+    session = GradleSession(project_path)
+    try:
+        if args.cold:
+            ok = build_cold(not args.incremental, args.live)
+        else:
+            ok = build_session(session, not args.incremental)
+    finally:
+        if args.stop_daemon and not args.cold:
+            session.stop()
+    if not ok:
+        return
 
     # 5) 列出 AAB 路徑
-    aab_dir = Path(project_path) / r"app\build\outputs\bundle\prodRelease"
-    aabs = list(aab_dir.glob("*.aab"))
+    aabs = list_aabs()
+    if aabs:
+        save_state(project_path, fingerprint, files)
     print("=== AAB paths ===")
     if aabs:
         for p in aabs:
@@ -80,4 +149,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.session("compose_fix_build_and_bundle"):
+        main()
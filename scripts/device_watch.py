@@ -0,0 +1,226 @@
+"""
+事件驅動的裝置 / keystore 監看：
+- 裝置：訂閱 adb server 的 host:track-devices，裝置一連上（state == "device"）立即觸發
+- keystore：有安裝 watchdog 時使用檔案系統通知；否則退回 stat 迴圈（只呼叫 os.stat，不啟動任何子行程）
+兩個來源都把事件丟進同一個 queue，呼叫端以 wait() 阻塞到第一個事件或逾時。
+
+用法：
+  python scripts/device_watch.py --selfcheck   # 對 FakeAdbServer 替身檢查裝置事件與 keystore 事件（含 stat 迴圈）
+"""
+
+import argparse
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import adb_client
+from checks import Checks
+
+RECONNECT_DELAY = 1.0
+
+
+class DeviceKeystoreWatcher:
+    def __init__(self, keystore_path=None, stat_interval: float = 0.5,
+                 adb_host: str = adb_client.ADB_HOST, adb_port: int = adb_client.ADB_PORT):
+        self.keystore_path = Path(keystore_path) if keystore_path else None
+        self.stat_interval = stat_interval
+        self.adb_host = adb_host
+        self.adb_port = adb_port
+        self.events = queue.Queue()
+        self.adb_available = False
+        self._stop = threading.Event()
+        self._threads = []
+        self._observer = None
+
+    # -- 裝置 -----------------------------------------------------------------
+
+    def _track_devices(self):
+        announced = set()
+        while not self._stop.is_set():
+            try:
+                for devices in adb_client.track_devices(self.adb_host, self.adb_port, stop=self._stop):
+                    ready = {serial for serial, state in devices if state == "device"}
+                    for serial in sorted(ready - announced):
+                        self.events.put(("device", serial))
+                    announced = ready
+            except (OSError, adb_client.AdbError):
+                # server 重啟或尚未啟動：稍後重連（track-devices 重連後會先送一次完整清單）
+                if not self._stop.wait(RECONNECT_DELAY):
+                    adb_client.ensure_server(self.adb_host, self.adb_port)
+
+    # -- keystore ------------------------------------------------------------
+
+    def _start_fs_watch(self) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler  # type: ignore
+            from watchdog.observers import Observer  # type: ignore
+        except Exception:
+            return False
+        parent = self.keystore_path.parent
+        if not parent.is_dir():
+            return False
+        target = self.keystore_path.resolve()
+        events = self.events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for attr in ("src_path", "dest_path"):
+                    p = getattr(event, attr, None)
+                    if p and Path(p).resolve() == target and target.exists():
+                        events.put(("keystore", str(target)))
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), str(parent), recursive=False)
+        self._observer.start()
+        return True
+
+    def _stat_loop(self):
+        while not self._stop.wait(self.stat_interval):
+            if self.keystore_path.exists():
+                self.events.put(("keystore", str(self.keystore_path)))
+                return
+
+    # -- 控制 -----------------------------------------------------------------
+
+    def start(self):
+        self.adb_available = adb_client.ensure_server(self.adb_host, self.adb_port)
+        if self.adb_available:
+            self._spawn(self._track_devices)
+        if self.keystore_path:
+            if self.keystore_path.exists():
+                self.events.put(("keystore", str(self.keystore_path)))
+            elif not self._start_fs_watch():
+                self._spawn(self._stat_loop)
+        return self
+
+    def _spawn(self, target):
+        t = threading.Thread(target=target, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def wait(self, timeout: float):
+        """阻塞直到第一個事件；回傳 (kind, detail) 或逾時時回傳 None。"""
+        try:
+            return self.events.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+        for t in self._threads:
+            t.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def wait_for_device_or_keystore(keystore_path, timeout_sec: float, stat_interval: float = 0.5):
+    """第一個事件到達（或逾時）後回傳 (ks_ok, dev_ok)；另一個條件也順便以 stat / socket 查詢一次。"""
+    deadline = time.monotonic() + timeout_sec
+    with DeviceKeystoreWatcher(keystore_path, stat_interval) as watcher:
+        event = watcher.wait(deadline - time.monotonic())
+        if event:
+            print(f"[EVENT] {event[0]}: {event[1]}")
+        kind = event[0] if event else None
+        ks_ok = kind == "keystore" or bool(keystore_path and Path(keystore_path).exists())
+        dev_ok = kind == "device"
+        if not dev_ok and watcher.adb_available:
+            try:
+                dev_ok = any(state == "device" for _, state in adb_client.devices(watcher.adb_host, watcher.adb_port))
+            except (OSError, adb_client.AdbError):
+                pass
+        return ks_ok, dev_ok
+
+
+# -- 自我檢查 -----------------------------------------------------------------
+
+EVENT_BOUND = 1.0
+
+
+def _timed_wait(watcher, bound: float):
+    t0 = time.monotonic()
+    event = watcher.wait(bound)
+    return event, time.monotonic() - t0
+
+
+def selfcheck() -> bool:
+    """對 FakeAdbServer 替身：裝置連上 / 重新連上的事件與延遲、keystore 建立事件（stat 迴圈與 watchdog）。"""
+    from fake_adb_server import FakeAdbServer
+
+    check = Checks("WATCH")
+    with FakeAdbServer(devices={}) as server, tempfile.TemporaryDirectory() as tmp:
+        # 1. 裝置：offline 不觸發；變成 device 後在 EVENT_BOUND 內觸發，拔掉再接上會再觸發一次
+        with DeviceKeystoreWatcher(adb_port=server.port) as watcher:
+            check(watcher.adb_available, "watcher could not reach the fake adb server")
+            server.set_device("emulator-5554", "offline")
+            event, _ = _timed_wait(watcher, 0.3)
+            check(event is None, f"offline device fired {event}")
+            server.set_device("emulator-5554", "device")
+            event, waited = _timed_wait(watcher, EVENT_BOUND)
+            check(event == ("device", "emulator-5554"), f"device attach: expected a device event, got {event}")
+            check(waited < EVENT_BOUND, f"device event took {waited:.2f}s")
+            server.remove_device("emulator-5554")
+            server.set_device("emulator-5554", "device")
+            event, _ = _timed_wait(watcher, EVENT_BOUND)
+            check(event == ("device", "emulator-5554"), f"device re-attach: expected a device event, got {event}")
+        server.remove_device("emulator-5554")
+
+        # 2. keystore：stat 迴圈（沒有 watchdog 時的路徑，這裡強制使用），有 watchdog 時也檢查檔案系統通知
+        modes = ["stat"]
+        try:
+            import watchdog  # type: ignore  # noqa: F401
+            modes.append("watchdog")
+        except ImportError:
+            print("[INFO] watchdog not installed; only the stat-loop fallback is checked")
+        for mode in modes:
+            ks = Path(tmp) / f"{mode}.jks"
+            watcher = DeviceKeystoreWatcher(ks, stat_interval=0.05, adb_port=server.port)
+            if mode == "stat":
+                watcher._start_fs_watch = lambda: False
+            with watcher:
+                event, _ = _timed_wait(watcher, 0.2)
+                check(event is None, f"{mode}: event {event} before the keystore existed")
+                ks.write_bytes(b"keystore")
+                event, waited = _timed_wait(watcher, EVENT_BOUND)
+                check(event is not None and event[0] == "keystore" and Path(event[1]).resolve() == ks.resolve(),
+                      f"{mode}: expected a keystore event, got {event}")
+                check(waited < EVENT_BOUND, f"{mode}: keystore event took {waited:.2f}s")
+                check(mode != "stat" or not watcher._observer, "stat mode started a filesystem observer")
+
+        # 3. 已存在的 keystore 立即觸發；stop() 不會卡住
+        with DeviceKeystoreWatcher(Path(tmp) / "stat.jks", adb_port=server.port) as watcher:
+            event, waited = _timed_wait(watcher, EVENT_BOUND)
+            check(event is not None and event[0] == "keystore" and waited < 0.1,
+                  f"existing keystore: got {event} after {waited:.2f}s")
+            t0 = time.monotonic()
+        check(time.monotonic() - t0 < 2.0, f"stop() took {time.monotonic() - t0:.2f}s")
+
+    return check.done("device_watch selfcheck: device attach/re-attach, keystore via stat loop"
+                      + (" and watchdog" if "watchdog" in modes else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch for an adb device or the release keystore")
+    parser.add_argument("--keystore", help="Keystore path to watch")
+    parser.add_argument("--timeout", type=float, default=600, help="Max wait seconds (default: 600)")
+    parser.add_argument("--selfcheck", action="store_true", help="Check device and keystore events against a fake adb server")
+    args = parser.parse_args()
+
+    if args.selfcheck:
+        sys.exit(0 if selfcheck() else 1)
+    ks_ok, dev_ok = wait_for_device_or_keystore(args.keystore, args.timeout)
+    print(f"[READY] ks_ok={ks_ok}, dev_ok={dev_ok}" if ks_ok or dev_ok else "<TIMEOUT>")
+    sys.exit(0 if ks_ok or dev_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,20 @@
 import os
 import shutil
-import subprocess
 from pathlib import Path
 
+import run_metrics
+from download_cache import DownloadCache
+
 project_path = r"F:\homeletter2.0android251006\homeletterAPP"
 bundletool_url = "https://github.com/google/bundletool/releases/download/1.18.2/bundletool-all-1.18.2.jar"
+# 可釘選 SHA-256（例如 CI 環境）；未設定時以 ETag/大小判斷快取
+bundletool_sha256 = os.environ.get("BUNDLETOOL_SHA256") or None
 
 
 def run_cmd(cmd_str: str):
     try:
         print(f"[RUN] {cmd_str}")
-        result = subprocess.run(["cmd", "/c", cmd_str], cwd=project_path, capture_output=True, text=True)
+        result = run_metrics.run(["cmd", "/c", cmd_str], cwd=project_path)
         print(result.stdout)
         if result.stderr:
             print(result.stderr)
@@ -21,31 +25,12 @@ def run_cmd(cmd_str: str):
 
 
 def download_bundletool(dest_path: Path):
+    # 透過共用下載快取：已下載過的版本直接由快取複製，中斷可續傳
     try:
-        import requests  # type: ignore
-        print("[INFO] Using requests to download bundletool...")
-        r = requests.get(bundletool_url, stream=True, timeout=120, allow_redirects=True)
-        r.raise_for_status()
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(dest_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        DownloadCache().fetch(bundletool_url, sha256=bundletool_sha256, dest=dest_path)
     except Exception as e:
-        print(f"[requests_unavailable_or_failed] {e}")
-        try:
-            print("[INFO] Fallback to urllib to download bundletool...")
-            import urllib.request
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            with urllib.request.urlopen(bundletool_url, timeout=120) as resp, open(dest_path, "wb") as f:
-                while True:
-                    chunk = resp.read(8192)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-        except Exception as e2:
-            print(f"[urllib_failed] {e2}")
-            return False
+        print(f"[download_failed] {e}")
+        return False
     # Basic validation
     try:
         size = dest_path.stat().st_size
@@ -94,4 +79,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.session("download_bundletool_and_verify"):
+        main()
\ No newline at end of file
@@ -0,0 +1,385 @@
+"""
+共用下載子系統（bundletool、platform-tools）：
+- 以 SHA-256 為鍵的內容定址快取，位於使用者快取目錄；依總大小做 LRU 淘汰（存取時更新 mtime）
+- 伺服器支援 Range 時以多條連線平行下載；.part 檔與進度 sidecar 讓中斷後可續傳
+- 1 MB 緩衝寫入；完成後驗證釘選的 SHA-256（若有）再原子性地放進快取
+- 未釘選的網址（例如 platform-tools-latest）以 ETag/Content-Length 判斷快取是否仍有效，並印出 <UNPINNED_DOWNLOAD> 警告與實際 SHA-256，
+  方便釘選；HEAD 失敗（離線、伺服器錯誤）時沿用該網址最後一次快取的檔案
+
+快取目錄：HOMELETTER_CACHE_DIR > %LOCALAPPDATA%\\homeletter\\cache > $XDG_CACHE_HOME/homeletter > ~/.cache/homeletter
+可把 url 指向本機 HTTP 替身伺服器來測試（見 fake_download_server.py；只需支援 HEAD 與 Range: bytes=a-b）。
+
+用法：
+  python scripts/download_cache.py URL [--sha256 HEX] [--dest PATH]
+  python scripts/download_cache.py --evict [--max-mb 2048]
+  python scripts/download_cache.py --selfcheck      # 以替身伺服器檢查續傳、淘汰、SHA-256 與 HEAD 失敗的處理
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from checks import Checks
+
+CHUNK = 1024 * 1024
+PARALLEL_MIN_SIZE = 8 * 1024 * 1024
+DEFAULT_CONNECTIONS = 4
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+STATE_FLUSH_BYTES = 4 * 1024 * 1024
+TIMEOUT = 120
+
+
+def cache_root() -> Path:
+    env = os.environ.get("HOMELETTER_CACHE_DIR")
+    if env:
+        return Path(env)
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "homeletter" / "cache"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".cache") / "homeletter"
+
+
+class DownloadError(Exception):
+    pass
+
+
+class RangeNotSupported(DownloadError):
+    pass
+
+
+class DownloadCache:
+    def __init__(self, root=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else cache_root() / "downloads"
+        self.blobs = self.root / "sha256"
+        self.partial = self.root / "partial"
+        self.index_path = self.root / "urls.json"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # -- 快取索引 -------------------------------------------------------------
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blobs / sha256.lower()
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    def _save_index(self, index: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(index, indent=1), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def lookup(self, sha256: str):
+        p = self.blob_path(sha256)
+        if p.exists():
+            os.utime(p)  # LRU：最近使用
+            return p
+        return None
+
+    def evict(self, max_bytes: int | None = None):
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        if not self.blobs.exists():
+            return []
+        entries = sorted((p.stat().st_mtime, p.stat().st_size, p) for p in self.blobs.iterdir() if p.is_file())
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, p in entries:
+            if total <= limit:
+                break
+            try:
+                p.unlink()
+                total -= size
+                removed.append(p.name)
+            except OSError:
+                pass
+        if removed:
+            index = self._load_index()
+            index = {u: meta for u, meta in index.items() if meta.get("sha256") not in removed}
+            self._save_index(index)
+        return removed
+
+    # -- 下載 -----------------------------------------------------------------
+
+    def fetch(self, url: str, sha256: str | None = None, dest=None, connections: int = DEFAULT_CONNECTIONS) -> Path:
+        """回傳快取中的檔案路徑；dest 若指定則另外複製一份過去。"""
+        pinned = sha256.lower() if sha256 else None
+        blob = self.lookup(pinned) if pinned else None
+        remote = None
+        if not blob and not pinned:
+            remote = self._head(url)
+            meta = self._load_index().get(url)
+            if meta and remote["validator"] and meta.get("validator") == remote["validator"]:
+                blob = self.lookup(meta["sha256"])
+            elif meta and not remote["ok"]:
+                # 無法確認遠端是否更新：沿用最後一次下載的版本，總比完全無法使用好
+                blob = self.lookup(meta["sha256"])
+                if blob:
+                    print(f"[WARN] HEAD failed; using the last cached copy of {url} "
+                          f"(fetched {time.strftime('%Y-%m-%d %H:%M', time.localtime(meta.get('fetched_at', 0)))})")
+        if blob:
+            print(f"[CACHE_HIT] {url} -> {blob.name[:12]}…")
+        else:
+            blob = self._download(url, pinned, remote or self._head(url), connections)
+        if dest:
+            dest = Path(dest)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(blob, dest)
+        return blob
+
+    def _head(self, url: str) -> dict:
+        info = {"url": url, "size": None, "ranges": False, "validator": None, "ok": False}
+        try:
+            req = urllib.request.Request(url, method="HEAD")
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+                info["url"] = resp.geturl()
+                length = resp.headers.get("Content-Length")
+                info["size"] = int(length) if length and length.isdigit() else None
+                info["ranges"] = "bytes" in (resp.headers.get("Accept-Ranges") or "").lower()
+                etag = resp.headers.get("ETag")
+                modified = resp.headers.get("Last-Modified")
+                if etag or modified:
+                    info["validator"] = f"{etag or ''}|{modified or ''}|{info['size']}"
+                info["ok"] = True
+        except Exception as e:
+            print(f"[HEAD_failed] {e}; falling back to a single stream")
+        return info
+
+    def _state_paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.partial / f"{key}.part", self.partial / f"{key}.json"
+
+    def _download(self, url: str, pinned, remote: dict, connections: int) -> Path:
+        self.partial.mkdir(parents=True, exist_ok=True)
+        part, state_path = self._state_paths(url)
+        size = remote["size"]
+        state = None
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+        # 遠端檔案變了（大小或 validator 不同）就不能續傳
+        if not state or state.get("size") != size or state.get("validator") != remote["validator"] or not part.exists():
+            state = None
+        if size and remote["ranges"]:
+            if state is None:
+                n = max(1, min(connections, size // PARALLEL_MIN_SIZE or 1))
+                step = -(-size // n)
+                state = {"size": size, "validator": remote["validator"],
+                         "ranges": [[i, min(i + step, size) - 1, 0] for i in range(0, size, step)]}
+                with open(part, "wb") as f:
+                    f.truncate(size)
+            resumed = sum(r[2] for r in state["ranges"])
+            if resumed:
+                print(f"[RESUME] {resumed}/{size} bytes already on disk")
+            print(f"[DOWNLOAD] {url} ({size} bytes, {len(state['ranges'])} range(s))")
+            try:
+                self._fetch_ranges(remote["url"], part, state, state_path)
+            except RangeNotSupported as e:
+                print(f"[WARN] {e}; retrying as a single stream")
+                state_path.unlink(missing_ok=True)
+                self._fetch_stream(remote["url"], part)
+        else:
+            print(f"[DOWNLOAD] {url} (single stream)")
+            self._fetch_stream(remote["url"], part)
+        digest = _sha256_file(part)
+        if pinned and digest != pinned:
+            part.unlink(missing_ok=True)
+            state_path.unlink(missing_ok=True)
+            raise DownloadError(f"SHA-256 mismatch for {url}: expected {pinned}, got {digest}")
+        if not pinned:
+            print(f"[WARN] <UNPINNED_DOWNLOAD> {url} was not checked against a pinned SHA-256; "
+                  f"pin it with --sha256 {digest} (or the matching *_SHA256 environment variable)")
+        blob = self.blob_path(digest)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        os.replace(part, blob)
+        state_path.unlink(missing_ok=True)
+        index = self._load_index()
+        index[url] = {"sha256": digest, "validator": remote["validator"], "size": blob.stat().st_size,
+                      "fetched_at": int(time.time())}
+        self._save_index(index)
+        print(f"[OK] Cached {blob.stat().st_size} bytes as sha256:{digest}")
+        self.evict()
+        return blob
+
+    def _fetch_ranges(self, url: str, part: Path, state: dict, state_path: Path):
+        def save_state():
+            with self._lock:
+                tmp = state_path.with_suffix(".tmp")
+                tmp.write_text(json.dumps(state), encoding="utf-8")
+                os.replace(tmp, state_path)
+
+        def worker(rng):
+            start, end, done = rng
+            if start + done > end:
+                return
+            req = urllib.request.Request(url, headers={"Range": f"bytes={start + done}-{end}"})
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as resp, open(part, "r+b") as f:
+                if resp.status != 206:
+                    raise RangeNotSupported(f"server ignored Range request (HTTP {resp.status})")
+                f.seek(start + done)
+                unflushed = 0
+                while True:
+                    chunk = resp.read(CHUNK)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    rng[2] += len(chunk)
+                    unflushed += len(chunk)
+                    if unflushed >= STATE_FLUSH_BYTES:
+                        f.flush()
+                        save_state()
+                        unflushed = 0
+                f.flush()
+            if start + rng[2] <= end:
+                raise DownloadError(f"range {start}-{end} ended early at {start + rng[2]}")
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(state["ranges"])) as pool:
+                for fut in [pool.submit(worker, rng) for rng in state["ranges"]]:
+                    fut.result()
+        finally:
+            save_state()
+
+    def _fetch_stream(self, url: str, part: Path):
+        with urllib.request.urlopen(url, timeout=TIMEOUT) as resp, open(part, "wb") as f:
+            shutil.copyfileobj(resp, f, CHUNK)
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# -- 自我檢查 -----------------------------------------------------------------
+
+def selfcheck() -> bool:
+    """對 fake_download_server 的替身跑一輪：平行 Range、續傳、SHA-256、HEAD 失敗、淘汰與不支援 Range 的伺服器。"""
+    import tempfile
+    from fake_download_server import FakeDownloadServer, random_bytes
+
+    check = Checks("DOWNLOAD")
+    big = random_bytes(20 * 1024 * 1024, seed=1)
+    small = random_bytes(300 * 1024, seed=2)
+    big_sha = hashlib.sha256(big).hexdigest()
+    with tempfile.TemporaryDirectory() as tmp, FakeDownloadServer(files={"/big.bin": big, "/small.bin": small}) as srv:
+        cache = DownloadCache(Path(tmp) / "c1")
+        url = srv.url("/big.bin")
+
+        # 1. 首次下載：多條 Range 連線，內容與 SHA-256 正確並寫進索引
+        blob = cache.fetch(url, sha256=big_sha)
+        ranged = [r for m, _, r in srv.requests if m == "GET" and r]
+        check(blob.read_bytes() == big, "first download content differs")
+        check(len(ranged) >= 2, f"expected parallel Range requests, saw {len(ranged)}")
+        check(cache._load_index().get(url, {}).get("sha256") == big_sha, "index entry missing after download")
+
+        # 2. 釘選命中：完全不連線；未釘選命中：只送 HEAD
+        srv.reset_counters()
+        cache.fetch(url, sha256=big_sha)
+        check(not srv.requests, f"pinned cache hit still sent {len(srv.requests)} request(s)")
+        cache.fetch(url)
+        check(srv.gets() == 0, "unpinned cache hit re-downloaded the file")
+
+        # 3. HEAD 失敗：沿用該網址最後一次的快取，不重新下載
+        srv.reset_counters()
+        srv.fail_head = True
+        try:
+            blob = cache.fetch(url)
+            check(blob.name == big_sha and srv.gets() == 0, "HEAD failure did not fall back to the cached blob")
+        except Exception as e:
+            check(False, f"HEAD failure with a cached blob raised {e}")
+        srv.fail_head = False
+
+        # 4. 中斷後續傳：第一次只收到部分位元組就失敗，第二次只補抓剩下的部分
+        resume = DownloadCache(Path(tmp) / "c2")
+        srv.reset_counters()
+        srv.drop_after = 3 * 1024 * 1024
+        try:
+            resume.fetch(url, sha256=big_sha)
+            check(False, "interrupted download did not fail")
+        except Exception:
+            pass
+        part, state_path = resume._state_paths(url)
+        check(part.exists() and state_path.exists(), "interrupted download left no .part/state to resume")
+        srv.reset_counters()
+        blob = resume.fetch(url, sha256=big_sha)
+        check(blob.read_bytes() == big, "resumed download content differs")
+        check(srv.served <= len(big) - 3 * 1024 * 1024,
+              f"resume re-fetched {srv.served} bytes (already had 3 MB)")
+        check(not part.exists() and not state_path.exists(), "resume left partial files behind")
+
+        # 5. SHA-256 不符：拋出 DownloadError，不留下 blob 或 .part
+        bad = DownloadCache(Path(tmp) / "c3")
+        try:
+            bad.fetch(srv.url("/small.bin"), sha256="0" * 64)
+            check(False, "digest mismatch was accepted")
+        except DownloadError:
+            pass
+        part, _ = bad._state_paths(srv.url("/small.bin"))
+        check(not part.exists() and not any(bad.blobs.glob("*")), "digest mismatch left files behind")
+
+        # 6. 遠端內容變了（ETag 不同）：未釘選的網址重新下載
+        srv.files["/small.bin"] = small[::-1]
+        first = cache.fetch(srv.url("/small.bin"))
+        srv.files["/small.bin"] = small
+        second = cache.fetch(srv.url("/small.bin"))
+        check(first.name != second.name and second.read_bytes() == small, "changed ETag did not trigger a re-download")
+
+        # 7. 淘汰：超過上限時先刪最久沒用的 blob，並移除對應的索引
+        lru = DownloadCache(Path(tmp) / "c4", max_bytes=len(big) + len(small) // 2)
+        lru.fetch(srv.url("/small.bin"))
+        time.sleep(0.05)
+        lru.fetch(url)
+        index = lru._load_index()
+        check(not lru.blob_path(hashlib.sha256(small).hexdigest()).exists(), "LRU blob was not evicted")
+        check(srv.url("/small.bin") not in index and url in index, "index not updated after eviction")
+
+    # 8. 伺服器忽略 Range：改用單一串流仍能完成
+    with tempfile.TemporaryDirectory() as tmp, FakeDownloadServer(files={"/big.bin": big}, ranges=False) as srv:
+        blob = DownloadCache(Path(tmp)).fetch(srv.url("/big.bin"), sha256=big_sha)
+        check(blob.read_bytes() == big and srv.gets() == 1, "single-stream fallback failed")
+
+    return check.done("download cache selfcheck: ranges, resume, digest, HEAD fallback, eviction")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch a file through the shared download cache")
+    parser.add_argument("url", nargs="?", help="URL to fetch")
+    parser.add_argument("--sha256", help="Pinned SHA-256 of the file")
+    parser.add_argument("--dest", help="Copy the cached file here")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="Parallel Range connections")
+    parser.add_argument("--evict", action="store_true", help="Only run LRU eviction")
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Cache size limit in MB")
+    parser.add_argument("--selfcheck", action="store_true", help="Exercise the cache against a local stand-in server")
+    args = parser.parse_args()
+    if args.selfcheck:
+        sys.exit(0 if selfcheck() else 1)
+    cache = DownloadCache(max_bytes=args.max_mb * 1024 * 1024)
+    if args.evict:
+        removed = cache.evict()
+        print(f"Evicted {len(removed)} blob(s) from {cache.blobs}")
+        return
+    if not args.url:
+        parser.error("url is required unless --evict is given")
+    print(cache.fetch(args.url, args.sha256, args.dest, args.connections))
+
+
+if __name__ == "__main__":
+    main()
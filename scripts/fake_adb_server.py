@@ -0,0 +1,402 @@
+"""
+本機 adb server 替身（開發/驗證用，不需要真的 adb 或裝置）：
+- host:version、host:devices、host:devices-l、host:track-devices、host:kill（只計數 killed，不會真的結束）
+- set_device() / remove_device() 會立即推送給所有 track-devices 訂閱者
+- host:transport:<serial> / host:transport-any 之後可用 shell:<cmd>（由 shell_handler 或 shell_responses 回應）
+  與 sync:（STAT/RECV/SEND/QUIT，檔案存在記憶體中的 files[serial]）
+- 沒有對應的 shell 回應時，以 packages[serial] 模擬套件管理：pm path、dumpsys package、sha256sum、
+  pm install-create/-write/-commit/-abandon（寫入的 APK 取自 files[serial]）與 rm -f
+- logcat（-v threadtime、-T N、-d、-c）：串流 logcat[serial]，log() 加入的新紀錄即時送出
+- am force-stop / am start -W -n：已安裝的套件回傳 TotalTime/WaitTime（依 launch_ms 與固定種子的亂數），
+  並寫入 ActivityTaskManager 的 "Displayed" 紀錄
+
+用法（另開一個終端機）：
+  python scripts/fake_adb_server.py --port 5038 --attach-after 3 emulator-5554
+  set ANDROID_ADB_SERVER_PORT=5038 && python scripts/auto_rerun_on_device_or_keystore.py
+"""
+
+import argparse
+import hashlib
+import random
+import shlex
+import socketserver
+import stat as stat_mod
+import struct
+import threading
+import time
+
+ADB_SERVER_VERSION = 41
+
+
+def _hex_block(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _read_request(self):
+        header = self._recv(4)
+        if not header:
+            return None
+        return self._recv(int(header, 16)).decode("utf-8")
+
+    def _recv(self, n):
+        buf = b""
+        while len(buf) < n:
+            chunk = self.request.recv(n - len(buf))
+            if not chunk:
+                return b""
+            buf += chunk
+        return buf
+
+    def _fail(self, message: str):
+        self.request.sendall(b"FAIL" + _hex_block(message))
+
+    def handle(self):
+        server = self.server
+        request = self._read_request()
+        if request is None:
+            return
+        server.requests.append(request)
+        if request == "host:version":
+            self.request.sendall(b"OKAY" + _hex_block(f"{ADB_SERVER_VERSION:04x}"))
+        elif request in ("host:devices", "host:devices-l"):
+            self.request.sendall(b"OKAY" + _hex_block(server.device_list(request.endswith("-l"))))
+        elif request == "host:kill":
+            self.request.sendall(b"OKAY")
+            server.killed += 1
+        elif request == "host:track-devices":
+            self.request.sendall(b"OKAY")
+            server.track(self.request)
+        elif request.startswith("host:transport"):
+            serial = server.resolve_transport(request)
+            if serial is None:
+                self._fail("device not found" if request != "host:transport-any" else "no devices/emulators found")
+                return
+            self.request.sendall(b"OKAY")
+            self._device_service(serial)
+        else:
+            self._fail(f"unsupported request: {request}")
+
+    def _device_service(self, serial: str):
+        server = self.server
+        service = self._read_request()
+        if service is None:
+            return
+        server.requests.append(f"{serial}:{service}")
+        if service.startswith("shell:"):
+            output = server.run_shell(serial, service[len("shell:"):])
+            self.request.sendall(b"OKAY")
+            if isinstance(output, str):
+                output = output.encode("utf-8")
+            if isinstance(output, bytes):
+                self.request.sendall(output)
+            else:
+                # 可迭代的輸出（例如模擬 logcat 串流）：逐段送出，客戶端關閉時結束
+                try:
+                    for chunk in output:
+                        self.request.sendall(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                except OSError:
+                    pass
+        elif service == "sync:":
+            self.request.sendall(b"OKAY")
+            self._sync(serial)
+        else:
+            self._fail(f"unsupported service: {service}")
+
+    def _sync(self, serial: str):
+        files = self.server.files.setdefault(serial, {})
+        while True:
+            header = self._recv(8)
+            if not header:
+                return
+            cmd, length = header[:4], struct.unpack("<I", header[4:])[0]
+            arg = self._recv(length) if length else b""
+            if cmd == b"QUIT":
+                return
+            if cmd == b"STAT":
+                data, mode, mtime = files.get(arg.decode("utf-8"), (b"", 0, 0))
+                self.request.sendall(b"STAT" + struct.pack("<III", mode, len(data) if mode else 0, mtime))
+            elif cmd == b"RECV":
+                entry = files.get(arg.decode("utf-8"))
+                if entry is None:
+                    msg = b"No such file or directory"
+                    self.request.sendall(b"FAIL" + struct.pack("<I", len(msg)) + msg)
+                    continue
+                data = entry[0]
+                for i in range(0, len(data), 64 * 1024):
+                    chunk = data[i:i + 64 * 1024]
+                    self.request.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                self.request.sendall(b"DONE" + struct.pack("<I", 0))
+            elif cmd == b"SEND":
+                path, _, mode = arg.decode("utf-8").rpartition(",")
+                chunks = []
+                while True:
+                    h = self._recv(8)
+                    c, n = h[:4], struct.unpack("<I", h[4:])[0]
+                    if c == b"DATA":
+                        chunks.append(self._recv(n))
+                    elif c == b"DONE":
+                        files[path] = (b"".join(chunks), int(mode or stat_mod.S_IFREG | 0o644), n)
+                        break
+                self.request.sendall(b"OKAY" + struct.pack("<I", 0))
+            else:
+                return
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int = 0, devices=None, handler=_Handler, shell_handler=None):
+        super().__init__(("127.0.0.1", port), handler)
+        self.devices = dict(devices or {})
+        self.requests = []
+        self.killed = 0
+        self.shell_responses = {}
+        self.shell_handler = shell_handler
+        self.files = {}
+        self.packages = {}
+        self._sessions = {}
+        self.logcat = {}
+        self.launch_ms = {}
+        self._running = {}
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+        self._log_cond = threading.Condition(self._lock)
+        self._stopping = False
+        self._trackers = []
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def device_list(self, long: bool = False) -> str:
+        with self._lock:
+            items = list(self.devices.items())
+        if long:
+            return "".join(f"{s}\t{st} product:fake model:Fake_Device device:fake transport_id:{i + 1}\n"
+                           for i, (s, st) in enumerate(items))
+        return "".join(f"{s}\t{st}\n" for s, st in items)
+
+    def resolve_transport(self, request: str):
+        with self._lock:
+            ready = [s for s, st in self.devices.items() if st == "device"]
+        if request == "host:transport-any":
+            return ready[0] if len(ready) == 1 else None
+        serial = request[len("host:transport:"):]
+        return serial if serial in ready else None
+
+    def run_shell(self, serial: str, command: str):
+        if self.shell_handler is not None:
+            return self.shell_handler(serial, command)
+        if command in self.shell_responses:
+            return self.shell_responses[command]
+        if command.startswith("logcat"):
+            return self.logcat_shell(serial, command)
+        if command.startswith("am "):
+            return self.am_shell(serial, command)
+        return self.package_shell(serial, command)
+
+    def _append_log(self, serial: str, tag: str, message: str, level: str, pid: int, tid: int):
+        """呼叫端需持有 self._lock。"""
+        now = time.time()
+        stamp = time.strftime("%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        self.logcat.setdefault(serial, []).append(f"{stamp} {pid:5d} {tid:5d} {level} {tag}: {message}\n")
+        self._log_cond.notify_all()
+
+    def log(self, serial: str, tag: str, message: str, level: str = "I", pid: int = 1000, tid: int | None = None):
+        with self._lock:
+            self._append_log(serial, tag, message, level, pid, pid if tid is None else tid)
+
+    def logcat_shell(self, serial: str, command: str):
+        args = command.split()
+        with self._lock:
+            lines = self.logcat.setdefault(serial, [])
+            if "-c" in args:
+                lines.clear()
+                return ""
+            if "-d" in args:
+                return "".join(lines)
+            start = max(0, len(lines) - int(args[args.index("-T") + 1])) if "-T" in args else 0
+
+        def stream(index=start):
+            while True:
+                with self._lock:
+                    while len(lines) <= index and not self._stopping:
+                        self._log_cond.wait(0.5)
+                    if self._stopping:
+                        return
+                    chunk, index = "".join(lines[index:]), len(lines)
+                yield chunk
+        return stream()
+
+    def am_shell(self, serial: str, command: str) -> str:
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            return ""
+        with self._lock:
+            running = self._running.setdefault(serial, set())
+            if args[:2] == ["am", "force-stop"] and len(args) > 2:
+                running.discard(args[2])
+                return ""
+            if args[:2] != ["am", "start"] or "-n" not in args:
+                return ""
+            component = args[args.index("-n") + 1]
+            package, _, activity = component.partition("/")
+            head = f"Starting: Intent {{ cmp={component} }}\n"
+            if package not in self.packages.get(serial, {}):
+                full = package + activity if activity.startswith(".") else activity
+                return head + f"Error type 3\nError: Activity class {{{package}/{full}}} does not exist.\n"
+            state = "WARM" if package in running else "COLD"
+            running.add(package)
+            base = self.launch_ms.get(activity, 450) * (1 if state == "COLD" else 0.35)
+            total = max(1, int(base * self._rng.lognormvariate(0, 0.08)))
+            wait = total + self._rng.randint(3, 20)
+            self._append_log(serial, "ActivityTaskManager", f"Displayed {component}: +{total}ms", "I", 1500, 1530)
+        if "-W" not in args:
+            return head
+        return (head + f"Status: ok\nLaunchState: {state}\nActivity: {component}\nTotalTime: {total}\n"
+                f"WaitTime: {wait}\nComplete\n")
+
+    def install_package(self, serial: str, package: str, apks: dict, version_code: int = 1, signatures=("0",)):
+        """apks：{"base.apk": bytes, "split_config.xxhdpi.apk": bytes, ...}"""
+        with self._lock:
+            self.packages.setdefault(serial, {})[package] = {
+                "version_code": version_code, "signatures": list(signatures), "apks": dict(apks)}
+
+    def package_shell(self, serial: str, command: str) -> str:
+        try:
+            args = shlex.split(command)
+        except ValueError:
+            return ""
+        with self._lock:
+            packages = self.packages.setdefault(serial, {})
+            files = self.files.setdefault(serial, {})
+            paths = {f"/data/app/~~fake==/{pkg}-1/{name}": data
+                     for pkg, p in packages.items() for name, data in p["apks"].items()}
+            if args[:2] == ["pm", "path"] and len(args) > 2:
+                pkg = packages.get(args[2])
+                return "".join(f"package:/data/app/~~fake==/{args[2]}-1/{n}\n" for n in pkg["apks"]) if pkg else ""
+            if args[:2] == ["dumpsys", "package"] and len(args) > 2:
+                pkg = packages.get(args[2])
+                if not pkg:
+                    return ""
+                return (f"Packages:\n  Package [{args[2]}] (fake):\n    versionCode={pkg['version_code']} minSdk=21 "
+                        f"targetSdk=34\n    signatures=PackageSignatures{{fake version:2, signatures:"
+                        f"[{', '.join(pkg['signatures'])}], past signatures:[]}}\n")
+            if args[:1] == ["sha256sum"]:
+                return "".join(f"{hashlib.sha256(paths[p]).hexdigest()}  {p}\n" if p in paths
+                               else f"sha256sum: {p}: No such file or directory\n" for p in args[1:])
+            if args[:2] == ["pm", "install-create"]:
+                session = str(1000 + len(self._sessions))
+                pkg = args[args.index("--pkg") + 1] if "--pkg" in args else None
+                self._sessions[session] = {"package": pkg, "inherit": "-p" in args, "apks": {}}
+                return f"Success: created install session [{session}]\n"
+            if args[:2] == ["pm", "install-write"] and len(args) >= 5:
+                rest = [a for a in args[2:] if a != "-S"][1:]  # 去掉 -S 的值
+                session, name, path = rest[0], rest[1], rest[2]
+                if session not in self._sessions or path not in files:
+                    return "Failure [INSTALL_FAILED_INVALID_APK]\n"
+                self._sessions[session]["apks"][f"{name}.apk"] = files[path][0]
+                return f"Success: streamed {len(files[path][0])} bytes\n"
+            if args[:2] == ["pm", "install-commit"] and len(args) > 2:
+                session = self._sessions.pop(args[2], None)
+                if not session or not session["package"]:
+                    return "Failure [INSTALL_FAILED_INTERNAL_ERROR]\n"
+                current = packages.get(session["package"])
+                apks = dict(current["apks"]) if current and session["inherit"] else {}
+                apks.update(session["apks"])
+                packages[session["package"]] = {
+                    "version_code": current["version_code"] if current else 1,
+                    "signatures": current["signatures"] if current else ["0"], "apks": apks}
+                return "Success\n"
+            if args[:2] == ["pm", "install-abandon"] and len(args) > 2:
+                self._sessions.pop(args[2], None)
+                return "Success\n"
+            if args[:2] == ["rm", "-f"]:
+                for p in args[2:]:
+                    files.pop(p, None)
+                return ""
+        return ""
+
+    def track(self, sock):
+        with self._lock:
+            self._trackers.append(sock)
+        self._push(sock)
+        # 保持連線直到客戶端關閉
+        try:
+            while sock.recv(1):
+                pass
+        except OSError:
+            pass
+        with self._lock:
+            if sock in self._trackers:
+                self._trackers.remove(sock)
+
+    def _push(self, sock):
+        try:
+            sock.sendall(_hex_block(self.device_list()))
+        except OSError:
+            pass
+
+    def _broadcast(self):
+        with self._lock:
+            trackers = list(self._trackers)
+        for sock in trackers:
+            self._push(sock)
+
+    def set_device(self, serial: str, state: str = "device"):
+        with self._lock:
+            self.devices[serial] = state
+        self._broadcast()
+
+    def remove_device(self, serial: str):
+        with self._lock:
+            self.devices.pop(serial, None)
+        self._broadcast()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._log_cond.notify_all()
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stand-in adb server for local testing")
+    parser.add_argument("--port", type=int, default=5038, help="Port to listen on (default: 5038)")
+    parser.add_argument("--device", action="append", default=[], help="Serial attached from the start (repeatable)")
+    parser.add_argument("--attach-after", nargs=2, metavar=("SECONDS", "SERIAL"),
+                        help="Attach SERIAL after SECONDS to exercise device events")
+    args = parser.parse_args()
+    server = FakeAdbServer(args.port, {s: "device" for s in args.device})
+    server.start()
+    print(f"[FAKE_ADB] listening on 127.0.0.1:{server.port}")
+    try:
+        if args.attach_after:
+            time.sleep(float(args.attach_after[0]))
+            server.set_device(args.attach_after[1])
+            print(f"[FAKE_ADB] attached {args.attach_after[1]}")
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
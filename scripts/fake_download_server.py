@@ -0,0 +1,163 @@
+"""
+本機下載伺服器替身（開發/驗證 download_cache 用，不需要網路）：
+- files[路徑] = bytes，存在記憶體中；HEAD 回傳 Content-Length、ETag（內容 SHA-256 前 16 碼）與 Accept-Ranges
+- GET 支援 Range: bytes=a-b（206）；ranges=False 時忽略 Range、一律回 200 整檔
+- drop_after=N：接下來一次 GET 只送出 N 個位元組就中斷連線（Content-Length 仍為完整長度），用來測試續傳
+- fail_head=True：HEAD 一律回 503，模擬離線或伺服器故障
+- requests 記錄 (method, path, Range)；served 累計實際送出的內容位元組
+
+用法：
+  python scripts/fake_download_server.py --port 8765 --size-mb 20 /bundletool-all.jar
+  python scripts/download_cache.py http://127.0.0.1:8765/bundletool-all.jar
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)$")
+WRITE_CHUNK = 256 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _lookup(self):
+        server = self.server
+        header = self.headers.get("Range")
+        with server.lock:
+            server.requests.append((self.command, self.path, header))
+            data = server.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return None, None
+        return data, header
+
+    def _headers(self, status: int, data: bytes, length: int, extra=()):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", '"%s"' % hashlib.sha256(data).hexdigest()[:16])
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.server.fail_head:
+            with self.server.lock:
+                self.server.requests.append(("HEAD", self.path, None))
+            self.send_error(503)
+            return
+        data, _ = self._lookup()
+        if data is not None:
+            self._headers(200, data, len(data))
+
+    def do_GET(self):
+        server = self.server
+        data, header = self._lookup()
+        if data is None:
+            return
+        m = RANGE_RE.match(header or "") if server.ranges else None
+        if m:
+            start = int(m.group(1))
+            end = min(int(m.group(2)) if m.group(2) else len(data) - 1, len(data) - 1)
+            if start > end:
+                self.send_error(416)
+                return
+            body = data[start:end + 1]
+            self._headers(206, data, len(body), [("Content-Range", f"bytes {start}-{end}/{len(data)}")])
+        else:
+            body = data
+            self._headers(200, data, len(body))
+        with server.lock:
+            limit, server.drop_after = server.drop_after, None
+        if limit is not None:
+            body = body[:limit]
+        for i in range(0, len(body), WRITE_CHUNK):
+            chunk = body[i:i + WRITE_CHUNK]
+            self.wfile.write(chunk)
+            with server.lock:
+                server.served += len(chunk)
+        if limit is not None:
+            # 刻意在 Content-Length 之前中斷，讓用戶端看到不完整的回應
+            self.wfile.flush()
+            self.close_connection = True
+
+
+class FakeDownloadServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, files: dict | None = None, ranges: bool = True):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.port = self.server_address[1]
+        self.files = dict(files or {})
+        self.ranges = ranges
+        self.fail_head = False
+        self.drop_after = None
+        self.requests = []
+        self.served = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def gets(self) -> int:
+        with self.lock:
+            return sum(1 for method, _, _ in self.requests if method == "GET")
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests.clear()
+            self.served = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def random_bytes(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stand-in HTTP download server for local testing")
+    parser.add_argument("paths", nargs="+", help="URL paths to serve (e.g. /bundletool-all.jar)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--size-mb", type=float, default=20, help="Size of each generated file in MB")
+    parser.add_argument("--no-ranges", action="store_true", help="Ignore Range requests")
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+    files = {p: random_bytes(size, seed=i) for i, p in enumerate(args.paths)}
+    server = FakeDownloadServer(args.port, files, ranges=not args.no_ranges)
+    server.start()
+    for path, data in files.items():
+        print(f"[FAKE_DOWNLOAD] {server.url(path)} sha256={hashlib.sha256(data).hexdigest()}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
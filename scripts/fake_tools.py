@@ -0,0 +1,392 @@
+"""
+確定性的外部工具替身（開發/基準測試用；不需要 JDK、Android SDK 或裝置）：
+- gradlew：輸出 --info --console=plain 風格的大型 log（FAKE_GRADLE_LOG_MB，預設 50），bundle task 會產出 AAB
+- java -jar bundletool…：help / build-apks（寫出 .apks，universal.apk 大小 FAKE_APK_MB，預設 32）/ install-apks / validate
+- adb：version / devices / start-server
+- keytool：-list -v（FAKE_KEYTOOL_ENTRIES 筆，預設 200）/ -printcert
+所有內容由固定種子產生，同樣的參數每次輸出都相同；簽章使用內建的自簽測試憑證（v1 PKCS#7）。
+
+用法：
+  install_fake_tools(bin_dir)  # 在 bin_dir 建立 gradlew/java/adb/keytool 的可執行檔，放到 PATH 最前面即可
+  python scripts/fake_tools.py gradlew :app:bundleProdRelease --info
+"""
+
+import base64
+import hashlib
+import io
+import os
+import random
+import stat
+import struct
+import sys
+import zipfile
+from pathlib import Path
+
+from apk_signing import cert_info
+
+MB = 1024 * 1024
+SEED = 20251006
+FIXED_DATE = (2025, 10, 6, 0, 0, 0)
+
+TEST_CERT_DER = base64.b64decode(
+    "MIIDUTCCAjmgAwIBAgICEJIwDQYJKoZIhvcNAQELBQAwQDEWMBQGA1UEAwwNQmVuY2ggUmVsZWFz"
+    "ZTEZMBcGA1UECgwQSG9tZUxldHRlciBCZW5jaDELMAkGA1UEBhMCVFcwIBcNMjYxMDE4MTE1MjMw"
+    "WhgPMjEyNjA5MjQxMTUyMzBaMEAxFjAUBgNVBAMMDUJlbmNoIFJlbGVhc2UxGTAXBgNVBAoMEEhv"
+    "bWVMZXR0ZXIgQmVuY2gxCzAJBgNVBAYTAlRXMIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKC"
+    "AQEAoQdULVdDhyK0tRv/cfRaqhBlzLo83XuU6k14elkQQOklQNSm4nTtQgs8iCcG8oC7Shf7q8mG"
+    "n5YkfoipSsW5lzo6h2LObxlzZ/0Ij3zCfnkS8J3XDZCdfqPog5+z7zQ4vA6tH1VRaPBNXLUnvF2M"
+    "R2RQ4m+CDb2A3JuzR1x1gNk+WA6zJOHQ7Hde7/6S7w08XoBy5OI4hSz30XcIS3D009Jp2woSq+k/"
+    "mESCo6JkVDeOUsS6vRJa/z8CXaQZefwUKMBfTSD1w8RRr81b+wDQ7Pian7uJrrzV+nvM8IQyB1mJ"
+    "FvBXQgBWwl9LuKNv2hQy0aI4GCWUsAkU6Tb/Qbw/jQIDAQABo1MwUTAdBgNVHQ4EFgQUeGJ3d/R7"
+    "gWSiw5BQnUJKATEZiSYwHwYDVR0jBBgwFoAUeGJ3d/R7gWSiw5BQnUJKATEZiSYwDwYDVR0TAQH/"
+    "BAUwAwEB/zANBgkqhkiG9w0BAQsFAAOCAQEAfzqdO7BJ7QKUBDjNLxHmvVwZ/QuUJNt1HiROTvs0"
+    "kCGi59wGHKlh7sIunGmsqyr7yzu92/oj/PRYEvz/iwfGj24EaX+7CeLZ/HkJB7N2F5M4FEHCrMBU"
+    "U/fzoy80TqhMusDOsl8EvlTa7EHCTOMDYvyZYwJi0EeEjlh4oEkqB7ATY6gagS0rLNT8fPHIBKYm"
+    "GRq3qJh3mbQ/3uVUyK/PdWtXNUBm92ezd8TWoZZo30gFvFM8lbcrVShuLD166JrMaalJTz2YeBd0"
+    "2SnfVuwX6kS+Q2OmTfbpGTbtGtqxVw7MRZg6rE7U57+cf2NmVlwDh+v5nNs03zwsJ31j9xOp5g=="
+)
+TEST_ALIAS = "homeletter"
+PACKAGE = "org.homeletter.app"
+VERSION_CODE = 10
+OID_SIGNED_DATA_DER = bytes.fromhex("06092a864886f70d010702")
+OID_DATA_DER = bytes.fromhex("06092a864886f70d010701")
+
+GRADLE_TASKS = [
+    "preBuild", "preProdReleaseBuild", "generateProdReleaseBuildConfig", "checkProdReleaseAarMetadata",
+    "processProdReleaseMainManifest", "processProdReleaseManifest", "mergeProdReleaseResources",
+    "processProdReleaseResources", "compileProdReleaseKotlin", "compileProdReleaseJavaWithJavac",
+    "dexBuilderProdRelease", "mergeDexProdRelease", "mergeProdReleaseJniLibFolders",
+    "mergeProdReleaseNativeLibs", "stripProdReleaseDebugSymbols", "mergeProdReleaseAssets",
+    "compressProdReleaseAssets", "lintVitalAnalyzeProdRelease", "buildProdReleasePreBundle",
+    "packageProdReleaseBundle", "signProdReleaseBundle", "bundleProdRelease",
+]
+NOISE = [
+    "Resolve mutations for :app:{task} (Thread[#91,Execution worker Thread 3,5,main]) started.",
+    "Caching disabled for task ':app:{task}' because:",
+    "  Build cache is disabled",
+    "file or directory '/project/app/src/prod/java', not found",
+    "Kotlin compile daemon is ready",
+    "Using Kotlin compiler version 2.0.21 for module app",
+    "w: /project/app/src/main/java/org/homeletter/app/MainActivity.kt:42:13 'getter for statusBarColor' is deprecated",
+    "Starting process 'command '/opt/jdk/bin/java''. Working directory: /project/app Command: /opt/jdk/bin/java",
+    "Successfully started process 'command '/opt/jdk/bin/java''",
+    "AGPBI: {{\"kind\":\"warning\",\"text\":\"Unable to strip the following libraries, packaging them as they are\"}}",
+    "Transforming classes.jar (project :app) with DexingNoClasspathTransform",
+    "Watching 1234 directories to track changes",
+]
+
+
+# ---------------------------------------------------------------------------
+# DER / 簽章材料
+# ---------------------------------------------------------------------------
+
+def _der(tag: int, body: bytes) -> bytes:
+    n = len(body)
+    if n < 0x80:
+        length = bytes([n])
+    else:
+        raw = n.to_bytes((n.bit_length() + 7) // 8, "big")
+        length = bytes([0x80 | len(raw)]) + raw
+    return bytes([tag]) + length + body
+
+
+def pkcs7_signed_data(certs) -> bytes:
+    """只含憑證的 PKCS#7 SignedData（足以讓 apk_signing.certs_from_pkcs7 取出憑證）。"""
+    signed = _der(0x30, b"".join([
+        _der(0x02, b"\x01"),
+        _der(0x31, b""),
+        _der(0x30, OID_DATA_DER),
+        _der(0xA0, b"".join(certs)),
+        _der(0x31, b""),
+    ]))
+    return _der(0x30, OID_SIGNED_DATA_DER + _der(0xA0, signed))
+
+
+def jks_bytes(alias: str = TEST_ALIAS, cert: bytes = TEST_CERT_DER) -> bytes:
+    """單一 trustedCertEntry 的 JKS；結尾的完整性摘要以零填充（讀取端不驗證）。"""
+    name = alias.encode("utf-8")
+    body = struct.pack(">III", 0xFEEDFEED, 2, 1)
+    body += struct.pack(">I", 2) + struct.pack(">H", len(name)) + name + struct.pack(">Q", 0)
+    body += struct.pack(">H", 5) + b"X.509" + struct.pack(">I", len(cert)) + cert
+    return body + b"\x00" * 20
+
+
+def _put(zf: zipfile.ZipFile, name: str, data, stored: bool = False):
+    """固定時間戳寫入，讓同樣參數產生的封存檔逐位元組相同。"""
+    info = zipfile.ZipInfo(name, date_time=FIXED_DATE)
+    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    zf.writestr(info, data)
+
+
+def _v1_signature_entries(zf: zipfile.ZipFile):
+    _put(zf, "META-INF/MANIFEST.MF", "Manifest-Version: 1.0\r\nCreated-By: fake_tools\r\n\r\n")
+    _put(zf, "META-INF/CERT.SF", "Signature-Version: 1.0\r\nCreated-By: fake_tools\r\n\r\n")
+    _put(zf, "META-INF/CERT.RSA", pkcs7_signed_data([TEST_CERT_DER]))
+
+
+# ---------------------------------------------------------------------------
+# 封存檔
+# ---------------------------------------------------------------------------
+
+def axml_manifest(package: str = PACKAGE, version_code: int = VERSION_CODE) -> bytes:
+    """最小的二進位 AndroidManifest.xml：<manifest package=... android:versionCode=...>。"""
+    strings = ["versionCode", "package", "manifest", "http://schemas.android.com/apk/res/android", package]
+    data = b""
+    offsets = []
+    for text in strings:
+        offsets.append(len(data))
+        data += struct.pack("<H", len(text)) + text.encode("utf-16-le") + b"\0\0"
+    data += b"\0" * (-len(data) % 4)
+    header = 28 + 4 * len(strings)
+    pool = struct.pack("<HHIIIIII", 0x0001, 28, header + len(data), len(strings), 0, 0, header, 0)
+    pool += struct.pack(f"<{len(strings)}I", *offsets) + data
+    res_map = struct.pack("<HHII", 0x0180, 8, 12, 0x0101021B)
+    none = 0xFFFFFFFF
+    attrs = struct.pack("<IIIHBBI", 3, 0, none, 8, 0, 0x10, version_code)
+    attrs += struct.pack("<IIIHBBI", none, 1, 4, 8, 0, 0x03, 4)
+    element = struct.pack("<HHIIIIIHHHHHH", 0x0102, 16, 36 + len(attrs), 1, none, none, 2, 20, 20, 2, 0, 0, 0) + attrs
+    end = struct.pack("<HHIIIII", 0x0103, 16, 24, 1, none, none, 2)
+    body = pool + res_map + element + end
+    return struct.pack("<HHI", 0x0003, 8, 8 + len(body)) + body
+
+
+def apk_bytes(size_mb: float, seed: int = SEED, version_code: int = VERSION_CODE) -> bytes:
+    """已簽章（v1）的 APK：dex 為不可壓縮的隨機資料，另有大量小型資源檔。"""
+    rng = random.Random(seed)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        _put(zf, "AndroidManifest.xml", axml_manifest(version_code=version_code))
+        dex_bytes = int(size_mb * MB * 0.8)
+        _put(zf, "classes.dex", rng.randbytes(dex_bytes), stored=True)
+        for density in ("mdpi", "hdpi", "xhdpi", "xxhdpi", "xxxhdpi"):
+            for i in range(40):
+                _put(zf, f"res/drawable-{density}-v4/ic_{i}.png", rng.randbytes(2048))
+        _put(zf, "resources.arsc", rng.randbytes(int(size_mb * MB * 0.1)), stored=True)
+        _v1_signature_entries(zf)
+    return buf.getvalue()
+
+
+def write_apks(path, apk_size_mb: float = 32, seed: int = SEED, version_code: int = VERSION_CODE):
+    """bundletool --mode=universal 的 .apks：toc.pb + 以 STORED 放入的 universal.apk。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        _put(zf, "toc.pb", b"\x0a\x04fake")
+        _put(zf, "universal.apk", apk_bytes(apk_size_mb, seed, version_code), stored=True)
+    return path
+
+
+def write_aab(path, size_mb: float = 16, seed: int = SEED):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        _put(zf, "BundleConfig.pb", b"\x0a\x06\x0a\x041.18")
+        _put(zf, "base/manifest/AndroidManifest.xml", rng.randbytes(4096))
+        _put(zf, "base/dex/classes.dex", rng.randbytes(int(size_mb * MB * 0.8)), stored=True)
+        _put(zf, "base/resources.pb", rng.randbytes(int(size_mb * MB * 0.1)))
+        for i in range(60):
+            _put(zf, f"base/res/mipmap-xxhdpi-v4/ic_launcher_{i}.webp", rng.randbytes(4096))
+        _v1_signature_entries(zf)
+    return path
+
+
+def write_platform_tools_zip(path, size_mb: float = 16, revision: str = "36.0.1", seed: int = SEED):
+    """platform-tools-latest-windows.zip 的形狀：頂層 platform-tools/ 目錄、數個大型執行檔與 source.properties。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    big = {"adb.exe": 0.35, "fastboot.exe": 0.25, "AdbWinApi.dll": 0.05, "AdbWinUsbApi.dll": 0.05,
+           "libwinpthread-1.dll": 0.05, "make_f2fs.exe": 0.1, "mke2fs.exe": 0.1, "sqlite3.exe": 0.05}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, share in big.items():
+            _put(zf, f"platform-tools/{name}", rng.randbytes(int(size_mb * MB * share)))
+        _put(zf, "platform-tools/source.properties", f"Pkg.UserSrc=false\nPkg.Revision={revision}\n")
+        _put(zf, "platform-tools/NOTICE.txt", "Apache License 2.0\n" * 20000)
+        for i in range(30):
+            _put(zf, f"platform-tools/lib64/libc++_{i}.so", rng.randbytes(8192))
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 文字輸出
+# ---------------------------------------------------------------------------
+
+def iter_gradle_log(size_mb: float, tasks=None, seed: int = SEED):
+    """產生 --info 風格的 log 文字區塊（每塊都以換行結尾），總量約 size_mb；結尾為 BUILD SUCCESSFUL。
+
+    雜訊行依 task 先組成一個區塊再重複輸出，產生速度遠高於被測的讀取端，量測不會被替身本身拖慢。
+    """
+    rng = random.Random(seed)
+    task_names = [f":app:{t}" for t in GRADLE_TASKS] if tasks is None else list(tasks)
+    budget = int(size_mb * MB)
+    per_task = max(1, budget // max(1, len(task_names)))
+    yield ("Initialized native services in: /home/user/.gradle/native\n"
+           "Starting Build\n"
+           "Settings evaluated using settings file '/project/settings.gradle.kts'.\n"
+           "All projects evaluated.\n"
+           "Tasks to be executed: [" + ", ".join(task_names) + "]\n")
+    total_seconds = 0.0
+    for i, path in enumerate(task_names):
+        worker = f"Thread[#{90 + i % 4},Execution worker Thread {i % 4 + 1},5,main]"
+        short = path.rsplit(":", 1)[-1]
+        yield (f"> Task {path}\n{path} ({worker}) started.\n"
+               f"Task '{path}' is not up-to-date because:\n  Task has failed previously.\n")
+        block = "".join(NOISE[rng.randrange(len(NOISE))].format(task=short) + "\n" for _ in range(512))
+        written = 0
+        while written + len(block) <= per_task:
+            yield block
+            written += len(block)
+        if written < per_task:
+            yield block[:block.rfind("\n", 0, per_task - written) + 1]
+        seconds = round(rng.uniform(0.05, 30.0 if "Kotlin" in path else 4.0), 3)
+        total_seconds += seconds
+        yield f"{path} ({worker}) completed. Took {seconds} secs.\n"
+    yield (f"\nBUILD SUCCESSFUL in {int(total_seconds // 60)}m {int(total_seconds % 60)}s\n"
+           f"{len(task_names)} actionable tasks: {len(task_names)} executed\n")
+
+
+def write_gradle_log(path, size_mb: float, seed: int = SEED):
+    path = Path(path)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for chunk in iter_gradle_log(size_mb, seed=seed):
+            f.write(chunk)
+    return path
+
+
+def keytool_list_text(entries: int = 200, alias: str = TEST_ALIAS) -> str:
+    """keytool -list -v 的輸出；alias 對應的項目使用測試憑證，其餘為確定性的假指紋。"""
+    info = cert_info(TEST_CERT_DER)
+    rng = random.Random(SEED)
+    blocks = [f"Keystore type: JKS\nKeystore provider: SUN\n\nYour keystore contains {entries} entries\n\n"]
+    for i in range(entries):
+        if i == entries // 2:
+            name, sha256, sha1, md5 = alias, info["sha256"], info["sha1"], info["md5"]
+        else:
+            digest = hashlib.sha256(f"{SEED}-{i}".encode()).digest()
+            name = f"entry{i}"
+            sha256 = ":".join(f"{b:02X}" for b in digest)
+            sha1 = ":".join(f"{b:02X}" for b in digest[:20])
+            md5 = ":".join(f"{b:02X}" for b in digest[:16])
+        blocks.append(
+            f"Alias name: {name}\nCreation date: Oct 6, 2025\nEntry type: PrivateKeyEntry\n"
+            f"Certificate chain length: 1\nCertificate[1]:\nOwner: {info['subject']}\nIssuer: {info['issuer']}\n"
+            f"Serial number: {rng.getrandbits(64):x}\n"
+            f"Valid from: Mon Oct 06 00:00:00 CST 2025 until: Fri Sep 12 00:00:00 CST 2125\n"
+            f"Certificate fingerprints:\n\t MD5:  {md5}\n\t SHA1: {sha1}\n\t SHA256: {sha256}\n"
+            f"Signature algorithm name: SHA256withRSA\nSubject Public Key Algorithm: 2048-bit RSA key\nVersion: 3\n\n"
+            + "*" * 43 + "\n" + "*" * 43 + "\n\n\n"
+        )
+    return "".join(blocks)
+
+
+# ---------------------------------------------------------------------------
+# 可執行檔替身
+# ---------------------------------------------------------------------------
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _arg_value(args, prefix: str):
+    for a in args:
+        if a.startswith(prefix):
+            return a[len(prefix):].strip('"')
+    return None
+
+
+def fake_gradlew(args) -> int:
+    tasks = [a for a in args if a.startswith(":")]
+    # 一律跑完整的 task graph（和真的 bundleProdRelease 一樣），再補上清單中沒有的 task
+    graph = [f":app:{t}" for t in GRADLE_TASKS]
+    graph += [t for t in tasks if t not in graph]
+    out = sys.stdout
+    for chunk in iter_gradle_log(_env_float("FAKE_GRADLE_LOG_MB", 50), graph):
+        out.write(chunk)
+    out.flush()
+    if any("bundle" in t.lower() for t in tasks):
+        write_aab(Path("app/build/outputs/bundle/prodRelease/app-prod-release.aab"), _env_float("FAKE_AAB_MB", 16))
+    return 0
+
+
+def fake_java(args) -> int:
+    command = next((a for a in args[2:] if not a.startswith("-")), "help") if args[:1] == ["-jar"] else "help"
+    if command == "help":
+        print("Synopsis: bundletool <command> ...\nUse 'bundletool help <command>' to learn more about the given command.")
+        for c in ("build-apks", "build-sdk-apks", "extract-apks", "get-device-spec", "install-apks", "validate", "version"):
+            print(f"  {c}")
+        return 0
+    if command == "build-apks":
+        output = _arg_value(args, "--output=")
+        if not output:
+            print("Error: --output is required", file=sys.stderr)
+            return 1
+        write_apks(output, _env_float("FAKE_APK_MB", 32))
+        return 0
+    if command == "install-apks":
+        print("The APKs have been extracted in the directory: /tmp/fake-install")
+        return 0
+    if command == "validate":
+        print("App Bundle information\n------------\nFeature modules:\n\tFeature module: base")
+        return 0
+    if command == "version":
+        print("1.18.2")
+        return 0
+    print(f"Error: unknown command '{command}'", file=sys.stderr)
+    return 1
+
+
+def fake_adb(args) -> int:
+    if args[:1] == ["version"]:
+        print("Android Debug Bridge version 1.0.41\nVersion 36.0.1-13823407\nInstalled as /fake/adb")
+    elif args[:1] == ["devices"]:
+        print("List of devices attached\nemulator-5554\tdevice\n")
+    elif args[:1] in (["start-server"], ["kill-server"]):
+        pass
+    else:
+        print(f"adb: unknown command {' '.join(args)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def fake_keytool(args) -> int:
+    if "-list" in args:
+        alias = args[args.index("-alias") + 1] if "-alias" in args else TEST_ALIAS
+        print(keytool_list_text(int(_env_float("FAKE_KEYTOOL_ENTRIES", 200)), alias))
+        return 0
+    if "-printcert" in args:
+        info = cert_info(TEST_CERT_DER)
+        print(f"Signer #1:\n\nCertificate #1:\nOwner: {info['subject']}\nIssuer: {info['issuer']}\n"
+              f"Certificate fingerprints:\n\t SHA1: {info['sha1']}\n\t SHA256: {info['sha256']}\n")
+        return 0
+    print("keytool error: unsupported option", file=sys.stderr)
+    return 1
+
+
+TOOLS = {"gradlew": fake_gradlew, "java": fake_java, "adb": fake_adb, "keytool": fake_keytool}
+
+
+def install_fake_tools(bin_dir) -> Path:
+    """在 bin_dir 建立各工具的 POSIX shell 包裝檔（呼叫本模組）。"""
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    here = Path(__file__).resolve()
+    for name in TOOLS:
+        shim = bin_dir / name
+        shim.write_text(f"#!/bin/sh\nexec \"{sys.executable}\" \"{here}\" {name} \"$@\"\n", encoding="utf-8")
+        shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return bin_dir
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+        print(f"usage: fake_tools.py {{{','.join(TOOLS)}}} [args...]", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(TOOLS[sys.argv[1]](sys.argv[2:]))
+
+
+if __name__ == "__main__":
+    main()
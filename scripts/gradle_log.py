@@ -0,0 +1,109 @@
+"""
+Gradle 日誌工具（固定記憶體）：
+- tail_lines：從檔尾以區塊反向讀取最後 N 行，不讀整個檔案（--info --stacktrace 的 log 可達數百 MB）
+- run_and_tee：執行指令，同步把輸出寫入 log 檔並即時套用 ERROR_PATTERN；
+  以環形緩衝保留前文，第一個錯誤出現時立即顯示，不必等 Gradle 結束
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+import run_metrics
+
+ERROR_PATTERN = re.compile(r"(ERROR|FAILED|Unresolved)", re.IGNORECASE)
+BLOCK_SIZE = 64 * 1024
+CONTEXT_LINES = 20
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="ignore").rstrip("\r")
+
+
+def tail_lines(log_path, n: int, block_size: int = BLOCK_SIZE):
+    """回傳檔案最後 n 行（str list），只讀取檔尾所需的區塊。"""
+    if n <= 0:
+        return []
+    with open(log_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        blocks = []
+        newlines = 0
+        # 需要 n+1 個換行才能確定第一行完整（檔尾換行另計）
+        while pos > 0 and newlines <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+        data = b"".join(reversed(blocks))
+    lines = data.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    if pos > 0:
+        # 第一段可能是被截斷的行
+        lines = lines[1:]
+    return [_decode(ln) for ln in lines[-n:]]
+
+
+class LiveErrorFilter:
+    """逐行餵入輸出；保留最近 context 行，回報第一個符合 ERROR_PATTERN 的行與其前文。"""
+
+    def __init__(self, pattern=ERROR_PATTERN, context: int = CONTEXT_LINES, out=None):
+        self.pattern = pattern
+        self.ring = deque(maxlen=context)
+        self.out = out or sys.stdout
+        self.first_failure = None
+        self.matches = 0
+
+    def feed(self, line: str):
+        if self.pattern.search(line):
+            self.matches += 1
+            if self.first_failure is None:
+                self.first_failure = line
+                print(f"=== [FIRST_FAILURE] (context {len(self.ring)} lines) ===", file=self.out)
+                for ctx in self.ring:
+                    print(ctx, file=self.out)
+                print(f">>> {line}", file=self.out)
+                print("=== [/FIRST_FAILURE] ===", file=self.out)
+            else:
+                print(f"[LIVE_ERROR] {line}", file=self.out)
+            self.out.flush()
+        self.ring.append(line)
+
+
+def run_and_tee(cmd, log_path, cwd=None, pattern=ERROR_PATTERN, context: int = CONTEXT_LINES, on_line=None,
+                label: str | None = None):
+    """執行 cmd（list 或 str），stdout+stderr 逐行寫入 log_path 並即時過濾錯誤。
+
+    on_line：可選的逐行回呼（例如依 Gradle task 標頭歸屬錯誤）。
+    耗時、峰值 RSS 與輸出量以 label 記錄到 run_metrics 的目前 session。
+    回傳 (returncode, LiveErrorFilter)。
+    """
+    live = LiveErrorFilter(pattern, context)
+    start = time.monotonic()
+    output_bytes = 0
+    Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                shell=isinstance(cmd, str))
+    except Exception as e:
+        print(f"[NativeCommandError] {e}")
+        return 1, live
+    with open(log_path, "wb") as log:
+        for raw in proc.stdout:
+            log.write(raw)
+            output_bytes += len(raw)
+            line = _decode(raw.rstrip(b"\n"))
+            live.feed(line)
+            if on_line:
+                on_line(line)
+    code, peak_rss = run_metrics.wait_measured(proc)
+    run_metrics.record_command(label or run_metrics.default_label(cmd), time.monotonic() - start,
+                               code, peak_rss, output_bytes)
+    return code, live
@@ -0,0 +1,174 @@
+"""
+Gradle 建置工作階段（warm daemon）：
+- 不再傳 --no-daemon，同一個 daemon 在步驟之間與多次腳本執行之間重複使用
+- 多個步驟（例如 compileProdReleaseKotlin + bundleProdRelease）合併為一次 Gradle 呼叫，只付一次設定成本
+- 同時即時建立 task 時間軸（SessionResult.timeline，見 gradle_timeline；需 --info 才有 task 耗時）
+- 依 "> Task :x" 標頭與 "Execution failed for task ':x'" 將錯誤歸屬回各步驟
+- 明確關閉：GradleSession.stop() 或 `python scripts/gradle_session.py --stop`
+
+用法：
+  session = GradleSession(PROJECT_DIR)
+  result = session.run([("compile", ":app:compileProdReleaseKotlin"), ("bundle", ":app:bundleProdRelease")],
+                       log_path=PROJECT_DIR / "bundle_fixed.log")
+  result.print_summary()
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+from gradle_log import ERROR_PATTERN, run_and_tee
+from gradle_timeline import GradleTimeline
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_ARGS = ["--daemon", "--console=plain"]
+
+TASK_HEADER = re.compile(r"^> Task (\S+)(?:\s+(.*))?$")
+EXECUTION_FAILED = re.compile(r"Execution failed for task '([^']+)'")
+
+
+def find_gradlew(project_dir) -> Path:
+    return Path(project_dir) / ("gradlew.bat" if os.name == "nt" else "gradlew")
+
+
+class StepResult:
+    def __init__(self, name: str, target: str):
+        self.name = name
+        self.target = target
+        self.tasks = []
+        self.errors = []
+        self.target_outcome = None
+        self.failed = False
+
+    @property
+    def status(self) -> str:
+        if self.failed:
+            return "FAILED"
+        if self.target_outcome is None:
+            return "NOT_RUN"
+        return "OK"
+
+
+class SessionResult:
+    def __init__(self, returncode: int, steps: list, timeline: GradleTimeline | None = None):
+        self.returncode = returncode
+        self.steps = steps
+        self.timeline = timeline
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    def step(self, name: str) -> StepResult:
+        return next(s for s in self.steps if s.name == name)
+
+    def failed_step(self):
+        return next((s for s in self.steps if s.status == "FAILED"), None)
+
+    def print_summary(self, max_errors: int = 20):
+        print("=== Gradle session steps ===")
+        for s in self.steps:
+            print(f"[{s.status}] {s.name} ({s.target}) tasks={len(s.tasks)} errors={len(s.errors)}")
+            for line in s.errors[:max_errors]:
+                print(f"    {line}")
+
+
+class _StepAttributor:
+    """依 task 標頭順序把輸出行歸屬到步驟：步驟 i 的目標 task 出現後，下一個 task 起算步驟 i+1。"""
+
+    def __init__(self, steps: list):
+        self.steps = steps
+        self.index = 0
+        self.task_owner = {}
+
+    def __call__(self, line: str):
+        m = TASK_HEADER.match(line)
+        if m:
+            task, outcome = m.group(1), (m.group(2) or "").strip()
+            current = self.steps[self.index]
+            if current.target_outcome is not None and task != current.target and self.index + 1 < len(self.steps):
+                self.index += 1
+                current = self.steps[self.index]
+            self.task_owner[task] = current
+            current.tasks.append(task)
+            if task == current.target:
+                current.target_outcome = outcome or "EXECUTED"
+            if outcome == "FAILED":
+                current.failed = True
+                current.errors.append(line)
+            return
+        m = EXECUTION_FAILED.search(line)
+        if m:
+            owner = self.task_owner.get(m.group(1), self.steps[self.index])
+            owner.failed = True
+            owner.errors.append(line)
+            return
+        if ERROR_PATTERN.search(line):
+            self.steps[self.index].errors.append(line)
+
+
+class GradleSession:
+    def __init__(self, project_dir=PROJECT_DIR, gradlew=None, base_args=None):
+        self.project_dir = Path(project_dir)
+        self.gradlew = Path(gradlew) if gradlew else find_gradlew(self.project_dir)
+        self.base_args = list(DEFAULT_ARGS if base_args is None else base_args)
+
+    def command(self, tasks, extra_args=()):
+        return [str(self.gradlew), *tasks, *self.base_args, *extra_args]
+
+    def run(self, steps, log_path, extra_args=(), context: int = 20) -> SessionResult:
+        """steps：[(名稱, task 路徑), ...]，依序合併為同一個 task graph 執行。"""
+        results = [StepResult(name, target) for name, target in steps]
+        cmd = self.command([target for _, target in steps], extra_args)
+        print(f"[RUN] {' '.join(cmd)} (tee -> {Path(log_path).name})")
+        attributor = _StepAttributor(results)
+        timeline = GradleTimeline()
+
+        def on_line(line):
+            attributor(line)
+            timeline.feed(line, time.monotonic())
+
+        code, _ = run_and_tee(cmd, log_path, cwd=str(self.project_dir), context=context, on_line=on_line,
+                              label="gradle " + "+".join(name for name, _ in steps))
+        if code != 0 and not any(s.failed for s in results):
+            # 失敗但沒有可辨識的 task 失敗行（例如設定階段錯誤）：歸給第一個尚未完成的步驟
+            pending = next((s for s in results if s.target_outcome is None), results[-1])
+            pending.failed = True
+        return SessionResult(code, results, timeline)
+
+    def stop(self) -> int:
+        """明確關閉此專案 Gradle 版本的所有 daemon。"""
+        cmd = [str(self.gradlew), "--stop"]
+        print(f"[RUN] {' '.join(cmd)}")
+        try:
+            return subprocess.run(cmd, cwd=str(self.project_dir)).returncode
+        except Exception as e:
+            print(f"[NativeCommandError] {e}")
+            return 1
+
+    def status(self) -> int:
+        cmd = [str(self.gradlew), "--status"]
+        print(f"[RUN] {' '.join(cmd)}")
+        try:
+            return subprocess.run(cmd, cwd=str(self.project_dir)).returncode
+        except Exception as e:
+            print(f"[NativeCommandError] {e}")
+            return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or shut down the warm Gradle daemon used by the release scripts")
+    parser.add_argument("--project", default=str(PROJECT_DIR), help="Project root (default: repo root)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--stop", action="store_true", help="Stop the Gradle daemon(s)")
+    group.add_argument("--status", action="store_true", help="Show Gradle daemon status")
+    args = parser.parse_args()
+    session = GradleSession(args.project)
+    raise SystemExit(session.stop() if args.stop else session.status())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Gradle --info --console=plain 日誌分析（單次掃描、記憶體只和 task 數量有關，與 log 大小無關）：
+- "> Task :x [UP-TO-DATE|FROM-CACHE|NO-SOURCE|SKIPPED|FAILED]" 標頭與 --info 的
+  "Skipping task ... up-to-date" / "Loaded cache entry for task" / "is not up-to-date because" 判斷結果
+- ":x (Thread[...]) started." / "completed. Took 1 mins 2.5 secs." 取得每個 task 的耗時與執行緒
+- 報告：最慢的 N 個 task、Kotlin 編譯耗時、build cache 命中率、設定階段時間
+  設定階段：即時餵入（feed(line, t)）時以時間戳計算；離線分析 log 檔時以
+  "BUILD ... in" 總時間減去最忙碌執行緒的 task 時間估算（上限值）
+
+用法：
+  python scripts/gradle_timeline.py bundle_fixed.log [--top 20] [--json]
+  analyzer = GradleTimeline(); run_and_tee(cmd, log, on_line=lambda l: analyzer.feed(l, time.monotonic()))
+"""
+
+import argparse
+import heapq
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+TASK_HEADER = re.compile(r"^> Task (:\S+)(?:\s+(UP-TO-DATE|FROM-CACHE|NO-SOURCE|SKIPPED|FAILED))?\s*$")
+TASK_STARTED = re.compile(r"^(:\S+) \(Thread\[(.*)\]\) started\.$")
+TASK_COMPLETED = re.compile(r"^(:\S+) \(Thread\[(.*)\]\) completed\. Took (.+?)\.?$")
+UP_TO_DATE = re.compile(r"^Skipping task '(:[^']+)' as it is up-to-date\.")
+LOADED_FROM_CACHE = re.compile(r"^Loaded cache entry for task '(:[^']+)'")
+CACHE_KEY = re.compile(r"^Build cache key for task '(:[^']+)' is ")
+NOT_UP_TO_DATE = re.compile(r"^Task '(:[^']+)' is not up-to-date because:")
+EXECUTION_FAILED = re.compile(r"Execution failed for task '(:[^']+)'")
+BUILD_RESULT = re.compile(r"^BUILD (SUCCESSFUL|FAILED) in (.+)$")
+CONFIGURATION_DONE = re.compile(r"^(All projects evaluated\.|Tasks to be executed:)")
+KOTLIN_TASK = re.compile(r":compile\w*Kotlin$")
+
+DURATION_PART = re.compile(r"([\d.]+)\s*(hrs?|h|mins?|m|secs?|s|ms)\b")
+UNIT_SECONDS = {"hrs": 3600, "hr": 3600, "h": 3600, "mins": 60, "min": 60, "m": 60,
+                "secs": 1, "sec": 1, "s": 1, "ms": 0.001}
+
+
+def parse_duration(text: str):
+    """'1 mins 2.5 secs' / '1m 23s' / '850ms' -> 秒數；無法解析時回傳 None。"""
+    parts = DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(v) * UNIT_SECONDS[u] for v, u in parts)
+
+
+class TaskRecord:
+    __slots__ = ("path", "outcome", "seconds", "thread", "cache_key", "started_at")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.outcome = None
+        self.seconds = None
+        self.thread = None
+        self.cache_key = False
+        self.started_at = None
+
+
+class GradleTimeline:
+    def __init__(self):
+        self.tasks = {}
+        self.build_status = None
+        self.build_seconds = None
+        self.lines = 0
+        self.first_time = None
+        self.configured_time = None
+
+    def _task(self, path: str) -> TaskRecord:
+        rec = self.tasks.get(path)
+        if rec is None:
+            rec = self.tasks[path] = TaskRecord(path)
+        return rec
+
+    def feed(self, line: str, t: float | None = None):
+        """餵入一行（不含換行）；t 為可選的時間戳（即時分析時用 time.monotonic()）。"""
+        self.lines += 1
+        if t is not None and self.first_time is None:
+            self.first_time = t
+        line = line.rstrip("\r\n")
+        if not line:
+            return
+        c = line[0]
+        # 大部分 --info 行不屬於以下任何一種：先用首字元過濾，避免每行跑全部正規表示式
+        if c == ">":
+            m = TASK_HEADER.match(line)
+            if m:
+                if t is not None and self.configured_time is None:
+                    self.configured_time = t
+                rec = self._task(m.group(1))
+                if m.group(2):
+                    rec.outcome = m.group(2)
+            return
+        if c == ":":
+            m = TASK_COMPLETED.match(line)
+            if m:
+                rec = self._task(m.group(1))
+                rec.thread = m.group(2)
+                rec.seconds = parse_duration(m.group(3))
+                if rec.outcome is None:
+                    rec.outcome = "EXECUTED"
+                return
+            m = TASK_STARTED.match(line)
+            if m:
+                self._task(m.group(1)).started_at = t
+            return
+        if c == "S":
+            m = UP_TO_DATE.match(line)
+            if m:
+                self._task(m.group(1)).outcome = "UP-TO-DATE"
+            return
+        if c == "L":
+            m = LOADED_FROM_CACHE.match(line)
+            if m:
+                self._task(m.group(1)).outcome = "FROM-CACHE"
+            return
+        if c == "B":
+            m = CACHE_KEY.match(line)
+            if m:
+                self._task(m.group(1)).cache_key = True
+                return
+            m = BUILD_RESULT.match(line)
+            if m:
+                self.build_status = m.group(1)
+                self.build_seconds = parse_duration(m.group(2))
+            return
+        if c == "T":
+            m = NOT_UP_TO_DATE.match(line)
+            if m:
+                rec = self._task(m.group(1))
+                if rec.outcome is None:
+                    rec.outcome = "EXECUTED"
+                return
+        if c in "AT" and t is not None and self.configured_time is None and CONFIGURATION_DONE.match(line):
+            self.configured_time = t
+            return
+        if "Execution failed for task" in line:
+            m = EXECUTION_FAILED.search(line)
+            if m:
+                self._task(m.group(1)).outcome = "FAILED"
+
+    def feed_file(self, log_path, encoding: str = "utf-8"):
+        with open(log_path, "rb") as f:
+            for raw in f:
+                self.feed(raw.decode(encoding, errors="replace"))
+        return self
+
+    # -- 報告 -----------------------------------------------------------------
+
+    def slowest(self, n: int = 20) -> list:
+        timed = (r for r in self.tasks.values() if r.seconds is not None)
+        return heapq.nlargest(n, timed, key=lambda r: r.seconds)
+
+    def outcome_counts(self) -> dict:
+        counts = defaultdict(int)
+        for r in self.tasks.values():
+            counts[r.outcome or "UNKNOWN"] += 1
+        return dict(counts)
+
+    def cache_hit_ratio(self):
+        """FROM-CACHE /（FROM-CACHE + 有計算 cache key 但實際執行的 task）；沒有可快取的 task 時回傳 None。"""
+        hits = sum(1 for r in self.tasks.values() if r.outcome == "FROM-CACHE")
+        misses = sum(1 for r in self.tasks.values() if r.outcome == "EXECUTED" and r.cache_key)
+        return hits / (hits + misses) if hits + misses else None
+
+    def busiest_thread_seconds(self) -> float:
+        per_thread = defaultdict(float)
+        for r in self.tasks.values():
+            if r.seconds is not None:
+                per_thread[r.thread or "?"] += r.seconds
+        return max(per_thread.values(), default=0.0)
+
+    def configuration_seconds(self):
+        """回傳 (秒數, 是否為估計值)；無法得知時秒數為 None。"""
+        if self.first_time is not None and self.configured_time is not None:
+            return self.configured_time - self.first_time, False
+        if self.build_seconds is not None:
+            return max(0.0, self.build_seconds - self.busiest_thread_seconds()), True
+        return None, True
+
+    def kotlin_tasks(self) -> list:
+        return sorted((r for r in self.tasks.values() if KOTLIN_TASK.search(r.path) and r.seconds is not None),
+                      key=lambda r: -r.seconds)
+
+    def summary(self, top: int = 20) -> dict:
+        config_seconds, estimated = self.configuration_seconds()
+        ratio = self.cache_hit_ratio()
+        return {
+            "lines": self.lines,
+            "build": self.build_status,
+            "build_seconds": self.build_seconds,
+            "tasks": len(self.tasks),
+            "outcomes": self.outcome_counts(),
+            "task_seconds_total": round(sum(r.seconds or 0.0 for r in self.tasks.values()), 3),
+            "cache_hit_ratio": round(ratio, 3) if ratio is not None else None,
+            "configuration_seconds": round(config_seconds, 3) if config_seconds is not None else None,
+            "configuration_estimated": estimated,
+            "kotlin": [{"task": r.path, "seconds": r.seconds, "outcome": r.outcome} for r in self.kotlin_tasks()],
+            "slowest": [{"task": r.path, "seconds": r.seconds, "outcome": r.outcome} for r in self.slowest(top)],
+        }
+
+    def print_report(self, top: int = 20):
+        s = self.summary(top)
+        print("=== Gradle task timeline ===")
+        build = f"{s['build']} in {s['build_seconds']:.1f}s" if s["build_seconds"] is not None else "UNKNOWN"
+        print(f"Build: {build} | tasks={s['tasks']} | task time total={s['task_seconds_total']:.1f}s")
+        print("Outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(s["outcomes"].items())))
+        ratio = s["cache_hit_ratio"]
+        print(f"Build cache hit ratio: {ratio * 100:.0f}%" if ratio is not None else "Build cache hit ratio: N/A")
+        if s["configuration_seconds"] is None:
+            print("Configuration: UNKNOWN")
+        else:
+            note = " (estimated: build time minus busiest worker)" if s["configuration_estimated"] else ""
+            print(f"Configuration: {s['configuration_seconds']:.1f}s{note}")
+        if s["kotlin"]:
+            total = sum(k["seconds"] for k in s["kotlin"])
+            print(f"Kotlin compile: {total:.1f}s across {len(s['kotlin'])} task(s)")
+            for k in s["kotlin"]:
+                print(f"  {k['seconds']:8.1f}s  {k['task']}")
+        print(f"Slowest {len(s['slowest'])} task(s):")
+        for r in s["slowest"]:
+            print(f"  {r['seconds']:8.1f}s  {r['task']} [{r['outcome']}]")
+
+
+def analyze_log(log_path) -> GradleTimeline:
+    return GradleTimeline().feed_file(log_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the task timeline from a Gradle --info log")
+    parser.add_argument("log", help="Gradle log (e.g. bundle_fixed.log)")
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest tasks to list (default: 20)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+    if not Path(args.log).exists():
+        print(f"<LOG_NOT_FOUND> {args.log}")
+        sys.exit(1)
+    timeline = analyze_log(args.log)
+    if args.json:
+        print(json.dumps(timeline.summary(args.top), indent=1))
+    else:
+        timeline.print_report(args.top)
+
+
+if __name__ == "__main__":
+    main()
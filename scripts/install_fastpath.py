@@ -0,0 +1,320 @@
+"""
+安裝快速路徑：裝置上已經是同一個建置時不重新安裝，只有部分 split 變動時只推送變動的 split。
+- 裝置端（adb server socket，不啟動 adb.exe）：
+  pm path <package> -> 已安裝的 base.apk / split_*.apk；sha256sum 在裝置上雜湊，不需拉回 APK
+  dumpsys package <package> -> versionCode 與 signatures:[...]（Signature.hashCode）
+- 本機端：.apks 內各 APK 的 SHA-256（STORED 項目直接切片讀取）、universal/base APK 的 versionCode（二進位 AXML）
+  與簽署憑證（apk_signing），對應到裝置上的檔名（universal.apk / base-master.apk -> base.apk、
+  base-xxhdpi.apk -> split_config.xxhdpi.apk、feature-master.apk -> split_feature.apk）
+- 判斷：
+  skip    versionCode、憑證與每個已安裝 APK 的雜湊都相同
+  partial versionCode 與憑證相同，只有部分 APK 不同：以 pm install-create -p（繼承其餘 split）只寫入變動的 APK
+  full    未安裝、versionCode 或憑證不同、裝置上有本機沒有的 split、或無法在裝置上雜湊：交回 bundletool install-apks
+
+用法：
+  python scripts/install_fastpath.py app-prod.apks [--serial emulator-5554] [--package org.homeletter.app] [--plan]
+"""
+
+import argparse
+import hashlib
+import posixpath
+import re
+import struct
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from adb_client import AdbClient, AdbError
+from apk_signing import primary_cert, read_archive_signers
+from nested_zip import open_entry
+
+PACKAGE = "org.homeletter.app"
+REMOTE_TMP = "/data/local/tmp"
+HASH_CHUNK = 1024 * 1024
+VERSION_CODE_ATTR = 0x0101021B
+
+
+# ---------------------------------------------------------------------------
+# 本機 APK set
+# ---------------------------------------------------------------------------
+
+def _string_pool(buf: bytes, start: int) -> list:
+    header_size, _, count, _, flags, strings_start = struct.unpack_from("<HIIIII", buf, start + 2)
+    utf8 = bool(flags & 0x100)
+    offsets = struct.unpack_from(f"<{count}I", buf, start + header_size)
+    base = start + strings_start
+    out = []
+    for off in offsets:
+        pos = base + off
+        if utf8:
+            pos += 2 if buf[pos] & 0x80 else 1  # UTF-16 長度
+            n = buf[pos]
+            if n & 0x80:
+                n = ((n & 0x7F) << 8) | buf[pos + 1]
+                pos += 1
+            out.append(buf[pos + 1:pos + 1 + n].decode("utf-8", errors="replace"))
+        else:
+            (n,) = struct.unpack_from("<H", buf, pos)
+            if n & 0x8000:
+                n = ((n & 0x7FFF) << 16) | struct.unpack_from("<H", buf, pos + 2)[0]
+                pos += 2
+            out.append(buf[pos + 2:pos + 2 + n * 2].decode("utf-16-le", errors="replace"))
+    return out
+
+
+def manifest_attributes(axml: bytes) -> dict:
+    """二進位 AndroidManifest.xml 根元素 <manifest> 的屬性 -> {名稱: 值}（字串或整數）；無法解析時回傳 {}。
+    android:versionCode 依資源 ID 辨識，名稱一律為 "versionCode"。"""
+    attrs = {}
+    try:
+        strings, res_ids = [], []
+        pos = struct.unpack_from("<H", axml, 2)[0]
+        while pos + 8 <= len(axml):
+            ctype, header_size, size = struct.unpack_from("<HHI", axml, pos)
+            if ctype == 0x0001:
+                strings = _string_pool(axml, pos)
+            elif ctype == 0x0180:
+                res_ids = list(struct.unpack_from(f"<{(size - header_size) // 4}I", axml, pos + header_size))
+            elif ctype == 0x0102:
+                attr_start, attr_size, attr_count = struct.unpack_from("<HHH", axml, pos + header_size + 8)
+                first = pos + header_size + attr_start
+                for i in range(attr_count):
+                    _, name, raw, _, _, data_type, data = struct.unpack_from("<IIIHBBI", axml, first + i * attr_size)
+                    if name < len(res_ids) and res_ids[name] == VERSION_CODE_ATTR:
+                        key = "versionCode"
+                    elif name < len(strings):
+                        key = strings[name]
+                    else:
+                        continue
+                    if raw < len(strings):
+                        attrs[key] = strings[raw]
+                    elif data_type == 0x03 and data < len(strings):
+                        attrs[key] = strings[data]
+                    elif 0x10 <= data_type <= 0x1F:
+                        attrs[key] = data
+                return attrs  # 只看第一個元素（<manifest>）
+            if size <= 0:
+                break
+            pos += size
+    except (struct.error, IndexError):
+        pass
+    return attrs
+
+
+def manifest_version_code(axml: bytes):
+    """二進位 AndroidManifest.xml -> <manifest android:versionCode>；無法解析時回傳 None。"""
+    value = manifest_attributes(axml).get("versionCode")
+    return value if isinstance(value, int) else None
+
+
+def device_apk_name(member: str):
+    """.apks 內的路徑 -> 安裝後在裝置上的檔名；不會安裝到裝置上的項目回傳 None。"""
+    name = posixpath.basename(member)
+    if not name.endswith(".apk"):
+        return None
+    if name == "universal.apk":
+        return "base.apk"
+    if not member.startswith("splits/"):
+        return None
+    module, _, variant = name[:-4].partition("-")
+    if variant == "master":
+        return "base.apk" if module == "base" else f"split_{module}.apk"
+    return f"split_config.{variant}.apk" if module == "base" else f"split_{module}.config.{variant}.apk"
+
+
+def _sha256_stream(f) -> str:
+    h = hashlib.sha256()
+    while True:
+        chunk = f.read(HASH_CHUNK)
+        if not chunk:
+            break
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def describe_apk_set(apks_path) -> dict:
+    """{"apks": {裝置檔名: {"member", "sha256", "size"}}, "version_code", "signature"}。"""
+    apks = {}
+    version_code = signature = None
+    with zipfile.ZipFile(apks_path) as zf:
+        for info in zf.infolist():
+            name = device_apk_name(info.filename)
+            if not name:
+                continue
+            with open_entry(zf, info.filename) as f:
+                apks[name] = {"member": info.filename, "sha256": _sha256_stream(f), "size": info.file_size}
+        base = apks.get("base.apk")
+        if base:
+            with open_entry(zf, base["member"]) as f:
+                cert = primary_cert(read_archive_signers(f))
+                f.seek(0)
+                with zipfile.ZipFile(f) as apk:
+                    try:
+                        version_code = manifest_version_code(apk.read("AndroidManifest.xml"))
+                    except KeyError:
+                        pass
+            signature = cert["hash_code"] if cert else None
+    return {"apks": apks, "version_code": version_code, "signature": signature}
+
+
+# ---------------------------------------------------------------------------
+# 裝置端
+# ---------------------------------------------------------------------------
+
+def query_device(client: AdbClient, serial: str, package: str = PACKAGE) -> dict:
+    """{"installed", "version_code", "signatures", "apks": {檔名: {"path", "sha256"}}}。"""
+    paths = [line[len("package:"):].strip() for line in client.shell(serial, f"pm path {package}").splitlines()
+             if line.startswith("package:")]
+    if not paths:
+        return {"installed": False, "version_code": None, "signatures": [], "apks": {}}
+    dump = client.shell(serial, f"dumpsys package {package}")
+    block = dump.split(f"Package [{package}]", 1)[-1]
+    m = re.search(r"\bversionCode=(\d+)", block)
+    sigs = re.search(r"signatures:\[([0-9a-fA-F, ]*)\]", block)
+    hashes = {}
+    out = client.shell(serial, "sha256sum " + " ".join(paths))
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and re.fullmatch(r"[0-9a-f]{64}", parts[0]):
+            hashes[parts[1]] = parts[0]
+    return {
+        "installed": True,
+        "version_code": int(m.group(1)) if m else None,
+        "signatures": [s.strip().lower() for s in sigs.group(1).split(",") if s.strip()] if sigs else [],
+        "apks": {posixpath.basename(p): {"path": p, "sha256": hashes.get(p)} for p in paths},
+    }
+
+
+def plan_install(device: dict, local: dict) -> dict:
+    """回傳 {"action": "skip"|"partial"|"full", "reason", "changed": [裝置檔名]}。"""
+    def full(reason):
+        return {"action": "full", "reason": reason, "changed": sorted(local["apks"])}
+
+    if not device["installed"]:
+        return full("not installed")
+    if local["version_code"] is not None and device["version_code"] is not None \
+            and local["version_code"] != device["version_code"]:
+        return full(f"versionCode {device['version_code']} -> {local['version_code']}")
+    if local["signature"] and device["signatures"] and local["signature"] not in device["signatures"]:
+        return full("signing certificate differs; the install needs an uninstall first")
+    missing = sorted(set(device["apks"]) - set(local["apks"]))
+    if missing:
+        return full(f"device has splits not in this APK set: {', '.join(missing)}")
+    if any(a["sha256"] is None for a in device["apks"].values()):
+        return full("could not hash the installed APKs on the device")
+    changed = sorted(n for n, a in device["apks"].items() if a["sha256"] != local["apks"][n]["sha256"])
+    if not changed:
+        return {"action": "skip", "reason": "identical build already installed", "changed": []}
+    return {"action": "partial", "reason": f"{len(changed)} of {len(device['apks'])} APK(s) changed", "changed": changed}
+
+
+def install_changed(client: AdbClient, serial: str, apks_path, local: dict, names: list, inherit: bool,
+                    package: str = PACKAGE) -> str:
+    """以 pm install session 寫入 names；inherit=True 時保留裝置上其餘的 split。回傳 pm 輸出（成功時含 Success）。"""
+    remotes = {}
+    session = None
+    try:
+        with zipfile.ZipFile(apks_path) as zf:
+            for name in names:
+                remote = f"{REMOTE_TMP}/homeletter-fast-{name}"
+                with open_entry(zf, local["apks"][name]["member"]) as src, client.sync(serial) as conn:
+                    conn.push(src, remote, 0o644, int(time.time()))
+                remotes[name] = remote
+        total = sum(local["apks"][n]["size"] for n in names)
+        out = client.shell(serial, f"pm install-create -r {'-p ' + package if inherit else ''} --pkg {package} -S {total}")
+        m = re.search(r"\[(\d+)\]", out)
+        if not m:
+            return out
+        session = m.group(1)
+        for name in names:
+            out = client.shell(serial, f"pm install-write -S {local['apks'][name]['size']} {session} "
+                                       f"{name[:-4]} {remotes[name]}")
+            if "Success" not in out:
+                return out
+        out = client.shell(serial, f"pm install-commit {session}", timeout=300)
+        if "Success" in out:
+            session = None
+        return out
+    finally:
+        if session:
+            client.shell(serial, f"pm install-abandon {session}")
+        if remotes:
+            client.shell(serial, "rm -f " + " ".join(remotes.values()))
+
+
+def fast_install(client: AdbClient, serial: str, apks_path, local: dict, package: str = PACKAGE) -> dict:
+    """回傳 {"serial", "action", "reason", "ok", "seconds", "changed"}；ok=False 表示需要一般安裝。"""
+    start = time.monotonic()
+    result = {"serial": serial, "action": "full", "reason": "", "ok": False, "changed": []}
+    try:
+        device = query_device(client, serial, package)
+        plan = plan_install(device, local)
+        result.update(plan)
+        if plan["action"] == "skip":
+            result["ok"] = True
+        elif plan["action"] == "partial":
+            out = install_changed(client, serial, apks_path, local, plan["changed"],
+                                  inherit=len(plan["changed"]) < len(device["apks"]), package=package)
+            result["ok"] = "Success" in out
+            if not result["ok"]:
+                result.update(action="full", reason=f"partial install failed: {out.strip()[:200]}")
+    except (OSError, AdbError) as e:
+        result.update(action="full", reason=f"device query failed: {e}")
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def fast_install_all(serials: list, apks_path, package: str = PACKAGE, client: AdbClient | None = None) -> dict:
+    """對每台裝置嘗試快速路徑（平行）；回傳 {serial: result}。本機 APK set 只分析一次。"""
+    if not serials:
+        return {}
+    try:
+        local = describe_apk_set(apks_path)
+    except (OSError, zipfile.BadZipFile, ValueError) as e:
+        return {s: {"serial": s, "action": "full", "reason": f"cannot read {apks_path}: {e}", "ok": False,
+                    "changed": [], "seconds": 0.0} for s in serials}
+    client = client or AdbClient()
+    with ThreadPoolExecutor(max_workers=min(8, len(serials))) as pool:
+        results = list(pool.map(lambda s: fast_install(client, s, apks_path, local, package), serials))
+    return {r["serial"]: r for r in results}
+
+
+def print_results(results: dict):
+    for r in results.values():
+        if r["action"] == "skip":
+            print(f"[FAST_INSTALL] {r['serial']}: {r['reason']}; skipped install ({r['seconds']:.1f}s)")
+        elif r["action"] == "partial" and r["ok"]:
+            print(f"[FAST_INSTALL] {r['serial']}: pushed {', '.join(r['changed'])} only ({r['seconds']:.1f}s)")
+        else:
+            print(f"[FAST_INSTALL] {r['serial']}: full install needed ({r['reason']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skip or minimise installs when the device already has the build")
+    parser.add_argument("apks", help="APK set built by bundletool")
+    parser.add_argument("--serial", action="append", help="Device serial (repeatable; default: every ready device)")
+    parser.add_argument("--package", default=PACKAGE, help=f"Application id (default: {PACKAGE})")
+    parser.add_argument("--plan", action="store_true", help="Only print what would happen")
+    args = parser.parse_args()
+
+    client = AdbClient()
+    serials = args.serial or (client.ready_serials() if client.ensure_server() else [])
+    if not serials:
+        print("<NO_ADB_DEVICE>")
+        sys.exit(1)
+    if args.plan:
+        local = describe_apk_set(args.apks)
+        print(f"Local: versionCode={local['version_code']} signature={local['signature']} "
+              f"apks={', '.join(sorted(local['apks']))}")
+        for serial in serials:
+            plan = plan_install(query_device(client, serial, args.package), local)
+            print(f"{serial}: {plan['action']} ({plan['reason']}) {' '.join(plan['changed'])}")
+        return
+    results = fast_install_all(serials, args.apks, args.package, client)
+    print_results(results)
+    sys.exit(0 if all(r["ok"] for r in results.values()) else 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,20 @@
 import os
 import sys
 import zipfile
-import urllib.request
 import shutil
 import re
 from pathlib import Path
-import subprocess
+
+from adb_client import AdbClient, AdbError
+from apk_signing import keystore_fingerprints, primary_cert, read_archive_signers
+from download_cache import DownloadCache
+import install_fastpath
+from nested_zip import find_member, open_entry
+import platform_tools_install
+from probe_cache import ProbeCache
+from release_pipeline import Pipeline
+import run_metrics
+import verify_aab_with_bundletool as verify
 
 project_path = r"F:\homeletter2.0android251006\homeletterAPP"
 platform_tools_url = "https://dl.google.com/android/repository/platform-tools-latest-windows.zip"
@@ -15,7 +24,7 @@ install_dir = Path(r"C:\platform-tools")
 def run_cmd(cmd: str, cwd: Path | None = None):
     try:
         print(f"[RUN] {cmd}")
-        res = subprocess.run(f"cmd /c {cmd}", cwd=str(cwd or project_path), shell=True, capture_output=True, text=True)
+        res = run_metrics.run(f"cmd /c {cmd}", cwd=str(cwd or project_path), shell=True)
         if res.stdout:
             print(res.stdout)
         if res.stderr:
@@ -28,14 +37,8 @@ def run_cmd(cmd: str, cwd: Path | None = None):
 
 def download_platform_tools_zip(dest_zip: Path):
     try:
-        dest_zip.parent.mkdir(parents=True, exist_ok=True)
         print(f"[INFO] Downloading Platform Tools from {platform_tools_url}")
-        with urllib.request.urlopen(platform_tools_url, timeout=120) as resp, open(dest_zip, "wb") as f:
-            while True:
-                chunk = resp.read(8192)
-                if not chunk:
-                    break
-                f.write(chunk)
+        DownloadCache().fetch(platform_tools_url, sha256=os.environ.get("PLATFORM_TOOLS_SHA256") or None, dest=dest_zip)
         size = dest_zip.stat().st_size
         print(f"[OK] Downloaded ZIP: {dest_zip} ({size} bytes)")
         return True
@@ -45,45 +48,18 @@ def download_platform_tools_zip(dest_zip: Path):
 
 
 def extract_zip_to(zip_path: Path, out_dir: Path):
+    # 串流解壓到 staging 目錄後原子性切換；已安裝相同 Pkg.Revision 時直接略過（見 platform_tools_install）
     try:
-        # If already installed and adb exists, keep existing installation
-        existing_adb = out_dir / "adb.exe"
-        if out_dir.exists() and existing_adb.exists():
-            print(f"[INFO] Existing Platform Tools detected at {out_dir}; skipping clean reinstall.")
+        r = platform_tools_install.install(zip_path, out_dir)
+        if r["status"] == "skipped":
+            print(f"[INFO] Platform Tools {r['revision']} already installed at {out_dir}; skipping extraction.")
+        elif r["status"] == "kept":
+            print(f"[INFO] Continuing with the existing Platform Tools {r['revision']} at {out_dir}.")
         else:
-            if out_dir.exists():
-                print(f"[INFO] Removing existing {out_dir} for clean install...")
-                try:
-                    shutil.rmtree(out_dir)
-                except Exception as e:
-                    print(f"[WARN] Could not remove existing dir: {e}. Will attempt direct extract.")
-            out_dir.mkdir(parents=True, exist_ok=True)
-            with zipfile.ZipFile(zip_path, "r") as zf:
-                zf.extractall(out_dir)
-            # The ZIP contains a folder 'platform-tools'; if so, flatten it
-            inner = out_dir / "platform-tools"
-            if inner.exists():
-                for item in inner.iterdir():
-                    target = out_dir / item.name
-                    if target.exists():
-                        try:
-                            if target.is_dir():
-                                shutil.rmtree(target)
-                            else:
-                                target.unlink()
-                        except Exception:
-                            pass
-                    try:
-                        shutil.move(str(item), str(target))
-                    except Exception:
-                        pass
-                try:
-                    shutil.rmtree(inner)
-                except Exception:
-                    pass
-        out_dir.mkdir(parents=True, exist_ok=True)
+            print(f"[OK] Extracted {r['files']} files ({r['bytes'] / (1024 * 1024):.1f} MB) to {out_dir} "
+                  f"in {r['seconds']:.2f}s")
         adb_path = out_dir / "adb.exe"
-        print(f"[OK] Extracted to {out_dir}; adb present: {adb_path.exists()}")
+        print(f"[OK] Platform Tools {r['revision']} at {out_dir}; adb present: {adb_path.exists()}")
         return adb_path.exists()
     except Exception as e:
         print(f"[extract_failed] {e}")
@@ -131,10 +107,18 @@ def ensure_path_has_platform_tools():
 def verify_adb_version():
     # Prefer direct path to freshly installed adb to avoid PATH timing issues
     adb_full = install_dir / "adb.exe"
-    if adb_full.exists():
-        code, out, err = run_cmd(f"\"{adb_full}\" version")
-    else:
-        code, out, err = run_cmd("adb version")
+    adb_bin = str(adb_full) if adb_full.exists() else shutil.which("adb")
+
+    def probe():
+        if adb_full.exists():
+            code, out, err = run_cmd(f"\"{adb_full}\" version")
+        else:
+            code, out, err = run_cmd("adb version")
+        return {"code": code, "out": out or "", "err": err or ""}
+
+    # adb 執行檔沒變（大小/mtime/內容）就沿用上次的版本輸出
+    res = ProbeCache().get_or_probe("adb-version", [adb_bin], probe, accept=lambda r: r["code"] == 0)
+    code, out, err = res["code"], res["out"], res["err"]
     target = "Android Debug Bridge version 36.0.1"
     ok = (code == 0 and target in (out or ""))
     print(f"ADB version ok: {ok}")
@@ -142,16 +126,13 @@ def verify_adb_version():
 
 
 def list_devices():
-    adb_full = install_dir / "adb.exe"
-    if adb_full.exists():
-        code, out, err = run_cmd(f"\"{adb_full}\" devices")
-    else:
-        code, out, err = run_cmd("adb devices")
     devices = []
-    if code == 0 and out:
-        for ln in out.splitlines():
-            if ln.strip().endswith("\tdevice") and not ln.lower().startswith("list of devices"):
-                devices.append(ln.strip())
+    client = AdbClient()
+    if client.ensure_server():
+        try:
+            devices = [f"{serial}\tdevice" for serial in client.ready_serials()]
+        except (OSError, AdbError) as e:
+            print(f"[ADB_QUERY_FAILED] {e}")
     if not devices:
         print("<NO_ADB_DEVICE> 建議：啟用 USB 偵錯，連接裝置並授權。")
     else:
@@ -161,21 +142,23 @@ def list_devices():
     return devices
 
 
-def run_verify_script():
-    # Use cmd /c python to run the existing verification script
-    code, out, err = run_cmd("python scripts\\verify_aab_with_bundletool.py")
-    return code, out, err
+def run_verify_pipeline():
+    # 在同一個行程內執行 verify pipeline（與 rebuild_twa_and_verify 相同），不另外啟動 python
+    cfg = verify.resolve_config()
+    result = Pipeline(verify.build_stages(cfg)).run()
+    result.print_summary()
+    verify.print_verify_summary(cfg, result)
+    return result
 
 
-def parse_install_result(output: str) -> str:
-    # Look for 'Install result: ...'
-    m = re.search(r"Install result:\s*(\w+)", output)
-    return m.group(1) if m else "UNKNOWN"
+def install_status(result) -> str:
+    # install stage 的輸出；stage 失敗或被略過時用 stage 狀態（FAILED / SKIPPED）
+    install = result.value("install")
+    return install["result"] if install else result["install"].status
 
 
-def fallback_debug_if_needed(verify_code: int, verify_out: str):
-    install_status = parse_install_result(verify_out)
-    need_fallback = (verify_code != 0) or (install_status not in ("SUCCESS",))
+def fallback_debug_if_needed(result):
+    need_fallback = not result.ok or install_status(result) != "SUCCESS"
     if not need_fallback:
         print("[INFO] No fallback needed; install status is SUCCESS.")
         return
@@ -197,73 +180,82 @@ def fallback_debug_if_needed(verify_code: int, verify_out: str):
     if code != 0 or not apks_path.exists():
         print("<DEBUG_APKS_BUILD_FAILED>")
         return
-    # Install
+    # Install（裝置上已是同一個 debug 建置時略過，只有部分 split 不同時只推送那些 split）
+    try:
+        client = AdbClient()
+        serials = client.ready_serials() if client.ensure_server() else []
+    except (OSError, AdbError):
+        serials = []
+    if len(serials) == 1:
+        fast = install_fastpath.fast_install_all(serials, apks_path, client=client)
+        install_fastpath.print_results(fast)
+        if fast[serials[0]]["ok"]:
+            print("[DEBUG] Install result: SUCCESS")
+            return
     code, out, err = run_cmd(f"java -jar scripts\\bundletool-all.jar install-apks --apks=\"{apks_path}\"")
     print(f"[DEBUG] Install result: {'SUCCESS' if code == 0 else 'FAILED'}")
 
 
 def extract_fingerprints(apks_path: Path, keystore_path: Path | None, alias: str | None, storepass: str | None):
-    out_dir = Path(project_path) / "apks_extracted"
     try:
-        if out_dir.exists():
-            shutil.rmtree(out_dir)
-        out_dir.mkdir(parents=True, exist_ok=True)
-        # Directly extract 'universal.apk' from the .apks (ZIP)
+        # 直接在 .apks 內以串流開啟 universal.apk，不解壓到磁碟
         with zipfile.ZipFile(apks_path, "r") as zf:
-            names = zf.namelist()
-            uni = next((n for n in names if n.endswith("universal.apk")), None)
+            uni = find_member(zf, "universal.apk")
             if not uni:
                 print("<UNIVERSAL_APK_NOT_FOUND>")
                 return None
-            zf.extract(uni, out_dir)
-        universal_apk = out_dir / "universal.apk"
-        if not universal_apk.exists():
-            print("<UNIVERSAL_APK_EXTRACTION_FAILED>")
-            return None
-        # Find META-INF/*.RSA file inside universal.apk
-        rsa_path = None
-        with zipfile.ZipFile(universal_apk, "r") as apk:
-            rsa_candidates = [n for n in apk.namelist() if n.upper().startswith("META-INF/") and n.upper().endswith(".RSA")]
-            if rsa_candidates:
-                target = rsa_candidates[0]
-                apk.extract(target, out_dir)
-                rsa_path = out_dir / target
-        if not rsa_path or not rsa_path.exists():
-            print("<RSA_FILE_NOT_FOUND>")
+            with open_entry(zf, uni) as universal_apk:
+                signers = read_archive_signers(universal_apk)
+                universal_apk.seek(0)
+                with zipfile.ZipFile(universal_apk) as apk:
+                    axml = apk.read("AndroidManifest.xml") if "AndroidManifest.xml" in apk.namelist() else None
+        # 確認 universal.apk 確實是本 app 的建置：套件名稱與 versionCode 取自二進位 manifest
+        manifest = install_fastpath.manifest_attributes(axml) if axml else {}
+        package, version_code = manifest.get("package"), manifest.get("versionCode")
+        if axml is None:
+            print("<MANIFEST_NOT_FOUND>")
+        elif not package or not isinstance(version_code, int):
+            print("<MANIFEST_UNREADABLE>")
+        else:
+            print(f"APK manifest: package={package} versionCode={version_code}")
+            if package != install_fastpath.PACKAGE:
+                print(f"[WARN] <MANIFEST_PACKAGE_MISMATCH> expected {install_fastpath.PACKAGE}, got {package}")
+        # Read APK certificate fingerprint（v3 > v2 > v1，原生解析，不啟動 keytool）
+        cert = primary_cert(signers)
+        if not cert:
+            print("<SIGNATURE_NOT_FOUND>")
             return None
-        # Read APK certificate fingerprint
-        code, out, err = run_cmd(f"keytool -printcert -file \"{rsa_path}\"")
-        apk_sha256 = None
-        apk_md5 = None
-        if out:
-            m1 = re.search(r"SHA[- ]?256\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
-            m2 = re.search(r"MD5\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
-            apk_sha256 = m1.group(1) if m1 else None
-            apk_md5 = m2.group(1) if m2 else None
-            if apk_sha256:
-                print(f"APK SHA-256: {apk_sha256}")
-            if apk_md5:
-                print(f"APK MD5: {apk_md5}")
+        print(f"APK signature schemes: {','.join(sorted(signers))}")
+        apk_sha256, apk_md5 = cert["sha256"], cert["md5"]
+        print(f"APK SHA-256: {apk_sha256}")
+        print(f"APK MD5: {apk_md5}")
         # Read keystore fingerprint if provided
         ks_sha256 = None
         ks_md5 = None
         if keystore_path and alias and storepass:
-            code, out, err = run_cmd(f"keytool -list -v -keystore \"{keystore_path}\" -alias \"{alias}\" -storepass \"{storepass}\"")
-            if code == 0 and out:
-                m1 = re.search(r"SHA[- ]?256\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
-                m2 = re.search(r"MD5\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
-                ks_sha256 = m1.group(1) if m1 else None
-                ks_md5 = m2.group(1) if m2 else None
-                if ks_sha256:
-                    print(f"Keystore SHA-256: {ks_sha256}")
-                if ks_md5:
-                    print(f"Keystore MD5: {ks_md5}")
+            ks_cert = keystore_fingerprints(keystore_path, alias, storepass)
+            if ks_cert:
+                ks_sha256, ks_md5 = ks_cert["sha256"], ks_cert["md5"]
+            else:
+                # 格式不支援（例如舊版 PKCS12 加密）時退回 keytool
+                code, out, err = run_cmd(f"keytool -list -v -keystore \"{keystore_path}\" -alias \"{alias}\" -storepass \"{storepass}\"")
+                if code == 0 and out:
+                    m1 = re.search(r"SHA[- ]?256\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
+                    m2 = re.search(r"MD5\s*:\s*([A-F0-9:]+)", out, re.IGNORECASE)
+                    ks_sha256 = m1.group(1) if m1 else None
+                    ks_md5 = m2.group(1) if m2 else None
+            if ks_sha256:
+                print(f"Keystore SHA-256: {ks_sha256}")
+            if ks_md5:
+                print(f"Keystore MD5: {ks_md5}")
         # Compare
         match_sha256 = (apk_sha256 and ks_sha256 and apk_sha256.upper() == ks_sha256.upper())
         match_md5 = (apk_md5 and ks_md5 and apk_md5.upper() == ks_md5.upper())
         print(f"Fingerprint match (SHA-256): {'YES' if match_sha256 else 'NO' if apk_sha256 and ks_sha256 else 'UNKNOWN'}")
         print(f"Fingerprint match (MD5): {'YES' if match_md5 else 'NO' if apk_md5 and ks_md5 else 'UNKNOWN'}")
         return {
+            "package": package,
+            "version_code": version_code,
             "apk_sha256": apk_sha256,
             "apk_md5": apk_md5,
             "ks_sha256": ks_sha256,
@@ -289,10 +281,8 @@ def main():
     # 2) List devices
     devices = list_devices()
 
-    # 3) Rerun verify script
-    code, out, err = run_verify_script()
-    print("=== Verify Script Output ===")
-    print(out)
+    # 3) Rerun verification
+    result = run_verify_pipeline()
     # 4) Fingerprint comparison using generated APKS
     apks = Path(project_path) / "app-prod.apks"
     # Resolve keystore from gradle.properties
@@ -323,14 +313,14 @@ def main():
         extract_fingerprints(apks, Path(ks_path) if ks_path else None, alias, storepass)
 
     # Fallback if needed
-    fallback_debug_if_needed(code, out or "")
+    fallback_debug_if_needed(result)
 
     print("=== Summary ===")
     print(f"ADB installed: {ok}")
     print(f"Devices: {devices if devices else '<NONE>'}")
-    install_status = parse_install_result(out or "")
-    print(f"Install: {install_status}")
+    print(f"Install: {install_status(result)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.session("install_platform_tools_and_verify"):
+        main()
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+串流式 logcat 監看（adb server socket，不啟動 adb.exe，也不重複 dump 整個 log buffer）：
+- 在背景執行緒讀取 shell:logcat -v threadtime，逐行解析成 LogRecord（時間、pid、tid、level、tag、訊息）
+- 最近的紀錄保存在有上限的 ring buffer（collections.deque），記憶體用量固定
+- 多個 LogFilter 一次掃描完成：有指定 tag 的過濾器依 tag 建索引，每行只比對該 tag 的過濾器與不限 tag 的過濾器，
+  正規表示式只在 tag/level 符合後才執行
+- wait_for(名稱, timeout)：阻塞到第一筆符合的紀錄或逾時；已讀入的紀錄會立即回傳，不必重新讀 log
+- 內建檢查：ads_init（Google Mobile Ads SDK 初始化）、crash（FATAL EXCEPTION）、native_crash、anr
+
+用法：
+  python scripts/logcat_monitor.py [--serial emulator-5554] [--wait ads_init --timeout 30]
+                                   [--filter NAME=TAG:REGEX ...] [--duration 10] [--tail 5000]
+  with LogcatMonitor(AdbClient(), serial) as mon:
+      rec = mon.wait_for("ads_init", timeout=5)
+"""
+
+import argparse
+import collections
+import re
+import socket
+import sys
+import threading
+import time
+
+from adb_client import AdbClient, AdbError
+
+DEFAULT_CAPACITY = 50000
+LEVELS = "VDIWEFA"
+# 10-18 12:00:00.123  1234  1250 I Ads     : message
+THREADTIME = re.compile(r"^(\d\d-\d\d) (\d\d:\d\d:\d\d\.\d+)\s+(\d+)\s+(\d+) ([VDIWEFA]) (.*?)\s*: (.*)$")
+
+
+class LogRecord:
+    __slots__ = ("seq", "date", "time", "pid", "tid", "level", "tag", "message")
+
+    def __init__(self, seq, date, time_, pid, tid, level, tag, message):
+        self.seq = seq
+        self.date = date
+        self.time = time_
+        self.pid = pid
+        self.tid = tid
+        self.level = level
+        self.tag = tag
+        self.message = message
+
+    def __str__(self):
+        return f"{self.date} {self.time} {self.pid:5d} {self.tid:5d} {self.level} {self.tag}: {self.message}"
+
+
+def parse_line(line: str, seq: int = 0):
+    m = THREADTIME.match(line)
+    if not m:
+        return None
+    return LogRecord(seq, m.group(1), m.group(2), int(m.group(3)), int(m.group(4)), m.group(5), m.group(6),
+                     m.group(7))
+
+
+class LogFilter:
+    """tags：限定的 tag（None = 全部）；pattern：訊息的正規表示式；min_level：最低等級（V < D < I < W < E < F）。"""
+
+    def __init__(self, name: str, tags=None, pattern: str | None = None, min_level: str = "V", pid: int | None = None):
+        self.name = name
+        self.tags = frozenset(tags) if tags else None
+        self.regex = re.compile(pattern) if pattern else None
+        self.min_level = LEVELS.index(min_level)
+        self.pid = pid
+
+    def match(self, rec: LogRecord) -> bool:
+        if LEVELS.index(rec.level) < self.min_level:
+            return False
+        if self.pid is not None and rec.pid != self.pid:
+            return False
+        return self.regex is None or self.regex.search(rec.message) is not None
+
+    @classmethod
+    def parse(cls, spec: str) -> "LogFilter":
+        """'name=TAG:REGEX'、'name=TAG'、'name=:REGEX'。"""
+        name, _, rest = spec.partition("=")
+        tag, _, pattern = rest.partition(":")
+        return cls(name, tags=[tag] if tag else None, pattern=pattern or None)
+
+
+DEFAULT_FILTERS = (
+    LogFilter("ads_init", pattern=r"(?i)mobileads|mobile ads sdk|ads sdk initializ"),
+    LogFilter("crash", tags=["AndroidRuntime"], pattern=r"^FATAL EXCEPTION", min_level="E"),
+    LogFilter("native_crash", tags=["libc", "DEBUG", "crash_dump64", "crash_dump32"],
+              pattern=r"Fatal signal|^\*\*\* \*\*\* \*\*\*", min_level="E"),
+    LogFilter("anr", tags=["ActivityManager"], pattern=r"^ANR in ", min_level="E"),
+)
+
+
+class LogcatMonitor:
+    def __init__(self, client: AdbClient | None = None, serial: str | None = None, filters=DEFAULT_FILTERS,
+                 capacity: int = DEFAULT_CAPACITY, tail: int | None = None, clear: bool = False):
+        self.client = client
+        self.serial = serial
+        self.tail = tail
+        self.clear = clear
+        self.buffer = collections.deque(maxlen=capacity)
+        self.matches = {}
+        self.lines = 0
+        self.unparsed = 0
+        self._by_tag = collections.defaultdict(list)
+        self._any_tag = []
+        self._cond = threading.Condition()
+        self._sock = None
+        self._thread = None
+        self._closed = False
+        self.error = None
+        for f in filters:
+            self.add_filter(f)
+
+    # -- 過濾器 ---------------------------------------------------------------
+
+    def add_filter(self, f: LogFilter):
+        with self._cond:
+            self.matches[f.name] = collections.deque(maxlen=1000)
+            if f.tags:
+                for tag in f.tags:
+                    self._by_tag[tag].append(f)
+            else:
+                self._any_tag.append(f)
+
+    def feed(self, line: str):
+        """餵入一行 threadtime 輸出（讀取執行緒或離線分析時使用）。"""
+        self.lines += 1
+        rec = parse_line(line.rstrip("\r\n"), self.lines)
+        if rec is None:
+            self.unparsed += 1
+            return None
+        hits = [f.name for f in self._by_tag.get(rec.tag, ()) if f.match(rec)]
+        hits += [f.name for f in self._any_tag if f.match(rec)]
+        with self._cond:
+            self.buffer.append(rec)
+            for name in hits:
+                self.matches[name].append(rec)
+            if hits:
+                self._cond.notify_all()
+        return rec
+
+    # -- 串流 -----------------------------------------------------------------
+
+    def start(self):
+        if self.clear:
+            self.client.shell(self.serial, "logcat -c")
+        cmd = "logcat -v threadtime" + (f" -T {int(self.tail)}" if self.tail else "")
+        self._sock = self.client.open_service(self.serial, f"shell:{cmd}")
+        self._thread = threading.Thread(target=self._read, name=f"logcat-{self.serial or 'any'}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _read(self):
+        pending = b""
+        try:
+            while True:
+                chunk = self._sock.recv(64 * 1024)
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for raw in lines:
+                    self.feed(raw.decode("utf-8", errors="replace"))
+        except OSError as e:
+            if not self._closed:
+                self.error = e
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+
+    def stop(self):
+        if self._sock is not None:
+            self._closed = True
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -- 查詢 -----------------------------------------------------------------
+
+    def wait_for(self, name: str, timeout: float | None = None, after_seq: int = 0):
+        """回傳第一筆 seq > after_seq 且符合過濾器 name 的紀錄；逾時或串流結束時回傳 None。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                rec = next((r for r in self.matches[name] if r.seq > after_seq), None)
+                if rec is not None or (self._closed and self._thread is not None):
+                    return rec
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def found(self, name: str) -> list:
+        with self._cond:
+            return list(self.matches[name])
+
+    def query(self, tag: str | None = None, min_level: str = "V", pattern: str | None = None,
+              pid: int | None = None) -> list:
+        """在 ring buffer 內查詢（不重新讀 log）。"""
+        f = LogFilter("query", [tag] if tag else None, pattern, min_level, pid)
+        with self._cond:
+            records = list(self.buffer)
+        return [r for r in records if (f.tags is None or r.tag in f.tags) and f.match(r)]
+
+    def context(self, rec: LogRecord, lines: int = 20) -> list:
+        """rec 之後同一 pid/tid 的紀錄（例如 FATAL EXCEPTION 之後的堆疊）。"""
+        with self._cond:
+            records = list(self.buffer)
+        return [r for r in records if r.seq >= rec.seq and r.pid == rec.pid and r.tid == rec.tid][:lines]
+
+
+def print_summary(mon: LogcatMonitor, names=None, context_lines: int = 12):
+    for name in names or list(mon.matches):
+        hits = mon.found(name)
+        print(f"  {name}: {len(hits)} match(es)")
+        for rec in hits[-3:]:
+            print(f"    {rec}")
+            if name in ("crash", "native_crash", "anr"):
+                for r in mon.context(rec, context_lines)[1:]:
+                    print(f"      {r.tag}: {r.message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream logcat and report SDK init, crashes and ANRs")
+    parser.add_argument("--serial", help="Device serial (default: the only ready device)")
+    parser.add_argument("--wait", help="Filter name to wait for (e.g. ads_init)")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for --wait (default: 30)")
+    parser.add_argument("--duration", type=float, default=0, help="Keep streaming this many seconds before reporting")
+    parser.add_argument("--filter", action="append", default=[], help="Extra filter NAME=TAG:REGEX (repeatable)")
+    parser.add_argument("--tail", type=int, help="Only start from the last N lines of the device buffer")
+    parser.add_argument("--clear", action="store_true", help="Clear the device log buffer first")
+    args = parser.parse_args()
+
+    client = AdbClient()
+    if not client.ensure_server():
+        print("<ADB_SERVER_UNAVAILABLE>")
+        sys.exit(1)
+    filters = list(DEFAULT_FILTERS) + [LogFilter.parse(spec) for spec in args.filter]
+    try:
+        with LogcatMonitor(client, args.serial, filters, tail=args.tail, clear=args.clear) as mon:
+            start = time.monotonic()
+            code = 0
+            if args.wait:
+                rec = mon.wait_for(args.wait, args.timeout)
+                if rec:
+                    print(f"[OK] {args.wait} after {time.monotonic() - start:.3f}s: {rec}")
+                else:
+                    print(f"<LOGCAT_TIMEOUT> {args.wait} not seen within {args.timeout:.0f}s")
+                    code = 2
+            if args.duration:
+                time.sleep(args.duration)
+            print(f"=== Logcat ({mon.lines} lines, {len(mon.buffer)} buffered) ===")
+            print_summary(mon)
+    except (OSError, AdbError) as e:
+        print(f"<LOGCAT_FAILED> {e}")
+        sys.exit(1)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+信箱服務的負載測試（mailbox_service.py 或任何相容的 /api/mailbox 後端）：
+- 以 mailbox.json 的信件為樣本產生 --items 筆（預設 100k，id / createdAt / topic 各不相同），
+  寫成暫存 JSON 後另開一個 mailbox_service 行程（與負載產生端不共用 GIL）；--url 則直接打現有服務
+- 先量「整包 GET /api/mailbox」（main.js renderMailbox 目前的做法）的延遲與大小作為對照
+- --clients 條 keep-alive 連線在 --duration 秒內混合：分頁、依 topic 分頁、帶 If-None-Match 的條件式 GET、
+  DELETE（id 取自先前回應），報告每種操作的 req/s、p50/p95/p99 延遲、平均回應大小與 304 比例
+
+用法：
+  python scripts/mailbox_loadtest.py [--items 100000] [--clients 8] [--duration 10] [--size 10]
+                                     [--url http://127.0.0.1:3000] [--out results.json]
+"""
+
+import argparse
+import collections
+import http.client
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+from mailbox_service import DEFAULT_DATA, load_items
+
+# 各操作的權重
+MIX = {"page": 45, "topic_page": 25, "conditional": 25, "delete": 5}
+TOPICS = ["工作 / 職場", "家庭 / 關係", "壓力 / 焦慮", "病痛 / 醫治", "供應 / 需要",
+          "饒恕 / 和好", "方向 / 抉擇", "信心 / 盼望", "平安 / 安息", "感恩 / 敬拜"]
+
+
+def generate_items(count: int, seed: int = 0, samples=None) -> list:
+    rng = random.Random(seed)
+    samples = samples or load_items(DEFAULT_DATA) or [{"text": "親愛的孩子，願平安與你同在。", "verses": "", "actions": ""}]
+    start = 1_700_000_000_000
+    items = []
+    for i in range(count):
+        s = samples[i % len(samples)]
+        created = start + i * 60_000 + rng.randrange(60_000)
+        items.append({"id": f"{created}_{i:06x}", "topic": rng.choice(TOPICS), "text": s.get("text", ""),
+                      "directions": s.get("directions", ""), "verses": s.get("verses", ""),
+                      "actions": s.get("actions", ""), "createdAt": created})
+    return items
+
+
+def start_service(items: list, workdir: Path):
+    """另開 mailbox_service 行程；回傳 (proc, base_url, 載入訊息)。"""
+    data = workdir / "mailbox_load.json"
+    data.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    proc = subprocess.Popen([sys.executable, str(Path(__file__).with_name("mailbox_service.py")),
+                             "--data", str(data), "--port", "0"],
+                            stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    loaded = ""
+    for line in proc.stdout:
+        if line.startswith("[INFO] Loaded"):
+            loaded = line.strip()
+        m = re.search(r"http://([\d.]+):(\d+)/", line)
+        if m:
+            return proc, f"http://{m.group(1)}:{m.group(2)}", loaded
+    raise RuntimeError(f"mailbox_service exited with {proc.wait()}")
+
+
+class Worker(threading.Thread):
+    def __init__(self, base_url: str, deadline: float, size: int, total_pages: int, shared: dict, seed: int):
+        super().__init__(daemon=True)
+        url = urlsplit(base_url)
+        self.conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        self.deadline = deadline
+        self.size = size
+        self.total_pages = total_pages
+        self.shared = shared
+        self.rng = random.Random(seed)
+        self.latency = collections.defaultdict(list)
+        self.bytes = collections.Counter()
+        self.status = collections.Counter()
+        self.etags = {}
+
+    def request(self, op: str, method: str, path: str, headers=None):
+        start = time.perf_counter()
+        self.conn.request(method, path, headers=headers or {})
+        resp = self.conn.getresponse()
+        body = resp.read()
+        self.latency[op].append((time.perf_counter() - start) * 1000)
+        self.bytes[op] += len(body)
+        self.status[(op, resp.status)] += 1
+        return resp, body
+
+    def page_path(self, topic=None):
+        page = self.rng.randint(1, max(1, self.total_pages if topic is None else self.total_pages // len(TOPICS)))
+        topic_q = f"&topic={quote(topic)}" if topic else ""
+        return f"/api/mailbox?page={page}&size={self.size}{topic_q}"
+
+    def remember(self, path, resp, body):
+        if resp.status == 200:
+            self.etags[path] = resp.getheader("ETag")
+            ids = [x["id"] for x in json.loads(body).get("list", [])]
+            with self.shared["lock"]:
+                self.shared["ids"].extend(ids[:2])
+
+    def run(self):
+        ops, weights = zip(*MIX.items())
+        while time.perf_counter() < self.deadline:
+            op = self.rng.choices(ops, weights)[0]
+            if op == "page":
+                path = self.page_path()
+                self.remember(path, *self.request(op, "GET", path))
+            elif op == "topic_page":
+                path = self.page_path(self.rng.choice(TOPICS))
+                self.remember(path, *self.request(op, "GET", path))
+            elif op == "conditional":
+                if not self.etags:
+                    continue
+                path = self.rng.choice(list(self.etags))
+                self.remember(path, *self.request(op, "GET", path, {"If-None-Match": self.etags[path]}))
+            else:
+                with self.shared["lock"]:
+                    item_id = self.shared["ids"].popleft() if self.shared["ids"] else None
+                if item_id:
+                    self.request(op, "DELETE", f"/api/mailbox/{quote(item_id)}")
+        self.conn.close()
+
+
+def summarize(latencies: list, seconds: float, total_bytes: int) -> dict:
+    q = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {"count": len(latencies), "rps": round(len(latencies) / seconds, 1),
+            "p50_ms": round(q[49], 2), "p95_ms": round(q[94], 2), "p99_ms": round(q[98], 2),
+            "avg_bytes": total_bytes // max(1, len(latencies))}
+
+
+def measure_full_list(base_url: str, repeat: int = 3) -> dict:
+    url = urlsplit(base_url)
+    times, size = [], 0
+    for _ in range(repeat):
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+        start = time.perf_counter()
+        conn.request("GET", "/api/mailbox")
+        size = len(conn.getresponse().read())
+        times.append((time.perf_counter() - start) * 1000)
+        conn.close()
+    return {"median_ms": round(statistics.median(times), 1), "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the mailbox API with paging, conditional GETs and deletes")
+    parser.add_argument("--items", type=int, default=100_000, help="Letters to seed (default: 100000)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive connections (default: 8)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load (default: 10)")
+    parser.add_argument("--size", type=int, default=10, help="Page size (default: 10, like MAILBOX_PAGE_SIZE)")
+    parser.add_argument("--url", help="Existing service to test instead of spawning mailbox_service.py")
+    parser.add_argument("--skip-full", action="store_true", help="Skip the full-list baseline")
+    parser.add_argument("--out", help="Write JSON results here")
+    args = parser.parse_args()
+
+    proc = None
+    workdir = Path(tempfile.mkdtemp(prefix="mailbox-load-"))
+    try:
+        if args.url:
+            base_url, loaded = args.url.rstrip("/"), ""
+        else:
+            start = time.perf_counter()
+            items = generate_items(args.items)
+            print(f"[INFO] Generated {len(items)} letters in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            proc, base_url, loaded = start_service(items, workdir)
+            print(loaded, file=sys.stderr)
+        url = urlsplit(base_url)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        conn.request("GET", f"/api/mailbox?page=1&size={args.size}")
+        total = json.loads(conn.getresponse().read())["total"]
+        conn.close()
+        full = None if args.skip_full else measure_full_list(base_url)
+        if full:
+            print(f"[INFO] Full list: {full['bytes'] / (1024 * 1024):.1f} MB in {full['median_ms']:.0f} ms",
+                  file=sys.stderr)
+
+        shared = {"lock": threading.Lock(), "ids": collections.deque()}
+        deadline = time.perf_counter() + args.duration
+        workers = [Worker(base_url, deadline, args.size, -(-total // args.size), shared, seed)
+                   for seed in range(args.clients)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        seconds = time.perf_counter() - start
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+        for p in workdir.iterdir():
+            p.unlink()
+        workdir.rmdir()
+
+    ops = {}
+    for op in MIX:
+        lat = [x for w in workers for x in w.latency[op]]
+        if lat:
+            ops[op] = summarize(lat, seconds, sum(w.bytes[op] for w in workers))
+    status = collections.Counter()
+    for w in workers:
+        status.update(w.status)
+    not_modified = status[("conditional", 304)]
+    report = {
+        "items": total, "clients": args.clients, "seconds": round(seconds, 2), "page_size": args.size,
+        "loaded": loaded, "full_list": full, "total_rps": round(sum(o["count"] for o in ops.values()) / seconds, 1),
+        "conditional_304_ratio": round(not_modified / max(1, sum(v for (o, _), v in status.items() if o == "conditional")), 3),
+        "errors": sum(v for (o, code), v in status.items() if code >= 400), "ops": ops,
+    }
+    print(f"=== Mailbox load test: {total} letters, {args.clients} clients, {seconds:.1f}s ===")
+    print(f"  {'op':<12} {'count':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'avg B':>8}")
+    for op, o in ops.items():
+        print(f"  {op:<12} {o['count']:>8} {o['rps']:>8.0f} {o['p50_ms']:>8.2f} {o['p95_ms']:>8.2f} "
+              f"{o['p99_ms']:>8.2f} {o['avg_bytes']:>8}")
+    print(f"  total {report['total_rps']:.0f} req/s, 304 ratio {report['conditional_304_ratio']:.0%}, "
+          f"errors {report['errors']}")
+    if full:
+        print(f"  full list baseline: {full['median_ms']:.0f} ms, {full['bytes'] / 1024:.0f} KB per popover open")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+        print(f"[OK] results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
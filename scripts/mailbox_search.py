@@ -0,0 +1,569 @@
+"""
+信箱全文檢索（倒排索引，只用標準函式庫）：
+- 斷詞：NFKC + 小寫；連續的中日韓文字切成重疊的二字詞（bigram），英數字串為一個詞（經文章節「4:7」-> 4、7）；
+  建索引時每個字另外算一個一字詞，查詢只用二字詞，單獨一個字（例如「愛」）才查一字詞
+- 欄位：text、verses、actions，加權（經文 ×2、行動 ×1.5）後合成一個詞頻；排序用 BM25
+- postings：依內部文件編號排序，每 256 筆封成一個 chunk（差值以 u8/u16/u32 中最窄的寬度存放，
+  比較小時再 zlib），chunk 記錄首尾編號與 impact 上限 max(tf / (tf + norm))；
+  新增的信件先放在未封裝的尾端（array），滿了才封裝
+- 增量：add() 只 append；delete() 標記刪除（df 在壓縮前是近似值），刪除超過 1/4 時 compact() 重寫 postings，
+  不需要重新斷詞
+- 序列化：save() / load()，開啟索引不需要重新斷詞；詞典與文件表為 zlib JSON，postings 為一段連續 bytes
+- 查詢：預設所有詞都要出現（AND），沒有結果時退回 OR。AND 以最稀有詞的 chunk 為視窗、依分數上限由高到低處理，
+  上限贏不了目前第 limit 名就停（block-max，結果與全部計分相同，同分時新的在前）；逐筆計分交給 C 實作的 map/zip/set
+- 執行緒：SearchIndex 自己有一把鎖，mailbox_service 在自己的 _lock 之外查詢與更新索引
+- 效能現況：尚未達成「10 萬封信、排名查詢在毫秒級」的目標。bench --letters 100000（mailbox_loadtest.generate_items，
+  範例信件重複使用，全部只有約 3.9k 個詞、每封約 650 個詞，幾乎每個詞都出現在大量信件中）：
+  查詢 p50 約 40 ms、p95 約 175–310 ms；建索引約 3–6 分鐘（純 Python 斷詞，約 2–4 ms/封）；存檔 / 載入數秒。
+  這份語料是倒排索引的最壞情況，但真實信件的數字還沒量過，不能拿來當作目標已達成
+
+用法：
+  python scripts/mailbox_search.py build mailbox.json mailbox.hlsx
+  python scripts/mailbox_search.py query mailbox.hlsx "平安 喜樂" [--limit 10] [--data mailbox.json]
+  python scripts/mailbox_search.py bench [--letters 100000] [--queries 200]
+"""
+
+import argparse
+import base64
+import bisect
+import functools
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+from collections import Counter
+from operator import add, mul, truediv
+from pathlib import Path
+
+MAGIC = b"HLSX"
+VERSION = 1
+CHUNK = 256
+# 欄位權重（整數，詞頻與文件長度都以此加權；上限 255 的詞頻以 u8 存）
+FIELD_WEIGHTS = {"text": 2, "verses": 4, "actions": 3}
+MAX_TF = 255
+K1, B = 1.2, 0.75
+_RUN = re.compile(r"[㐀-䶿一-鿿豈-﫿぀-ヿ가-힯]+|[0-9a-z]+")
+_WIDTHS = "BHI"
+
+
+def tokenize(text, unigrams: bool = False) -> list:
+    """查詢只取二字詞（單獨一個字才用一字詞）；建索引時 unigrams=True，每個字也各算一個詞。"""
+    if not isinstance(text, str):
+        text = json.dumps(text, ensure_ascii=False) if text is not None else ""
+    out = []
+    for run in _RUN.findall(unicodedata.normalize("NFKC", text).lower()):
+        if len(run) == 1 or run[0] < "Ā":
+            out.append(run)
+        else:
+            out.extend([run[i:i + 2] for i in range(len(run) - 1)])
+            if unigrams:
+                out.extend(run)
+    return out
+
+
+def _encode_chunk(docs: array, tfs: array) -> tuple:
+    """-> (first, last, count, payload)；payload[0] = 寬度代碼 | 0x80（zlib）。"""
+    first = docs[0]
+    deltas = [b - a for a, b in zip(docs, docs[1:])]
+    top = max(deltas, default=0)
+    code = 0 if top < 0x100 else 1 if top < 0x10000 else 2
+    packed = array(_WIDTHS[code], deltas)
+    t = array("B", tfs)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    body = packed.tobytes() + t.tobytes()
+    squeezed = zlib.compress(body, 6)
+    if len(squeezed) < len(body):
+        return first, docs[-1], len(docs), bytes((code | 0x80,)) + squeezed
+    return first, docs[-1], len(docs), bytes((code,)) + body
+
+
+def _decode_chunk(first: int, count: int, payload) -> tuple:
+    flags = payload[0]
+    body = zlib.decompress(payload[1:]) if flags & 0x80 else bytes(payload[1:])
+    deltas = array(_WIDTHS[flags & 3])
+    split = deltas.itemsize * (count - 1)
+    deltas.frombytes(body[:split])
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    return list(itertools.accumulate(deltas, initial=first)), body[split:]
+
+
+def _impacts(docs, tfs, norms: list):
+    """tf / (tf + norm)，逐筆；分數 = idf * (k1 + 1) * impact，chunk 上限用同一個算式才能與分數精確比較。"""
+    return map(truediv, tfs, map(add, tfs, map(norms.__getitem__, docs)))
+
+
+class Postings:
+    __slots__ = ("chunks", "tail_docs", "tail_tfs", "df")
+
+    def __init__(self):
+        # [(first, last, count, payload, 最大 impact, 計算時的平均長度)]
+        self.chunks = []
+        self.tail_docs = array("I")
+        self.tail_tfs = array("B")
+        self.df = 0
+
+    def append(self, docno: int, tf: int, norms: list, avgdl: float):
+        self.tail_docs.append(docno)
+        self.tail_tfs.append(min(tf, MAX_TF))
+        self.df += 1
+        if len(self.tail_docs) >= CHUNK:
+            self.seal(norms, avgdl)
+
+    def seal(self, norms: list, avgdl: float):
+        if self.tail_docs:
+            top = max(_impacts(self.tail_docs, self.tail_tfs, norms))
+            self.chunks.append(_encode_chunk(self.tail_docs, self.tail_tfs) + (top, avgdl))
+            self.tail_docs = array("I")
+            self.tail_tfs = array("B")
+
+    def blocks(self, norms: list, avgdl: float) -> list:
+        """[(first, last, impact 上限, 解碼函式)]；呼叫解碼函式才解壓。"""
+        out = []
+        for first, last, count, payload, top, seal_avgdl in self.chunks:
+            # 平均長度變長時 impact 最多放大 avgdl / seal_avgdl 倍；變短只會變小
+            if avgdl > seal_avgdl:
+                top *= avgdl / seal_avgdl
+            out.append((first, last, top, lambda f=first, c=count, p=payload: _decode_chunk(f, c, p)))
+        if self.tail_docs:
+            docs, tfs = list(self.tail_docs), bytes(self.tail_tfs)
+            out.append((docs[0], docs[-1], max(_impacts(docs, tfs, norms)), lambda: (docs, tfs)))
+        return out
+
+
+def _locked(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SearchIndex:
+    """add / delete / compact / search / save 共用 self._lock（RLock：delete 內會呼叫 compact），
+    呼叫端不需要另外加鎖。"""
+
+    def __init__(self, weights=None, k1: float = K1, b: float = B):
+        self.weights = dict(weights or FIELD_WEIGHTS)
+        self.k1, self.b = k1, b
+        self.ids = []                    # 文件編號 -> 信件 id（已刪除為 None）
+        self.docno = {}                  # 信件 id -> 文件編號
+        self.doclen = array("I")
+        self.terms = {}
+        self.total_len = 0
+        self.deleted = 0
+        self._dead = set()               # 已刪除、尚未 compact 的文件編號
+        self._norm = None
+        self._norm_avgdl = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.docno)
+
+    # -- 增量 -----------------------------------------------------------------
+
+    @_locked
+    def add(self, item: dict) -> int:
+        letter_id = item.get("id")
+        if letter_id is None:
+            return -1
+        if letter_id in self.docno:
+            self.delete(letter_id)
+        counts = {}
+        length = 0
+        for field, weight in self.weights.items():
+            toks = tokenize(item.get(field), True)
+            length += weight * len(toks)
+            for tok, n in Counter(toks).items():
+                counts[tok] = counts.get(tok, 0) + n * weight
+        docno = len(self.ids)
+        self.ids.append(letter_id)
+        self.docno[letter_id] = docno
+        self.doclen.append(length)
+        self.total_len += length
+        if self._norm is not None:
+            self._norm.append(self.k1 * (1 - self.b + self.b * length / self._norm_avgdl))
+        norms = self._norms()
+        avgdl = self._norm_avgdl
+        terms = self.terms
+        for tok, tf in counts.items():
+            p = terms.get(tok)
+            if p is None:
+                p = terms[tok] = Postings()
+            # 與 Postings.append 相同，大量建索引時省下一層呼叫
+            tail = p.tail_docs
+            tail.append(docno)
+            p.tail_tfs.append(tf if tf < MAX_TF else MAX_TF)
+            p.df += 1
+            if len(tail) >= CHUNK:
+                p.seal(norms, avgdl)
+        return docno
+
+    @_locked
+    def delete(self, letter_id) -> bool:
+        docno = self.docno.pop(letter_id, None)
+        if docno is None:
+            return False
+        self.ids[docno] = None
+        self._dead.add(docno)
+        self.total_len -= self.doclen[docno]
+        self.deleted += 1
+        if self.deleted > max(1024, len(self.ids) // 4):
+            self.compact()
+        return True
+
+    @_locked
+    def compact(self):
+        """重寫 postings：去掉已刪除的文件並重新編號（不重新斷詞）。"""
+        old_norms, old_avgdl = self._norms(), self._norm_avgdl
+        remap = array("i", [-1]) * len(self.ids)
+        ids, doclen = [], array("I")
+        for old, letter_id in enumerate(self.ids):
+            if letter_id is not None:
+                remap[old] = len(ids)
+                ids.append(letter_id)
+                doclen.append(self.doclen[old])
+        self.ids, self.doclen = ids, doclen
+        self.docno = {letter_id: i for i, letter_id in enumerate(ids)}
+        self.deleted = 0
+        self._dead = set()
+        self._norm = None
+        norms, avgdl = self._norms(), self._norm_avgdl
+        terms = {}
+        for tok, p in self.terms.items():
+            q = Postings()
+            for _, _, _, decode in p.blocks(old_norms, old_avgdl):
+                docs, tfs = decode()
+                for d, tf in zip(docs, tfs):
+                    new = remap[d]
+                    if new >= 0:
+                        q.append(new, tf, norms, avgdl)
+            if q.df:
+                terms[tok] = q
+        self.terms = terms
+
+    # -- 查詢 -----------------------------------------------------------------
+
+    def _norms(self, avgdl: float | None = None) -> list:
+        """每份文件的 k1 * (1 - b + b * dl / avgdl)；平均長度變動不到 2% 時沿用（新文件直接 append）。"""
+        current = self.total_len / max(1, len(self.docno)) or 1.0
+        if self._norm is None or abs(current - self._norm_avgdl) > 0.02 * self._norm_avgdl:
+            avgdl = avgdl if avgdl and abs(current - avgdl) <= 0.02 * avgdl else current
+            k1, b = self.k1, self.b
+            self._norm = [k1 * (1 - b + b * dl / avgdl) for dl in self.doclen]
+            self._norm_avgdl = avgdl
+        return self._norm
+
+    def _idf(self, p: Postings) -> float:
+        n = len(self.docno)
+        df = min(p.df, n) if n else p.df
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _top_and(self, found: list, weights: list, limit: int) -> list:
+        """所有詞都出現的前 limit 名（block-max）：以最稀有詞的 chunk 為視窗，
+        視窗上限 = 各詞在範圍內 chunk 的 impact 上限 × 權重之和；依上限由高到低處理，
+        (上限, 視窗最後編號) 贏不了目前第 limit 名時其餘視窗都不用解壓。"""
+        norms, avgdl = self._norms(), self._norm_avgdl
+        blocks = [p.blocks(norms, avgdl) for p in found]
+        firsts = [[blk[0] for blk in bl] for bl in blocks]
+        lasts = [[blk[1] for blk in bl] for bl in blocks]
+        windows = []
+        for first, last, top, decode in blocks[0]:
+            bound = weights[0] * top
+            spans = []
+            for t in range(1, len(found)):
+                i = bisect.bisect_left(lasts[t], first)
+                j = bisect.bisect_right(firsts[t], last, i)
+                if i >= j:
+                    break  # 這個詞在視窗範圍內沒有任何文件
+                bound += weights[t] * max(blk[2] for blk in blocks[t][i:j])
+                spans.append((t, i, j))
+            else:
+                windows.append((bound, last, decode, spans))
+        windows.sort(key=lambda w: (w[0], w[1]), reverse=True)
+        heap, decoded = [], {}
+        for bound, last, decode, spans in windows:
+            if len(heap) == limit and (bound, last) <= heap[0]:
+                break
+            docs, tfs = decode()
+            maps = [dict(zip(docs, tfs))]
+            cand = maps[0].keys() - self._dead
+            for t, i, j in spans:
+                m = {}
+                for k in range(i, j):
+                    part = decoded.get((t, k))
+                    if part is None:
+                        part = decoded[(t, k)] = dict(zip(*blocks[t][k][3]()))
+                    if j - i == 1:
+                        m = part
+                    else:
+                        m.update(part)
+                cand &= m.keys()
+                if not cand:
+                    break
+                maps.append(m)
+            if not cand:
+                continue
+            docs = list(cand)
+            total = None
+            for w, m in zip(weights, maps):
+                part = map(mul, itertools.repeat(w), _impacts(docs, list(map(m.__getitem__, docs)), norms))
+                total = list(part) if total is None else list(map(add, total, part))
+            hits = zip(total, docs)
+            if len(heap) == limit:
+                # 只看分數不低於目前第 limit 名的（同分再比編號）
+                hits = itertools.compress(hits, map(heap[0][0].__le__, total))
+            for hit in hits:
+                if len(heap) < limit:
+                    heapq.heappush(heap, hit)
+                elif hit > heap[0]:
+                    heapq.heapreplace(heap, hit)
+        return sorted(heap, reverse=True)
+
+    def _top_or(self, found: list, weights: list, limit: int) -> list:
+        """任一詞出現即可：全部解壓後用 set 聯集，再只排序達到門檻的文件。"""
+        norms, avgdl = self._norms(), self._norm_avgdl
+        maps = []
+        for p in found:
+            docs, tfs = [], bytearray()
+            for _, _, _, decode in p.blocks(norms, avgdl):
+                d, t = decode()
+                docs += d
+                tfs += t
+            maps.append(dict(zip(docs, tfs)))
+        docs = list(set().union(*maps) - self._dead)
+        if not docs:
+            return []
+        total = None
+        for w, m in zip(weights, maps):
+            part = map(mul, itertools.repeat(w), _impacts(docs, list(map(m.get, docs, itertools.repeat(0))), norms))
+            total = list(part) if total is None else list(map(add, total, part))
+        floor = heapq.nlargest(limit, total)[-1]
+        top = list(itertools.compress(zip(total, docs), map(floor.__le__, total)))
+        return sorted(top, reverse=True)[:limit]
+
+    @_locked
+    def search(self, query: str, limit: int = 20, mode: str = "and") -> list:
+        """回傳 [(信件 id, 分數)]，分數高到低（同分時新的在前）。"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        found = sorted((self.terms[t] for t in terms if t in self.terms), key=lambda p: p.df)
+        if not found or limit < 1:
+            return []
+        weights = [self._idf(p) * (self.k1 + 1) for p in found]
+        hits = None
+        if mode == "and" and len(found) == len(terms):
+            hits = self._top_and(found, weights, limit)
+        if not hits and len(terms) > 1:
+            hits = self._top_or(found, weights, limit)
+        return [(self.ids[d], round(score, 4)) for score, d in hits or ()]
+
+    # -- 序列化 ---------------------------------------------------------------
+
+    @_locked
+    def save(self, path) -> int:
+        norms, avgdl = self._norms(), self._norm_avgdl
+        for p in self.terms.values():
+            p.seal(norms, avgdl)
+        meta = {"version": VERSION, "weights": self.weights, "k1": self.k1, "b": self.b, "avgdl": avgdl, "ids": self.ids,
+                "doclen": base64.b64encode(self.doclen.tobytes()).decode("ascii"), "byteorder": sys.byteorder}
+        blob = bytearray()
+        table = {}
+        for tok, p in self.terms.items():
+            entry = [p.df]
+            for first, last, count, payload, top, seal_avgdl in p.chunks:
+                entry += [first, last, count, len(blob), len(payload), top, seal_avgdl]
+                blob += payload
+            table[tok] = entry
+        meta_z = zlib.compress(json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        table_z = zlib.compress(json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<HII", VERSION, len(meta_z), len(table_z)))
+            f.write(meta_z)
+            f.write(table_z)
+            f.write(blob)
+        os.replace(tmp, path)
+        return 14 + len(meta_z) + len(table_z) + len(blob)
+
+    @classmethod
+    def load(cls, path) -> "SearchIndex":
+        data = Path(path).read_bytes()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path}: not a search index")
+        version, meta_len, table_len = struct.unpack_from("<HII", data, 4)
+        if version > VERSION:
+            raise ValueError(f"{path}: index version {version} is newer than supported ({VERSION})")
+        meta = json.loads(zlib.decompress(data[14:14 + meta_len]))
+        table = json.loads(zlib.decompress(data[14 + meta_len:14 + meta_len + table_len]))
+        blob = memoryview(data)[14 + meta_len + table_len:]
+        index = cls(meta["weights"], meta["k1"], meta["b"])
+        index.ids = meta["ids"]
+        index.doclen.frombytes(base64.b64decode(meta["doclen"]))
+        if meta.get("byteorder", "little") != sys.byteorder:
+            index.doclen.byteswap()
+        index.docno = {letter_id: i for i, letter_id in enumerate(index.ids) if letter_id is not None}
+        index._dead = {i for i, letter_id in enumerate(index.ids) if letter_id is None}
+        index.deleted = len(index._dead)
+        index.total_len = sum(index.doclen[i] for i in index.docno.values())
+        for tok, entry in table.items():
+            p = Postings()
+            p.df = entry[0]
+            p.chunks = [(entry[i], entry[i + 1], entry[i + 2], blob[entry[i + 3]:entry[i + 3] + entry[i + 4]],
+                         entry[i + 5], entry[i + 6]) for i in range(1, len(entry), 7)]
+            index.terms[tok] = p
+        # 沿用存檔時的平均長度，chunk 的 impact 上限才不用放大
+        index._norms(meta["avgdl"])
+        return index
+
+    def stats(self) -> dict:
+        chunks = sum(len(p.chunks) for p in self.terms.values())
+        postings = sum(p.df for p in self.terms.values())
+        return {"letters": len(self.docno), "deleted": self.deleted, "terms": len(self.terms),
+                "postings": postings, "chunks": chunks}
+
+
+def build(items) -> SearchIndex:
+    index = SearchIndex()
+    for item in items:
+        if isinstance(item, dict):
+            index.add(item)
+    return index
+
+
+def _percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def benchmark(letters: int, queries: int, seed: int = 0) -> dict:
+    import random
+    import tempfile
+    from mailbox_loadtest import generate_items
+
+    items = generate_items(letters, seed)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    index = build(items)
+    build_s = time.perf_counter() - start
+    stats = index.stats()
+    with tempfile.TemporaryDirectory(prefix="hlsx-bench-") as tmp:
+        path = Path(tmp) / "mailbox.hlsx"
+        start = time.perf_counter()
+        size = index.save(path)
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        index = SearchIndex.load(path)
+        load_s = time.perf_counter() - start
+
+    # 查詢：信件中隨機取 2–4 字的片段、兩個片段組合、經文書名、以及不存在的詞
+    texts = [x["text"] for x in items[:64] if x.get("text")]
+    picks = []
+    for _ in range(queries):
+        t = rng.choice(texts)
+        i = rng.randrange(max(1, len(t) - 4))
+        kind = rng.random()
+        if kind < 0.5:
+            picks.append(t[i:i + rng.randint(2, 4)])
+        elif kind < 0.8:
+            j = rng.randrange(max(1, len(t) - 3))
+            picks.append(f"{t[i:i + 2]} {t[j:j + 3]}")
+        elif kind < 0.95:
+            picks.append(rng.choice(["腓立比書 4:7", "彼得前書 5:7", "耶利米書 29:11", "以賽亞書", "詩篇 23"]))
+        else:
+            picks.append("量子糾纏")
+    latencies = []
+    hits = 0
+    for q in picks:
+        start = time.perf_counter()
+        hits += bool(index.search(q, 10))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    extra = generate_items(1000, seed + 1)
+    for item in extra:
+        index.add(dict(item, id="new-" + item["id"]))
+    add_ms = (time.perf_counter() - start) * 1000 / len(extra)
+    start = time.perf_counter()
+    for item in items[:1000]:
+        index.delete(item["id"])
+    delete_ms = (time.perf_counter() - start) * 1000 / 1000
+    return {
+        "letters": letters, "build_s": round(build_s, 2), "save_s": round(save_s, 2), "load_s": round(load_s, 2),
+        "index_bytes": size, "terms": stats["terms"], "postings": stats["postings"],
+        "bytes_per_posting": round(size / max(1, stats["postings"]), 2),
+        "queries": len(picks), "hit_ratio": round(hits / max(1, len(picks)), 2),
+        "query_p50_ms": round(_percentile(latencies, 0.5), 2), "query_p95_ms": round(_percentile(latencies, 0.95), 2),
+        "query_max_ms": round(max(latencies), 2), "add_ms": round(add_ms, 3), "delete_ms": round(delete_ms, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the mailbox full-text index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("build", help="Index a mailbox.json file")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p = sub.add_parser("query", help="Ranked search")
+    p.add_argument("index")
+    p.add_argument("q")
+    p.add_argument("--limit", type=int, default=10, help="Results to show (default: 10)")
+    p.add_argument("--or", dest="mode", action="store_const", const="or", default="and", help="Match any term")
+    p.add_argument("--data", help="mailbox.json to print previews from")
+    p = sub.add_parser("bench", help="Build, save, load and query a synthetic mailbox")
+    p.add_argument("--letters", type=int, default=100_000, help="Letters to index (default: 100000)")
+    p.add_argument("--queries", type=int, default=200, help="Queries to time (default: 200)")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        items = json.loads(Path(args.src).read_text(encoding="utf-8"))
+        start = time.perf_counter()
+        index = build(items)
+        size = index.save(args.dest)
+        s = index.stats()
+        print(f"[OK] Indexed {s['letters']} letters ({s['terms']} terms, {s['postings']} postings) "
+              f"-> {args.dest} ({size} bytes, {time.perf_counter() - start:.2f}s)")
+    elif args.cmd == "query":
+        try:
+            index = SearchIndex.load(args.index)
+        except (OSError, ValueError) as e:
+            print(f"<INDEX_LOAD_FAILED> {e}")
+            sys.exit(1)
+        start = time.perf_counter()
+        results = index.search(args.q, args.limit, args.mode)
+        took = (time.perf_counter() - start) * 1000
+        letters = {}
+        if args.data:
+            letters = {x.get("id"): x for x in json.loads(Path(args.data).read_text(encoding="utf-8"))}
+        print(f"{len(results)} result(s) in {took:.2f} ms")
+        for letter_id, score in results:
+            item = letters.get(letter_id, {})
+            preview = re.sub(r"\s+", " ", item.get("text") or "")[:60]
+            print(f"  {score:8.3f}  {letter_id}  {item.get('topic') or ''}  {preview}")
+    else:
+        r = benchmark(args.letters, args.queries)
+        if args.json:
+            print(json.dumps(r, indent=1))
+            return
+        print(f"=== Search index: {r['letters']} letters ===")
+        print(f"  build {r['build_s']:.1f}s, save {r['save_s']:.2f}s, load {r['load_s']:.2f}s")
+        print(f"  {r['index_bytes'] / (1024 * 1024):.1f} MB, {r['terms']} terms, {r['postings']} postings "
+              f"({r['bytes_per_posting']} B/posting)")
+        print(f"  {r['queries']} queries: p50 {r['query_p50_ms']:.2f} ms, p95 {r['query_p95_ms']:.2f} ms, "
+              f"max {r['query_max_ms']:.2f} ms, {r['hit_ratio']:.0%} with hits")
+        print(f"  add {r['add_ms']:.3f} ms/letter, delete {r['delete_ms']:.4f} ms/letter")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+信箱 API 的本機替身（開發用，也是後端該如何擴展的參考實作；只用標準函式庫）：
+- 啟動時讀入 mailbox.json 格式（id、topic、text、directions、verses、actions、createdAt）
+- 記憶體索引：id -> 信件（dict）；全域與每個 topic 各一份依 (createdAt, id) 排序的鍵（OrderedKeys），
+  新信件（createdAt 最大）直接 append
+- GET /api/mailbox?page=&size=&topic=：伺服器端分頁（新到舊），回傳 total/totalPages；
+  不帶 page/size 時回傳整個 list，與 server.js 相容
+- ETag = 伺服器啟動識別碼 + 該 topic（或全域）的版本號；If-None-Match 相同時回 304，不序列化任何內容。
+  只有該 topic 的新增/刪除會讓該 topic 的頁面失效
+- DELETE /api/mailbox/{id}：dict 移除 O(1)，排序鍵只標記刪除並更新 Fenwick tree（O(log n)），
+  分頁以 Fenwick tree 直接定位第 k 筆存活信件，讀取不需要掃描或壓縮；死鍵超過一半時才整批重建
+- GET /api/mailbox/search?q=&limit=&mode=and|or：全文檢索（mailbox_search.SearchIndex，BM25 排序），
+  需以 --search 或 --search-index 啟用；POST/DELETE 同步更新索引，--search-index 的檔案在結束時寫回
+- 其餘 GET 路徑當作靜態檔案（預設為專案根目錄），可直接開 index.html 測 main.js
+
+用法：
+  python scripts/mailbox_service.py [--data mailbox.json] [--port 3000] [--static .] [--search-index mailbox.hlsx]
+  curl "http://127.0.0.1:3000/api/mailbox?page=1&size=10&topic=工作 / 職場"
+"""
+
+import argparse
+import bisect
+import functools
+import json
+import os
+import random
+import string
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from mailbox_search import SearchIndex
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_DATA = PROJECT_DIR / "mailbox.json"
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+ALL = None  # 全域（不分 topic）的索引鍵
+
+
+def new_id(now_ms: int | None = None) -> str:
+    """與 server.js 相同格式：<毫秒>_<6 個 base36 字元>。"""
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return f"{now_ms}_{''.join(random.choices(string.ascii_lowercase + string.digits, k=6))}"
+
+
+def _created_at(item: dict) -> int:
+    try:
+        return int(item.get("createdAt") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class OrderedKeys:
+    """依 (createdAt, id) 由舊到新排列的鍵；刪除只標記，Fenwick tree 記錄存活數以便 O(log n) 找第 k 筆。
+
+    新鍵不小於最後一個鍵時直接 append（O(log n)）；亂序插入或死鍵超過一半時整批重建（O(n)，攤提後很少發生）。
+    """
+
+    def __init__(self, keys=()):
+        self._rebuild(sorted(keys))
+
+    def _rebuild(self, keys: list):
+        self.keys = keys
+        self.alive = bytearray(b"\x01" * len(keys))
+        self.pos = {k[1]: i for i, k in enumerate(keys)}
+        self.live = len(keys)
+        # Fenwick tree（1 起算），全部存活時 tree[i] = lowbit(i)
+        self.tree = [0] + [i & -i for i in range(1, len(keys) + 1)]
+
+    def _prefix(self, i: int) -> int:
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def add(self, key: tuple):
+        if key[1] in self.pos:
+            self.remove(key[1])
+        if self.keys and key < self.keys[-1]:
+            live = [k for k, a in zip(self.keys, self.alive) if a]
+            bisect.insort(live, key)
+            self._rebuild(live)
+            return
+        i = len(self.keys) + 1
+        self.tree.append(1 + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self.keys.append(key)
+        self.alive.append(1)
+        self.pos[key[1]] = i - 1
+        self.live += 1
+
+    def remove(self, item_id: str) -> bool:
+        i = self.pos.pop(item_id, None)
+        if i is None:
+            return False
+        self.alive[i] = 0
+        self.live -= 1
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] -= 1
+            i += i & -i
+        if len(self.keys) > 1024 and self.live < len(self.keys) // 2:
+            self._rebuild([k for k, a in zip(self.keys, self.alive) if a])
+        return True
+
+    def _find(self, rank: int) -> int:
+        """第 rank 個（0 起算）存活鍵的位置。"""
+        i, step = 0, 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            j = i + step
+            if j < len(self.tree) and self.tree[j] <= rank:
+                i = j
+                rank -= self.tree[j]
+            step >>= 1
+        return i
+
+    def newest(self, offset: int, count: int) -> list:
+        """新到舊略過 offset 筆後的 count 個鍵。"""
+        stop = self.live - offset
+        first = max(0, stop - count)
+        if stop <= first:
+            return []
+        out = []
+        i = self._find(first)
+        while len(out) < stop - first:
+            if self.alive[i]:
+                out.append(self.keys[i])
+            i += 1
+        out.reverse()
+        return out
+
+    def __len__(self):
+        return self.live
+
+    def __iter__(self):
+        """新到舊。"""
+        return (k for k, a in zip(reversed(self.keys), reversed(self.alive)) if a)
+
+
+class MailboxIndex:
+    def __init__(self, items=()):
+        self.epoch = f"{int(time.time()):x}{random.getrandbits(16):04x}"
+        self.by_id = {}
+        self._order = {}            # topic（ALL = 全部）-> OrderedKeys
+        self._versions = {ALL: 0}
+        self._lock = threading.Lock()
+        # 寫入者依序進行；全文索引有自己的鎖，寫入者在 _lock 之外更新它，讀取與翻頁不必等正在進行的查詢
+        self._write_lock = threading.Lock()
+        self.search_index = None
+        # 相同 id 以後出現的為準；沒有 id 的補上新 id
+        keys = {ALL: []}
+        for item in items:
+            if isinstance(item, dict):
+                item = self._normalize(dict(item))
+                self.by_id[item["id"]] = item
+        for item in self.by_id.values():
+            key = (item["createdAt"], item["id"])
+            keys[ALL].append(key)
+            keys.setdefault(item.get("topic") or "", []).append(key)
+        self._order = {t: OrderedKeys(k) for t, k in keys.items()}
+
+    @staticmethod
+    def _normalize(item: dict) -> dict:
+        item["id"] = item.get("id") or new_id()
+        item["createdAt"] = _created_at(item) or int(time.time() * 1000)
+        return item
+
+    def _bump(self, topic):
+        for t in (ALL, topic):
+            self._versions[t] = self._versions.get(t, 0) + 1
+
+    # -- 寫入 -----------------------------------------------------------------
+
+    def add(self, item: dict) -> dict:
+        item = self._normalize(dict(item))
+        with self._write_lock:
+            with self._lock:
+                if item["id"] in self.by_id:
+                    self._remove(item["id"])
+                topic = item.get("topic") or ""
+                key = (item["createdAt"], item["id"])
+                self.by_id[item["id"]] = item
+                self._order[ALL].add(key)
+                self._order.setdefault(topic, OrderedKeys()).add(key)
+                self._bump(topic)
+                search_index = self.search_index
+            if search_index is not None:
+                # 相同 id 時 SearchIndex.add 會先刪掉舊的
+                search_index.add(item)
+        return item
+
+    def _remove(self, item_id: str):
+        item = self.by_id.pop(item_id, None)
+        if item is not None:
+            topic = item.get("topic") or ""
+            self._order[ALL].remove(item_id)
+            self._order[topic].remove(item_id)
+            self._bump(topic)
+        return item
+
+    def delete(self, item_id: str) -> bool:
+        with self._write_lock:
+            with self._lock:
+                removed = self._remove(item_id) is not None
+                search_index = self.search_index
+            if removed and search_index is not None:
+                search_index.delete(item_id)
+        return removed
+
+    # -- 讀取 -----------------------------------------------------------------
+
+    def etag(self, topic=ALL) -> str:
+        with self._lock:
+            return f'"{self.epoch}-{self._versions.get(topic, 0)}"'
+
+    def count(self, topic=ALL) -> int:
+        with self._lock:
+            order = self._order.get(topic)
+            return len(order) if order else 0
+
+    def get(self, item_id: str):
+        with self._lock:
+            return self.by_id.get(item_id)
+
+    def page(self, page: int, size: int, topic=ALL) -> dict:
+        """新到舊的第 page 頁（1 起算，超出範圍時夾到最後一頁，與 renderMailboxList 相同）。"""
+        with self._lock:
+            order = self._order.get(topic) or OrderedKeys()
+            total = len(order)
+            total_pages = max(1, -(-total // size))
+            page = min(max(1, page), total_pages)
+            items = [self.by_id[k[1]] for k in order.newest((page - 1) * size, size)]
+            version = self._versions.get(topic, 0)
+        return {"ok": True, "list": items, "page": page, "size": size, "total": total, "totalPages": total_pages,
+                "topic": topic, "etag": f'"{self.epoch}-{version}"'}
+
+    def all(self) -> list:
+        with self._lock:
+            return [self.by_id[k[1]] for k in self._order[ALL]]
+
+    def topics(self) -> dict:
+        with self._lock:
+            return {t: len(o) for t, o in self._order.items() if t is not ALL and len(o)}
+
+    # -- 全文檢索 ---------------------------------------------------------------
+
+    def attach_search(self, search_index: SearchIndex | None = None) -> SearchIndex:
+        """掛上全文索引；傳入的索引與目前信件不一致（例如檔案過期）時重建。重建期間寫入會等待，讀取不受影響。"""
+        with self._write_lock:
+            with self._lock:
+                items = [self.by_id[k[1]] for k in self._order[ALL]]
+            if search_index is None or search_index.docno.keys() != {item["id"] for item in items}:
+                search_index = SearchIndex()
+                for item in items:
+                    search_index.add(item)
+            with self._lock:
+                self.search_index = search_index
+        return search_index
+
+    def search(self, query: str, limit: int = 20, mode: str = "and") -> list:
+        # 查詢只拿 SearchIndex 的鎖；_lock 只用在把 id 換回信件，期間被刪掉的信件直接略過
+        hits = self.search_index.search(query, limit, mode)
+        with self._lock:
+            return [dict(self.by_id[item_id], score=score) for item_id, score in hits if item_id in self.by_id]
+
+
+def load_items(path) -> list:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+class MailboxHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 標頭與內容分兩次寫出；不關 Nagle 的話 keep-alive 連線每個回應都會卡在延遲 ACK（約 40 ms）
+    disable_nagle_algorithm = True
+    index: MailboxIndex = None
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def end_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        super().end_headers()
+
+    def _send_json(self, status: int, payload, etag: str | None = None):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag: str) -> bool:
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        return False
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if parts[:2] != ["api", "mailbox"] and url.path != "/healthz":
+            return None, None, None
+        return url.path, parts[2:], parse_qs(url.query)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, DELETE, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        path, rest, query = self._route()
+        if path is None:
+            return super().do_GET()
+        index = self.index
+        if path == "/healthz":
+            return self._send_json(200, {"ok": True, "count": index.count()})
+        if rest == ["topics"]:
+            return self._send_json(200, {"ok": True, "topics": index.topics()})
+        if rest == ["search"]:
+            if index.search_index is None:
+                return self._send_json(501, {"ok": False, "error": "search index disabled (--search)"})
+            q = query.get("q", [""])[0]
+            mode = query.get("mode", ["and"])[0]
+            try:
+                limit = min(MAX_PAGE_SIZE, max(1, int(query.get("limit", [str(DEFAULT_PAGE_SIZE)])[0])))
+            except ValueError:
+                return self._send_json(400, {"ok": False, "error": "limit must be an integer"})
+            return self._send_json(200, {"ok": True, "q": q, "list": index.search(q, limit, mode)})
+        if rest:
+            item = index.get(rest[0])
+            return self._send_json(200, {"ok": True, "item": item}) if item else \
+                self._send_json(404, {"ok": False, "error": "not found"})
+        topic = query.get("topic", [None])[0] or ALL
+        etag = index.etag(topic)
+        if self._not_modified(etag):
+            return
+        if "page" not in query and "size" not in query and topic is ALL:
+            return self._send_json(200, {"ok": True, "list": index.all()}, etag)
+        try:
+            page = int(query.get("page", ["1"])[0])
+            size = min(MAX_PAGE_SIZE, max(1, int(query.get("size", [str(DEFAULT_PAGE_SIZE)])[0])))
+        except ValueError:
+            return self._send_json(400, {"ok": False, "error": "page/size must be integers"})
+        result = index.page(page, size, topic)
+        return self._send_json(200, result, result.pop("etag"))
+
+    def do_POST(self):
+        path, rest, _ = self._route()
+        if path is None or rest:
+            return self._send_json(404, {"ok": False, "error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"ok": False, "error": "invalid JSON"})
+        if not isinstance(body, dict) or not body.get("text"):
+            return self._send_json(400, {"ok": False, "error": "缺少文字內容"})
+        fields = ("topic", "text", "directions", "verses", "actions", "createdAt")
+        item = self.index.add({k: body.get(k) for k in fields})
+        return self._send_json(200, {"ok": True, "id": item["id"]})
+
+    def do_DELETE(self):
+        path, rest, _ = self._route()
+        if path is None or len(rest) != 1:
+            return self._send_json(404, {"ok": False, "error": "not found"})
+        return self._send_json(200, {"ok": True, "deleted": self.index.delete(rest[0])})
+
+
+def make_server(index: MailboxIndex, host: str = "127.0.0.1", port: int = 0, static_dir=PROJECT_DIR,
+                verbose: bool = False) -> ThreadingHTTPServer:
+    handler = type("Handler", (MailboxHandler,), {"index": index})
+    server = ThreadingHTTPServer((host, port), functools.partial(handler, directory=str(static_dir)))
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve /api/mailbox from in-memory indexes (local stand-in)")
+    parser.add_argument("--data", default=str(DEFAULT_DATA), help="Seed file in mailbox.json format")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 3000)), help="Port (default: PORT or 3000)")
+    parser.add_argument("--static", default=str(PROJECT_DIR), help="Directory for non-API GET requests")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    parser.add_argument("--search", action="store_true", help="Build a full-text index for /api/mailbox/search")
+    parser.add_argument("--search-index", help="Load/save the full-text index here (implies --search)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = MailboxIndex(load_items(args.data))
+    print(f"[INFO] Loaded {index.count()} letters from {args.data} in {time.perf_counter() - start:.2f}s")
+    if args.search or args.search_index:
+        start = time.perf_counter()
+        saved = None
+        if args.search_index and Path(args.search_index).exists():
+            try:
+                saved = SearchIndex.load(args.search_index)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Ignoring search index: {e}")
+        search_index = index.attach_search(saved)
+        state = "Loaded" if search_index is saved else "Built"
+        print(f"[INFO] {state} search index ({len(search_index)} letters) in {time.perf_counter() - start:.2f}s")
+        if args.search_index and search_index is not saved:
+            search_index.save(args.search_index)
+    server = make_server(index, args.host, args.port, args.static, args.verbose)
+    print(f"[OK] Mailbox service on http://{args.host}:{server.server_address[1]}/api/mailbox")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+        if args.search_index:
+            index.search_index.save(args.search_index)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+"""
+信箱的精簡二進位儲存格式（HLMB，版本 1）與 JSON 互轉：
+- topic 以字典編碼（每封信 u16 索引），createdAt 為 int64 欄位，id 另有依 id 排序的位置表可直接二分搜尋
+- text / directions / verses / actions（與其他欄位）每 --block 封信合成一個 zlib 區塊（區塊內為 JSON 陣列，
+  讀取時交給 C 實作的 json.loads）；信件夠多時所有區塊共用一份從樣本取出的
+  zlib 預設字典（最多 32 KB），稱呼、經文標註與收尾在每個區塊的開頭就能被參照
+- 偏移索引：每個區塊的檔案位置與長度、每封信在解壓後區塊內的位置；
+  讀單一封信只解壓它所在的區塊，topic / createdAt 不需要解壓任何東西（mmap 直接讀欄位）
+- 與 mailbox.json 無損互轉：欄位缺少 / null / 非字串值、欄位順序與額外欄位都會保留
+
+檔案配置（little-endian）：
+  header   "HLMB" u16 版本 u16 旗標 u32 信件數 u32 區塊數 u32 每區塊信件數
+           u64×5 各段位置（topics、columns、ids、zdict、index）
+  topics   u32 個數，每個 u16 長度 + UTF-8
+  columns  （8 bytes 對齊）int64 createdAt × n，u16 topic 索引 × n
+  ids      u32 長度 + 以 \\0 分隔的 id（UTF-8）、u32 每個 id 的起點 × n、u32 依 id 排序的位置 × n（二分搜尋）
+  zdict    u32 長度 + 預設字典（長度 0 = 不使用）
+  blocks   zlib(JSON 陣列，每封信一個物件；鍵 "\\u0000" 保存欄位順序與欄位區放不下的值)
+  index    (u64 位置, u32 長度) × 區塊數，u32 區塊內位置 × n
+
+用法：
+  python scripts/mailbox_store.py to-bin mailbox.json mailbox.hlmb
+  python scripts/mailbox_store.py to-json mailbox.hlmb mailbox.json
+  python scripts/mailbox_store.py info mailbox.hlmb | get mailbox.hlmb ID
+  python scripts/mailbox_store.py bench [--counts 10000 100000]
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+MAGIC = b"HLMB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII5Q")
+INDEX_ENTRY = struct.Struct("<QI")
+DEFAULT_BLOCK = 64
+ZDICT_SIZE = 32 * 1024
+# 依 mailbox.json 的欄位順序；id / topic / createdAt 在欄位區，其餘在文字區塊
+FIELDS = ("id", "topic", "text", "directions", "verses", "actions", "createdAt")
+COLUMN_FIELDS = ("id", "topic", "createdAt")
+NO_TOPIC, NULL_TOPIC, OTHER_TOPIC = 0xFFFF, 0xFFFE, 0xFFFD
+NO_TIME = -(1 << 63)
+META = "\0"  # 區塊紀錄內的保留鍵：欄位順序與欄位區放不下的值
+
+
+class FormatError(Exception):
+    pass
+
+
+def _topic_code(item: dict, topic_index: dict, topics: list) -> int:
+    if "topic" not in item:
+        return NO_TOPIC
+    t = item["topic"]
+    if t is None:
+        return NULL_TOPIC
+    if not isinstance(t, str) or len(t.encode("utf-8")) > 0xFFFF:
+        return OTHER_TOPIC
+    code = topic_index.get(t)
+    if code is None:
+        if len(topics) >= OTHER_TOPIC:
+            return OTHER_TOPIC
+        code = topic_index[t] = len(topics)
+        topics.append(t)
+    return code
+
+
+def _record(item: dict, topic_code: int) -> bytes:
+    """文字區塊內一封信：除了欄位區的 id / topic / createdAt 以外的欄位，JSON 物件。"""
+    rec = {k: v for k, v in item.items() if k not in COLUMN_FIELDS}
+    meta = {}
+    keys = list(item)
+    if keys != [k for k in FIELDS if k in item]:
+        meta["order"] = keys
+    if "id" not in item:
+        meta["no_id"] = True
+    elif not isinstance(item["id"], str):
+        meta["id"] = item["id"]
+    if topic_code == OTHER_TOPIC:
+        meta["topic"] = item["topic"]
+    created = item.get("createdAt")
+    if "createdAt" in item and not (type(created) is int and NO_TIME < created < (1 << 63)):
+        meta["createdAt"] = created
+    if meta:
+        rec[META] = meta
+    return json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_zdict(records: list, block_letters: int, size: int = ZDICT_SIZE) -> bytes:
+    """從平均分布的樣本取常見片段（稱呼、經文格式、收尾）作為 zlib 預設字典。
+
+    字典本身要存進檔案，所以只在區塊數夠多、攤提得掉時使用（最多總量的 1/16）。
+    """
+    total = sum(len(r) for r in records)
+    size = min(size, total // 16)
+    if len(records) <= 4 * block_letters or size < 1024:
+        return b""
+    step = max(1, len(records) // 64)
+    return b"".join(records[::step])[-size:]
+
+
+def write_mailbox(path, items: list, block_letters: int = DEFAULT_BLOCK, level: int = 9) -> dict:
+    """寫入 HLMB（原子性取代）；回傳大小統計。"""
+    topics, topic_index = [], {}
+    created = array("q")
+    topic_col = array("H")
+    ids = []
+    records = []
+    for item in items:
+        code = _topic_code(item, topic_index, topics)
+        topic_col.append(code)
+        c = item.get("createdAt")
+        created.append(c if type(c) is int and NO_TIME < c < (1 << 63) else NO_TIME)
+        ids.append(item["id"] if isinstance(item.get("id"), str) else "")
+        records.append(_record(item, code))
+    if sys.byteorder != "little":
+        created.byteswap()
+        topic_col.byteswap()
+    zdict = build_zdict(records, block_letters)
+
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    n = len(items)
+    nblocks = -(-n // block_letters) if n else 0
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        topics_off = f.tell()
+        f.write(struct.pack("<I", len(topics)))
+        for t in topics:
+            raw = t.encode("utf-8")
+            f.write(struct.pack("<H", len(raw)) + raw)
+        f.write(b"\0" * (-f.tell() % 8))  # int64 欄位對齊
+        columns_off = f.tell()
+        f.write(created.tobytes())
+        f.write(topic_col.tobytes())
+        ids_off = f.tell()
+        encoded = [i.encode("utf-8") for i in ids]
+        blob = b"\0".join(encoded)
+        f.write(struct.pack("<I", len(blob)) + blob)
+        f.write(b"\0" * (-f.tell() % 4))
+        starts, pos = array("I"), 0
+        for e in encoded:
+            starts.append(pos)
+            pos += len(e) + 1
+        by_id = array("I", sorted(range(n), key=encoded.__getitem__))
+        if sys.byteorder != "little":
+            starts.byteswap()
+            by_id.byteswap()
+        f.write(starts.tobytes())
+        f.write(by_id.tobytes())
+        zdict_off = f.tell()
+        f.write(struct.pack("<I", len(zdict)) + zdict)
+        blocks = []
+        inner = array("I")
+        for b in range(nblocks):
+            chunk = records[b * block_letters:(b + 1) * block_letters]
+            pos = 1
+            for rec in chunk:
+                inner.append(pos)
+                pos += len(rec) + 1
+            comp = zlib.compressobj(level, zdict=zdict) if zdict else zlib.compressobj(level)
+            data = comp.compress(b"[" + b",".join(chunk) + b"]") + comp.flush()
+            blocks.append((f.tell(), len(data)))
+            f.write(data)
+        index_off = f.tell()
+        for entry in blocks:
+            f.write(INDEX_ENTRY.pack(*entry))
+        if sys.byteorder != "little":
+            inner.byteswap()
+        f.write(inner.tobytes())
+        size = f.tell()
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, n, nblocks, block_letters, topics_off, columns_off, ids_off,
+                            zdict_off, index_off))
+    os.replace(tmp, path)
+    return {"letters": n, "blocks": nblocks, "topics": len(topics), "bytes": size}
+
+
+class MailboxFile:
+    """唯讀開啟 HLMB；欄位與索引以 mmap 讀取，文字區塊在用到時才解壓（保留最近一個）。"""
+
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空檔案
+            self._f.close()
+            raise FormatError(f"{path}: empty file")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise FormatError(f"{path}: truncated header")
+        (magic, version, _flags, self.count, self.nblocks, self.block_letters,
+         topics_off, columns_off, ids_off, zdict_off, self._index_off) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise FormatError(f"{path}: not a mailbox file")
+        if version > VERSION:
+            self.close()
+            raise FormatError(f"{path}: format version {version} is newer than supported ({VERSION})")
+        (ntopics,) = struct.unpack_from("<I", self._mm, topics_off)
+        pos = topics_off + 4
+        self.topics = []
+        for _ in range(ntopics):
+            (length,) = struct.unpack_from("<H", self._mm, pos)
+            self.topics.append(self._mm[pos + 2:pos + 2 + length].decode("utf-8"))
+            pos += 2 + length
+        self._created = self._column(columns_off, "q")
+        self._topic = self._column(columns_off + 8 * self.count, "H")
+        (blob_len,) = struct.unpack_from("<I", self._mm, ids_off)
+        self._id_blob = (ids_off + 4, ids_off + 4 + blob_len)
+        starts_off = self._id_blob[1] + (-self._id_blob[1] % 4)
+        self._id_starts = self._column(starts_off, "I")
+        self._by_id = self._column(starts_off + 4 * self.count, "I")
+        self._ids = None
+        (zdict_len,) = struct.unpack_from("<I", self._mm, zdict_off)
+        self._zdict = self._mm[zdict_off + 4:zdict_off + 4 + zdict_len]
+        self._inner = self._column(self._index_off + INDEX_ENTRY.size * self.nblocks, "I")
+        self._cached = (None, None)
+
+    def _column(self, offset: int, typecode: str):
+        size = array(typecode).itemsize * self.count
+        if sys.byteorder == "little":
+            return memoryview(self._mm)[offset:offset + size].cast(typecode)
+        col = array(typecode, self._mm[offset:offset + size])
+        col.byteswap()
+        return col
+
+    def close(self):
+        for name in ("_created", "_topic", "_inner", "_id_starts", "_by_id"):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    # -- 欄位（不需解壓） -----------------------------------------------------
+
+    def created_at(self, i: int):
+        v = self._created[i]
+        return None if v == NO_TIME else v
+
+    def topic(self, i: int):
+        code = self._topic[i]
+        return self.topics[code] if code < len(self.topics) else None
+
+    def ids(self) -> list:
+        if self._ids is None:
+            raw = self._mm[self._id_blob[0]:self._id_blob[1]]
+            self._ids = raw.decode("utf-8").split("\0") if self.count else []
+        return self._ids
+
+    def _id_bytes(self, i: int) -> bytes:
+        start = self._id_blob[0] + self._id_starts[i]
+        end = self._id_blob[0] + self._id_starts[i + 1] - 1 if i + 1 < self.count else self._id_blob[1]
+        return self._mm[start:end]
+
+    def id_at(self, i: int) -> str:
+        return self._ids[i] if self._ids is not None else self._id_bytes(i).decode("utf-8")
+
+    def position(self, item_id: str):
+        """以依 id 排序的位置表二分搜尋（只讀 log2(n) 個 id，不載入整個 id 欄位）。"""
+        target = item_id.encode("utf-8")
+        k = bisect.bisect_left(range(self.count), target, key=lambda j: self._id_bytes(self._by_id[j]))
+        if k < self.count and self._id_bytes(self._by_id[k]) == target:
+            return self._by_id[k]
+        return None
+
+    # -- 信件 -----------------------------------------------------------------
+
+    def _block(self, b: int) -> bytes:
+        if self._cached[0] != b:
+            off, length = INDEX_ENTRY.unpack_from(self._mm, self._index_off + INDEX_ENTRY.size * b)
+            d = zlib.decompressobj(zdict=self._zdict) if self._zdict else zlib.decompressobj()
+            self._cached = (b, d.decompress(self._mm[off:off + length]))
+        return self._cached[1]
+
+    def get(self, i: int) -> dict:
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        b = i // self.block_letters
+        block = self._block(b)
+        end = self._inner[i + 1] - 1 if i + 1 < min(self.count, (b + 1) * self.block_letters) else len(block) - 1
+        return self._assemble(i, json.loads(block[self._inner[i]:end]))
+
+    def find(self, item_id: str):
+        i = self.position(item_id)
+        return None if i is None else self.get(i)
+
+    def __iter__(self):
+        # 整個區塊一次交給 json.loads（C 實作），不逐封切片
+        self.ids()
+        for b in range(self.nblocks):
+            first = b * self.block_letters
+            for k, rec in enumerate(json.loads(self._block(b))):
+                yield self._assemble(first + k, rec)
+
+    def _assemble(self, i: int, rec: dict) -> dict:
+        meta = rec.pop(META, None)
+        if meta is None:
+            # 常見情況：標準欄位順序、沒有額外欄位、欄位區的值都正常
+            item = {"id": self.id_at(i)}
+            code = self._topic[i]
+            if code < len(self.topics):
+                item["topic"] = self.topics[code]
+            elif code == NULL_TOPIC:
+                item["topic"] = None
+            item.update(rec)
+            if self._created[i] != NO_TIME:
+                item["createdAt"] = self._created[i]
+            return item
+        values = dict(rec)
+        if "id" in meta:
+            values["id"] = meta["id"]
+        elif not meta.get("no_id"):
+            values["id"] = self.id_at(i)
+        code = self._topic[i]
+        if code < len(self.topics):
+            values["topic"] = self.topics[code]
+        elif code == NULL_TOPIC:
+            values["topic"] = None
+        elif code == OTHER_TOPIC:
+            values["topic"] = meta["topic"]
+        if "createdAt" in meta:
+            values["createdAt"] = meta["createdAt"]
+        elif self._created[i] != NO_TIME:
+            values["createdAt"] = self._created[i]
+        order = meta.get("order") or [k for k in FIELDS if k in values]
+        return {k: values[k] for k in order}
+
+
+def read_mailbox(path) -> list:
+    with MailboxFile(path) as mf:
+        return list(mf)
+
+
+def json_to_bin(src, dest, block_letters: int = DEFAULT_BLOCK) -> dict:
+    items = json.loads(Path(src).read_text(encoding="utf-8"))
+    if not isinstance(items, list):
+        raise FormatError(f"{src}: expected a JSON array")
+    return write_mailbox(dest, items, block_letters)
+
+
+def bin_to_json(src, dest):
+    """與 server.js 的 saveMailbox（JSON.stringify(list, null, 2)）相同排版。"""
+    text = json.dumps(read_mailbox(src), ensure_ascii=False, indent=2)
+    Path(dest).write_text(text, encoding="utf-8")
+    return len(text.encode("utf-8"))
+
+
+def benchmark(counts, block_letters: int = DEFAULT_BLOCK, repeat: int = 3) -> list:
+    import tempfile
+    from mailbox_loadtest import generate_items
+
+    def best(func):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="hlmb-bench-") as tmp:
+        for n in counts:
+            items = generate_items(n)
+            jpath, bpath = Path(tmp) / f"{n}.json", Path(tmp) / f"{n}.hlmb"
+            jtext = json.dumps(items, ensure_ascii=False, indent=2)
+            jpath.write_text(jtext, encoding="utf-8")
+            json_write, _ = best(lambda: jpath.write_text(json.dumps(items, ensure_ascii=False, indent=2),
+                                                          encoding="utf-8"))
+            bin_write, stats = best(lambda: write_mailbox(bpath, items, block_letters))
+            json_parse, parsed = best(lambda: json.loads(jpath.read_text(encoding="utf-8")))
+            bin_parse, decoded = best(lambda: read_mailbox(bpath))
+            if decoded != parsed:
+                raise FormatError(f"round trip mismatch at {n} letters")
+            target = items[n // 2]["id"]
+            json_one, _ = best(lambda: next(x for x in json.loads(jpath.read_text(encoding="utf-8"))
+                                            if x["id"] == target))
+
+            def bin_lookup():
+                with MailboxFile(bpath) as mf:
+                    return mf.find(target)
+            bin_one, _ = best(bin_lookup)
+            rows.append({
+                "letters": n, "json_bytes": len(jtext.encode("utf-8")), "hlmb_bytes": stats["bytes"],
+                "gzip_json_bytes": len(zlib.compress(jtext.encode("utf-8"), 6)),
+                "json_write_s": round(json_write, 3), "hlmb_write_s": round(bin_write, 3),
+                "json_parse_s": round(json_parse, 3), "hlmb_parse_s": round(bin_parse, 3),
+                "json_one_ms": round(json_one * 1000, 2), "hlmb_one_ms": round(bin_one * 1000, 2),
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and inspect the compact HLMB mailbox format")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("to-bin", help="mailbox.json -> .hlmb")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="Letters per compressed block (default: 64)")
+    p = sub.add_parser("to-json", help=".hlmb -> mailbox.json")
+    p.add_argument("src")
+    p.add_argument("dest")
+    p = sub.add_parser("info", help="Show header and topic dictionary")
+    p.add_argument("path")
+    p = sub.add_parser("get", help="Print one letter by id")
+    p.add_argument("path")
+    p.add_argument("id")
+    p = sub.add_parser("bench", help="Compare size and parse time with JSON")
+    p.add_argument("--counts", type=int, nargs="+", default=[10_000, 100_000], help="Letter counts (default: 10k 100k)")
+    p.add_argument("--block", type=int, default=DEFAULT_BLOCK, help="Letters per compressed block (default: 64)")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.cmd == "to-bin":
+            src_size = Path(args.src).stat().st_size
+            stats = json_to_bin(args.src, args.dest, args.block)
+            print(f"[OK] {stats['letters']} letters, {stats['topics']} topics: {src_size} -> {stats['bytes']} bytes "
+                  f"({stats['bytes'] / max(1, src_size):.1%})")
+        elif args.cmd == "to-json":
+            size = bin_to_json(args.src, args.dest)
+            print(f"[OK] Wrote {args.dest} ({size} bytes)")
+        elif args.cmd == "info":
+            with MailboxFile(args.path) as mf:
+                print(f"HLMB v{VERSION}: {len(mf)} letters in {mf.nblocks} block(s) of {mf.block_letters}")
+                for i, t in enumerate(mf.topics):
+                    print(f"  topic[{i}] {t}")
+        elif args.cmd == "get":
+            with MailboxFile(args.path) as mf:
+                item = mf.find(args.id)
+            if item is None:
+                print(f"<NOT_FOUND> {args.id}")
+                sys.exit(1)
+            print(json.dumps(item, ensure_ascii=False, indent=2))
+        else:
+            rows = benchmark(args.counts, args.block)
+            if args.json:
+                print(json.dumps(rows, indent=1))
+                return
+            print(f"  {'letters':>8} {'JSON MB':>8} {'HLMB MB':>8} {'gz MB':>7} {'JSON parse':>11} {'HLMB parse':>11} "
+                  f"{'JSON one':>9} {'HLMB one':>9}")
+            for r in rows:
+                mb = 1024 * 1024
+                print(f"  {r['letters']:>8} {r['json_bytes'] / mb:>8.1f} {r['hlmb_bytes'] / mb:>8.2f} "
+                      f"{r['gzip_json_bytes'] / mb:>7.2f} {r['json_parse_s']:>10.3f}s {r['hlmb_parse_s']:>10.3f}s "
+                      f"{r['json_one_ms']:>7.1f}ms {r['hlmb_one_ms']:>7.2f}ms")
+    except (FormatError, OSError, ValueError) as e:
+        print(f"<MAILBOX_STORE_FAILED> {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
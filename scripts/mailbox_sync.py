@@ -0,0 +1,566 @@
+"""
+信箱的游標式差異同步（參考實作，只用標準函式庫）：
+- 取代 main.js（saveToMailbox / renderMailbox / deleteCard）與 LocalMailbox.kt「整包重抓、整包覆寫」的做法
+- 每封信以 id 為鍵；沒有 id 的舊本地資料用 createdAt + 內文雜湊推出固定的 id（各裝置匯入同一封會得到同一個 id）
+- 每次變更帶版本 rev = [Lamport 時鐘, 裝置代號]；合併一律「rev 大者勝」（刪除也是一筆帶 rev 的 tombstone），
+  與套用順序無關、重複套用無效果，所以伺服器與各客戶端最後一定收斂到同一份資料
+- 伺服器（SyncServer）：每筆變更給一個遞增 seq，只保留每封信最新的一筆；
+  pull(cursor) 回傳 cursor 之後的 upserts 與 tombstones（{id, createdAt, rev}），可分頁（more）；
+  增量同步時不回傳由請求端自己寫入、且仍是最新版本的變更（客戶端本來就有）；
+  tombstone 可以 gc()，比 gc 界線還舊的游標（或伺服器換了 epoch）會收到 reset，改為完整快照
+  （快照分頁中的游標帶 :s / :r 標記與快照開始時的 seq，不受 gc 界線影響；快照開始之後才有的 tombstone
+  照樣回傳，分頁期間被刪除的信不會留在客戶端）
+- 客戶端（SyncClient）：本地寫入先進 outbox，sync() = push outbox，再 pull 到沒有 more 為止
+- 傳輸（JsonTransport）：請求與回應都實際序列化成 JSON，統計雙向位元組數
+
+用法：
+  python scripts/mailbox_sync.py selfcheck [--clients 4] [--ops 3000] [--seed 0]
+  python scripts/mailbox_sync.py bench [--sizes 100,1000,10000,100000] [--syncs 20] [--per-sync 3] [--json]
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import random
+import string
+import sys
+import threading
+import time
+
+from checks import Checks
+from mailbox_service import new_id
+
+DEFAULT_PAGE = 500
+SERVER = "server"
+_BASE36 = string.digits + string.ascii_lowercase
+
+
+class SyncError(Exception):
+    pass
+
+
+def legacy_id(item: dict) -> str:
+    """沒有 id 的信件（離線時只存在 localStorage）：由 createdAt 與內文推出固定 id，格式與 server.js 相同。"""
+    n = int.from_bytes(hashlib.sha1((item.get("text") or "").encode("utf-8")).digest()[:8], "big")
+    suffix = ""
+    for _ in range(6):
+        n, r = divmod(n, 36)
+        suffix += _BASE36[r]
+    return f"{int(item.get('createdAt') or 0)}_{suffix}"
+
+
+def _rev(value) -> tuple:
+    try:
+        clock, replica = value
+        return int(clock), str(replica)
+    except (TypeError, ValueError):
+        raise SyncError(f"invalid rev: {value!r}") from None
+
+
+class Entry:
+    __slots__ = ("rev", "item", "created_at", "seq")
+
+    def __init__(self, rev: tuple, item, created_at: int, seq: int = 0):
+        self.rev = rev
+        self.item = item            # None = tombstone
+        self.created_at = created_at
+        self.seq = seq
+
+
+def change_of(item_id: str, entry: Entry) -> dict:
+    """Entry -> 傳輸格式：upsert 為信件本身加上 rev；tombstone 為 {id, createdAt, rev, deleted}。"""
+    if entry.item is None:
+        return {"id": item_id, "createdAt": entry.created_at, "rev": list(entry.rev), "deleted": True}
+    return dict(entry.item, rev=list(entry.rev))
+
+
+def entry_of(change: dict) -> tuple:
+    """傳輸格式 -> (id, Entry)。"""
+    item_id = change.get("id")
+    if not item_id:
+        raise SyncError("change without id")
+    rev = _rev(change.get("rev"))
+    created_at = int(change.get("createdAt") or 0)
+    if change.get("deleted"):
+        return item_id, Entry(rev, None, created_at)
+    item = {k: v for k, v in change.items() if k != "rev"}
+    return item_id, Entry(rev, item, created_at)
+
+
+class Replica:
+    """伺服器與客戶端共用的狀態與合併規則。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.clock = 0
+        self.entries = {}           # id -> Entry（含 tombstone）
+
+    def merge(self, item_id: str, incoming: Entry) -> bool:
+        """rev 大者勝；回傳是否採用。"""
+        if incoming.rev[0] > self.clock:
+            self.clock = incoming.rev[0]
+        current = self.entries.get(item_id)
+        if current is not None and current.rev >= incoming.rev:
+            return False
+        self.entries[item_id] = incoming
+        return True
+
+    def _local(self, item_id: str, item, created_at: int) -> Entry:
+        self.clock += 1
+        entry = Entry((self.clock, self.name), item, created_at)
+        self.merge(item_id, entry)
+        return entry
+
+    def put(self, item: dict) -> str:
+        item = dict(item)
+        item["createdAt"] = int(item.get("createdAt") or time.time() * 1000)
+        item["id"] = item.get("id") or new_id(item["createdAt"])
+        self._local(item["id"], item, item["createdAt"])
+        return item["id"]
+
+    def remove(self, item_id: str) -> bool:
+        current = self.entries.get(item_id)
+        if current is None or current.item is None:
+            return False
+        self._local(item_id, None, current.created_at)
+        return True
+
+    def items(self) -> list:
+        """存活的信件，新到舊（createdAt，同時間再比 id），與 renderMailbox 的排序相同。"""
+        live = [e.item for e in self.entries.values() if e.item is not None]
+        live.sort(key=lambda x: (x["createdAt"], x["id"]), reverse=True)
+        return live
+
+    def state(self) -> dict:
+        return {k: (e.rev, e.item) for k, e in self.entries.items()}
+
+
+class SyncServer(Replica):
+    def __init__(self, epoch: str | None = None):
+        super().__init__(SERVER)
+        self.epoch = epoch or f"{int(time.time()):x}{random.getrandbits(16):04x}"
+        self.seq = 0
+        self.horizon = 0            # seq <= horizon 的 tombstone 已清除
+        self._seqs = []             # 變更紀錄（只 append；被新版本取代的在讀取時跳過）
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def merge(self, item_id: str, incoming: Entry) -> bool:
+        if not super().merge(item_id, incoming):
+            return False
+        self.seq += 1
+        incoming.seq = self.seq
+        self._seqs.append(self.seq)
+        self._ids.append(item_id)
+        if len(self._seqs) > 1024 and len(self._seqs) > 2 * len(self.entries):
+            self._compact()
+        return True
+
+    def _compact(self):
+        live = sorted((e.seq, k) for k, e in self.entries.items())
+        self._seqs = [s for s, _ in live]
+        self._ids = [k for _, k in live]
+
+    def gc(self, keep: int = 0) -> int:
+        """清除 tombstone，只留最新的 keep 個 seq 之內的；回傳清除數。"""
+        limit = self.seq - keep
+        dead = [k for k, e in self.entries.items() if e.item is None and e.seq <= limit]
+        for k in dead:
+            del self.entries[k]
+        self.horizon = max(self.horizon, limit)
+        self._compact()
+        return len(dead)
+
+    def cursor(self) -> str:
+        return f"{self.epoch}:{self.seq}"
+
+    def _since(self, cursor) -> tuple:
+        """-> (起點 seq, 是否為快照, 是否 reset, 快照開始時的 seq)。
+        快照分頁中的游標為 epoch:seq:s:start（或 :r = reset 中）。"""
+        if not cursor:
+            return 0, True, False, self.seq
+        epoch, seq, *mode = str(cursor).split(":")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return 0, True, True, self.seq
+        if mode:
+            start = int(mode[1]) if len(mode) > 1 and mode[1].isdigit() else 0
+            if start < self.horizon:
+                # 快照進行中 gc 清掉了之後才產生的 tombstone：重新開始一次 reset
+                return 0, True, True, self.seq
+            return int(seq), True, mode[0] == "r", start
+        since = int(seq)
+        return (0, True, True, self.seq) if since < self.horizon else (since, False, False, since)
+
+    # -- 協定 -----------------------------------------------------------------
+
+    def _live(self, i: int) -> bool:
+        entry = self.entries.get(self._ids[i])
+        return entry is not None and entry.seq == self._seqs[i]
+
+    def pull(self, cursor=None, limit: int = DEFAULT_PAGE, replica: str | None = None) -> dict:
+        since, snapshot, reset, start = self._since(cursor)
+        upserts, tombstones = [], []
+        i = bisect.bisect_right(self._seqs, since)
+        n = len(self._seqs)
+        last = since
+        while i < n and len(upserts) + len(tombstones) < limit:
+            if self._live(i):
+                item_id, entry = self._ids[i], self.entries[self._ids[i]]
+                last = entry.seq
+                if not snapshot and entry.rev[1] == replica:
+                    pass  # 增量同步時不回傳請求端自己寫的最新版本，它本來就有
+                elif entry.item is not None:
+                    upserts.append(change_of(item_id, entry))
+                elif not snapshot or entry.seq > start:
+                    # 快照開始前就刪除的不必回傳；開始後才刪除的可能已在前幾頁送出，必須回傳 tombstone
+                    tombstones.append(change_of(item_id, entry))
+            i += 1
+        while i < n and not self._live(i):
+            i += 1  # 被取代的紀錄最多佔一半（_compact），跳過的成本可攤銷
+        more = i < n
+        if not more:
+            cursor = f"{self.epoch}:{self.seq}"
+        elif snapshot:
+            cursor = f"{self.epoch}:{last}:{'r' if reset else 's'}:{start}"
+        else:
+            cursor = f"{self.epoch}:{last}"
+        return {"cursor": cursor, "reset": reset, "more": more,
+                "upserts": upserts, "tombstones": tombstones}
+
+    def push(self, changes: list) -> dict:
+        applied = stale = 0
+        for change in changes:
+            item_id, entry = entry_of(change)
+            if self.merge(item_id, entry):
+                applied += 1
+            else:
+                stale += 1
+        return {"ok": True, "applied": applied, "stale": stale}
+
+    def handle(self, request: dict) -> dict:
+        """單一端點的請求分派（JSON in / JSON out）；可由多執行緒的 HTTP handler 直接呼叫。"""
+        op = request.get("op")
+        with self._lock:
+            return self._dispatch(op, request)
+
+    def _dispatch(self, op, request: dict) -> dict:
+        try:
+            if op == "pull":
+                return self.pull(request.get("cursor"), int(request.get("limit") or DEFAULT_PAGE),
+                                 request.get("replica"))
+            if op == "push":
+                return self.push(request.get("changes") or [])
+            if op == "list":
+                return {"ok": True, "list": self.items()}
+        except (SyncError, ValueError) as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+class JsonTransport:
+    """把請求與回應真的序列化成 JSON（與 HTTP body 相同的大小），並統計位元組數。"""
+
+    def __init__(self, server: SyncServer):
+        self.server = server
+        self.sent = 0
+        self.received = 0
+        self.requests = 0
+
+    def __call__(self, request: dict) -> dict:
+        body = json.dumps(request, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        response = self.server.handle(json.loads(body))
+        raw = json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.sent += len(body)
+        self.received += len(raw)
+        self.requests += 1
+        return json.loads(raw)
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.received
+
+
+class SyncClient(Replica):
+    def __init__(self, name: str, transport, page: int = DEFAULT_PAGE):
+        super().__init__(name)
+        self.transport = transport
+        self.page = page
+        self.cursor = None
+        self.outbox = set()         # 尚未 push 的 id
+
+    def _local(self, item_id: str, item, created_at: int) -> Entry:
+        entry = super()._local(item_id, item, created_at)
+        self.outbox.add(item_id)
+        return entry
+
+    def import_legacy(self, items: list) -> int:
+        """匯入舊的本地信箱（homeletter_mailbox / LocalMailbox）；沒有 id 的給固定 id。"""
+        count = 0
+        for item in items:
+            if isinstance(item, dict):
+                self.put(dict(item, id=item.get("id") or legacy_id(item)))
+                count += 1
+        return count
+
+    def sync(self) -> dict:
+        pushed = len(self.outbox)
+        if self.outbox:
+            changes = [change_of(k, self.entries[k]) for k in sorted(self.outbox) if k in self.entries]
+            resp = self.transport({"op": "push", "changes": changes})
+            if not resp.get("ok"):
+                raise SyncError(resp.get("error") or "push failed")
+            self.outbox.clear()
+        pulled = 0
+        seen = None                 # reset 時收集快照裡的 id
+        while True:
+            resp = self.transport({"op": "pull", "cursor": self.cursor, "limit": self.page, "replica": self.name})
+            if "cursor" not in resp:
+                raise SyncError(resp.get("error") or "pull failed")
+            if resp["reset"] and seen is None:
+                seen = set()
+            for change in resp["upserts"] + resp["tombstones"]:
+                item_id, entry = entry_of(change)
+                self.merge(item_id, entry)
+                if seen is not None:
+                    seen.add(item_id)
+                pulled += 1
+            self.cursor = resp["cursor"]
+            if not resp["more"]:
+                break
+        if seen is not None:
+            # reset：快照裡沒有的（outbox 已先 push）表示伺服器上已不存在，tombstone 也已 gc
+            for item_id in [k for k in self.entries if k not in seen and k not in self.outbox]:
+                del self.entries[item_id]
+        return {"pushed": pushed, "pulled": pulled, "reset": seen is not None}
+
+
+# -- 自我檢查 -----------------------------------------------------------------
+
+class _AfterFirstPull:
+    """包住 transport：下一次 pull 回應之後呼叫一次 hook(resp)，用來在分頁之間插入其他裝置的操作。"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.hook = None
+
+    def __call__(self, request: dict) -> dict:
+        resp = self.transport(request)
+        if request.get("op") == "pull" and self.hook:
+            hook, self.hook = self.hook, None
+            hook(resp)
+        return resp
+
+
+def selfcheck(clients: int = 4, ops: int = 3000, seed: int = 0) -> bool:
+    check = Checks("SYNC")
+    letter = {"topic": "平安 / 安息", "text": "親愛的孩子，願平安與你同在。", "verses": "", "actions": ""}
+
+    # 1. 同一封信被兩台裝置離線修改：不論誰先 sync，都收斂到 rev 較大的那一版
+    for order in ((0, 1), (1, 0)):
+        server = SyncServer("e1")
+        a, b = SyncClient("a", JsonTransport(server)), SyncClient("b", JsonTransport(server))
+        item_id = a.put(dict(letter, id="1700000000000_k3x9q2", createdAt=1_700_000_000_000))
+        a.sync()
+        b.sync()
+        a.put(dict(a.entries[item_id].item, topic="A 改的"))
+        b.put(dict(b.entries[item_id].item, topic="B 改的"))
+        b.put(dict(b.entries[item_id].item, topic="B 又改"))
+        for i in order + order:
+            (a, b)[i].sync()
+        expect = "B 又改"   # b 的時鐘較大
+        check(a.items() == b.items() == server.items(), f"concurrent edit diverged (order {order})")
+        check(server.entries[item_id].item["topic"] == expect,
+              f"concurrent edit kept {server.entries[item_id].item['topic']!r} (order {order})")
+
+    # 2. 一邊刪除、一邊修改：rev 大者勝，兩種同步順序結果相同
+    results = []
+    for order in ((0, 1), (1, 0)):
+        server = SyncServer("e2")
+        a, b = SyncClient("a", JsonTransport(server)), SyncClient("b", JsonTransport(server))
+        item_id = a.put(dict(letter, id="1700000000000_k3x9q2", createdAt=1_700_000_000_000))
+        a.sync()
+        b.sync()
+        a.remove(item_id)
+        b.put(dict(b.entries[item_id].item, topic="B 改的"))
+        for i in order + order:
+            (a, b)[i].sync()
+        check(a.state() == b.state() == server.state(), f"delete/edit diverged (order {order})")
+        results.append(server.state())
+    check(results[0] == results[1], "delete/edit result depends on sync order")
+
+    # 3. 隨機操作、隨機同步時機：最後全部 sync 兩輪後與伺服器一致；
+    #    把所有變更打亂順序、重複套用到新的 replica 也得到同一個狀態（與順序無關、冪等）
+    rng = random.Random(seed)
+    server = SyncServer("e3")
+    nodes = [SyncClient(f"c{i}", JsonTransport(server), page=rng.choice((7, 50, 500))) for i in range(clients)]
+    log = []
+    created = 1_700_000_000_000
+    for step in range(ops):
+        node = rng.choice(nodes)
+        live = [k for k, e in node.entries.items() if e.item is not None]
+        r = rng.random()
+        if r < 0.45 or not live:
+            created += rng.randrange(1, 60_000)
+            node.put(dict(letter, createdAt=created, text=f"信 {step}"))
+        elif r < 0.7:
+            k = rng.choice(live)
+            node.put(dict(node.entries[k].item, topic=f"改 {step}"))
+        elif r < 0.85:
+            node.remove(rng.choice(live))
+        else:
+            log += [change_of(k, node.entries[k]) for k in node.outbox]
+            node.sync()
+        if step == ops // 2:
+            server.gc(keep=20)          # 讓落後的客戶端走 reset
+    for _ in range(2):
+        for node in nodes:
+            log += [change_of(k, node.entries[k]) for k in node.outbox]
+            node.sync()
+    live_server = [e.item for e in server.entries.values() if e.item is not None]
+    for node in nodes:
+        check(node.items() == server.items(), f"{node.name} diverged from server after final sync")
+    replay = Replica("replay")
+    for change in rng.sample(log, len(log)) + rng.sample(log, len(log) // 3):
+        replay.merge(*entry_of(change))
+    check(replay.items() == server.items(), "shuffled replay differs from server state")
+
+    # 4. 游標比 tombstone gc 界線還舊：reset 成完整快照，伺服器上已刪除的信也從本地移除
+    server4 = SyncServer("e4")
+    a, b = SyncClient("a", JsonTransport(server4), page=3), SyncClient("b", JsonTransport(server4))
+    ids = [a.put(dict(letter, id=f"17000000000{i:02d}_gc{i:04d}", createdAt=1_700_000_000_000 + i)) for i in range(10)]
+    a.sync()
+    b.sync()
+    for item_id in ids[:4]:
+        b.remove(item_id)
+    b.sync()
+    server4.gc()
+    a.put(dict(letter, id="1700000000099_local1", createdAt=1_700_000_000_099))
+    result = a.sync()
+    check(result["reset"], "stale cursor did not trigger a reset")
+    check(a.items() == server4.items() and len(a.items()) == 7, "reset left deleted letters behind")
+
+    # 5. 不會重送請求端自己寫的資料；空的差異只回游標
+    transport = JsonTransport(server)
+    quiet = SyncClient("quiet", transport)
+    quiet.sync()
+    before = transport.received
+    quiet.sync()
+    check(transport.received - before < 120, f"idle sync transferred {transport.received - before} bytes")
+
+    # 6. 分頁中途被刪除：客戶端以多頁取得初次快照（或 reset 快照），第一頁之後另一台裝置刪掉其中已送出的信，
+    #    後續頁面必須帶回該 tombstone，客戶端不得永久保留已刪除的信
+    for mode in ("initial", "reset"):
+        server6 = SyncServer("e6")
+        writer = SyncClient("w", JsonTransport(server6))
+        for i in range(1200):
+            writer.put(dict(letter, id=f"{1_700_000_000_000 + i}_pg{i:04d}", createdAt=1_700_000_000_000 + i))
+        writer.sync()
+        reader = SyncClient("r", _AfterFirstPull(JsonTransport(server6)), page=500)
+        if mode == "reset":
+            reader.transport.hook = None
+            reader.sync()
+            writer.remove(f"{1_700_000_000_000 + 1199}_pg1199")
+            writer.sync()
+            server6.gc()
+
+        def delete_first(resp, writer=writer):
+            victim = resp["upserts"][0]["id"]
+            writer.remove(victim)
+            writer.sync()
+
+        reader.transport.hook = delete_first
+        result = reader.sync()
+        check(result["reset"] == (mode == "reset"), f"paging ({mode}): unexpected reset={result['reset']}")
+        check(reader.items() == server6.items(), f"paging ({mode}): letter deleted mid-snapshot survived")
+        reader.sync()
+        reader.sync()
+        check(reader.items() == server6.items() and len(reader.items()) == len(server6.items()),
+              f"paging ({mode}): diverged after two more syncs")
+
+    return check.done(f"sync selfcheck: {clients} clients, {ops} ops, {len(live_server)} letters, "
+                      f"{len(log)} changes pushed, converged")
+
+
+# -- 基準測試 -----------------------------------------------------------------
+
+def _json_len(value) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def bench_size(n: int, syncs: int, per_sync: int, seed: int = 0) -> dict:
+    from mailbox_loadtest import generate_items
+
+    rng = random.Random(seed)
+    server = SyncServer("bench")
+    for item in generate_items(n, seed):
+        server.put(item)
+    phone = SyncClient("phone", JsonTransport(server))
+    web = SyncClient("web", JsonTransport(server))
+    start = time.perf_counter()
+    phone.sync()
+    initial_s = time.perf_counter() - start
+    initial = phone.transport.total
+    web.sync()
+
+    # 全部重抓的大小 = GET /api/mailbox 的 {"ok":true,"list":[...]}；逐筆累加，不必每次重新序列化
+    sizes = {k: _json_len(e.item) for k, e in server.entries.items() if e.item is not None}
+    full = []
+    delta = []
+    sync_ms = []
+    extra = generate_items(syncs * per_sync, seed + 1)
+    for round_no in range(syncs):
+        for item in extra[round_no * per_sync:(round_no + 1) * per_sync]:
+            item_id = web.put(dict(item, id=None, createdAt=item["createdAt"] + 10 ** 12))
+            sizes[item_id] = _json_len(web.entries[item_id].item)
+        if round_no % 2:
+            victim = rng.choice(list(sizes))
+            web.remove(victim)
+            sizes.pop(victim)
+        if round_no % 5 == 4:
+            k = rng.choice(list(sizes))
+            web.put(dict(web.entries[k].item, topic="感恩 / 敬拜"))
+            sizes[k] = _json_len(web.entries[k].item)
+        web.sync()
+        before = phone.transport.total
+        start = time.perf_counter()
+        phone.sync()
+        sync_ms.append((time.perf_counter() - start) * 1000)
+        delta.append(phone.transport.total - before)
+        full.append(len('{"ok":true,"list":[]}') + sum(sizes.values()) + max(0, len(sizes) - 1))
+    if phone.items() != server.items():
+        raise SyncError(f"phone diverged from server at {n} letters")
+    return {"letters": n, "initial_bytes": initial, "initial_s": round(initial_s, 2),
+            "full_refetch_bytes": round(sum(full) / len(full)), "delta_bytes": round(sum(delta) / len(delta)),
+            "ratio": round(sum(full) / max(1, sum(delta)), 1), "sync_ms": round(sum(sync_ms) / len(sync_ms), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cursor-based delta sync for the mailbox (reference engine)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("selfcheck", help="Concurrent-edit and convergence checks")
+    p.add_argument("--clients", type=int, default=4, help="Simulated devices (default: 4)")
+    p.add_argument("--ops", type=int, default=3000, help="Random operations (default: 3000)")
+    p.add_argument("--seed", type=int, default=0)
+    p = sub.add_parser("bench", help="Bytes per sync vs full-list refetch as the mailbox grows")
+    p.add_argument("--sizes", default="100,1000,10000,100000", help="Comma-separated mailbox sizes")
+    p.add_argument("--syncs", type=int, default=20, help="Sync rounds per size (default: 20)")
+    p.add_argument("--per-sync", type=int, default=3, help="Letters saved on another device per round (default: 3)")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if args.cmd == "selfcheck":
+        sys.exit(0 if selfcheck(args.clients, args.ops, args.seed) else 1)
+    rows = [bench_size(int(n), args.syncs, args.per_sync) for n in args.sizes.split(",") if n.strip()]
+    if args.json:
+        print(json.dumps(rows, indent=1))
+        return
+    print(f"=== Delta sync vs full refetch ({args.syncs} rounds, {args.per_sync} new letters per round) ===")
+    print(f"  {'letters':>8} {'first sync':>12} {'full/open':>12} {'delta/sync':>11} {'ratio':>8} {'sync ms':>8}")
+    for r in rows:
+        print(f"  {r['letters']:>8} {r['initial_bytes'] / 1024:>10.0f}KB {r['full_refetch_bytes'] / 1024:>10.0f}KB "
+              f"{r['delta_bytes']:>10}B {r['ratio']:>7.0f}x {r['sync_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+巢狀 ZIP 讀取（.apks -> universal.apk -> META-INF/...），全程不落地：
+- STORED 項目：直接在外層檔案上開一個唯讀切片（zero-copy），bundletool 產生的 .apks 內 APK 即為此類
+- DEFLATED 等壓縮項目：解壓進 SpooledTemporaryFile，小於 spool_limit 時只在記憶體中
+回傳的串流可 seek，可直接交給 zipfile.ZipFile 或 apk_signing.read_archive_signers。
+"""
+
+import io
+import shutil
+import struct
+import tempfile
+import zipfile
+
+SPOOL_LIMIT = 64 * 1024 * 1024
+COPY_CHUNK = 1024 * 1024
+LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+
+
+class ZipSlice(io.RawIOBase):
+    """外層檔案中 [offset, offset+size) 的唯讀、可 seek 視圖；每次讀取前自行 seek，不依賴共用位置。"""
+
+    def __init__(self, fileobj, offset: int, size: int, owns_file: bool = False):
+        super().__init__()
+        self._f = fileobj
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+        self._owns_file = owns_file
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._size
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return self._pos
+
+    def readinto(self, buf):
+        remaining = self._size - self._pos
+        if remaining <= 0:
+            return 0
+        n = min(len(buf), remaining)
+        self._f.seek(self._offset + self._pos)
+        data = self._f.read(n)
+        buf[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if self._owns_file and not self.closed:
+            self._f.close()
+        super().close()
+
+
+def _data_offset(fileobj, info: zipfile.ZipInfo) -> int:
+    fileobj.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(fileobj.read(LOCAL_HEADER.size))
+    if header[0] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"bad local header for {info.filename}")
+    name_len, extra_len = header[10], header[11]
+    return info.header_offset + LOCAL_HEADER.size + name_len + extra_len
+
+
+def open_entry(zf: zipfile.ZipFile, name: str, spool_limit: int = SPOOL_LIMIT):
+    """回傳 zf 中 name 的可 seek 二進位串流。呼叫端負責 close。"""
+    info = zf.getinfo(name)
+    if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+        if zf.filename:
+            f = open(zf.filename, "rb")
+            owns = True
+        else:
+            f = zf.fp
+            owns = False
+        try:
+            offset = _data_offset(f, info)
+        except Exception:
+            if owns:
+                f.close()
+            raise
+        return io.BufferedReader(ZipSlice(f, offset, info.file_size, owns_file=owns), buffer_size=COPY_CHUNK)
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_limit)
+    with zf.open(info) as src:
+        shutil.copyfileobj(src, spool, COPY_CHUNK)
+    spool.seek(0)
+    return spool
+
+
+class NestedZipFile(zipfile.ZipFile):
+    """ZipFile 不會關閉外部傳入的串流；這個子類別在 close() 時一併釋放。"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        super().__init__(stream)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._stream.close()
+
+
+def open_nested_zip(zf: zipfile.ZipFile, name: str, spool_limit: int = SPOOL_LIMIT) -> zipfile.ZipFile:
+    """把 zf 內的 ZIP 項目當成 ZipFile 開啟。"""
+    stream = open_entry(zf, name, spool_limit)
+    try:
+        return NestedZipFile(stream)
+    except Exception:
+        stream.close()
+        raise
+
+
+def find_member(zf: zipfile.ZipFile, suffix: str):
+    return next((n for n in zf.namelist() if n.endswith(suffix)), None)
@@ -0,0 +1,489 @@
+"""
+建置前的圖片資源最佳化（app/src/main/res 的 drawable-*dpi/splash.png、通知圖示等）：
+- PNG 無損重新壓縮（純 Python + zlib，不需額外套件）：
+  移除不影響顯示的 metadata chunk（tEXt/zTXt/iTXt/tIME/pHYs）；8-bit 非交錯影像會解開 filter，
+  嘗試無損的色彩型態縮減（全不透明 RGBA -> RGB、灰階 -> Gray、≤256 色 -> 調色盤 + tRNS），
+  再以多種 filter（None/Sub/Up/逐列最佳）與 zlib 策略壓縮，取最小者
+- 每個輸出都會重新解碼，與原圖的 RGBA 像素逐位元比對，不一致就保留原檔
+- --webp：可選擇轉成無損 WebP（需 minSdk >= 18；有 Pillow 時使用並比對像素，否則使用 PATH 上的 cwebp），
+  只在比最佳化後的 PNG 更小時才取代；.9.png 與已有同名 .webp 的資源不轉換
+- 以 ProcessPoolExecutor 分散到多核心；結果依內容 SHA-256 快取，內容沒變的檔案直接略過
+- 報告每個檔案節省的位元組
+
+快取檔：<使用者快取目錄>/image_opt.json（見 download_cache.cache_root）
+
+用法：
+  python scripts/optimize_images.py [app/src/main/res] [--webp] [--dry-run] [--workers N] [--json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from download_cache import cache_root
+
+try:
+    from PIL import Image  # type: ignore
+except ImportError:
+    Image = None
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 不影響像素與色彩的 chunk：直接移除
+DROP_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME", b"pHYs"}
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+WEBP_MIN_SDK = 18
+CACHE_VERSION = 1
+CACHE_MAX_ENTRIES = 5000
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+
+
+class PngError(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# PNG 讀寫
+# ---------------------------------------------------------------------------
+
+class Png:
+    __slots__ = ("width", "height", "bit_depth", "color_type", "interlace", "chunks", "idat")
+
+    @classmethod
+    def parse(cls, data: bytes) -> "Png":
+        if not data.startswith(PNG_SIGNATURE):
+            raise PngError("not a PNG")
+        png = cls()
+        png.chunks = []  # IDAT 以外的 chunk：(type, data, 是否在 IDAT 之前)
+        idat = []
+        pos = len(PNG_SIGNATURE)
+        seen_idat = False
+        while pos + 12 <= len(data):
+            length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+            body = data[pos + 8:pos + 8 + length]
+            (crc,) = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+            if len(body) != length or zlib.crc32(ctype + body) != crc:
+                raise PngError(f"corrupt {ctype!r} chunk")
+            pos += 12 + length
+            if ctype == b"IHDR":
+                (png.width, png.height, png.bit_depth, png.color_type, _, _,
+                 png.interlace) = struct.unpack(">IIBBBBB", body)
+            elif ctype == b"IDAT":
+                idat.append(body)
+                seen_idat = True
+            elif ctype == b"IEND":
+                break
+            else:
+                png.chunks.append((ctype, body, not seen_idat))
+        if not idat or png.color_type not in CHANNELS:
+            raise PngError("missing IHDR/IDAT")
+        png.idat = zlib.decompress(b"".join(idat))
+        return png
+
+    def chunk(self, ctype: bytes):
+        return next((body for t, body, _ in self.chunks if t == ctype), None)
+
+    @property
+    def bpp(self) -> int:
+        return max(1, CHANNELS[self.color_type] * self.bit_depth // 8)
+
+    @property
+    def stride(self) -> int:
+        return (self.width * CHANNELS[self.color_type] * self.bit_depth + 7) // 8
+
+
+def _chunk(ctype: bytes, body: bytes) -> bytes:
+    return struct.pack(">I", len(body)) + ctype + body + struct.pack(">I", zlib.crc32(ctype + body))
+
+
+def write_png(width, height, bit_depth, color_type, interlace, before, after, idat_compressed) -> bytes:
+    out = [PNG_SIGNATURE, _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, interlace))]
+    out += [_chunk(t, b) for t, b in before]
+    out.append(_chunk(b"IDAT", idat_compressed))
+    out += [_chunk(t, b) for t, b in after]
+    out.append(_chunk(b"IEND", b""))
+    return b"".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Filter：Up/Sub 以大整數做逐位元組的加減（SWAR），整列一次完成
+# ---------------------------------------------------------------------------
+
+def _masks(n: int):
+    high = int.from_bytes(b"\x80" * n, "big")
+    return high, int.from_bytes(b"\x7f" * n, "big")
+
+
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    """逐位元組 (a + b) mod 256。"""
+    n = len(a)
+    high, low = _masks(n)
+    x, y = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+    return (((x & low) + (y & low)) ^ ((x ^ y) & high)).to_bytes(n, "big")
+
+
+def _sub_bytes(a: bytes, b: bytes) -> bytes:
+    """逐位元組 (a - b) mod 256。"""
+    n = len(a)
+    high, low = _masks(n)
+    x, y = int.from_bytes(a, "big"), int.from_bytes(b, "big")
+    return (((x | high) - (y & low)) ^ ((~(x ^ y)) & high)).to_bytes(n, "big")
+
+
+def unfilter(data: bytes, height: int, stride: int, bpp: int) -> bytes:
+    out = bytearray()
+    prev = bytes(stride)
+    pos = 0
+    for _ in range(height):
+        ftype = data[pos]
+        row = data[pos + 1:pos + 1 + stride]
+        pos += 1 + stride
+        if ftype == 0:
+            cur = bytes(row)
+        elif ftype == 2:
+            cur = _add_bytes(row, prev)
+        else:
+            cur = bytearray(row)
+            if ftype == 1:
+                for i in range(bpp, stride):
+                    cur[i] = (cur[i] + cur[i - bpp]) & 0xFF
+            elif ftype == 3:
+                for i in range(stride):
+                    left = cur[i - bpp] if i >= bpp else 0
+                    cur[i] = (cur[i] + ((left + prev[i]) >> 1)) & 0xFF
+            elif ftype == 4:
+                for i in range(stride):
+                    a = cur[i - bpp] if i >= bpp else 0
+                    b = prev[i]
+                    c = prev[i - bpp] if i >= bpp else 0
+                    p = a + b - c
+                    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                    cur[i] = (cur[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 0xFF
+            else:
+                raise PngError(f"bad filter type {ftype}")
+            cur = bytes(cur)
+        out += cur
+        prev = cur
+    return bytes(out)
+
+
+def filter_streams(raw: bytes, height: int, stride: int, bpp: int) -> dict:
+    """回傳 {名稱: 已加 filter 位元組的資料}：None、Sub、Up 與逐列挑選（以 zlib level 1 估計列的壓縮量）。"""
+    rows = {"none": [], "sub": [], "up": []}
+    adaptive = []
+    prev = bytes(stride)
+    pad = bytes(bpp)
+    for y in range(height):
+        row = raw[y * stride:(y + 1) * stride]
+        candidates = (b"\x00" + row, b"\x01" + _sub_bytes(row, pad + row[:-bpp]), b"\x02" + _sub_bytes(row, prev))
+        for name, c in zip(("none", "sub", "up"), candidates):
+            rows[name].append(c)
+        adaptive.append(min(candidates, key=lambda c: len(zlib.compress(c, 1))))
+        prev = row
+    streams = {name: b"".join(r) for name, r in rows.items()}
+    streams["adaptive"] = b"".join(adaptive)
+    return streams
+
+
+def best_deflate(stream: bytes) -> bytes:
+    best = None
+    for strategy in ZLIB_STRATEGIES:
+        c = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        data = c.compress(stream) + c.flush()
+        if best is None or len(data) < len(best):
+            best = data
+    return best
+
+
+# ---------------------------------------------------------------------------
+# 像素：轉成標準 RGBA 以便比對；無損的色彩型態縮減
+# ---------------------------------------------------------------------------
+
+def _interleave(planes: list) -> bytes:
+    n = len(planes)
+    out = bytearray(len(planes[0]) * n)
+    for i, plane in enumerate(planes):
+        out[i::n] = plane
+    return bytes(out)
+
+
+def to_rgba(png: Png, raw: bytes) -> bytes:
+    """8-bit 非交錯影像的未 filter 資料 -> RGBA。"""
+    ct = png.color_type
+    if ct == 6:
+        return raw
+    if ct == 2:
+        return _interleave([raw[0::3], raw[1::3], raw[2::3], b"\xff" * (len(raw) // 3)])
+    if ct == 4:
+        g = raw[0::2]
+        return _interleave([g, g, g, raw[1::2]])
+    if ct == 0:
+        return _interleave([raw, raw, raw, b"\xff" * len(raw)])
+    palette = png.chunk(b"PLTE") or b""
+    alpha = png.chunk(b"tRNS") or b""
+    table = [palette[i * 3:i * 3 + 3] + (alpha[i:i + 1] or b"\xff") for i in range(len(palette) // 3)]
+    return b"".join(table[i] for i in raw)
+
+
+def reductions(rgba: bytes, allow_gray: bool) -> list:
+    """回傳 [(color_type, 未 filter 資料, PLTE, tRNS), ...]，皆可無損還原為 rgba。"""
+    r, g, b, a = rgba[0::4], rgba[1::4], rgba[2::4], rgba[3::4]
+    opaque = a == b"\xff" * len(a)
+    gray = allow_gray and r == g == b
+    if gray:
+        options = [(0, r, None, None)] if opaque else [(4, _interleave([r, a]), None, None)]
+    else:
+        options = [(2, _interleave([r, g, b]), None, None)] if opaque else [(6, rgba, None, None)]
+    pixels = [rgba[i:i + 4] for i in range(0, len(rgba), 4)]
+    colors = set(pixels)
+    if len(colors) <= 256:
+        # 有透明度的顏色排在前面，tRNS 可以只寫到最後一個非不透明的索引
+        ordered = sorted(colors, key=lambda c: (c[3] == 255, c))
+        index = {c: i for i, c in enumerate(ordered)}
+        plte = b"".join(c[:3] for c in ordered)
+        trns = bytes(c[3] for c in ordered if c[3] != 255)
+        options.append((3, bytes(index[p] for p in pixels), plte, trns or None))
+    return options
+
+
+# ---------------------------------------------------------------------------
+# 單一檔案（在 worker 行程中執行）
+# ---------------------------------------------------------------------------
+
+def optimize_png_bytes(data: bytes) -> bytes:
+    """回傳無損最佳化後的 PNG；沒有更小時回傳原資料。"""
+    png = Png.parse(data)
+    before = [(t, b) for t, b, pre in png.chunks if pre and t not in DROP_CHUNKS]
+    after = [(t, b) for t, b, pre in png.chunks if not pre and t not in DROP_CHUNKS]
+    best = write_png(png.width, png.height, png.bit_depth, png.color_type, png.interlace,
+                     before, after, best_deflate(png.idat))
+    # 只對 8-bit、非交錯、沒有 color-key tRNS 的影像做 filter 與色彩型態縮減
+    if png.bit_depth != 8 or png.interlace or (png.color_type in (0, 2) and png.chunk(b"tRNS")):
+        return best if len(best) < len(data) else data
+    raw = unfilter(png.idat, png.height, png.stride, png.bpp)
+    rgba = to_rgba(png, raw)
+    # 色彩相關的 chunk：sBIT 依通道數而定，縮減時移除；有 ICC profile 時不轉灰階
+    keep_before = [(t, b) for t, b in before if t not in (b"PLTE", b"tRNS", b"sBIT", b"bKGD", b"hIST")]
+    for color_type, pixels, plte, trns in reductions(rgba, allow_gray=png.chunk(b"iCCP") is None):
+        if color_type == png.color_type and color_type != 3:
+            chunks_before = before
+        else:
+            chunks_before = keep_before + [(b"PLTE", plte)] * bool(plte) + [(b"tRNS", trns)] * bool(trns)
+        channels = CHANNELS[color_type]
+        for stream in filter_streams(pixels, png.height, png.width * channels, channels).values():
+            candidate = write_png(png.width, png.height, 8, color_type, 0, chunks_before, after, best_deflate(stream))
+            if len(candidate) < len(best):
+                best = candidate
+    if len(best) >= len(data):
+        return data
+    check = Png.parse(best)
+    if to_rgba(check, unfilter(check.idat, check.height, check.stride, check.bpp)) != rgba:
+        raise PngError("re-encoded pixels differ from the original")
+    return best
+
+
+def encode_webp(path: Path, rgba: bytes | None):
+    """無損 WebP；回傳位元組或 None（沒有可用的編碼器或無法驗證）。"""
+    if Image is not None:
+        import io
+        with Image.open(path) as im:
+            im = im.convert("RGBA")
+            buf = io.BytesIO()
+            im.save(buf, "WEBP", lossless=True, quality=100, method=6, exact=True)
+        with Image.open(io.BytesIO(buf.getvalue())) as check:
+            if rgba is not None and check.convert("RGBA").tobytes() != rgba:
+                return None
+        return buf.getvalue()
+    cwebp = shutil.which("cwebp")
+    if not cwebp:
+        return None
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "out.webp"
+        proc = subprocess.run([cwebp, "-quiet", "-lossless", "-exact", "-z", "9", str(path), "-o", str(out)],
+                              capture_output=True)
+        return out.read_bytes() if proc.returncode == 0 and out.exists() else None
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def optimize_file(path: str, webp: bool = False, dry_run: bool = False) -> dict:
+    path = Path(path)
+    data = path.read_bytes()
+    result = {"path": str(path), "before": len(data), "after": len(data), "action": "unchanged",
+              "output": str(path), "sha256": None, "error": None}
+    start = time.monotonic()
+    try:
+        best = optimize_png_bytes(data)
+        action = "png" if len(best) < len(data) else "unchanged"
+        target = path
+        if webp and not path.name.lower().endswith(".9.png") and not path.with_suffix(".webp").exists():
+            png = Png.parse(best)
+            rgba = None
+            if png.bit_depth == 8 and not png.interlace:
+                rgba = to_rgba(png, unfilter(png.idat, png.height, png.stride, png.bpp))
+            encoded = encode_webp(path, rgba)
+            if encoded and len(encoded) < len(best):
+                best, action, target = encoded, "webp", path.with_suffix(".webp")
+        if action != "unchanged" and not dry_run:
+            _write_atomic(target, best)
+            if target != path:
+                path.unlink()
+        result.update(after=len(best), action=action, output=str(target),
+                      sha256=hashlib.sha256(best).hexdigest())
+    except (PngError, zlib.error, OSError) as e:
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = round(time.monotonic() - start, 3)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 快取與批次
+# ---------------------------------------------------------------------------
+
+class ImageCache:
+    """內容 SHA-256（+ 選項）-> 已是最佳結果；只記錄最佳化後（或無法再縮小）的內容。"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else cache_root() / "image_opt.json"
+        self._lock = threading.Lock()
+        try:
+            self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            if self._data.get("version") != CACHE_VERSION:
+                raise ValueError
+        except Exception:
+            self._data = {"version": CACHE_VERSION, "entries": {}}
+
+    @staticmethod
+    def key(sha256: str, webp: bool) -> str:
+        return f"{sha256}:{'webp' if webp else 'png'}"
+
+    def hit(self, sha256: str, webp: bool) -> bool:
+        return self.key(sha256, webp) in self._data["entries"]
+
+    def add(self, sha256: str, webp: bool):
+        with self._lock:
+            entries = self._data["entries"]
+            entries.pop(self.key(sha256, webp), None)
+            entries[self.key(sha256, webp)] = int(time.time())
+            while len(entries) > CACHE_MAX_ENTRIES:
+                entries.pop(next(iter(entries)))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._data), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def read_min_sdk(project_root) -> int | None:
+    """app/build.gradle(.kts) 中最小的 minSdk（兩份都存在時取較保守的值）。"""
+    values = []
+    for name in ("build.gradle", "build.gradle.kts"):
+        try:
+            text = (Path(project_root) / "app" / name).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        values += [int(v) for v in re.findall(r"minSdk(?:Version)?\s*=?\s*(\d+)", text)]
+    return min(values) if values else None
+
+
+def find_images(res_dir) -> list:
+    res_dir = Path(res_dir)
+    return sorted(p for p in res_dir.glob("drawable*/*.png")) + sorted(p for p in res_dir.glob("mipmap*/*.png"))
+
+
+def optimize_directory(res_dir, webp: bool = False, dry_run: bool = False, workers: int | None = None,
+                       cache: ImageCache | None = None) -> list:
+    cache = cache or ImageCache()
+    results, todo = [], []
+    for path in find_images(res_dir):
+        sha = hashlib.sha256(path.read_bytes()).hexdigest()
+        if cache.hit(sha, webp):
+            size = path.stat().st_size
+            results.append({"path": str(path), "before": size, "after": size, "action": "cached",
+                            "output": str(path), "sha256": sha, "error": None, "seconds": 0.0})
+        else:
+            todo.append(str(path))
+    if len(todo) <= 1:
+        done = [optimize_file(p, webp, dry_run) for p in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(optimize_file, todo, [webp] * len(todo), [dry_run] * len(todo)))
+    for r in done:
+        # dry-run 沒有寫入，只有本來就無法再縮小的檔案可以記為最佳
+        if r["sha256"] and not r["error"] and (not dry_run or r["action"] == "unchanged"):
+            cache.add(r["sha256"], webp)
+    if done:
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"[WARN] image cache not saved: {e}")
+    return sorted(results + done, key=lambda r: r["path"])
+
+
+def print_report(results: list, res_dir, dry_run: bool = False):
+    res_dir = Path(res_dir)
+    print("=== Image optimization" + (" (dry run)" if dry_run else "") + " ===")
+    for r in results:
+        name = os.path.relpath(r["output"], res_dir)
+        if r["error"]:
+            print(f"  [WARN] {name}: {r['error']}")
+            continue
+        saved = r["before"] - r["after"]
+        pct = saved / r["before"] * 100 if r["before"] else 0.0
+        print(f"  {r['action']:>9}  {r['before']:>9,d} -> {r['after']:>9,d} B  -{saved:>8,d} B ({pct:4.1f}%)  {name}")
+    before = sum(r["before"] for r in results)
+    saved = sum(r["before"] - r["after"] for r in results if not r["error"])
+    cached = sum(1 for r in results if r["action"] == "cached")
+    print(f"Total: {len(results)} file(s), {cached} cached, saved {saved:,d} of {before:,d} bytes")
+
+
+def main():
+    project_root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Losslessly recompress PNG resources before the build")
+    parser.add_argument("res_dir", nargs="?", default=str(project_root / "app" / "src" / "main" / "res"),
+                        help="Resource directory (default: app/src/main/res)")
+    parser.add_argument("--webp", action="store_true", help="Convert PNGs to lossless WebP when smaller")
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without rewriting files")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if not Path(args.res_dir).is_dir():
+        print(f"<RES_DIR_NOT_FOUND> {args.res_dir}")
+        sys.exit(1)
+    if args.webp:
+        min_sdk = read_min_sdk(project_root)
+        if min_sdk is None or min_sdk < WEBP_MIN_SDK:
+            print(f"[WARN] lossless WebP needs minSdk >= {WEBP_MIN_SDK} (found {min_sdk}); keeping PNG")
+            args.webp = False
+        elif Image is None and not shutil.which("cwebp"):
+            print("[WARN] neither Pillow nor cwebp is available; keeping PNG")
+            args.webp = False
+    results = optimize_directory(args.res_dir, args.webp, args.dry_run, args.workers)
+    if args.json:
+        print(json.dumps(results, indent=1))
+    else:
+        print_report(results, args.res_dir, args.dry_run)
+    if any(r["error"] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
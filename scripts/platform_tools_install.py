@@ -0,0 +1,225 @@
+"""
+platform-tools 安裝（串流、選擇性、原子性）：
+- 只讀 zip 的 central directory 決定要解的成員（platform-tools/ 底下的檔案；--minimal 時只有 adb 必需品），
+  直接串流寫到攤平後的路徑（platform-tools/adb.exe -> <staging>/adb.exe），不經過 extractall + 搬移
+- 多執行緒平行解壓（每個執行緒各自開一個 ZipFile handle；zlib 解壓時會釋放 GIL）
+- 邊讀邊驗 CRC-32 與大小，任何成員失敗就丟棄整個 staging 目錄，原本的安裝不受影響
+- 全部成功後才切換：舊目錄改名為 .old、staging 改名為目標目錄、再刪 .old；
+  若在兩次改名之間中斷，下次執行會先把 .old 復原
+- 切換前若目標目錄內有 adb，先以 host:kill 停掉 adb server（Windows 上執行中的 adb.exe 會讓目錄無法改名）；
+  仍無法改名（PermissionError，例如其他程式開著 adb.exe）時保留原本的安裝並警告，不視為失敗
+- 已安裝的 source.properties 的 Pkg.Revision 與 zip 內相同（且 adb 存在）時完全不解壓
+
+用法：
+  python scripts/platform_tools_install.py platform-tools-latest-windows.zip C:\\platform-tools [--minimal] [--force]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from adb_client import kill_server
+
+PREFIX = "platform-tools/"
+CHUNK = 1024 * 1024
+DEFAULT_WORKERS = 4
+SWAP_RETRIES = 5
+SWAP_RETRY_DELAY = 0.4
+ADB_NAMES = ("adb.exe", "adb")
+# adb 在 Windows 上需要的 DLL；source.properties 用來判斷版本
+MINIMAL_MEMBERS = {"adb.exe", "adb", "AdbWinApi.dll", "AdbWinUsbApi.dll", "libwinpthread-1.dll", "source.properties"}
+
+
+class InstallError(Exception):
+    pass
+
+
+def parse_revision(text: str):
+    for line in text.splitlines():
+        key, _, value = line.partition("=")
+        if key.strip() == "Pkg.Revision":
+            return value.strip()
+    return None
+
+
+def archive_revision(zf: zipfile.ZipFile, prefix: str = PREFIX):
+    try:
+        return parse_revision(zf.read(prefix + "source.properties").decode("utf-8", errors="replace"))
+    except KeyError:
+        return None
+
+
+def installed_revision(out_dir):
+    try:
+        return parse_revision((Path(out_dir) / "source.properties").read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        return None
+
+
+def _adb_path(out_dir):
+    return next((Path(out_dir) / n for n in ADB_NAMES if (Path(out_dir) / n).exists()), None)
+
+
+def select_members(zf: zipfile.ZipFile, prefix: str = PREFIX, minimal: bool = False) -> list:
+    """回傳 [(ZipInfo, 攤平後的相對路徑)]；拒絕絕對路徑與 '..'。"""
+    members = []
+    for info in zf.infolist():
+        if info.is_dir() or not info.filename.startswith(prefix):
+            continue
+        rel = info.filename[len(prefix):]
+        parts = rel.replace("\\", "/").split("/")
+        if not rel or any(p in ("", "..") for p in parts) or ":" in parts[0]:
+            raise InstallError(f"unsafe member name: {info.filename}")
+        if minimal and rel not in MINIMAL_MEMBERS:
+            continue
+        members.append((info, "/".join(parts)))
+    return members
+
+
+class _Extractor:
+    """每個執行緒各自的 ZipFile handle（ZipFile 物件不可跨執行緒共用讀取位置）。"""
+
+    def __init__(self, zip_path):
+        self.zip_path = zip_path
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def _zipfile(self) -> zipfile.ZipFile:
+        zf = getattr(self._local, "zf", None)
+        if zf is None:
+            zf = self._local.zf = zipfile.ZipFile(self.zip_path)
+            with self._lock:
+                self._handles.append(zf)
+        return zf
+
+    def extract(self, info: zipfile.ZipInfo, target: Path) -> int:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        crc = 0
+        size = 0
+        with self._zipfile().open(info) as src, open(target, "wb") as dst:
+            while True:
+                chunk = src.read(CHUNK)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                dst.write(chunk)
+        if crc != info.CRC or size != info.file_size:
+            raise InstallError(f"CRC/size mismatch for {info.filename}")
+        mode = (info.external_attr >> 16) & 0o777
+        if mode and os.name != "nt":
+            os.chmod(target, mode)
+        return size
+
+    def close(self):
+        for zf in self._handles:
+            zf.close()
+        self._handles.clear()
+
+
+def recover(out_dir):
+    """上次在切換途中中斷：目標不存在但 .old 還在時復原。"""
+    out_dir = Path(out_dir)
+    backup = out_dir.with_name(out_dir.name + ".old")
+    if backup.exists():
+        if out_dir.exists():
+            shutil.rmtree(backup, ignore_errors=True)
+        else:
+            os.replace(backup, out_dir)
+            print(f"[INFO] Restored previous installation from {backup}")
+
+
+def _swap(staging: Path, out_dir: Path, backup: Path) -> bool:
+    """staging -> out_dir；舊目錄一直被占用（PermissionError）時回傳 False，兩邊都不動。"""
+    if _adb_path(out_dir) and kill_server():
+        print("[INFO] Stopped the running adb server before replacing platform-tools")
+    for attempt in range(SWAP_RETRIES):
+        try:
+            if out_dir.exists():
+                os.replace(out_dir, backup)
+            break
+        except PermissionError:
+            if attempt == SWAP_RETRIES - 1:
+                return False
+            time.sleep(SWAP_RETRY_DELAY)  # adb server 收到 host:kill 後需要一點時間才結束
+    os.replace(staging, out_dir)
+    return True
+
+
+def install(zip_path, out_dir, prefix: str = PREFIX, minimal: bool = False, force: bool = False,
+            workers: int = DEFAULT_WORKERS) -> dict:
+    """安裝到 out_dir；回傳 {"status": "skipped"|"installed"|"kept", "revision", "files", "bytes", "seconds"}。
+    "kept"：目標目錄被占用無法切換，保留原本的安裝（revision 為原本安裝的版本）。"""
+    zip_path, out_dir = Path(zip_path), Path(out_dir)
+    start = time.monotonic()
+    recover(out_dir)
+    with zipfile.ZipFile(zip_path) as zf:
+        revision = archive_revision(zf, prefix)
+        members = select_members(zf, prefix, minimal)
+    if not members:
+        raise InstallError(f"no members under {prefix!r} in {zip_path}")
+    if not force and revision and installed_revision(out_dir) == revision and _adb_path(out_dir):
+        return {"status": "skipped", "revision": revision, "files": 0, "bytes": 0,
+                "seconds": round(time.monotonic() - start, 3)}
+
+    staging = out_dir.with_name(f"{out_dir.name}.staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    extractor = _Extractor(zip_path)
+    try:
+        # 大檔先開始，避免最後只剩一個執行緒在解 adb.exe
+        members.sort(key=lambda m: -m[0].file_size)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="unzip") as pool:
+            sizes = list(pool.map(lambda m: extractor.extract(m[0], staging / m[1]), members))
+        extractor.close()
+        if not _adb_path(staging):
+            raise InstallError("adb is not part of the archive")
+        backup = out_dir.with_name(out_dir.name + ".old")
+        if not _swap(staging, out_dir, backup):
+            shutil.rmtree(staging, ignore_errors=True)
+            print(f"[WARN] {out_dir} is in use; keeping the installed Platform Tools "
+                  f"{installed_revision(out_dir) or '?'} instead of {revision or '?'}")
+            return {"status": "kept", "revision": installed_revision(out_dir), "files": 0, "bytes": 0,
+                    "seconds": round(time.monotonic() - start, 3)}
+        shutil.rmtree(backup, ignore_errors=True)
+    except BaseException:
+        extractor.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        recover(out_dir)
+        raise
+    return {"status": "installed", "revision": revision, "files": len(members), "bytes": sum(sizes),
+            "seconds": round(time.monotonic() - start, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Install platform-tools from a zip into a flat directory, atomically")
+    parser.add_argument("zip", help="platform-tools zip")
+    parser.add_argument("out_dir", help="Install directory (e.g. C:\\platform-tools)")
+    parser.add_argument("--minimal", action="store_true", help="Only install adb and the files it needs")
+    parser.add_argument("--force", action="store_true", help="Reinstall even if the revision matches")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Extraction threads (default: 4)")
+    args = parser.parse_args()
+    try:
+        r = install(args.zip, args.out_dir, minimal=args.minimal, force=args.force, workers=args.workers)
+    except (InstallError, zipfile.BadZipFile, zlib.error, OSError) as e:
+        print(f"[extract_failed] {e}")
+        sys.exit(1)
+    if r["status"] == "skipped":
+        print(f"[INFO] Platform Tools {r['revision']} already installed at {args.out_dir}; skipped extraction.")
+    elif r["status"] == "kept":
+        print(f"[INFO] Kept Platform Tools {r['revision']} at {args.out_dir}.")
+    else:
+        print(f"[OK] Installed Platform Tools {r['revision']} to {args.out_dir} "
+              f"({r['files']} files, {r['bytes'] / (1024 * 1024):.1f} MB, {r['seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+工具探測結果的持久快取（java + bundletool help、adb version、keystore 指紋…）：
+- 每筆結果綁定一組檔案，記錄各檔案的路徑、大小、mtime 與 SHA-256
+- 大小與 mtime 都沒變：直接命中，不重新雜湊
+- 大小或 mtime 變了：重新雜湊；內容相同仍命中（只更新 stat），內容不同則重新探測
+- 只快取成功的結果；密碼等機密不得放進 key 或結果
+- 同一路徑的所有實例共用一把鎖；每次寫入都在鎖內重讀檔案、合併變更後再以唯一暫存檔 os.replace，
+  多執行緒或多個實例同時寫入也不會互相覆蓋
+
+快取檔：<使用者快取目錄>/probes.json（見 download_cache.cache_root）
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from download_cache import cache_root
+
+HASH_CHUNK = 1024 * 1024
+
+_LOCKS: dict = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _path_lock(path: Path) -> threading.Lock:
+    """同一個快取檔（以解析後路徑為準）在整個行程內只對應一把鎖。"""
+    key = str(path.resolve())
+    with _LOCKS_GUARD:
+        lock = _LOCKS.get(key)
+        if lock is None:
+            lock = _LOCKS[key] = threading.Lock()
+        return lock
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ProbeCache:
+    def __init__(self, path=None):
+        self.path = Path(path) if path else cache_root() / "probes.json"
+        self._lock = _path_lock(self.path)
+        self._data = None
+
+    def _read(self) -> dict:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def _update(self, changes: dict, drop=(), reset: bool = False):
+        """呼叫端須持有 self._lock：重讀磁碟上的最新內容，套用本次變更後原子寫回。"""
+        data = {} if reset else self._read()
+        for key in drop:
+            data.pop(key, None)
+        data.update(changes)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=self.path.name + ".", suffix=".tmp", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        finally:
+            self._data = data
+
+    @staticmethod
+    def _stat(path) -> dict:
+        p = Path(path).resolve()
+        st = p.stat()
+        return {"path": str(p), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def _still_valid(self, entry: dict, files: list):
+        """回傳 (是否有效, 新的檔案指紋清單)。"""
+        old = entry.get("files", [])
+        if len(old) != len(files):
+            return False, None
+        fresh = []
+        for prev, path in zip(old, files):
+            try:
+                cur = self._stat(path)
+            except OSError:
+                return False, None
+            if cur["path"] != prev["path"]:
+                return False, None
+            if cur["size"] == prev["size"] and cur["mtime_ns"] == prev["mtime_ns"]:
+                cur["sha256"] = prev["sha256"]
+            else:
+                cur["sha256"] = _sha256_file(Path(cur["path"]))
+                if cur["sha256"] != prev["sha256"]:
+                    return False, None
+            fresh.append(cur)
+        return True, fresh
+
+    def get(self, name: str, files: list, extra: str = ""):
+        key = f"{name}|{extra}"
+        with self._lock:
+            entry = self._load().get(key)
+            if not entry:
+                # 可能是別的實例剛寫入：重讀一次再判定未命中
+                self._data = self._read()
+                entry = self._data.get(key)
+            if not entry:
+                return None
+            valid, fresh = self._still_valid(entry, files)
+            if not valid:
+                self._update({}, drop=(key,))
+                return None
+            if fresh != entry["files"]:
+                self._update({key: dict(entry, files=fresh)})
+            return entry["result"]
+
+    def put(self, name: str, files: list, result, extra: str = ""):
+        key = f"{name}|{extra}"
+        fingerprints = []
+        for path in files:
+            cur = self._stat(path)
+            cur["sha256"] = _sha256_file(Path(cur["path"]))
+            fingerprints.append(cur)
+        with self._lock:
+            self._update({key: {"files": fingerprints, "result": result}})
+
+    def get_or_probe(self, name: str, files: list, probe, extra: str = "", accept=lambda r: r is not None):
+        """命中就回傳快取；否則呼叫 probe()，accept(result) 為真時寫入快取。"""
+        files = [f for f in files if f]
+        if not all(Path(f).exists() for f in files):
+            return probe()
+        cached = self.get(name, files, extra)
+        if cached is not None:
+            print(f"[PROBE_CACHE_HIT] {name}")
+            return cached
+        result = probe()
+        if accept(result):
+            self.put(name, files, result, extra)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._update({}, reset=True)
@@ -3,45 +3,59 @@
 """
 重建原生 Compose 版本並進行基本驗證：
 1) Gradle clean
-2) :app:bundleProdRelease 產出 AAB
+2) :app:bundleProdRelease 產出 AAB（與 clean 合併為同一次 warm daemon 呼叫）
 3) 以 bundletool（若存在）驗證 AAB 結構
-4) 簡單檢查 AdMob SDK 初始化 log（裝置連線時）
+4) 串流 logcat 等待 AdMob SDK 初始化，並檢查 crash / ANR（裝置連線時；等待上限 LOGCAT_WAIT_SECONDS，預設 10 秒）
 
 用法：
-  python scripts/rebuild_original_compose.py
+  python scripts/rebuild_original_compose.py [--stop-daemon]
 """
 
 import os
 import sys
-import subprocess
+import argparse
 from pathlib import Path
 
+from adb_client import AdbClient
+from logcat_monitor import LogcatMonitor, print_summary
+from gradle_log import tail_lines
+from gradle_session import GradleSession
+import run_metrics
+
 PROJECT_DIR = Path(__file__).resolve().parents[1]
 APP_DIR = PROJECT_DIR / 'app'
 BUILD_DIR = APP_DIR / 'build' / 'outputs' / 'bundle' / 'prodRelease'
 GRADLEW = PROJECT_DIR / ('gradlew.bat' if os.name == 'nt' else 'gradlew')
+BUILD_LOG = PROJECT_DIR / 'rebuild_original.log'
 
 
 def run(cmd, cwd=None, shell=False):
     print(f"\n$ {' '.join(cmd) if isinstance(cmd, list) else cmd}")
-    return subprocess.run(cmd, cwd=cwd, shell=shell, text=True, capture_output=True)
+    return run_metrics.run(cmd, cwd=cwd, shell=shell)
 
 
 def main():
-    print("=== Step 1: Gradle clean ===")
-    r = run([str(GRADLEW), 'clean'], cwd=str(PROJECT_DIR))
-    print(r.stdout); print(r.stderr)
-
-    if r.returncode != 0:
-        print("[ERROR] gradle clean 失敗")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Rebuild the native Compose AAB and run basic checks")
+    parser.add_argument('--stop-daemon', action='store_true', help='Stop the warm Gradle daemon when done')
+    args = parser.parse_args()
 
-    print("=== Step 2: Build :app:bundleProdRelease ===")
-    r = run([str(GRADLEW), ':app:bundleProdRelease', '--stacktrace'], cwd=str(PROJECT_DIR))
-    print(r.stdout); print(r.stderr)
-
-    if r.returncode != 0:
-        print("[ERROR] 建置 AAB 失敗")
+    print("=== Step 1+2: Gradle clean + :app:bundleProdRelease（warm daemon） ===")
+    session = GradleSession(PROJECT_DIR, GRADLEW)
+    try:
+        result = session.run([('clean', ':app:clean'), ('bundle', ':app:bundleProdRelease')],
+                             BUILD_LOG, extra_args=['--stacktrace'])
+    finally:
+        if args.stop_daemon:
+            session.stop()
+    print('\n'.join(tail_lines(BUILD_LOG, 200)))
+    result.print_summary()
+
+    if not result.ok:
+        failed = result.failed_step()
+        if failed and failed.name == 'clean':
+            print("[ERROR] gradle clean 失敗")
+        else:
+            print("[ERROR] 建置 AAB 失敗")
         sys.exit(1)
 
     aab_files = list(BUILD_DIR.glob('*.aab'))
@@ -62,10 +76,23 @@ def main():
         print("略過：未設定 BUNDLETOOL_JAR 環境變數或檔案不存在。")
 
     print("=== Step 4: AdMob 初始化檢查（ADB 可選） ===")
-    # 嘗試抓取 Logcat 中 Google Mobile Ads SDK 初始化關鍵字
+    # 串流 logcat（既有 buffer 先讀入，之後的新紀錄持續進來）：等 SDK 初始化，順便檢查 crash / ANR
     try:
-        r = run(['adb', 'logcat', '-d', '|', 'findstr', 'MobileAds'])
-        print(r.stdout)
+        client = AdbClient()
+        serials = client.ready_serials() if client.ensure_server() else []
+        if not serials:
+            print("略過：ADB 不可用或無裝置。")
+        timeout = float(os.environ.get('LOGCAT_WAIT_SECONDS', '10'))
+        monitors = [LogcatMonitor(client, serial).start() for serial in serials]
+        try:
+            for serial, mon in zip(serials, monitors):
+                print(f"[{serial}]")
+                rec = mon.wait_for("ads_init", timeout)
+                print(f"[OK] {rec}" if rec else f"<ADS_INIT_NOT_SEEN> {timeout:.0f}s 內未見 MobileAds 紀錄")
+                print_summary(mon, ("crash", "native_crash", "anr"))
+        finally:
+            for mon in monitors:
+                mon.stop()
     except Exception as e:
         print(f"略過：ADB 不可用或無裝置。{e}")
 
@@ -73,4 +100,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    with run_metrics.session('rebuild_original_compose'):
+        main()
\ No newline at end of file
@@ -3,24 +3,36 @@
 重建 TWA 版 AAB 並使用 bundletool 驗證。
 
 使用方式：
-  python scripts/rebuild_twa_and_verify.py
+  python scripts/rebuild_twa_and_verify.py [--stop-daemon] [--all-devices] [--optimize-images [--webp-images]]
+
+--optimize-images 會直接改寫 app/src/main/res 內受版控的 PNG（--webp-images 另會刪除被取代的 PNG），
+預設不執行；啟用後請檢查 git diff 再提交。
 
 需求：Windows（已安裝 JDK 11+）、Gradle Wrapper、bundletool（專案已附帶）。
 """
-import os
-import subprocess
+import argparse
 import sys
 from pathlib import Path
 
-
-def run(cmd, cwd=None):
-    print(f"\n>>> RUN: {' '.join(cmd)}")
-    proc = subprocess.run(cmd, cwd=cwd, shell=False)
-    if proc.returncode != 0:
-        raise SystemExit(f"命令失敗（exit={proc.returncode}）：{' '.join(cmd)}")
+import optimize_images
+import verify_aab_with_bundletool as verify
+from gradle_session import GradleSession
+import run_metrics
+from release_pipeline import Pipeline, Stage, StageFailed
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Rebuild the TWA AAB and verify it with bundletool")
+    parser.add_argument('--stop-daemon', action='store_true', help='Stop the warm Gradle daemon when done')
+    parser.add_argument('--all-devices', action='store_true', help='Install on every ready device concurrently')
+    parser.add_argument('--optimize-images', action='store_true',
+                        help='Losslessly recompress PNG resources in app/src/main/res in place before the build')
+    parser.add_argument('--webp-images', action='store_true',
+                        help='With --optimize-images, replace PNG resources with lossless WebP when smaller')
+    args = parser.parse_args()
+    if args.webp_images and not args.optimize_images:
+        parser.error('--webp-images requires --optimize-images')
+
     project_root = Path(__file__).resolve().parent.parent
     gradlew = project_root / 'gradlew.bat'
     app_dir = project_root / 'app'
@@ -29,28 +41,52 @@ def main():
     if not gradlew.exists():
         raise SystemExit(f"找不到 Gradle Wrapper：{gradlew}")
 
-    print("1) 清理專案…")
-    run([str(gradlew), 'clean'], cwd=str(project_root))
-
-    print("2) 建置並產生 prodRelease AAB…")
-    run([str(gradlew), ':app:bundleProdRelease', '--no-daemon'], cwd=str(project_root))
+    def optimize_res(_):
+        # 0) 建置前無損壓縮 res 內的 PNG（僅 --optimize-images；會改寫原始檔）；內容沒變的檔案依 SHA-256 快取略過
+        res_dir = app_dir / 'src' / 'main' / 'res'
+        min_sdk = optimize_images.read_min_sdk(project_root)
+        webp = args.webp_images and min_sdk is not None and min_sdk >= optimize_images.WEBP_MIN_SDK
+        results = optimize_images.optimize_directory(res_dir, webp=webp)
+        optimize_images.print_report(results, res_dir)
+        return sum(r['before'] - r['after'] for r in results if not r['error'])
 
-    if not aab_path.exists():
-        raise SystemExit(f"AAB 未找到：{aab_path}")
-    print(f"AAB 生成完成：{aab_path}")
+    def gradle_bundle(_):
+        print("1+2) 清理專案並建置 prodRelease AAB（warm daemon，單次呼叫）…")
+        session = GradleSession(project_root, gradlew)
+        try:
+            result = session.run([('clean', ':app:clean'), ('bundle', ':app:bundleProdRelease')],
+                                 project_root / 'rebuild_twa.log')
+        finally:
+            if args.stop_daemon:
+                session.stop()
+        result.print_summary()
+        if not result.ok:
+            failed = result.failed_step()
+            raise StageFailed(f"命令失敗（exit={result.returncode}）：{failed.name if failed else 'gradle'} 步驟")
+        if not aab_path.exists():
+            raise StageFailed(f"AAB 未找到：{aab_path}")
+        print(f"AAB 生成完成：{aab_path}")
+        return str(aab_path)
 
-    print("3) 使用 bundletool 驗證 AAB…")
-    verify_script = project_root / 'scripts' / 'verify_aab_with_bundletool.py'
-    if not verify_script.exists():
-        raise SystemExit(f"找不到驗證腳本：{verify_script}")
-    run(['python', str(verify_script), str(aab_path)], cwd=str(project_root))
+    # 3) bundletool 驗證在同一個行程內執行；不讀 AAB 的 stage（keystore 指紋、裝置探測、bundletool 檢查）與建置同時進行
+    cfg = verify.resolve_config(aab_path)
+    pre = [Stage('optimize_images', optimize_res)] if args.optimize_images else []
+    stages = pre + [Stage('gradle_bundle', gradle_bundle, deps=[s.name for s in pre], live=True)]
+    stages += verify.build_stages(cfg, all_devices=args.all_devices, after=['gradle_bundle'])
+    result = Pipeline(stages).run()
+    result.print_summary()
+    verify.print_verify_summary(cfg, result)
+    if not result.ok:
+        failed = [r.name for r in result.stages.values() if r.status == 'FAILED']
+        raise SystemExit(f"流程失敗：{', '.join(failed)}")
 
     print("全部步驟完成！")
 
 
 if __name__ == '__main__':
     try:
-        main()
+        with run_metrics.session('rebuild_twa_and_verify'):
+            main()
     except Exception as e:
         print(f"發生錯誤：{e}")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+發佈流程的 DAG 執行器：
+- 每個 Stage 宣告名稱、函式與相依的 stage；沒有相依關係的 stage 以執行緒平行執行
+- stage 函式收到 {相依 stage 名稱: 輸出} 的 dict，回傳值即為該 stage 的輸出
+- 失敗時拋出 StageFailed(marker)；依賴它的 stage 標記為 SKIPPED，其他分支照常跑完
+- cache=callable(inputs) 回傳 (檔案清單, extra) 或 None 時，輸出依 (檔案清單, extra) 存進 ProbeCache，檔案沒變就直接沿用（輸出須可 JSON 序列化；空值不快取）
+  同一個 Pipeline 的所有 stage 共用一個 ProbeCache；快取讀寫的 OSError 視為未命中，只警告不讓 stage 失敗
+- 每個 stage 的耗時與狀態記錄到 run_metrics 的目前 session
+- 平行 stage 的 print 依執行緒分別緩衝，stage 結束時整段輸出，不會交錯；live=True 的 stage 直接輸出
+  （例如 Gradle 建置，需要即時看到 log）
+
+用法：
+  pipeline = Pipeline([
+      Stage("device_probe", probe_devices),
+      Stage("build_apks", build_apks, deps=["bundletool_check"]),
+      Stage("install", install, deps=["build_apks", "device_probe"]),
+      ...
+  ])
+  result = pipeline.run()
+  result.print_summary()
+"""
+
+import io
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import run_metrics
+from probe_cache import ProbeCache
+
+DEFAULT_WORKERS = 4
+
+
+class StageFailed(Exception):
+    """stage 無法繼續；marker 會原樣印出（例如 "<BUILD_APKS_FAILED>"）。"""
+
+    def __init__(self, marker: str, detail: str = ""):
+        super().__init__(f"{marker} {detail}".strip())
+        self.marker = marker
+        self.detail = detail
+
+
+class Stage:
+    def __init__(self, name: str, func, deps=(), cache=None, live: bool = False):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.cache = cache
+        self.live = live
+
+
+class StageResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "PENDING"
+        self.value = None
+        self.error = None
+        self.seconds = 0.0
+        self.started = None
+        self.finished = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("OK", "CACHED")
+
+
+class PipelineResult:
+    def __init__(self, stages: dict, seconds: float):
+        self.stages = stages
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.stages.values())
+
+    def __getitem__(self, name: str) -> StageResult:
+        return self.stages[name]
+
+    def value(self, name: str, default=None):
+        r = self.stages.get(name)
+        return r.value if r is not None and r.ok else default
+
+    def critical_path(self, pipeline) -> tuple:
+        """回傳 (最長相依鏈的 stage 名稱, 總秒數)，用來和實際 wall-clock 比較。"""
+        best = {}
+        for stage in pipeline.order:
+            dep = max((best[d] for d in stage.deps), key=lambda b: b[1], default=([], 0.0))
+            best[stage.name] = (dep[0] + [stage.name], dep[1] + self.stages[stage.name].seconds)
+        return max(best.values(), key=lambda b: b[1], default=([], 0.0))
+
+    def print_summary(self):
+        print("=== Pipeline stages ===")
+        for r in self.stages.values():
+            line = f"[{r.status}] {r.name} ({r.seconds:.1f}s)"
+            if r.error:
+                line += f" {r.error}"
+            print(line)
+        print(f"Wall-clock: {self.seconds:.1f}s")
+
+
+class _ThreadOutput(io.TextIOBase):
+    """sys.stdout 代理：有設定緩衝區的執行緒寫進自己的緩衝區，其他執行緒直接寫到原本的 stdout。"""
+
+    def __init__(self, target):
+        self.target = target
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, s):
+        buf = getattr(self.local, "buffer", None)
+        if buf is not None:
+            buf.append(s)
+        else:
+            with self.lock:
+                self.target.write(s)
+        return len(s)
+
+    def flush(self):
+        self.target.flush()
+
+    def emit(self, text: str):
+        with self.lock:
+            self.target.write(text)
+            self.target.flush()
+
+
+class Pipeline:
+    def __init__(self, stages: list, max_workers: int = DEFAULT_WORKERS, cache: ProbeCache | None = None):
+        self.stages = {s.name: s for s in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("duplicate stage names")
+        for s in stages:
+            for d in s.deps:
+                if d not in self.stages:
+                    raise ValueError(f"stage {s.name!r} depends on unknown stage {d!r}")
+        self.order = self._toposort()
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else ProbeCache()
+
+    def _toposort(self) -> list:
+        order, state = [], {}
+
+        def visit(name, chain):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("dependency cycle: " + " -> ".join(chain + [name]))
+            state[name] = "visiting"
+            for d in self.stages[name].deps:
+                visit(d, chain + [name])
+            state[name] = "done"
+            order.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _needed(self, targets) -> list:
+        if not targets:
+            return self.order
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].deps)
+        return [s for s in self.order if s.name in needed]
+
+    def _cached(self, stage: Stage, inputs: dict, files: list, extra: str):
+        """依檔案指紋沿用快取的 stage 輸出；快取本身讀寫失敗時當成未命中照常執行。"""
+        name = f"stage:{stage.name}"
+        usable = all(Path(f).exists() for f in files)
+        if usable:
+            try:
+                cached = self.cache.get(name, files, extra)
+            except OSError as e:
+                print(f"[WARN] stage cache read failed for {stage.name}: {e}")
+                cached = None
+            if cached is not None:
+                print(f"[PROBE_CACHE_HIT] {name}")
+                return cached, "CACHED"
+        value = stage.func(inputs)
+        if usable and value:
+            try:
+                self.cache.put(name, files, value, extra)
+            except OSError as e:
+                print(f"[WARN] stage cache write failed for {stage.name}: {e}")
+        return value, "OK"
+
+    def _execute(self, stage: Stage, inputs: dict, result: StageResult, out: _ThreadOutput):
+        if not stage.live:
+            out.local.buffer = []
+        result.started = time.monotonic()
+        try:
+            key = stage.cache(inputs) if stage.cache is not None else None
+            if key is not None:
+                files, extra = key
+                result.value, result.status = self._cached(stage, inputs, [f for f in files if f], extra)
+            else:
+                result.value = stage.func(inputs)
+                result.status = "OK"
+        except StageFailed as e:
+            print(e.marker + (f" {e.detail}" if e.detail else ""))
+            result.status, result.error = "FAILED", e.marker
+        except Exception as e:
+            print(f"[STAGE_ERROR] {stage.name}: {e}")
+            result.status, result.error = "FAILED", f"{type(e).__name__}: {e}"
+        finally:
+            result.finished = time.monotonic()
+            result.seconds = result.finished - result.started
+            run_metrics.record_stage(stage.name, result.status, result.seconds)
+            buffered = getattr(out.local, "buffer", None)
+            out.local.buffer = None
+            header = f"=== [{stage.name}] {result.status} ({result.seconds:.1f}s) ===\n"
+            out.emit(header + "".join(buffered or []))
+
+    def run(self, targets=None) -> PipelineResult:
+        """執行 targets（及其相依 stage；None = 全部），回傳 PipelineResult。"""
+        stages = self._needed(targets)
+        results = {s.name: StageResult(s.name) for s in stages}
+        pending = {s.name: s for s in stages}
+        running = {}
+        start = time.monotonic()
+        out = _ThreadOutput(sys.stdout)
+        original, sys.stdout = sys.stdout, out
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while pending or running:
+                    for name, stage in list(pending.items()):
+                        dep_status = [results[d].status for d in stage.deps]
+                        if any(st in ("FAILED", "SKIPPED") for st in dep_status):
+                            results[name].status = "SKIPPED"
+                            results[name].error = "dependency failed"
+                            del pending[name]
+                        elif all(st in ("OK", "CACHED") for st in dep_status):
+                            inputs = {d: results[d].value for d in stage.deps}
+                            running[pool.submit(self._execute, stage, inputs, results[name], out)] = name
+                            del pending[name]
+                    if not running:
+                        continue
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        running.pop(fut)
+                        fut.result()
+        finally:
+            sys.stdout = original
+        return PipelineResult(results, time.monotonic() - start)
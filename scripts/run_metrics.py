@@ -0,0 +1,243 @@
+"""
+執行計時與歷史紀錄：
+- run()：取代 subprocess.run(capture_output=True)，記錄 monotonic 耗時、子行程峰值 RSS 與輸出量
+  峰值 RSS：POSIX 以 os.wait4 取得（含已回收的子孫行程）；Windows 有安裝 psutil 時讀 peak_wset，否則為 None
+- default_label(cmd)：記錄用的標籤（程式名稱 + 第一個子命令，不含參數值）；命令含密碼時以遮罩後的顯示字串呼叫，
+  再傳給 run(label=...)
+- Pipeline 的每個 stage 也會記錄（見 release_pipeline）
+- session(script)：腳本結束時寫出 JSON 報告，並附加一行到 history.jsonl（只附加、不改寫）
+- 與同一腳本最近 N 次（預設 10）的中位數比較，超過門檻（預設 +25%，且至少慢 1 秒）即標記 [REGRESSION]
+
+輸出目錄：HOMELETTER_METRICS_DIR > <使用者快取目錄>/metrics（見 download_cache.cache_root）
+門檻：HOMELETTER_REGRESSION_THRESHOLD=0.25（或 session(threshold=...)）
+
+用法：
+  with run_metrics.session("verify_aab_with_bundletool"):
+      result = run_metrics.run("java -jar bundletool-all.jar help", shell=True)
+  python scripts/run_metrics.py [--script NAME] [--last 10]
+"""
+
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from download_cache import cache_root
+
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_WINDOW = 10
+MIN_REGRESSION_SECONDS = 1.0
+
+_current = None
+
+
+def metrics_dir() -> Path:
+    env = os.environ.get("HOMELETTER_METRICS_DIR")
+    return Path(env) if env else cache_root() / "metrics"
+
+
+def default_label(cmd) -> str:
+    """'java -jar "bundletool-all.jar" build-apks --bundle=...' -> 'java build-apks'；不含參數值，避免寫入密碼。"""
+    try:
+        tokens = shlex.split(cmd, posix=os.name != "nt") if isinstance(cmd, str) else [str(c) for c in cmd]
+    except ValueError:
+        tokens = str(cmd).split()
+    if tokens and tokens[0].lower() in ("cmd", "cmd.exe") and len(tokens) > 2 and tokens[1].lower() == "/c":
+        tokens = tokens[2:]
+    if not tokens:
+        return "?"
+    program = Path(tokens[0].strip('"')).name
+    for tok in tokens[1:]:
+        tok = tok.strip('"')
+        if tok and not tok.startswith("-") and not any(c in tok for c in "./\\:="):
+            return f"{program} {tok}"
+    return program
+
+
+def _peak_rss_windows(pid: int):
+    try:
+        import psutil  # type: ignore
+        return psutil.Process(pid).memory_info().peak_wset // 1024
+    except Exception:
+        return None
+
+
+def wait_measured(proc) -> tuple:
+    """等待子行程結束，回傳 (returncode, 峰值 RSS KB 或 None)。
+    Linux 的 ru_maxrss 含 fork 當下父行程的 RSS 高水位，子行程比父行程小時量到的是父行程的值。"""
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return proc.returncode, usage.ru_maxrss
+        except ChildProcessError:
+            return proc.wait(), None
+    # Windows：Popen 仍持有行程 handle，結束後也能讀到 peak_wset
+    peak = _peak_rss_windows(proc.pid)
+    code = proc.wait()
+    return code, _peak_rss_windows(proc.pid) or peak
+
+
+def run(cmd, cwd=None, shell: bool = False, env=None, label: str | None = None,
+        echo: bool = False) -> subprocess.CompletedProcess:
+    """執行並擷取 stdout/stderr（文字）；echo=True 時同時即時輸出。結果記錄到目前的 session。"""
+    start = time.monotonic()
+    proc = subprocess.Popen(cmd, cwd=cwd, shell=shell, env=env, text=True, errors="replace",
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    captured = {"stdout": [], "stderr": []}
+
+    def pump(name, stream):
+        target = getattr(sys, name)
+        for line in stream:
+            captured[name].append(line)
+            if echo:
+                target.write(line)
+        stream.close()
+
+    threads = [threading.Thread(target=pump, args=(n, getattr(proc, n)), daemon=True) for n in ("stdout", "stderr")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    code, peak_rss = wait_measured(proc)
+    out, err = "".join(captured["stdout"]), "".join(captured["stderr"])
+    record_command(label or default_label(cmd), time.monotonic() - start, code, peak_rss,
+                   len(out.encode("utf-8")) + len(err.encode("utf-8")))
+    return subprocess.CompletedProcess(cmd, code, out, err)
+
+
+def record_command(label: str, seconds: float, returncode: int, peak_rss_kb=None, output_bytes: int = 0):
+    if _current is not None:
+        _current.add("commands", {"label": label, "seconds": round(seconds, 3), "returncode": returncode,
+                                  "peak_rss_kb": peak_rss_kb, "output_bytes": output_bytes})
+
+
+def record_stage(name: str, status: str, seconds: float):
+    if _current is not None:
+        _current.add("stages", {"name": name, "status": status, "seconds": round(seconds, 3)})
+
+
+class RunRecorder:
+    def __init__(self, script: str, threshold: float | None = None, window: int = DEFAULT_WINDOW, directory=None):
+        self.script = script
+        env_threshold = os.environ.get("HOMELETTER_REGRESSION_THRESHOLD")
+        self.threshold = threshold if threshold is not None else float(env_threshold or DEFAULT_THRESHOLD)
+        self.window = window
+        self.directory = Path(directory) if directory else metrics_dir()
+        self.history_path = self.directory / "history.jsonl"
+        self.report = {"script": script, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "seconds": None, "stages": [], "commands": [], "regressions": []}
+        self._lock = threading.Lock()
+        self._start = None
+
+    def add(self, kind: str, entry: dict):
+        with self._lock:
+            self.report[kind].append(entry)
+
+    def _totals(self) -> dict:
+        """同名 stage/指令可能執行多次：依名稱加總，作為與歷史比較的單位。"""
+        totals = {"total": self.report["seconds"]}
+        for s in self.report["stages"]:
+            key = f"stage:{s['name']}"
+            totals[key] = round(totals.get(key, 0.0) + s["seconds"], 3)
+        for c in self.report["commands"]:
+            key = f"cmd:{c['label']}"
+            totals[key] = round(totals.get(key, 0.0) + c["seconds"], 3)
+        return totals
+
+    def load_history(self) -> list:
+        runs = []
+        try:
+            with open(self.history_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("script") == self.script:
+                        runs.append(entry)
+        except FileNotFoundError:
+            pass
+        return runs[-self.window:]
+
+    def find_regressions(self, totals: dict, history: list) -> list:
+        regressions = []
+        for key, seconds in totals.items():
+            past = [h["totals"][key] for h in history if key in h.get("totals", {})]
+            if len(past) < 3 or seconds is None:
+                continue
+            median = statistics.median(past)
+            if seconds > median * (1 + self.threshold) and seconds - median >= MIN_REGRESSION_SECONDS:
+                regressions.append({"key": key, "seconds": seconds, "median": median,
+                                    "ratio": round(seconds / median, 2) if median else None})
+        return regressions
+
+    def start(self):
+        self._start = time.monotonic()
+        return self
+
+    def finish(self):
+        self.report["seconds"] = round(time.monotonic() - self._start, 3)
+        totals = self._totals()
+        self.report["regressions"] = self.find_regressions(totals, self.load_history())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        report_path = self.directory / f"{self.script}-{stamp}-{os.getpid()}.json"
+        report_path.write_text(json.dumps(self.report, indent=1, ensure_ascii=False), encoding="utf-8")
+        with open(self.history_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"script": self.script, "started_at": self.report["started_at"],
+                                "totals": totals}, ensure_ascii=False) + "\n")
+        print(f"=== Timing ({self.report['seconds']:.1f}s total) ===")
+        for key, seconds in totals.items():
+            if key != "total":
+                print(f"  {key}: {seconds:.1f}s")
+        for r in self.report["regressions"]:
+            pct = (r["seconds"] / r["median"] - 1) * 100 if r["median"] else float("inf")
+            print(f"[REGRESSION] {r['key']} {r['seconds']:.1f}s vs median {r['median']:.1f}s (+{pct:.0f}%)")
+        print(f"[METRICS] {report_path}")
+        return report_path
+
+
+@contextmanager
+def session(script: str, threshold: float | None = None, window: int = DEFAULT_WINDOW):
+    """with session("script_name"): ... — 期間的 run()/stage 都記到同一份報告，結束時寫出。"""
+    global _current
+    recorder = RunRecorder(script, threshold, window).start()
+    previous, _current = _current, recorder
+    try:
+        yield recorder
+    finally:
+        _current = previous
+        try:
+            recorder.finish()
+        except OSError as e:
+            print(f"[METRICS_WRITE_FAILED] {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show recorded run timings")
+    parser.add_argument("--script", help="Only show runs of this script")
+    parser.add_argument("--last", type=int, default=DEFAULT_WINDOW, help="Number of runs to show (default: 10)")
+    args = parser.parse_args()
+    path = metrics_dir() / "history.jsonl"
+    if not path.exists():
+        print(f"No history at {path}")
+        return
+    runs = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if args.script:
+        runs = [r for r in runs if r.get("script") == args.script]
+    for r in runs[-args.last:]:
+        slowest = sorted(((k, v) for k, v in r["totals"].items() if k != "total"), key=lambda kv: -kv[1])[:3]
+        detail = ", ".join(f"{k}={v:.1f}s" for k, v in slowest)
+        print(f"{r['started_at']} {r['script']}: {r['totals'].get('total', 0):.1f}s  [{detail}]")
+
+
+if __name__ == "__main__":
+    main()
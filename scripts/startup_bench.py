@@ -0,0 +1,364 @@
+"""
+冷啟動延遲基準測試（透過 adb server socket，裝置需已安裝要量測的版本）：
+- 每輪先 am force-stop，再 am start -W -n 啟動 MainActivity / MailboxDetailActivity，
+  收集 TotalTime、WaitTime 與 logcat 的 "Displayed ...: +NNNms"（logcat_monitor 串流，不重新 dump buffer）
+- 前 --warmup 輪不計入（第一次啟動含 dex/profile 編譯）；其餘計算 p50/p95/p99、平均、變異數與標準差
+- 結果依 AAB 內容 SHA-256 存放（<使用者快取目錄>/startup/<sha256>.json，見 download_cache.cache_root），
+  同一版本多次量測會累積成多個 session；--compare 以另一版本（AAB 路徑或 SHA-256 前綴）最新 session 的
+  p50/p95 比較，超過門檻時 exit code 為 1，可在上傳 Play 之前擋下啟動退步
+- MailboxDetailActivity 為 exported=false：shell 使用者啟動會得到 Permission Denial，
+  需在可 adb root 的模擬器（userdebug 映像）上量測
+
+用法：
+  python scripts/startup_bench.py --aab app/build/outputs/bundle/prodRelease/app-prod-release.aab
+                                  [--serial emulator-5554] [--runs 20] [--warmup 1] [--activity main detail]
+                                  [--compare OLD.aab|SHA256_PREFIX --threshold 0.1] [--list]
+  python scripts/startup_bench.py --selfcheck      # 解析器/統計/比較與替身 adb server 上的 run_session 檢查
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import run_metrics
+from checks import Checks
+from adb_client import AdbClient, AdbError
+from apks_cache import sha256_file
+from download_cache import cache_root
+from logcat_monitor import LogcatMonitor, LogFilter
+
+PACKAGE = "org.homeletter.app"
+ACTIVITIES = {
+    "main": f"{PACKAGE}/.MainActivity",
+    # MailboxDetailActivity 讀取 title / content extras
+    "detail": f"{PACKAGE}/.MailboxDetailActivity --es title bench --es content startup",
+}
+METRICS = ("total", "wait", "displayed")
+DISPLAYED = re.compile(r"^Displayed (\S+?)(?: for user \d+)?: \+(?:(\d+)s)?(\d+)ms")
+DISPLAY_TIMEOUT = 10
+
+
+class StartupError(Exception):
+    pass
+
+
+def parse_am_start(text: str) -> dict:
+    """am start -W 的輸出 -> {"status", "launch_state", "total", "wait", "error"}。"""
+    out = {"status": None, "launch_state": None, "total": None, "wait": None, "error": None}
+    for line in text.splitlines():
+        key, _, value = line.strip().partition(": ")
+        if key == "Status":
+            out["status"] = value
+        elif key == "LaunchState":
+            out["launch_state"] = value
+        elif key == "TotalTime":
+            out["total"] = int(value)
+        elif key == "WaitTime":
+            out["wait"] = int(value)
+        elif (key.startswith("Error") and not key.startswith("Error type")) or "Exception" in key \
+                or "Permission Denial" in line:
+            out["error"] = out["error"] or line.strip()
+    return out
+
+
+def parse_displayed(message: str):
+    """'Displayed pkg/.Act: +1s234ms' -> (component, 1234)；不符合時 None。"""
+    m = DISPLAYED.match(message)
+    if not m:
+        return None
+    return m.group(1), int(m.group(2) or 0) * 1000 + int(m.group(3))
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """線性內插（與 numpy 預設相同）。"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(values: list) -> dict:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "min": values[0],
+        "p50": round(percentile(values, 0.50), 1),
+        "p95": round(percentile(values, 0.95), 1),
+        "p99": round(percentile(values, 0.99), 1),
+        "max": values[-1],
+        "mean": round(statistics.fmean(values), 1),
+        "variance": round(statistics.variance(values), 1) if len(values) > 1 else 0.0,
+        "stdev": round(statistics.stdev(values), 1) if len(values) > 1 else 0.0,
+    }
+
+
+def measure(client: AdbClient, serial: str, monitor: LogcatMonitor, target: str, runs: int, warmup: int = 1,
+            package: str = PACKAGE) -> dict:
+    """target：ACTIVITIES 的值（component 加上 am start 參數）。回傳 {"samples": {...}, "summary": {...}}。"""
+    component = target.split()[0]
+    samples = {m: [] for m in METRICS}
+    states = []
+    for i in range(warmup + runs):
+        client.shell(serial, f"am force-stop {package}")
+        after = monitor.lines
+        result = parse_am_start(client.shell(serial, f"am start -W -n {target}"))
+        if result["error"] or result["total"] is None:
+            raise StartupError(result["error"] or f"am start returned no TotalTime for {component}")
+        displayed = None
+        while True:
+            rec = monitor.wait_for("displayed", DISPLAY_TIMEOUT, after)
+            if rec is None:
+                break
+            after = rec.seq
+            parsed = parse_displayed(rec.message)
+            if parsed and parsed[0] == component:
+                displayed = parsed[1]
+                break
+        if i < warmup:
+            continue
+        samples["total"].append(result["total"])
+        samples["wait"].append(result["wait"])
+        samples["displayed"].append(displayed)
+        states.append(result["launch_state"])
+    return {"component": component, "launch_states": sorted(set(s for s in states if s)), "samples": samples,
+            "summary": {m: summarize(v) for m, v in samples.items()}}
+
+
+class StartupResults:
+    """每個 AAB SHA-256 一個 JSON 檔：{"aab_sha256", "aab", "sessions": [...]}。"""
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else cache_root() / "startup"
+
+    def path(self, sha: str) -> Path:
+        return self.root / f"{sha}.json"
+
+    def load(self, sha: str) -> dict:
+        try:
+            return json.loads(self.path(sha).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"aab_sha256": sha, "sessions": []}
+
+    def add_session(self, sha: str, aab_name: str, session: dict) -> Path:
+        data = self.load(sha)
+        data["aab"] = aab_name
+        data["sessions"].append(session)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(sha)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def resolve(self, ref: str):
+        """AAB 路徑或 SHA-256（前綴）-> SHA-256；找不到或不唯一時 None。"""
+        if Path(ref).is_file():
+            return sha256_file(ref)
+        matches = [p.stem for p in self.root.glob(f"{ref.lower()}*.json")] if self.root.exists() else []
+        return matches[0] if len(matches) == 1 else None
+
+    def all(self) -> list:
+        if not self.root.exists():
+            return []
+        return [json.loads(p.read_text(encoding="utf-8"))
+                for p in sorted(self.root.glob("*.json"), key=lambda p: -p.stat().st_mtime)]
+
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    """比較兩個 session 各 activity 的 TotalTime p50/p95；回傳退步清單。"""
+    regressions = []
+    for name, act in new["activities"].items():
+        base = old["activities"].get(name)
+        if not base:
+            continue
+        for q in ("p50", "p95"):
+            a, b = base["summary"]["total"].get(q), act["summary"]["total"].get(q)
+            if a and b and b > a * (1 + threshold):
+                regressions.append({"activity": name, "metric": f"total.{q}", "old": a, "new": b,
+                                    "ratio": round(b / a, 2)})
+    return regressions
+
+
+def print_session(session: dict):
+    print(f"=== Cold start on {session['serial']} ({session.get('model') or '?'}), {session['runs']} runs ===")
+    print(f"  {'activity':<8} {'metric':<10} {'p50':>7} {'p95':>7} {'p99':>7} {'mean':>7} {'stdev':>7} {'var':>9}")
+    for name, act in session["activities"].items():
+        for metric in METRICS:
+            s = act["summary"][metric]
+            if not s.get("n"):
+                print(f"  {name:<8} {metric:<10} {'n/a':>7}")
+                continue
+            print(f"  {name:<8} {metric:<10} {s['p50']:>7.0f} {s['p95']:>7.0f} {s['p99']:>7.0f} "
+                  f"{s['mean']:>7.0f} {s['stdev']:>7.1f} {s['variance']:>9.1f}")
+
+
+def run_session(client: AdbClient, serial: str, activities: list, runs: int, warmup: int) -> dict:
+    filters = [LogFilter("displayed", tags=["ActivityTaskManager", "ActivityManager"], pattern=r"^Displayed ")]
+    session = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "serial": serial, "runs": runs, "warmup": warmup,
+               "model": client.shell(serial, "getprop ro.product.model").strip(),
+               "sdk": client.shell(serial, "getprop ro.build.version.sdk").strip(), "activities": {}}
+    with LogcatMonitor(client, serial, filters, tail=1) as mon:
+        for name in activities:
+            print(f"[INFO] {name}: {warmup} warm-up + {runs} cold starts ...")
+            session["activities"][name] = measure(client, serial, mon, ACTIVITIES[name], runs, warmup)
+    return session
+
+
+# -- 自我檢查 -----------------------------------------------------------------
+
+def selfcheck() -> bool:
+    """解析器、統計、比較與 run_session（對 FakeAdbServer 替身）的斷言檢查。"""
+    from fake_adb_server import FakeAdbServer
+
+    check = Checks("STARTUP")
+    main_cmp = ACTIVITIES["main"].split()[0]
+
+    # 1. am start -W：正常輸出、元件不存在（Error type 3 本身不是錯誤訊息）、Permission Denial
+    ok = parse_am_start(f"Starting: Intent {{ cmp={main_cmp} }}\nStatus: ok\nLaunchState: COLD\n"
+                        f"Activity: {main_cmp}\nTotalTime: 412\nWaitTime: 420\nComplete\n")
+    check(ok == {"status": "ok", "launch_state": "COLD", "total": 412, "wait": 420, "error": None},
+          f"parse_am_start(ok) -> {ok}")
+    missing = parse_am_start("Starting: Intent { cmp=x/.A }\nError type 3\n"
+                             "Error: Activity class {x/x.A} does not exist.\n")
+    check(missing["error"] == "Error: Activity class {x/x.A} does not exist." and missing["total"] is None,
+          f"parse_am_start(Error type 3) -> {missing}")
+    denied = parse_am_start("Starting: Intent { cmp=x/.D }\nSecurity exception: Permission Denial: starting Intent "
+                            "{ cmp=x/.D } from null (pid=1, uid=2000) not exported from uid 10123\n")
+    check(denied["error"] is not None and "Permission Denial" in denied["error"],
+          f"parse_am_start(Permission Denial) -> {denied}")
+
+    # 2. Displayed 紀錄：ms、s+ms、for user N；其他訊息不符合
+    for message, expect in ((f"Displayed {main_cmp}: +812ms", (main_cmp, 812)),
+                            (f"Displayed {main_cmp}: +1s234ms", (main_cmp, 1234)),
+                            (f"Displayed {main_cmp} for user 0: +2s5ms (total +3s)", (main_cmp, 2005)),
+                            ("Displaying something else", None)):
+        got = parse_displayed(message)
+        check(got == expect, f"parse_displayed({message!r}) -> {got}, expected {expect}")
+
+    # 3. 百分位數（線性內插）與摘要；None 不計入，空清單 n=0
+    values = [float(v) for v in range(1, 11)]
+    for q, expect in ((0.0, 1.0), (0.5, 5.5), (0.95, 9.55), (1.0, 10.0)):
+        got = percentile(values, q)
+        check(abs(got - expect) < 1e-9, f"percentile(1..10, {q}) -> {got}, expected {expect}")
+    check(percentile([], 0.5) is None and percentile([7], 0.95) == 7, "percentile edge cases")
+    s = summarize([3, None, 1, 2])
+    check(s["n"] == 3 and s["min"] == 1 and s["max"] == 3 and s["p50"] == 2 and s["mean"] == 2
+          and s["variance"] == 1.0 and s["stdev"] == 1.0, f"summarize([3, None, 1, 2]) -> {s}")
+    check(summarize([None]) == {"n": 0} and summarize([5])["stdev"] == 0.0, "summarize edge cases")
+
+    # 4. compare：只有超過門檻的 p50/p95 算退步；新 session 多出的 activity 略過
+    def sess(**totals):
+        return {"activities": {n: {"summary": {"total": {"p50": p50, "p95": p95}}} for n, (p50, p95) in totals.items()}}
+
+    regs = compare(sess(main=(400, 500)), sess(main=(430, 600), detail=(900, 990)), 0.10)
+    check([(r["activity"], r["metric"], r["ratio"]) for r in regs] == [("main", "total.p95", 1.2)],
+          f"compare -> {regs}")
+    check(compare(sess(main=(400, 500)), sess(main=(440, 550)), 0.10) == [], "compare flagged a change at the threshold")
+
+    # 5. run_session 對替身：每個 activity 各 runs 筆樣本（暖身不計）、全為 COLD，Displayed 與 TotalTime 一致
+    with FakeAdbServer(devices={"emulator-5554": "device"}) as server:
+        server.install_package("emulator-5554", PACKAGE, {"base.apk": b"PK"})
+        server.launch_ms.update({".MainActivity": 400, ".MailboxDetailActivity": 250})
+        client = AdbClient(port=server.port)
+        session = run_session(client, "emulator-5554", ["main", "detail"], runs=5, warmup=2)
+        starts = sum(1 for r in server.requests if "am start" in r)
+        check(starts == 2 * (5 + 2), f"expected {2 * 7} am start calls, saw {starts}")
+        for name, act in session["activities"].items():
+            samples = act["samples"]
+            check(all(len(samples[m]) == 5 for m in METRICS), f"{name}: sample counts {[len(v) for v in samples.values()]}")
+            check(act["launch_states"] == ["COLD"], f"{name}: launch states {act['launch_states']}")
+            check(samples["displayed"] == samples["total"], f"{name}: Displayed {samples['displayed']} "
+                  f"!= TotalTime {samples['total']}")
+            check(act["summary"]["total"]["n"] == 5, f"{name}: summary n={act['summary']['total']['n']}")
+        mean = {n: a["summary"]["total"]["mean"] for n, a in session["activities"].items()}
+        check(mean["detail"] < mean["main"], f"launch_ms not reflected in TotalTime: {mean}")
+
+        # 6. 套件未安裝：am start 回 Error type 3，run_session 拋出 StartupError
+        server.packages["emulator-5554"].pop(PACKAGE)
+        try:
+            run_session(client, "emulator-5554", ["main"], runs=1, warmup=0)
+            check(False, "run_session did not raise for a missing package")
+        except StartupError as e:
+            check("does not exist" in str(e), f"unexpected StartupError message: {e}")
+
+    return check.done("startup_bench selfcheck: parsers, stats, compare, run_session against the fake adb server")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start latency with am start -W and logcat")
+    parser.add_argument("--aab", help="AAB whose build is installed on the device (results are keyed by its hash)")
+    parser.add_argument("--serial", help="Device serial (default: the only ready device)")
+    parser.add_argument("--runs", type=int, default=20, help="Measured launches per activity (default: 20)")
+    parser.add_argument("--warmup", type=int, default=1, help="Launches discarded before measuring (default: 1)")
+    parser.add_argument("--activity", nargs="+", choices=sorted(ACTIVITIES), default=["main"],
+                        help="Activities to launch (default: main)")
+    parser.add_argument("--compare", help="Baseline build: AAB path or SHA-256 prefix of stored results")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed TotalTime p50/p95 slowdown (default: 0.10)")
+    parser.add_argument("--list", action="store_true", help="List stored results and exit")
+    parser.add_argument("--selfcheck", action="store_true", help="Check parsers, stats and run_session against a fake adb server")
+    args = parser.parse_args()
+
+    if args.selfcheck:
+        sys.exit(0 if selfcheck() else 1)
+
+    store = StartupResults()
+    if args.list:
+        for data in store.all():
+            for s in data["sessions"]:
+                totals = ", ".join(f"{n} p50={a['summary']['total'].get('p50')}ms"
+                                   for n, a in s["activities"].items())
+                print(f"{data['aab_sha256'][:12]}  {data.get('aab', '?'):<28} {s['timestamp']}  {s['serial']}  {totals}")
+        return
+    if not args.aab or not Path(args.aab).is_file():
+        print(f"<AAB_NOT_FOUND> {args.aab or '(--aab not given)'}")
+        sys.exit(1)
+
+    client = AdbClient()
+    serials = client.ready_serials() if client.ensure_server() else []
+    serial = args.serial or (serials[0] if len(serials) == 1 else None)
+    if serial not in serials:
+        print(f"<NO_DEVICE> ready devices: {', '.join(serials) or 'none'}; use --serial")
+        sys.exit(1)
+    try:
+        session = run_session(client, serial, args.activity, args.runs, args.warmup)
+    except StartupError as e:
+        print(f"<AM_START_FAILED> {e}")
+        if "Permission Denial" in str(e) or "not exported" in str(e):
+            print("[INFO] MailboxDetailActivity is not exported; run `adb root` on an emulator image first.")
+        sys.exit(1)
+    except (OSError, AdbError) as e:
+        print(f"<ADB_FAILED> {e}")
+        sys.exit(1)
+
+    sha = sha256_file(args.aab)
+    # 先讀基準再存這一輪：--compare 指到同一個 AAB（同一個 hash）時，基準才會是上一輪而不是剛量的這一輪
+    old_sha = store.resolve(args.compare) if args.compare else None
+    old = store.load(old_sha)["sessions"] if old_sha else []
+    path = store.add_session(sha, Path(args.aab).name, session)
+    print_session(session)
+    print(f"[OK] Stored under {sha[:12]} ({path})")
+
+    if args.compare:
+        if not old:
+            print(f"[WARN] No stored results for {args.compare}; nothing to compare.")
+            return
+        regressions = compare(old[-1], session, args.threshold)
+        for r in regressions:
+            print(f"[REGRESSION] {r['activity']} {r['metric']} {r['new']:.0f}ms vs {r['old']:.0f}ms (x{r['ratio']})")
+        if regressions:
+            sys.exit(1)
+        print(f"[OK] No startup regression vs {old_sha[:12]} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    with run_metrics.session('startup_bench'):
+        main()
@@ -1,9 +1,19 @@
 import os
-import subprocess
+import time
+import argparse
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
 
+from adb_client import PLATFORM_TOOLS_ADB, AdbClient, AdbError
+import apks_cache
+import archive_size
+import install_fastpath
+from apk_signing import keystore_fingerprints, primary_cert, read_archive_signers
+import run_metrics
+from release_pipeline import Pipeline, Stage, StageFailed
+
 project_path = r"F:\homeletter2.0android251006\homeletterAPP"
 
 
@@ -11,7 +21,7 @@ def run_cmd(cmd_str: str):
     try:
         print(f"[RUN] {cmd_str}")
         # Use shell=True on Windows to avoid quoting issues with absolute/relative paths
-        result = subprocess.run(cmd_str, cwd=project_path, shell=True, capture_output=True, text=True)
+        result = run_metrics.run(cmd_str, cwd=project_path, shell=True)
         print(result.stdout)
         if result.stderr:
             print(result.stderr)
@@ -24,7 +34,8 @@ def run_cmd(cmd_str: str):
 def run_cmd_masked(cmd_str: str, masked_display: str):
     try:
         print(f"[RUN] {masked_display}")
-        result = subprocess.run(cmd_str, cwd=project_path, shell=True, capture_output=True, text=True)
+        # 記錄用的標籤取自遮罩後的顯示字串，密碼不會寫進報告
+        result = run_metrics.run(cmd_str, cwd=project_path, shell=True, label=run_metrics.default_label(masked_display))
         print(result.stdout)
         if result.stderr:
             print(result.stderr)
@@ -57,177 +68,347 @@ def read_gradle_properties():
     return props
 
 
-def main():
-    aab_path = Path(project_path) / r"app\build\outputs\bundle\prodRelease\app-prod-release.aab"
-    apks_path = Path(project_path) / "app-prod.apks"
-    bundletool_jar = find_bundletool()
+def parse_keytool_fingerprints(out: str):
+    # keytool output varies slightly by locale; only used when the native reader cannot handle the input
+    sha256_match = re.search(r"SHA[- ]?256(?:\s*):\s*([A-F0-9:]+)", out or "", re.IGNORECASE)
+    md5_match = re.search(r"MD5(?:\s*):\s*([A-F0-9:]+)", out or "", re.IGNORECASE)
+    return (sha256_match.group(1) if sha256_match else None), (md5_match.group(1) if md5_match else None)
+
+
+def read_keystore_fingerprint(ks_path, ks_alias: str, ks_pass: str):
+    """原生讀取 keystore；格式不支援時退回 keytool。回傳 {"sha256", "md5"} 或 None。"""
+    try:
+        ks_cert = keystore_fingerprints(ks_path, ks_alias, ks_pass)
+    except Exception as e:
+        print(f"[native_keystore_read_failed] {e}")
+        ks_cert = None
+    if ks_cert:
+        return {"sha256": ks_cert["sha256"], "md5": ks_cert["md5"]}
+    list_cmd = f"keytool -list -v -keystore \"{ks_path}\" -alias \"{ks_alias}\" -storepass \"{ks_pass}\""
+    masked_list_display = f"keytool -list -v -keystore \"{ks_path}\" -alias \"{ks_alias}\" -storepass \"****\""
+    code, out, err = run_cmd_masked(list_cmd, masked_list_display)
+    if code == 0 and out:
+        sha256, md5 = parse_keytool_fingerprints(out)
+        if sha256:
+            return {"sha256": sha256, "md5": md5}
+    return None
 
-    print("=== Verify Inputs ===")
-    print(f"AAB: {aab_path}")
-    print(f"APKS: {apks_path}")
-    print(f"bundletool: {bundletool_jar}")
 
-    if not aab_path.exists():
-        print("<AAB_NOT_FOUND>")
-        return
-    if not bundletool_jar:
-        print("<BUNDLETOOL_JAR_NOT_FOUND> Please place bundletool-all.jar in project root.")
-        return
+def install_on_device(install_cmd_base: str, serial: str) -> dict:
+    # 各 worker 自行擷取輸出，結束後再整段印出，避免多台裝置的輸出交錯
+    cmd = f"{install_cmd_base} --device-id=\"{serial}\""
+    start = time.monotonic()
+    try:
+        result = run_metrics.run(cmd, cwd=project_path, shell=True, label="bundletool install-apks")
+        code, out, err = result.returncode, result.stdout, result.stderr
+    except Exception as e:
+        code, out, err = 1, "", str(e)
+    return {"serial": serial, "ok": code == 0, "seconds": time.monotonic() - start, "cmd": cmd, "out": out, "err": err}
 
-    # Report AAB size
-    aab_size_mb = os.path.getsize(aab_path) / (1024 * 1024)
-    print(f"AAB size: {aab_size_mb:.2f} MB")
 
-    # Read signing config
+def install_on_devices(install_cmd_base: str, serials: list, max_parallel: int) -> list:
+    print(f"[INFO] Installing on {len(serials)} device(s), up to {max_parallel} in parallel...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(serials)))) as pool:
+        results = list(pool.map(lambda s: install_on_device(install_cmd_base, s), serials))
+    for r in results:
+        print(f"[RUN] {r['cmd']}")
+        if r["out"]:
+            print(r["out"])
+        if r["err"]:
+            print(r["err"])
+    return results
+
+
+def aggregate_install_result(results: list) -> str:
+    ok = sum(1 for r in results if r["ok"])
+    if ok == len(results):
+        return "SUCCESS"
+    return "PARTIAL" if ok else "FAILED"
+
+
+def resolve_config(aab=None, apks=None) -> dict:
+    """Inputs shared by the stages: paths, signing properties and keystore location."""
+    aab_path = Path(aab) if aab else Path(project_path) / r"app\build\outputs\bundle\prodRelease\app-prod-release.aab"
+    apks_path = Path(apks) if apks else Path(project_path) / "app-prod.apks"
+    bundletool_jar = find_bundletool()
     props = read_gradle_properties()
     ks = props.get("RELEASE_STORE_FILE")
-    ks_alias = props.get("RELEASE_KEY_ALIAS")
     ks_pass = props.get("RELEASE_STORE_PASSWORD")
-    key_pass = props.get("RELEASE_KEY_PASSWORD", ks_pass)
 
     # Resolve keystore path relative to project if necessary and check existence
     ks_path = None
-    ks_exists = False
     if ks:
         ks_path = Path(ks)
         if not ks_path.is_absolute():
             ks_path = Path(project_path) / ks_path
-        ks_exists = ks_path.exists()
-    if not ks_exists:
-        print("<RELEASE_KEYSTORE_NOT_FOUND> 需使用 Release keystore 進行簽署，上傳前請提供正確 keystore、alias 與密碼。")
 
     # Prefer relative path to the project root for the JAR to avoid path quirks
     bundletool_rel = bundletool_jar
-    try:
-        bundletool_rel = os.path.relpath(bundletool_jar, project_path)
-    except Exception:
-        pass
-
-    # Sanity check the jar accessibility
-    sanity_cmd = f"java -jar \"{bundletool_rel}\" help"
-    scode, sout, serr = run_cmd(sanity_cmd)
-    if scode != 0:
-        print("<BUNDLETOOL_JAR_ACCESS_FAILED>")
-        return
-
-    # Build APKS (signed) with universal mode
+    if bundletool_jar:
+        try:
+            bundletool_rel = os.path.relpath(bundletool_jar, project_path)
+        except Exception:
+            pass
+
+    return {
+        "aab_path": aab_path,
+        "apks_path": apks_path,
+        "bundletool_jar": bundletool_jar,
+        "bundletool_rel": bundletool_rel,
+        "props": props,
+        "ks_path": ks_path,
+        "ks_exists": bool(ks_path and ks_path.exists()),
+        "ks_alias": props.get("RELEASE_KEY_ALIAS"),
+        "ks_pass": ks_pass,
+        "key_pass": props.get("RELEASE_KEY_PASSWORD", ks_pass),
+    }
+
+
+def build_stages(cfg: dict, all_devices: bool = False, max_parallel: int = 4, after=()) -> list:
+    """Verification stages; `after` names stages (e.g. the Gradle build) that must finish before the AAB is read.
+
+    keystore_fingerprint, device_probe and bundletool_check do not touch the AAB and run alongside the build.
+    """
+    aab_path, apks_path = cfg["aab_path"], cfg["apks_path"]
+    bundletool_jar, bundletool_rel = cfg["bundletool_jar"], cfg["bundletool_rel"]
+    ks_path, ks_exists, ks_alias = cfg["ks_path"], cfg["ks_exists"], cfg["ks_alias"]
+    ks_pass, key_pass = cfg["ks_pass"], cfg["key_pass"]
     signing_mode_release = bool(ks_exists and ks_alias)
-    print(f"Signing mode: {'RELEASE' if signing_mode_release else 'LOCAL_TESTING (debug)'}")
-    build_cmd = (
-        f"java -jar \"{bundletool_rel}\" build-apks "
-        f"--bundle=\"{aab_path}\" --output=\"{apks_path}\" --mode=universal --overwrite "
-        + (f"--ks=\"{ks_path}\" --ks-key-alias=\"{ks_alias}\" " if signing_mode_release else "--local-testing ")
-        + (f"--ks-pass=pass:{ks_pass} " if ks_exists and ks_pass else "")
-        + (f"--key-pass=pass:{key_pass} " if ks_exists and key_pass else "")
-    )
-    masked_build_display = (
-        f"java -jar \"{bundletool_rel}\" build-apks --bundle=\"{aab_path}\" --output=\"{apks_path}\" "
-        f"--mode=universal --overwrite "
-        + (f"--ks=\"{ks_path}\" --ks-key-alias=\"{ks_alias}\" " if signing_mode_release else "--local-testing ")
-        + ("--ks-pass=pass:**** " if ks_exists and ks_pass else "")
-        + ("--key-pass=pass:**** " if ks_exists and key_pass else "")
-    )
-    code, out, err = run_cmd_masked(build_cmd, masked_build_display)
-    if code != 0 or not apks_path.exists():
-        print("<BUILD_APKS_FAILED>")
-        # If signing mismatch or failure, hint to use debug bundle
-        print("Hint: Try ':app:bundleProdDebug' and local testing if signing fails.")
-        return
-
-    print("=== APKS Generated ===")
-    print(str(apks_path))
-    if not signing_mode_release:
-        print("[WARN] 目前使用 debug/local-testing 簽署，僅供本機測試，不可上傳 Play Console。")
-
-    # Check ADB devices and install APKS to connected device if available
-    adb_ok = False
-    use_platform_tools_path = False
-    # Try starting ADB server via PATH or fallback
-    run_cmd("adb start-server")
-    run_cmd("\"C:\\platform-tools\\adb.exe\" start-server")
-
-    # Prefer PATH if available, otherwise fallback to explicit platform-tools path
-    adb_in_path = shutil.which("adb") is not None
-    adb_checks = []
-    if adb_in_path:
-        adb_checks.append("adb devices")
-    adb_checks.append("\"C:\\platform-tools\\adb.exe\" devices")
-
-    for adb_cmd in adb_checks:
-        code, out, err = run_cmd(adb_cmd)
-        if code == 0 and out:
-            device_lines = [ln for ln in out.splitlines() if ln.strip().endswith("\tdevice")]
-            if device_lines:
-                adb_ok = True
-                use_platform_tools_path = ("platform-tools\\adb.exe" in adb_cmd)
-                break
-
-    if not adb_ok:
-        print("<NO_ADB_DEVICE> Skipping install-apks.")
-        install_result = "SKIPPED"
-    else:
-        # Ensure bundletool can find adb: inject platform-tools into PATH for this command if needed
-        prefix = "set PATH=C:\\platform-tools;%PATH% && " if use_platform_tools_path and not adb_in_path else ""
-        install_cmd = prefix + f"java -jar \"{bundletool_rel}\" install-apks --apks=\"{apks_path}\""
-        code, out, err = run_cmd(install_cmd)
-        install_result = "SUCCESS" if code == 0 else "FAILED"
-    print(f"Install result: {install_result}")
-
-    # Print signing info from AAB
-    print("=== Signing (keytool -printcert -jarfile) ===")
-    keytool_cmd = f"keytool -printcert -jarfile \"{aab_path}\""
-    code, out, err = run_cmd(keytool_cmd)
-    aab_sha256 = None
-    aab_md5 = None
-    if out:
-        # Try to parse SHA-256 and MD5 fingerprints (keytool output varies slightly by locale)
-        sha256_match = re.search(r"SHA[- ]?256(?:\s*):\s*([A-F0-9:]+)", out, re.IGNORECASE)
-        md5_match = re.search(r"MD5(?:\s*):\s*([A-F0-9:]+)", out, re.IGNORECASE)
-        aab_sha256 = sha256_match.group(1) if sha256_match else None
-        aab_md5 = md5_match.group(1) if md5_match else None
+
+    def inputs(_):
+        print("=== Verify Inputs ===")
+        print(f"AAB: {aab_path}")
+        print(f"APKS: {apks_path}")
+        print(f"bundletool: {bundletool_jar}")
+        if not aab_path.exists():
+            raise StageFailed("<AAB_NOT_FOUND>")
+        if not ks_exists:
+            print("<RELEASE_KEYSTORE_NOT_FOUND> 需使用 Release keystore 進行簽署，上傳前請提供正確 keystore、alias 與密碼。")
+        return str(aab_path)
+
+    def aab_size(_):
+        size_mb = os.path.getsize(aab_path) / (1024 * 1024)
+        print(f"AAB size: {size_mb:.2f} MB")
+        # 只讀 central directory：各模組/類別的壓縮前後大小，不解壓
+        entries = archive_size.read_archive(aab_path)
+        archive_size.print_breakdown(aab_path.name, entries, top=10, min_share=0.01)
+        baseline = cfg.get("size_baseline")
+        if baseline and Path(baseline).exists():
+            archive_size.print_diff(archive_size.diff(archive_size.read_archive(baseline), entries), top=10)
+        return size_mb
+
+    def bundletool_check(_):
+        if not bundletool_jar:
+            raise StageFailed("<BUNDLETOOL_JAR_NOT_FOUND>", "Please place bundletool-all.jar in project root.")
+        # Sanity check the jar accessibility（結果依 jar 與 java 執行檔快取，工具沒變就不再啟動 JVM）
+        # 回傳的版本字串同時是 .apks 快取鍵的一部分
+        code, out, _ = run_cmd(f"java -jar \"{bundletool_rel}\" version")
+        if code != 0:
+            raise StageFailed("<BUNDLETOOL_JAR_ACCESS_FAILED>")
+        return out.strip().splitlines()[-1] if out.strip() else "unknown"
+
+    def keystore_fingerprint(_):
+        # 指紋依 keystore 內容與 alias 快取（不含密碼）
+        if not (ks_exists and ks_alias and ks_pass):
+            return {}
+        ks_cert = read_keystore_fingerprint(ks_path, ks_alias, ks_pass) or {}
+        if ks_cert.get("sha256"):
+            print(f"Keystore SHA-256: {ks_cert['sha256']}")
+        if ks_cert.get("md5"):
+            print(f"Keystore MD5: {ks_cert['md5']}")
+        return ks_cert
+
+    def device_probe(_):
+        # Check ADB devices via the adb server socket protocol (no adb.exe spawn per check)
+        adb_in_path = shutil.which("adb") is not None
+        serials = []
+        client = AdbClient()
+        if client.ensure_server():
+            try:
+                serials = client.ready_serials()
+            except (OSError, AdbError) as e:
+                print(f"[ADB_QUERY_FAILED] {e}")
+        if serials:
+            print("ADB devices: " + ", ".join(serials))
+        # bundletool 需要 adb 執行檔：不在 PATH 時改用 C:\platform-tools
+        return {"serials": serials, "use_platform_tools_path": not adb_in_path and PLATFORM_TOOLS_ADB.exists()}
+
+    def build_apks(deps):
+        # Build APKS (signed) with universal mode
+        print(f"Signing mode: {'RELEASE' if signing_mode_release else 'LOCAL_TESTING (debug)'}")
+        # 相同 AAB + 簽署身分 + bundletool 版本已建過：直接取回，不啟動 JVM
+        cache_key = None
+        if cfg.get("apks_cache", True):
+            identity = apks_cache.signing_identity(signing_mode_release, ks_path, ks_alias,
+                                                   deps["keystore_fingerprint"].get("sha256"))
+            if identity:
+                aab_sha256 = apks_cache.sha256_file(aab_path)
+                cache_key = apks_cache.ApksCache.key(aab_sha256, identity, deps["bundletool_check"])
+                if apks_cache.ApksCache().restore(cache_key, apks_path):
+                    print(f"[APKS_CACHE_HIT] {cache_key[:12]} (AAB {aab_sha256[:12]}, bundletool {deps['bundletool_check']})")
+                    print("=== APKS Generated ===")
+                    print(str(apks_path))
+                    return str(apks_path)
+        build_cmd = (
+            f"java -jar \"{bundletool_rel}\" build-apks "
+            f"--bundle=\"{aab_path}\" --output=\"{apks_path}\" --mode=universal --overwrite "
+            + (f"--ks=\"{ks_path}\" --ks-key-alias=\"{ks_alias}\" " if signing_mode_release else "--local-testing ")
+            + (f"--ks-pass=pass:{ks_pass} " if ks_exists and ks_pass else "")
+            + (f"--key-pass=pass:{key_pass} " if ks_exists and key_pass else "")
+        )
+        masked_build_display = (
+            f"java -jar \"{bundletool_rel}\" build-apks --bundle=\"{aab_path}\" --output=\"{apks_path}\" "
+            f"--mode=universal --overwrite "
+            + (f"--ks=\"{ks_path}\" --ks-key-alias=\"{ks_alias}\" " if signing_mode_release else "--local-testing ")
+            + ("--ks-pass=pass:**** " if ks_exists and ks_pass else "")
+            + ("--key-pass=pass:**** " if ks_exists and key_pass else "")
+        )
+        code, out, err = run_cmd_masked(build_cmd, masked_build_display)
+        if code != 0 or not apks_path.exists():
+            # If signing mismatch or failure, hint to use debug bundle
+            raise StageFailed("<BUILD_APKS_FAILED>", "\nHint: Try ':app:bundleProdDebug' and local testing if signing fails.")
+        print("=== APKS Generated ===")
+        print(str(apks_path))
+        if cache_key:
+            try:
+                apks_cache.ApksCache().store(cache_key, apks_path, {
+                    "aab": aab_path.name, "aab_sha256": aab_sha256, "bundletool": deps["bundletool_check"],
+                    "signing": "release" if signing_mode_release else "local-testing", "alias": ks_alias})
+            except OSError as e:
+                print(f"[WARN] APKS cache not updated: {e}")
+        if not signing_mode_release:
+            print("[WARN] 目前使用 debug/local-testing 簽署，僅供本機測試，不可上傳 Play Console。")
+        return str(apks_path)
+
+    def install(deps):
+        probe = deps["device_probe"]
+        serials = probe["serials"]
+        device_results = []
+        if not serials:
+            print("<NO_ADB_DEVICE> Skipping install-apks.")
+            install_result = "SKIPPED"
+        else:
+            # 裝置上已是同一個建置時略過；只有部分 split 不同時只推送那些 split（見 install_fastpath）
+            targets = serials if all_devices else serials[:1]
+            fast = {} if cfg.get("force_install") else install_fastpath.fast_install_all(targets, apks_path)
+            install_fastpath.print_results(fast)
+            device_results = [r for r in fast.values() if r["ok"]]
+            pending = [s for s in targets if not fast.get(s, {}).get("ok")]
+            # Ensure bundletool can find adb: inject platform-tools into PATH for this command if needed
+            prefix = "set PATH=C:\\platform-tools;%PATH% && " if probe["use_platform_tools_path"] else ""
+            install_cmd = prefix + f"java -jar \"{bundletool_rel}\" install-apks --apks=\"{apks_path}\""
+            if not pending:
+                install_result = "SUCCESS"
+            elif all_devices:
+                device_results += install_on_devices(install_cmd, pending, max_parallel)
+                install_result = aggregate_install_result(device_results)
+            else:
+                if len(serials) > 1:
+                    # 多台裝置時 bundletool 需要 --device-id，否則直接失敗；預設取第一台
+                    print(f"[INFO] {len(serials)} devices attached; installing on {serials[0]} (use --all-devices for all)")
+                    install_cmd += f" --device-id=\"{serials[0]}\""
+                code, out, err = run_cmd(install_cmd)
+                install_result = "SUCCESS" if code == 0 else "FAILED"
+        print(f"Install result: {install_result}")
+        return {"result": install_result,
+                "devices": [{"serial": r["serial"], "ok": r["ok"], "seconds": r["seconds"]} for r in device_results]}
+
+    def aab_signing(_):
+        # Print signing info from AAB（原生讀取 META-INF 簽章區塊，失敗才退回 keytool）
+        print("=== Signing (AAB certificate) ===")
+        try:
+            cert = primary_cert(read_archive_signers(aab_path))
+        except Exception as e:
+            print(f"[native_signing_read_failed] {e}")
+            cert = None
+        if cert:
+            print(f"Owner: {cert['subject']}")
+            aab_sha256, aab_md5 = cert["sha256"], cert["md5"]
+        else:
+            keytool_cmd = f"keytool -printcert -jarfile \"{aab_path}\""
+            code, out, err = run_cmd(keytool_cmd)
+            aab_sha256, aab_md5 = parse_keytool_fingerprints(out)
         if aab_sha256:
             print(f"Parsed AAB SHA-256: {aab_sha256}")
         if aab_md5:
             print(f"Parsed AAB MD5: {aab_md5}")
+        return {"sha256": aab_sha256, "md5": aab_md5} if aab_sha256 else {}
+
+    def signing_report(deps):
+        aab_sha256, aab_md5 = deps["aab_signing"].get("sha256"), deps["aab_signing"].get("md5")
+        expected_sha256 = deps["keystore_fingerprint"].get("sha256")
+        expected_md5 = deps["keystore_fingerprint"].get("md5")
+        match_sha256 = (aab_sha256 and expected_sha256 and aab_sha256.strip().upper() == expected_sha256.strip().upper())
+        match_md5 = (aab_md5 and expected_md5 and aab_md5.strip().upper() == expected_md5.strip().upper())
+        print(f"Fingerprint match (SHA-256): {'YES' if match_sha256 else 'NO' if aab_sha256 and expected_sha256 else 'UNKNOWN'}")
+        print(f"Fingerprint match (MD5): {'YES' if match_md5 else 'NO' if aab_md5 and expected_md5 else 'UNKNOWN'}")
+        upload_ready = bool(signing_mode_release and (match_sha256 or (aab_sha256 and expected_sha256)))
+        print(f"Upload readiness: {'YES' if upload_ready else 'NO'}")
+        # Surface RELEASE_* from gradle.properties for operator to compare
+        print("=== gradle.properties RELEASE_* ===")
+        for k, v in cfg["props"].items():
+            if k.startswith("RELEASE_"):
+                if "PASSWORD" in k:
+                    print(f"{k}=****")
+                else:
+                    print(f"{k}={v}")
+        return {"upload_ready": upload_ready}
+
+    after = list(after)
+    return [
+        Stage("inputs", inputs, deps=after),
+        Stage("aab_size", aab_size, deps=["inputs"]),
+        Stage("bundletool_check", bundletool_check,
+              cache=lambda _: ([bundletool_jar, shutil.which("java")], "version|" + os.environ.get("JAVA_HOME", ""))
+              if bundletool_jar else None),
+        Stage("keystore_fingerprint", keystore_fingerprint,
+              cache=(lambda _: ([ks_path], ks_alias)) if ks_exists else None),
+        Stage("device_probe", device_probe),
+        Stage("build_apks", build_apks, deps=["inputs", "bundletool_check", "keystore_fingerprint"]),
+        Stage("install", install, deps=["build_apks", "device_probe"]),
+        Stage("aab_signing", aab_signing, deps=["inputs"], cache=lambda _: ([aab_path], "")),
+        Stage("signing_report", signing_report, deps=["aab_signing", "keystore_fingerprint"]),
+    ]
 
-    # If keystore details exist, obtain expected fingerprint from keystore alias
-    expected_sha256 = None
-    expected_md5 = None
-    if ks_exists and ks_alias and ks_pass:
-        list_cmd = f"keytool -list -v -keystore \"{ks_path}\" -alias \"{ks_alias}\" -storepass \"{ks_pass}\""
-        masked_list_display = f"keytool -list -v -keystore \"{ks_path}\" -alias \"{ks_alias}\" -storepass \"****\""
-        code, out, err = run_cmd_masked(list_cmd, masked_list_display)
-        if code == 0 and out:
-            sha256_match = re.search(r"SHA[- ]?256(?:\s*):\s*([A-F0-9:]+)", out, re.IGNORECASE)
-            md5_match = re.search(r"MD5(?:\s*):\s*([A-F0-9:]+)", out, re.IGNORECASE)
-            expected_sha256 = sha256_match.group(1) if sha256_match else None
-            expected_md5 = md5_match.group(1) if md5_match else None
-            if expected_sha256:
-                print(f"Keystore SHA-256: {expected_sha256}")
-            if expected_md5:
-                print(f"Keystore MD5: {expected_md5}")
-
-    match_sha256 = (aab_sha256 and expected_sha256 and aab_sha256.strip().upper() == expected_sha256.strip().upper())
-    match_md5 = (aab_md5 and expected_md5 and aab_md5.strip().upper() == expected_md5.strip().upper())
-    print(f"Fingerprint match (SHA-256): {'YES' if match_sha256 else 'NO' if aab_sha256 and expected_sha256 else 'UNKNOWN'}")
-    print(f"Fingerprint match (MD5): {'YES' if match_md5 else 'NO' if aab_md5 and expected_md5 else 'UNKNOWN'}")
-    upload_ready = bool(signing_mode_release and (match_sha256 or (aab_sha256 and expected_sha256)))
-    print(f"Upload readiness: {'YES' if upload_ready else 'NO'}")
-    # Surface RELEASE_* from gradle.properties for operator to compare
-    print("=== gradle.properties RELEASE_* ===")
-    for k, v in props.items():
-        if k.startswith("RELEASE_"):
-            if "PASSWORD" in k:
-                print(f"{k}=****")
-            else:
-                print(f"{k}={v}")
 
+def print_verify_summary(cfg: dict, result):
     print("=== Summary ===")
-    print(f"AAB size: {aab_size_mb:.2f} MB")
-    print(f"APKS path: {apks_path}")
-    print(f"Install: {install_result}")
+    size_mb = result.value("aab_size")
+    print(f"AAB size: {size_mb:.2f} MB" if size_mb is not None else "AAB size: UNKNOWN")
+    print(f"APKS path: {result.value('build_apks') or 'NOT_BUILT'}")
+    install = result.value("install") or {"result": result["install"].status, "devices": []}
+    print(f"Install: {install['result']}")
+    for r in install["devices"]:
+        print(f"  - {r['serial']}: {'SUCCESS' if r['ok'] else 'FAILED'} ({r['seconds']:.1f}s)")
+    signing_mode_release = bool(cfg["ks_exists"] and cfg["ks_alias"])
+    upload_ready = (result.value("signing_report") or {}).get("upload_ready", False)
     print(f"Signing: {'RELEASE' if signing_mode_release else 'LOCAL_TESTING'} | Upload readiness: {'YES' if upload_ready else 'NO'}")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Build a universal APK set from the AAB, install it and check signing")
+    parser.add_argument("aab", nargs="?", help="AAB to verify (default: prodRelease output)")
+    parser.add_argument("--all-devices", action="store_true",
+                        help="Install on every ready device concurrently instead of the first one")
+    parser.add_argument("--max-parallel", type=int, default=4, help="Concurrent installs with --all-devices (default: 4)")
+    parser.add_argument("--size-baseline", help="Previous AAB to diff the size breakdown against")
+    parser.add_argument("--no-apks-cache", action="store_true", help="Always run build-apks instead of reusing a cached set")
+    parser.add_argument("--force-install", action="store_true",
+                        help="Always run install-apks even if the device already has this build")
+    args = parser.parse_args()
+
+    cfg = resolve_config(args.aab)
+    cfg["size_baseline"] = args.size_baseline
+    cfg["apks_cache"] = not args.no_apks_cache
+    cfg["force_install"] = args.force_install
+    pipeline = Pipeline(build_stages(cfg, args.all_devices, args.max_parallel))
+    result = pipeline.run()
+    result.print_summary()
+    print_verify_summary(cfg, result)
+    return 0 if result.ok else 1
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.session("verify_aab_with_bundletool"):
+        code = main()
+    raise SystemExit(code)